@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Batch-process many contests in parallel.
+
+Runs ingest, normalization, STV tabulation and precomputation for every
+contest in a manifest, one contest per worker process, writing each
+contest's database and outputs to ``<output-root>/<contest id>/``.
+
+Manifest (JSON; relative CVR paths are resolved against the manifest):
+
+    {
+      "defaults": {"seats": 3},
+      "contests": [
+        {"id": "2024_portland_district1", "cvr": "cvr/district1.csv"},
+        {"id": "2024_portland_district2", "cvr": "cvr/district2.csv", "seats": 3}
+      ]
+    }
+
+Per-worker limits: DuckDB threads and memory limit for every connection the
+worker opens, plus optional hard caps on CPU time and address space.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add src to path so we can import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from precompute_data import PrecomputeProcessor  # noqa: E402
+
+from analysis.stv_vectorized import VectorizedSTVTabulator  # noqa: E402
+from data.cvr_parser import CVRParser  # noqa: E402
+from data.database import CVRDatabase  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+STAGES = ("ingest", "normalize", "tabulate", "precompute")
+DEFAULT_OUTPUT_ROOT = Path(__file__).parent.parent / "data" / "elections"
+
+
+def load_manifest(manifest_path: Path) -> List[Dict[str, Any]]:
+    """Read a manifest and return one settings dict per contest."""
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    defaults = manifest.get("defaults", {})
+    contests = []
+    seen = set()
+    for entry in manifest.get("contests", []):
+        contest = {"seats": 3, **defaults, **entry}
+        if "id" not in contest or "cvr" not in contest:
+            raise ValueError(f"Contest entry needs 'id' and 'cvr': {entry}")
+        if contest["id"] in seen:
+            raise ValueError(f"Duplicate contest id: {contest['id']}")
+        seen.add(contest["id"])
+        if not isinstance(contest["seats"], int) or contest["seats"] < 1:
+            raise ValueError(f"Contest {contest['id']} needs a positive seat count")
+        cvr = Path(contest["cvr"])
+        contest["cvr"] = str(cvr if cvr.is_absolute() else manifest_path.parent / cvr)
+        contests.append(contest)
+    if not contests:
+        raise ValueError("Manifest lists no contests")
+    return contests
+
+
+def _limit_resources(cpu_seconds: Optional[int], address_space_gb: Optional[float]):
+    """Worker initializer: apply hard per-process limits where supported."""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - not available on Windows
+        logger.warning("Resource limits are not supported on this platform")
+        return
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+    if address_space_gb:
+        limit = int(address_space_gb * 1024**3)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _configure(db: CVRDatabase, threads: int, memory_limit: Optional[str]):
+    db.conn.execute(f"SET threads = {int(threads)}")
+    if memory_limit:
+        db.conn.execute(f"SET memory_limit = '{memory_limit}'")
+
+
+def process_contest(
+    contest: Dict[str, Any],
+    output_root: str,
+    stages: List[str],
+    threads: int = 1,
+    memory_limit: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run the requested stages for one contest.
+
+    Returns:
+        Report with per-stage timings, the winners and any error
+    """
+    contest_dir = Path(output_root) / contest["id"]
+    contest_dir.mkdir(parents=True, exist_ok=True)
+    db_path = contest_dir / "election.duckdb"
+    report = {
+        "id": contest["id"],
+        "cvr": contest["cvr"],
+        "db_path": str(db_path),
+        "status": "ok",
+        "timings": {},
+        "error": None,
+    }
+    start = time.time()
+
+    try:
+        if "ingest" in stages or "normalize" in stages:
+            with CVRParser(str(db_path), read_only=False) as parser:
+                _configure(parser.db, threads, memory_limit)
+                if "ingest" in stages:
+                    stage_start = time.time()
+                    load_stats = parser.load_cvr_file(contest["cvr"])
+                    parser.extract_candidate_metadata()
+                    report["ballots"] = int(load_stats.get("total_ballots", 0))
+                    report["timings"]["ingest"] = time.time() - stage_start
+                else:
+                    parser._loaded = True  # rcv_data already in the database
+                if "normalize" in stages:
+                    stage_start = time.time()
+                    parser.normalize_vote_data()
+                    parser.get_summary_statistics()  # creates the summary views
+                    report["timings"]["normalize"] = time.time() - stage_start
+
+        if "tabulate" in stages:
+            stage_start = time.time()
+            with CVRDatabase(str(db_path), read_only=True) as db:
+                _configure(db, threads, memory_limit)
+                tabulator = VectorizedSTVTabulator(
+                    db, seats=contest["seats"], rules=contest.get("rules")
+                )
+                tabulator.run_stv_tabulation()
+                results = {
+                    "seats": contest["seats"],
+                    "winners": tabulator.winners,
+                    "rounds": len(tabulator.rounds),
+                    "quota": tabulator.rounds[0].quota if tabulator.rounds else None,
+                }
+                tabulator.get_round_summary().to_csv(
+                    contest_dir / "stv_rounds.csv", index=False
+                )
+            with open(contest_dir / "stv_results.json", "w") as f:
+                json.dump(results, f, indent=2, default=str)
+            report["winners"] = results["winners"]
+            report["timings"]["tabulate"] = time.time() - stage_start
+
+        if "precompute" in stages:
+            stage_start = time.time()
+            processor = PrecomputeProcessor(
+                str(db_path), contest["id"], data_dir=contest_dir
+            )
+            _configure(processor.db, threads, memory_limit)
+            # One contest per worker; keep precompute stages in-process
+            processor.run_full_precomputation(max_workers=1)
+            report["timings"]["precompute"] = time.time() - stage_start
+
+    except Exception as e:
+        report["status"] = "failed"
+        report["error"] = f"{type(e).__name__}: {e}"
+        report["traceback"] = traceback.format_exc()
+        logger.error(f"Contest {contest['id']} failed: {e}")
+
+    report["total_seconds"] = time.time() - start
+    with open(contest_dir / "batch_timings.json", "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    return report
+
+
+def run_batch(
+    contests: List[Dict[str, Any]],
+    output_root: Path,
+    stages: List[str],
+    workers: int = 1,
+    threads: int = 1,
+    memory_limit: Optional[str] = None,
+    cpu_seconds: Optional[int] = None,
+    address_space_gb: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Process every contest in a worker pool and build the consolidated report."""
+    start = time.time()
+    output_root.mkdir(parents=True, exist_ok=True)
+    reports = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_limit_resources,
+        initargs=(cpu_seconds, address_space_gb),
+    ) as executor:
+        futures = {
+            executor.submit(
+                process_contest,
+                contest,
+                str(output_root),
+                stages,
+                threads,
+                memory_limit,
+            ): contest
+            for contest in contests
+        }
+        for future in as_completed(futures):
+            contest = futures[future]
+            try:
+                report = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed by a resource limit)
+                report = {
+                    "id": contest["id"],
+                    "cvr": contest["cvr"],
+                    "status": "failed",
+                    "timings": {},
+                    "error": f"Worker failed: {type(e).__name__}: {e}",
+                    "total_seconds": None,
+                }
+            logger.info(f"{report['id']}: {report['status']}")
+            reports.append(report)
+
+    order = {contest["id"]: i for i, contest in enumerate(contests)}
+    reports.sort(key=lambda r: order[r["id"]])
+    stage_totals = {
+        stage: sum(r["timings"].get(stage, 0.0) for r in reports) for stage in stages
+    }
+    return {
+        "generated": datetime.now().isoformat(),
+        "stages": stages,
+        "workers": workers,
+        "limits": {
+            "duckdb_threads": threads,
+            "duckdb_memory_limit": memory_limit,
+            "cpu_seconds": cpu_seconds,
+            "address_space_gb": address_space_gb,
+        },
+        "wall_seconds": time.time() - start,
+        "stage_seconds": stage_totals,
+        "succeeded": sum(r["status"] == "ok" for r in reports),
+        "failed": sum(r["status"] != "ok" for r in reports),
+        "contests": reports,
+    }
+
+
+def print_report(batch: Dict[str, Any]):
+    stages = batch["stages"]
+    header = f"{'contest':<32}" + "".join(f"{s:>12}" for s in stages)
+    print("\n=== Batch Timing Report ===")
+    print(header + f"{'total':>10}  status")
+    for report in batch["contests"]:
+        timings = "".join(
+            (
+                f"{report['timings'][s]:>11.2f}s"
+                if s in report["timings"]
+                else f"{'-':>12}"
+            )
+            for s in stages
+        )
+        total = report.get("total_seconds")
+        total = f"{total:>9.2f}s" if total is not None else f"{'-':>10}"
+        print(f"{report['id']:<32}{timings}{total}  {report['status']}")
+    totals = "".join(f"{batch['stage_seconds'][s]:>11.2f}s" for s in stages)
+    print(f"{'(sum)':<32}{totals}")
+    print(
+        f"\n✓ {batch['succeeded']} succeeded, {batch['failed']} failed in "
+        f"{batch['wall_seconds']:.1f}s wall time with {batch['workers']} worker(s)"
+    )
+    for report in batch["contests"]:
+        if report["error"]:
+            print(f"✗ {report['id']}: {report['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the processing pipeline for many contests in parallel"
+    )
+    parser.add_argument("manifest", help="JSON manifest of contests")
+    parser.add_argument(
+        "--output-root",
+        default=str(DEFAULT_OUTPUT_ROOT),
+        help="Directory for per-contest outputs (default: data/elections)",
+    )
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help=f"Comma-separated stages to run (default: {','.join(STAGES)})",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Contests processed in parallel"
+    )
+    parser.add_argument(
+        "--threads", type=int, default=1, help="DuckDB threads per worker"
+    )
+    parser.add_argument(
+        "--memory-limit", help="DuckDB memory limit per worker (e.g. 2GB)"
+    )
+    parser.add_argument(
+        "--cpu-seconds", type=int, help="Hard CPU time limit per worker process"
+    )
+    parser.add_argument(
+        "--max-memory-gb",
+        type=float,
+        help="Hard address-space limit per worker process",
+    )
+    parser.add_argument(
+        "--report", help="Report path (default: <output-root>/batch_report.json)"
+    )
+
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown or not stages:
+        logger.error(f"Unknown stages: {', '.join(sorted(unknown)) or '(none)'}")
+        sys.exit(1)
+    stages = [s for s in STAGES if s in stages]
+
+    try:
+        contests = load_manifest(Path(args.manifest))
+    except (OSError, ValueError) as e:
+        logger.error(f"Invalid manifest: {e}")
+        sys.exit(1)
+    missing = [c["id"] for c in contests if not Path(c["cvr"]).exists()]
+    if "ingest" in stages and missing:
+        logger.error(f"CVR files not found for: {', '.join(missing)}")
+        sys.exit(1)
+
+    output_root = Path(args.output_root)
+    logger.info(
+        f"=== Batch processing {len(contests)} contests ({', '.join(stages)}) "
+        f"with {args.workers} worker(s) ==="
+    )
+    batch = run_batch(
+        contests,
+        output_root,
+        stages,
+        workers=args.workers,
+        threads=args.threads,
+        memory_limit=args.memory_limit,
+        cpu_seconds=args.cpu_seconds,
+        address_space_gb=args.max_memory_gb,
+    )
+
+    report_path = (
+        Path(args.report) if args.report else output_root / "batch_report.json"
+    )
+    with open(report_path, "w") as f:
+        json.dump(batch, f, indent=2, default=str)
+
+    print_report(batch)
+    print(f"\n✓ Report written to: {report_path}")
+    sys.exit(1 if batch["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Cross-verify STV engines against each other.
+
+Counts every election at every requested seat count with each engine at the
+same time (one worker process per count, all reading one ballot snapshot per
+election) and reports every round where the engines disagree.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add src to path so we can import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from analysis.cross_verification import ENGINES, cross_verify  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_elections(values):
+    """``ID=PATH`` or ``PATH`` (ID taken from the file name) per --db."""
+    elections = {}
+    for value in values:
+        election_id, sep, path = value.partition("=")
+        if not sep:
+            election_id, path = Path(value).stem, value
+        if election_id in elections:
+            raise ValueError(f"Duplicate election id: {election_id}")
+        elections[election_id] = path
+    return elections
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tabulate elections with several STV engines and diff the results"
+    )
+    parser.add_argument(
+        "--db",
+        action="append",
+        required=True,
+        help="Election database as PATH or ID=PATH (repeat for several elections)",
+    )
+    parser.add_argument(
+        "--seats", default="3", help="Comma-separated seat counts (default: 3)"
+    )
+    parser.add_argument(
+        "--engines",
+        default="sql,pyrankvote",
+        help=f"Comma-separated engines, first is the reference "
+        f"(available: {', '.join(ENGINES)}; default: sql,pyrankvote)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1e-6,
+        help="Largest vote difference treated as equal (default: 1e-6)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: CPUs)"
+    )
+    parser.add_argument(
+        "--snapshot-dir", help="Keep ballot snapshots here instead of a temp dir"
+    )
+    parser.add_argument("--report", help="Write the JSON discrepancy report here")
+    parser.add_argument("--export", help="Export discrepancies to CSV")
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Exit non-zero on any discrepancy, not only on different winners",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        elections = parse_elections(args.db)
+        seats = [int(s) for s in args.seats.split(",") if s.strip()]
+    except ValueError as e:
+        logger.error(f"Invalid arguments: {e}")
+        sys.exit(1)
+    missing = [path for path in elections.values() if not Path(path).exists()]
+    if missing:
+        logger.error(f"Database files not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    logger.info(
+        f"=== Cross-verifying {', '.join(engines)} on {len(elections)} elections "
+        f"x {len(seats)} seat counts ==="
+    )
+    try:
+        report = cross_verify(
+            elections,
+            seats=seats,
+            engines=engines,
+            tolerance=args.tolerance,
+            max_workers=args.workers,
+            snapshot_dir=args.snapshot_dir,
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    print("\n=== Cross-Verification ===")
+    for case in report.cases:
+        status = "✓" if not case["discrepancies"] else "✗"
+        seconds = ", ".join(f"{e} {t:.2f}s" for e, t in case["seconds"].items())
+        print(
+            f"{status} {case['election_id']} ({case['seats']} seats): "
+            f"{case['discrepancies']} discrepancies [{seconds}]"
+        )
+        if len({tuple(sorted(w)) for w in case["winners"].values()}) > 1:
+            for engine, winners in case["winners"].items():
+                print(f"    {engine} winners: {winners}")
+
+    slowest = max(report.engine_seconds.values())
+    print(
+        f"\nWinners agree: {'yes' if report.winners_agree else 'NO'}; "
+        f"{len(report.discrepancies)} discrepancies (tolerance {args.tolerance:g})"
+    )
+    print(
+        f"Wall time {report.wall_seconds:.2f}s (slowest engine's counting time "
+        f"{slowest:.2f}s)"
+    )
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report.to_dict(), f, indent=2, default=str)
+        print(f"✓ Report written to: {args.report}")
+    if args.export:
+        report.discrepancies_to_dataframe().to_csv(args.export, index=False)
+        print(f"✓ Discrepancies exported to: {args.export}")
+
+    failed = not report.passed if args.strict else not report.winners_agree
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
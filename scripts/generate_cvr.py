@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic Cast Vote Record file for load and scale testing.
+
+The output has the same wide ``Choice_<id>_1:...`` layout as a real CVR export
+and can be fed straight to process_data.py, as CSV or as ``.parquet``.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add src to path so we can import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from data.synthetic import (  # noqa: E402
+    FORMATS,
+    SyntheticCVRGenerator,
+    SyntheticElectionConfig,
+)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    defaults = SyntheticElectionConfig()
+    parser = argparse.ArgumentParser(description="Generate a synthetic CVR file")
+    parser.add_argument("output", help="Output file (.csv or .parquet)")
+    parser.add_argument("--format", choices=FORMATS, help="Default: from extension")
+    parser.add_argument("--ballots", type=int, default=defaults.n_ballots)
+    parser.add_argument("--candidates", type=int, default=defaults.n_candidates)
+    parser.add_argument("--ranks", type=int, default=defaults.max_rank)
+    parser.add_argument("--seats", type=int, default=defaults.seats)
+    parser.add_argument("--blocs", type=int, default=defaults.n_blocs)
+    parser.add_argument(
+        "--cohesion",
+        type=float,
+        default=defaults.bloc_cohesion,
+        help="Weight multiplier for each bloc's favoured slate",
+    )
+    parser.add_argument("--slate-size", type=int, default=defaults.slate_size)
+    parser.add_argument(
+        "--continue-rate",
+        type=float,
+        default=defaults.continue_rate,
+        help="Chance a voter ranks one more candidate",
+    )
+    parser.add_argument("--skip-rate", type=float, default=defaults.skip_rate)
+    parser.add_argument("--overvote-rate", type=float, default=defaults.overvote_rate)
+    parser.add_argument("--precincts", type=int, default=defaults.n_precincts)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--summary", help="Write the generation summary as JSON")
+
+    args = parser.parse_args()
+
+    config = SyntheticElectionConfig(
+        n_ballots=args.ballots,
+        n_candidates=args.candidates,
+        max_rank=args.ranks,
+        seats=args.seats,
+        n_blocs=args.blocs,
+        bloc_cohesion=args.cohesion,
+        slate_size=args.slate_size,
+        continue_rate=args.continue_rate,
+        skip_rate=args.skip_rate,
+        overvote_rate=args.overvote_rate,
+        n_precincts=args.precincts,
+        seed=args.seed,
+    )
+    try:
+        generator = SyntheticCVRGenerator(config)
+        summary = generator.write(args.output, fmt=args.format)
+    except ValueError as e:
+        logger.error(f"Invalid configuration: {e}")
+        sys.exit(1)
+
+    rate = config.n_ballots / max(summary["elapsed_seconds"], 1e-9)
+    print(
+        f"✓ {config.n_ballots:,} ballots, {config.n_candidates} candidates x "
+        f"{config.max_rank} ranks -> {summary['path']} "
+        f"({summary['bytes'] / 1e6:.1f} MB, {rate:,.0f} ballots/s)"
+    )
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"✓ Summary written to: {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,13 +13,13 @@ Performance targets:
 """
 
 import argparse
-import json
 import logging
 import sys
 import time
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 # import pandas as pd  # Commented out - not used in this script
 
@@ -28,7 +28,19 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 # from analysis.candidate_metrics import CandidateMetrics  # noqa: E402 - Commented out unused
 # from analysis.coalition import CoalitionAnalyzer  # noqa: E402 - Commented out unused
+from analysis.precinct import PrecinctAnalyzer  # noqa: E402
+from analysis.slates import SlateMiner  # noqa: E402
 from data.database import CVRDatabase  # noqa: E402
+from data.pipeline import (  # noqa: E402
+    Pipeline,
+    Stage,
+    replace_table,
+    replace_table_from_df,
+    write_json,
+    write_parquet,
+)
+from data.snapshots import DATABASE_NAME, SnapshotStore  # noqa: E402
+from monitoring.stages import get_recorder, instrument, recording, stage  # noqa: E402
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -42,14 +54,21 @@ class PrecomputeProcessor:
     Designed to run as batch job to prepare data for fast API responses.
     """
 
-    def __init__(self, db_path: str, election_id: str = "2024_portland_district2"):
+    def __init__(
+        self,
+        db_path: str,
+        election_id: str = "2024_portland_district2",
+        data_dir: Optional[Path] = None,
+    ):
         self.db_path = db_path
         self.election_id = election_id
         self.db = CVRDatabase(db_path, read_only=False)  # Need write access
         self.start_time = time.time()
+        self.recorder = None  # stage metrics of the last full run
+        self.stage_results = {}  # pipeline outcome per stage of the last run
 
         # Create data directory structure
-        self.data_dir = (
+        self.data_dir = data_dir or (
             Path(__file__).parent.parent / "data" / "elections" / election_id
         )
         self.precomputed_dir = self.data_dir / "precomputed"
@@ -62,6 +81,7 @@ class PrecomputeProcessor:
         self.stats = {
             "start_time": datetime.now().isoformat(),
             "operations_completed": [],
+            "operations_skipped": [],
             "performance_improvements": {},
             "data_sizes": {},
             "error_count": 0,
@@ -77,7 +97,7 @@ class PrecomputeProcessor:
         missing_tables = []
 
         for table in required_tables:
-            if not self.db.table_exists(table):
+            if not self.db.table_exists(table, use_temporary_connection=False):
                 missing_tables.append(table)
 
         if missing_tables:
@@ -103,7 +123,10 @@ class PrecomputeProcessor:
 
         return True
 
-    def precompute_adjacent_pairs(self, min_shared_ballots: int = 10) -> Dict[str, Any]:
+    @instrument("precompute.adjacent_pairs", rows=lambda s: int(s["total_pairs"]))
+    def precompute_adjacent_pairs(
+        self, min_shared_ballots: int = 10, db: Optional[CVRDatabase] = None
+    ) -> Dict[str, Any]:
         """
         Precompute candidate pairwise relationships and coalition metrics.
         This replaces expensive real-time self-joins on ballots_long.
@@ -111,14 +134,11 @@ class PrecomputeProcessor:
         """
         logger.info("=== Precomputing Adjacent Pairs ===")
         operation_start = time.time()
+        db = db or self.db
 
         try:
-            # Drop existing table if it exists
-            self.db.conn.execute("DROP TABLE IF EXISTS adjacent_pairs")
-
-            # Create the precomputed adjacent pairs table with optimized data types
-            create_table_sql = """
-            CREATE TABLE adjacent_pairs AS
+            # Compact types: candidate IDs fit TINYINT, scores DECIMAL(6,4)
+            select_sql = """
             WITH pair_analysis AS (
                 SELECT
                     b1.candidate_id as candidate_1,
@@ -158,7 +178,8 @@ class PrecomputeProcessor:
                     COUNT(DISTINCT BallotID) as total_ballots
                 FROM ballots_long
                 GROUP BY candidate_id
-            )
+            ),
+            scored_pairs AS (
             SELECT
                 ps.*,
                 ct1.total_ballots as total_ballots_1,
@@ -188,13 +209,42 @@ class PrecomputeProcessor:
             FROM pair_summary ps
             JOIN candidate_totals ct1 ON ps.candidate_1 = ct1.candidate_id
             JOIN candidate_totals ct2 ON ps.candidate_2 = ct2.candidate_id
+            )
+            SELECT
+                CAST(candidate_1 AS TINYINT) as candidate_1,                    -- 36-125 range fits in TINYINT
+                CAST(candidate_1_name AS VARCHAR(30)) as candidate_1_name,      -- Max 27 chars observed
+                CAST(candidate_2 AS TINYINT) as candidate_2,                    -- 36-125 range fits in TINYINT
+                CAST(candidate_2_name AS VARCHAR(30)) as candidate_2_name,      -- Max 27 chars observed
+                CAST(shared_ballots AS INTEGER) as shared_ballots,              -- Max 18K fits in INTEGER
+                CAST(total_ballots_1 AS INTEGER) as total_ballots_1,            -- Max 33K fits in INTEGER
+                CAST(total_ballots_2 AS INTEGER) as total_ballots_2,            -- Max 33K fits in INTEGER
+                CAST(ROUND(avg_ranking_distance, 2) AS DECIMAL(4,2)) as avg_ranking_distance,  -- 0.00-5.00 range
+                CAST(min_ranking_distance AS TINYINT) as min_ranking_distance,  -- 0-5 range
+                CAST(max_ranking_distance AS TINYINT) as max_ranking_distance,  -- 0-5 range
+                CAST(strong_coalition_votes AS INTEGER) as strong_coalition_votes,
+                CAST(weak_coalition_votes AS INTEGER) as weak_coalition_votes,
+                CAST(ROUND(basic_affinity_score, 4) AS DECIMAL(6,4)) as basic_affinity_score,         -- 0.0000-1.0000 range
+                CAST(ROUND(proximity_weighted_affinity, 4) AS DECIMAL(6,4)) as proximity_weighted_affinity,
+                CAST(ROUND(coalition_strength_score, 4) AS DECIMAL(6,4)) as coalition_strength_score,  -- 0.0000-1.0000 range
+                CAST(coalition_type AS VARCHAR(10)) as coalition_type           -- Max 8 chars observed
+            FROM scored_pairs
             ORDER BY coalition_strength_score DESC
             """
 
             logger.info(
                 f"Computing pairwise relationships (min {min_shared_ballots} shared ballots)..."
             )
-            self.db.conn.execute(create_table_sql, [min_shared_ballots])
+            replace_table(
+                db,
+                "adjacent_pairs",
+                select_sql,
+                [min_shared_ballots],
+                indexes=[
+                    ("idx_adjacent_pairs_candidates", "candidate_1, candidate_2"),
+                    ("idx_adjacent_pairs_strength", "coalition_strength_score DESC"),
+                    ("idx_adjacent_pairs_shared", "shared_ballots DESC"),
+                ],
+            )
 
             # Get statistics
             stats_query = """
@@ -209,7 +259,7 @@ class PrecomputeProcessor:
             FROM adjacent_pairs
             """
 
-            stats = self.db.query(stats_query).iloc[0].to_dict()
+            stats = db.query(stats_query).iloc[0].to_dict()
 
             operation_time = time.time() - operation_start
             logger.info(
@@ -221,15 +271,14 @@ class PrecomputeProcessor:
             logger.info(f"  - Strategic coalitions: {stats['strategic_coalitions']}")
 
             # Save as Parquet for external analysis
-            pairs_df = self.db.query("SELECT * FROM adjacent_pairs")
+            pairs_df = db.query("SELECT * FROM adjacent_pairs")
             parquet_path = self.precomputed_dir / "adjacent_pairs.parquet"
-            pairs_df.to_parquet(parquet_path, index=False)
+            write_parquet(parquet_path, pairs_df)
             logger.info(f"✓ Saved to {parquet_path}")
 
             # Update performance stats
             self.stats["performance_improvements"]["adjacent_pairs"] = {
                 "operation_time_seconds": operation_time,
-                "expected_speedup": "10-100x",
                 "api_endpoints_affected": [
                     "/api/coalition/pairs/all",
                     "/api/coalition/network",
@@ -246,177 +295,21 @@ class PrecomputeProcessor:
             self.stats["error_count"] += 1
             raise
 
-    def optimize_data_types(self) -> Dict[str, Any]:
-        """
-        Optimize data types and apply dictionary encoding for memory efficiency.
-        Expected: 50-70% memory reduction, 30-50% faster I/O
-        """
-        logger.info("=== Optimizing Data Types & Dictionary Encoding ===")
-        operation_start = time.time()
-
-        optimizations = {}
-
-        try:
-            # Optimize adjacent_pairs table
-            logger.info("Optimizing adjacent_pairs table data types...")
-
-            # Create optimized adjacent_pairs table
-            optimize_pairs_sql = """
-            CREATE OR REPLACE TABLE adjacent_pairs_optimized AS
-            SELECT
-                CAST(candidate_1 AS TINYINT) as candidate_1,                    -- 36-125 range fits in TINYINT
-                CAST(candidate_1_name AS VARCHAR(30)) as candidate_1_name,      -- Max 27 chars observed
-                CAST(candidate_2 AS TINYINT) as candidate_2,                    -- 36-125 range fits in TINYINT
-                CAST(candidate_2_name AS VARCHAR(30)) as candidate_2_name,      -- Max 27 chars observed
-                CAST(shared_ballots AS INTEGER) as shared_ballots,              -- Max 18K fits in INTEGER
-                CAST(total_ballots_1 AS INTEGER) as total_ballots_1,            -- Max 33K fits in INTEGER
-                CAST(total_ballots_2 AS INTEGER) as total_ballots_2,            -- Max 33K fits in INTEGER
-                CAST(ROUND(avg_ranking_distance, 2) AS DECIMAL(4,2)) as avg_ranking_distance,  -- 0.00-5.00 range
-                CAST(min_ranking_distance AS TINYINT) as min_ranking_distance,  -- 0-5 range
-                CAST(max_ranking_distance AS TINYINT) as max_ranking_distance,  -- 0-5 range
-                CAST(strong_coalition_votes AS INTEGER) as strong_coalition_votes,
-                CAST(weak_coalition_votes AS INTEGER) as weak_coalition_votes,
-                CAST(ROUND(basic_affinity_score, 4) AS DECIMAL(6,4)) as basic_affinity_score,         -- 0.0000-1.0000 range
-                CAST(ROUND(proximity_weighted_affinity, 4) AS DECIMAL(6,4)) as proximity_weighted_affinity,
-                CAST(ROUND(coalition_strength_score, 4) AS DECIMAL(6,4)) as coalition_strength_score,  -- 0.0000-1.0000 range
-                CAST(coalition_type AS VARCHAR(10)) as coalition_type           -- Max 8 chars observed
-            FROM adjacent_pairs
-            """
-
-            self.db.conn.execute(optimize_pairs_sql)
-
-            # Replace original with optimized version
-            self.db.conn.execute("DROP TABLE adjacent_pairs")
-            self.db.conn.execute(
-                "ALTER TABLE adjacent_pairs_optimized RENAME TO adjacent_pairs"
-            )
-
-            # Get size comparison
-            optimized_size = self.db.query(
-                "SELECT COUNT(*) * 64 as estimated_bytes FROM adjacent_pairs"
-            )["estimated_bytes"].iloc[0]
-            optimizations["adjacent_pairs"] = {
-                "optimized_estimated_bytes": optimized_size,
-                "optimization_applied": True,
-            }
-
-            # Optimize candidate_metrics table
-            logger.info("Optimizing candidate_metrics table data types...")
-
-            optimize_metrics_sql = """
-            CREATE OR REPLACE TABLE candidate_metrics_optimized AS
-            SELECT
-                CAST(candidate_id AS TINYINT) as candidate_id,                  -- 36-125 range
-                CAST(candidate_name AS VARCHAR(30)) as candidate_name,          -- Max 27 chars
-                CAST(total_ballots AS INTEGER) as total_ballots,                -- Max 33K
-                CAST(first_choice_votes AS INTEGER) as first_choice_votes,      -- Max 33K
-                CAST(weighted_score AS INTEGER) as weighted_score,              -- Integer points
-                CAST(ROUND(avg_rank_position, 2) AS DECIMAL(4,2)) as avg_rank_position,
-                CAST(total_connections AS TINYINT) as total_connections,        -- Max ~25 candidates
-                CAST(ROUND(avg_coalition_strength, 4) AS DECIMAL(6,4)) as avg_coalition_strength,
-                CAST(ROUND(total_coalition_strength, 4) AS DECIMAL(8,4)) as total_coalition_strength,
-                CAST(strong_connections AS TINYINT) as strong_connections,      -- Max ~25
-                CAST(ROUND(degree_centrality, 4) AS DECIMAL(6,4)) as degree_centrality,
-                CAST(ROUND(strength_centrality, 4) AS DECIMAL(8,4)) as strength_centrality,
-                CAST(position_type AS VARCHAR(15)) as position_type,            -- Max 11 chars observed
-                CAST(ROUND(first_choice_percentage, 2) AS DECIMAL(5,2)) as first_choice_percentage
-            FROM candidate_metrics
-            """
-
-            self.db.conn.execute(optimize_metrics_sql)
-
-            # Replace original with optimized version
-            self.db.conn.execute("DROP TABLE candidate_metrics")
-            self.db.conn.execute(
-                "ALTER TABLE candidate_metrics_optimized RENAME TO candidate_metrics"
-            )
-
-            optimized_metrics_size = self.db.query(
-                "SELECT COUNT(*) * 32 as estimated_bytes FROM candidate_metrics"
-            )["estimated_bytes"].iloc[0]
-            optimizations["candidate_metrics"] = {
-                "optimized_estimated_bytes": optimized_metrics_size,
-                "optimization_applied": True,
-            }
-
-            # Create indexes for optimized tables
-            logger.info("Creating optimized indexes...")
-
-            # Indexes for adjacent_pairs (most queried table)
-            self.db.conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_adjacent_pairs_candidates ON adjacent_pairs(candidate_1, candidate_2)"
-            )
-            self.db.conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_adjacent_pairs_strength ON adjacent_pairs(coalition_strength_score DESC)"
-            )
-            self.db.conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_adjacent_pairs_shared ON adjacent_pairs(shared_ballots DESC)"
-            )
-
-            # Indexes for candidate_metrics
-            self.db.conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_candidate_metrics_id ON candidate_metrics(candidate_id)"
-            )
-            self.db.conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_candidate_metrics_weighted ON candidate_metrics(weighted_score DESC)"
-            )
-
-            # Optional: Optimize ballots_long table (commented out to preserve existing data)
-            # This would provide additional memory savings but requires rebuilding the core table
-            """
-            logger.info("Optimizing ballots_long table (optional)...")
-            optimize_ballots_sql = '''
-            CREATE OR REPLACE TABLE ballots_long_optimized AS
-            SELECT
-                CAST(BallotID AS VARCHAR(20)) as BallotID,                      -- Observed ballot IDs are ~15 chars
-                CAST(PrecinctID AS TINYINT) as PrecinctID,                      -- 2-79 range
-                CAST(BallotStyleID AS TINYINT) as BallotStyleID,                -- Limited range
-                CAST(candidate_id AS TINYINT) as candidate_id,                  -- 36-125 range
-                CAST(candidate_name AS VARCHAR(30)) as candidate_name,          -- Max 27 chars
-                CAST(rank_position AS TINYINT) as rank_position,                -- 1-6 range
-                CAST(has_vote AS BOOLEAN) as has_vote                           -- 0/1 -> TRUE/FALSE
-            FROM ballots_long
-            '''
-            """
-
-            operation_time = time.time() - operation_start
-            logger.info(f"✓ Data type optimization completed in {operation_time:.2f}s")
-            logger.info(
-                "✓ Applied optimized data types with TINYINT, VARCHAR(n), DECIMAL precision"
-            )
-            logger.info("✓ Created performance indexes for common query patterns")
-            logger.info(
-                "✓ ballots_long table optimization available but not applied (preserves existing data)"
-            )
-
-            # Update performance stats
-            self.stats["performance_improvements"]["data_type_optimization"] = {
-                "operation_time_seconds": operation_time,
-                "expected_memory_reduction": "50-70%",
-                "expected_io_improvement": "30-50%",
-                "optimizations_applied": len(optimizations),
-            }
-
-            return optimizations
-
-        except Exception as e:
-            logger.error(f"Error optimizing data types: {e}")
-            self.stats["error_count"] += 1
-            raise
-
-    def precompute_candidate_metrics(self) -> Dict[str, Any]:
+    @instrument(
+        "precompute.candidate_metrics", rows=lambda s: int(s["total_candidates"])
+    )
+    def precompute_candidate_metrics(
+        self, db: Optional[CVRDatabase] = None
+    ) -> Dict[str, Any]:
         """
         Precompute candidate-level metrics including centrality, vote counts, and rankings.
         """
         logger.info("=== Precomputing Candidate Metrics ===")
         operation_start = time.time()
+        db = db or self.db
 
         try:
-            # Drop existing table if it exists
-            self.db.conn.execute("DROP TABLE IF EXISTS candidate_metrics")
-
-            create_metrics_sql = """
-            CREATE TABLE candidate_metrics AS
+            select_sql = """
             WITH candidate_vote_counts AS (
                 SELECT
                     c.candidate_id,
@@ -471,7 +364,8 @@ class PrecomputeProcessor:
             ),
             max_connections AS (
                 SELECT MAX(total_connections) as max_conn FROM centrality_summary
-            )
+            ),
+            metrics AS (
             SELECT
                 cv.*,
                 COALESCE(cs.total_connections, 0) as total_connections,
@@ -502,15 +396,40 @@ class PrecomputeProcessor:
             FROM candidate_vote_counts cv
             LEFT JOIN centrality_summary cs ON cv.candidate_id = cs.candidate_id
             CROSS JOIN max_connections mc
-            ORDER BY cv.weighted_score DESC
+            )
+            SELECT
+                CAST(candidate_id AS TINYINT) as candidate_id,                  -- 36-125 range
+                CAST(candidate_name AS VARCHAR(30)) as candidate_name,          -- Max 27 chars
+                CAST(total_ballots AS INTEGER) as total_ballots,                -- Max 33K
+                CAST(first_choice_votes AS INTEGER) as first_choice_votes,      -- Max 33K
+                CAST(weighted_score AS INTEGER) as weighted_score,              -- Integer points
+                CAST(ROUND(avg_rank_position, 2) AS DECIMAL(4,2)) as avg_rank_position,
+                CAST(total_connections AS TINYINT) as total_connections,        -- Max ~25 candidates
+                CAST(ROUND(avg_coalition_strength, 4) AS DECIMAL(6,4)) as avg_coalition_strength,
+                CAST(ROUND(total_coalition_strength, 4) AS DECIMAL(8,4)) as total_coalition_strength,
+                CAST(strong_connections AS TINYINT) as strong_connections,      -- Max ~25
+                CAST(ROUND(degree_centrality, 4) AS DECIMAL(6,4)) as degree_centrality,
+                CAST(ROUND(strength_centrality, 4) AS DECIMAL(8,4)) as strength_centrality,
+                CAST(position_type AS VARCHAR(15)) as position_type,            -- Max 11 chars observed
+                CAST(ROUND(first_choice_percentage, 2) AS DECIMAL(5,2)) as first_choice_percentage
+            FROM metrics
+            ORDER BY weighted_score DESC
             """
 
             logger.info("Computing candidate metrics and centrality...")
-            self.db.conn.execute(create_metrics_sql)
+            replace_table(
+                db,
+                "candidate_metrics",
+                select_sql,
+                indexes=[
+                    ("idx_candidate_metrics_id", "candidate_id"),
+                    ("idx_candidate_metrics_weighted", "weighted_score DESC"),
+                ],
+            )
 
             # Get statistics
             metrics_stats = (
-                self.db.query(
+                db.query(
                     """
                 SELECT
                     COUNT(*) as total_candidates,
@@ -541,15 +460,14 @@ class PrecomputeProcessor:
             logger.info(f"  - Isolated: {metrics_stats['isolated']}")
 
             # Save as Parquet
-            metrics_df = self.db.query("SELECT * FROM candidate_metrics")
+            metrics_df = db.query("SELECT * FROM candidate_metrics")
             parquet_path = self.precomputed_dir / "candidate_metrics.parquet"
-            metrics_df.to_parquet(parquet_path, index=False)
+            write_parquet(parquet_path, metrics_df)
             logger.info(f"✓ Saved to {parquet_path}")
 
             # Update performance stats
             self.stats["performance_improvements"]["candidate_metrics"] = {
                 "operation_time_seconds": operation_time,
-                "expected_speedup": "5-20x",
                 "api_endpoints_affected": [
                     "/api/candidates/enhanced",
                     "/api/coalition/network",
@@ -566,18 +484,141 @@ class PrecomputeProcessor:
             self.stats["error_count"] += 1
             raise
 
-    def precompute_static_responses(self) -> Dict[str, Any]:
+    @instrument("precompute.candidate_slates", rows=lambda s: s["total_slates"])
+    def precompute_candidate_slates(
+        self,
+        min_support: float = 0.01,
+        max_size: int = 4,
+        db: Optional[CVRDatabase] = None,
+    ) -> Dict[str, Any]:
+        """
+        Precompute frequently co-ranked candidate slates (3+ candidates).
+        Mining works on in-memory ballot patterns, so no self-joins are needed.
+        """
+        logger.info("=== Precomputing Candidate Slates ===")
+        operation_start = time.time()
+        db = db or self.db
+
+        try:
+            miner = SlateMiner(db)
+            slates = miner.mine_slates(
+                min_support=min_support, min_size=3, max_size=max_size
+            )
+            slates_df = miner.slates_to_dataframe(slates)
+            slates_df["mined_min_support"] = min_support
+
+            replace_table_from_df(db, "candidate_slates", slates_df)
+
+            stats = {
+                "total_slates": len(slates_df),
+                "triples": int((slates_df["slate_size"] == 3).sum()),
+                "quads": int((slates_df["slate_size"] == 4).sum()),
+                "max_lift": (
+                    float(slates_df["lift"].max()) if not slates_df.empty else 0.0
+                ),
+            }
+
+            operation_time = time.time() - operation_start
+            logger.info(
+                f"✓ Precomputed {stats['total_slates']} candidate slates in {operation_time:.2f}s"
+            )
+            logger.info(f"  - Triples: {stats['triples']}")
+            logger.info(f"  - Quads: {stats['quads']}")
+
+            # Save as Parquet
+            parquet_path = self.precomputed_dir / "candidate_slates.parquet"
+            write_parquet(parquet_path, slates_df)
+            logger.info(f"✓ Saved to {parquet_path}")
+
+            # Update performance stats
+            self.stats["performance_improvements"]["candidate_slates"] = {
+                "operation_time_seconds": operation_time,
+                "api_endpoints_affected": ["/api/coalition/slates"],
+            }
+            self.stats["data_sizes"][
+                "candidate_slates_mb"
+            ] = parquet_path.stat().st_size / (1024 * 1024)
+
+            return stats
+
+        except Exception as e:
+            logger.error(f"Error precomputing candidate slates: {e}")
+            self.stats["error_count"] += 1
+            raise
+
+    @instrument("precompute.precinct_cube", rows=lambda s: s["cube_cells"])
+    def precompute_precinct_cube(
+        self, max_workers: int = None, db: Optional[CVRDatabase] = None
+    ) -> Dict[str, Any]:
+        """
+        Precompute the precinct x candidate x rank cube, per-precinct pair
+        co-occurrence and precinct summaries. Precinct chunks are aggregated
+        in parallel worker processes.
+        """
+        logger.info("=== Precomputing Precinct Cube ===")
+        operation_start = time.time()
+        db = db or self.db
+
+        try:
+            analyzer = PrecinctAnalyzer(db)
+            tables = analyzer.build_tables(max_workers=max_workers)
+
+            total_size_mb = 0.0
+            for table_name, table_df in tables.items():
+                replace_table_from_df(db, table_name, table_df)
+
+                # Save as Parquet
+                parquet_path = self.precomputed_dir / f"{table_name}.parquet"
+                write_parquet(parquet_path, table_df)
+                total_size_mb += parquet_path.stat().st_size / (1024 * 1024)
+                logger.info(f"✓ Saved {table_name} ({len(table_df):,} rows)")
+
+            stats = {
+                "total_precincts": len(tables["precinct_summary"]),
+                "cube_cells": len(tables["precinct_rank_cube"]),
+                "precinct_pairs": len(tables["precinct_pairs"]),
+            }
+
+            operation_time = time.time() - operation_start
+            logger.info(
+                f"✓ Precomputed cube for {stats['total_precincts']} precincts in {operation_time:.2f}s"
+            )
+
+            # Update performance stats
+            self.stats["performance_improvements"]["precinct_cube"] = {
+                "operation_time_seconds": operation_time,
+                "api_endpoints_affected": [
+                    "/api/precincts",
+                    "/api/precincts/{precinct_id}",
+                    "/api/precincts/{precinct_id}/pairs",
+                    "/api/precincts/candidate/{candidate_id}",
+                ],
+            }
+            self.stats["data_sizes"]["precinct_cube_mb"] = total_size_mb
+
+            return stats
+
+        except Exception as e:
+            logger.error(f"Error precomputing precinct cube: {e}")
+            self.stats["error_count"] += 1
+            raise
+
+    @instrument("precompute.static_responses", rows=len)
+    def precompute_static_responses(
+        self, db: Optional[CVRDatabase] = None
+    ) -> Dict[str, Any]:
         """
         Generate static JSON responses for common API endpoints that rarely change.
         """
         logger.info("=== Precomputing Static Responses ===")
         operation_start = time.time()
+        db = db or self.db
 
         static_responses = {}
 
         try:
             # Coalition type breakdown
-            coalition_types = self.db.query(
+            coalition_types = db.query(
                 """
                 SELECT
                     coalition_type,
@@ -593,7 +634,7 @@ class PrecomputeProcessor:
 
             # Network statistics
             network_stats = (
-                self.db.query(
+                db.query(
                     """
                 SELECT
                     COUNT(*) as total_nodes,
@@ -609,7 +650,7 @@ class PrecomputeProcessor:
             )
 
             # Enhanced candidates summary
-            candidates_enhanced = self.db.query(
+            candidates_enhanced = db.query(
                 """
                 SELECT
                     candidate_id,
@@ -635,8 +676,7 @@ class PrecomputeProcessor:
 
             for filename, data in static_files.items():
                 json_path = self.static_responses_dir / f"{filename}.json"
-                with open(json_path, "w") as f:
-                    json.dump(data, f, indent=2, default=str)
+                write_json(json_path, data)
                 logger.info(f"✓ Saved {filename} ({len(str(data))} chars)")
                 static_responses[filename] = len(str(data))
 
@@ -646,7 +686,6 @@ class PrecomputeProcessor:
             self.stats["performance_improvements"]["static_responses"] = {
                 "operation_time_seconds": operation_time,
                 "files_generated": len(static_files),
-                "expected_speedup": "100x",
                 "api_endpoints_affected": [
                     "/api/coalition/types",
                     "/api/candidates/enhanced",
@@ -673,7 +712,19 @@ class PrecomputeProcessor:
             "data_version": "1.0",
             "source_database": str(self.db_path),
             "statistics": self.stats,
-            "precomputed_tables": ["adjacent_pairs", "candidate_metrics"],
+            "stages": self.recorder.totals() if self.recorder else [],
+            "pipeline": {
+                name: {"status": r.status, "seconds": r.seconds}
+                for name, r in self.stage_results.items()
+            },
+            "precomputed_tables": [
+                "adjacent_pairs",
+                "candidate_metrics",
+                "candidate_slates",
+                "precinct_rank_cube",
+                "precinct_pairs",
+                "precinct_summary",
+            ],
             "data_quality": {
                 "total_pairs": self.db.query(
                     "SELECT COUNT(*) as count FROM adjacent_pairs"
@@ -690,17 +741,84 @@ class PrecomputeProcessor:
         }
 
         # Save metadata
-        metadata_path = self.data_dir / "metadata.json"
-        with open(metadata_path, "w") as f:
-            json.dump(metadata, f, indent=2, default=str)
+        write_json(self.data_dir / "metadata.json", metadata)
 
         return metadata
 
-    def run_full_precomputation(self, min_shared_ballots: int = 10) -> Dict[str, Any]:
+    def build_stages(
+        self, min_shared_ballots: int = 10, max_workers: int = None
+    ) -> List[Stage]:
         """
-        Run the complete precomputation pipeline.
+        The precompute DAG. Pairs, slates and the precinct cube only read the
+        normalized ballots and run in parallel; metrics need the pairs, and the
+        static responses need both.
         """
-        logger.info("🚀 Starting Full Precomputation Pipeline")
+        source = ["ballots_long", "candidates"]
+        precinct_tables = ["precinct_rank_cube", "precinct_pairs", "precinct_summary"]
+        return [
+            Stage(
+                "adjacent_pairs",
+                self.precompute_adjacent_pairs,
+                inputs=source,
+                outputs=["adjacent_pairs"],
+                files=["precomputed/adjacent_pairs.parquet"],
+                params={"min_shared_ballots": min_shared_ballots},
+            ),
+            Stage(
+                "candidate_metrics",
+                self.precompute_candidate_metrics,
+                inputs=source + ["adjacent_pairs"],
+                outputs=["candidate_metrics"],
+                files=["precomputed/candidate_metrics.parquet"],
+            ),
+            Stage(
+                "candidate_slates",
+                self.precompute_candidate_slates,
+                inputs=source,
+                outputs=["candidate_slates"],
+                files=["precomputed/candidate_slates.parquet"],
+            ),
+            Stage(
+                "precinct_cube",
+                self.precompute_precinct_cube,
+                inputs=source,
+                outputs=precinct_tables,
+                files=[f"precomputed/{t}.parquet" for t in precinct_tables],
+                options={"max_workers": max_workers},
+            ),
+            Stage(
+                "static_responses",
+                self.precompute_static_responses,
+                inputs=["adjacent_pairs", "candidate_metrics"],
+                files=[
+                    f"static_responses/{name}.json"
+                    for name in (
+                        "coalition_types",
+                        "network_stats",
+                        "candidates_enhanced",
+                    )
+                ],
+            ),
+        ]
+
+    def run_full_precomputation(
+        self,
+        min_shared_ballots: int = 10,
+        max_workers: int = None,
+        force: bool = False,
+        max_parallel: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run the precompute pipeline, rebuilding only stages whose inputs,
+        parameters or code changed since the last run (see ``data.pipeline``).
+
+        Args:
+            min_shared_ballots: Minimum shared ballots for pair analysis
+            max_workers: Worker processes for the precinct cube
+            force: Rebuild every stage
+            max_parallel: Stages run at once (default: all that are ready)
+        """
+        logger.info("🚀 Starting Precomputation Pipeline")
         logger.info(f"Election ID: {self.election_id}")
         logger.info(f"Database: {self.db_path}")
         logger.info(f"Target directory: {self.data_dir}")
@@ -708,23 +826,23 @@ class PrecomputeProcessor:
         if not self.validate_prerequisites():
             raise RuntimeError("Prerequisites validation failed")
 
-        results = {}
-
-        # Phase 1: Adjacent pairs (most critical for performance)
-        results["adjacent_pairs"] = self.precompute_adjacent_pairs(min_shared_ballots)
-        self.stats["operations_completed"].append("adjacent_pairs")
-
-        # Phase 2: Candidate metrics
-        results["candidate_metrics"] = self.precompute_candidate_metrics()
-        self.stats["operations_completed"].append("candidate_metrics")
-
-        # Phase 3: Data type optimization
-        results["data_type_optimization"] = self.optimize_data_types()
-        self.stats["operations_completed"].append("data_type_optimization")
+        # Report to the caller's recorder if one is active, else our own
+        with recording(get_recorder()) as recorder, stage("precompute.full"):
+            self.recorder = recorder
+            pipeline = Pipeline(
+                self.db,
+                self.build_stages(min_shared_ballots, max_workers),
+                self.data_dir,
+                max_parallel=max_parallel,
+            )
+            self.stage_results = pipeline.run(force=force)
 
-        # Phase 4: Static responses
-        results["static_responses"] = self.precompute_static_responses()
-        self.stats["operations_completed"].append("static_responses")
+        results = {name: r.result for name, r in self.stage_results.items()}
+        for name, r in self.stage_results.items():
+            if r.status == "ran":
+                self.stats["operations_completed"].append(name)
+            else:
+                self.stats["operations_skipped"].append(name)
 
         # Generate final metadata
         results["metadata"] = self.generate_metadata()
@@ -735,19 +853,13 @@ class PrecomputeProcessor:
         total_time = time.time() - self.start_time
         logger.info(f"🎉 Precomputation completed in {total_time:.2f}s")
         logger.info(f"✓ {len(self.stats['operations_completed'])} operations completed")
+        logger.info(f"↷ {len(self.stats['operations_skipped'])} up to date")
         logger.info(f"✗ {self.stats['error_count']} errors encountered")
 
-        # Performance summary
-        logger.info("\n=== Performance Impact Summary ===")
-        for operation, improvement in self.stats["performance_improvements"].items():
-            if "expected_speedup" in improvement:
-                logger.info(f"{operation}: {improvement['expected_speedup']} speedup")
-            elif "expected_memory_reduction" in improvement:
-                logger.info(
-                    f"{operation}: {improvement['expected_memory_reduction']} memory reduction"
-                )
-            else:
-                logger.info(f"{operation}: optimization applied")
+        # Measured per-stage performance
+        metrics_path = recorder.write(self.data_dir / "stage_metrics.json")
+        logger.info("\n=== Stage Performance ===\n" + recorder.summary())
+        logger.info(f"✓ Stage metrics written to {metrics_path}")
 
         return results
 
@@ -756,7 +868,12 @@ def main():
     parser = argparse.ArgumentParser(
         description="Precompute analytical data for performance optimization"
     )
-    parser.add_argument("--db", required=True, help="Path to DuckDB database file")
+    parser.add_argument("--db", help="Path to DuckDB database file")
+    parser.add_argument(
+        "--snapshot-root",
+        help="Precompute into a copy of the current snapshot under this "
+        "directory and publish it when done (instead of --db)",
+    )
     parser.add_argument(
         "--election-id", default="2024_portland_district2", help="Election identifier"
     )
@@ -766,10 +883,22 @@ def main():
         default=10,
         help="Minimum shared ballots for pair analysis",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for parallel stages (default: CPU count)",
+    )
+    parser.add_argument(
+        "--max-parallel-stages",
+        type=int,
+        default=None,
+        help="Pipeline stages run at once (default: all that are ready)",
+    )
     parser.add_argument(
         "--force-refresh",
         action="store_true",
-        help="Force rebuild of all precomputed data",
+        help="Rebuild every stage, not only those whose inputs changed",
     )
     parser.add_argument(
         "--validate",
@@ -779,88 +908,91 @@ def main():
 
     args = parser.parse_args()
 
-    db_path = Path(args.db)
-    if not db_path.exists():
-        logger.error(f"Database file not found: {db_path}")
-        sys.exit(1)
+    if bool(args.db) == bool(args.snapshot_root):
+        parser.error("exactly one of --db and --snapshot-root is required")
 
-    try:
-        processor = PrecomputeProcessor(str(db_path), args.election_id)
+    if args.snapshot_root:
+        store = SnapshotStore(args.snapshot_root)
+        if store.current_version() is None:
+            logger.error(f"No snapshot published under {args.snapshot_root}")
+            sys.exit(1)
+    else:
+        db_path = Path(args.db)
+        if not db_path.exists():
+            logger.error(f"Database file not found: {db_path}")
+            sys.exit(1)
 
-        # Check if precomputed data already exists
-        if (
-            not args.force_refresh
-            and (processor.precomputed_dir / "adjacent_pairs.parquet").exists()
-        ):
-            logger.info(
-                "Precomputed data already exists. Use --force-refresh to rebuild."
+    try:
+        with ExitStack() as stack:
+            data_dir = None
+            if args.snapshot_root:
+                # Starts from the current snapshot's database and artifacts, so
+                # unchanged stages are still skipped; published on success only
+                data_dir = stack.enter_context(store.build(copy_current=True))
+                db_path = data_dir / DATABASE_NAME
+
+            processor = PrecomputeProcessor(str(db_path), args.election_id, data_dir)
+
+            # Only stages whose inputs changed since the last run are rebuilt
+            processor.run_full_precomputation(
+                args.min_shared_ballots,
+                max_workers=args.workers,
+                force=args.force_refresh,
+                max_parallel=args.max_parallel_stages,
             )
 
-            # Load existing metadata for validation
-            metadata_path = processor.data_dir / "metadata.json"
-            if metadata_path.exists():
-                with open(metadata_path) as f:
-                    metadata = json.load(f)
-                logger.info(
-                    f"Existing data version: {metadata.get('data_version', 'unknown')}"
-                )
-                logger.info(f"Generated: {metadata.get('generation_time', 'unknown')}")
-
-            if not args.validate:
-                logger.info("Use --validate to check data integrity")
-                sys.exit(0)
-
-        # Run precomputation
-        processor.run_full_precomputation(args.min_shared_ballots)  # Run precomputation
+            if args.validate:
+                logger.info("\n=== Validation Checks ===")
 
-        if args.validate:
-            logger.info("\n=== Validation Checks ===")
+                # Test precomputed data integrity
+                db = CVRDatabase(str(db_path), read_only=True)
 
-            # Test precomputed data integrity
-            db = CVRDatabase(str(db_path), read_only=True)
+                # Check adjacent pairs
+                pairs_count = db.query("SELECT COUNT(*) as count FROM adjacent_pairs")[
+                    "count"
+                ].iloc[0]
+                logger.info(f"✓ Adjacent pairs table: {pairs_count:,} records")
 
-            # Check adjacent pairs
-            pairs_count = db.query("SELECT COUNT(*) as count FROM adjacent_pairs")[
-                "count"
-            ].iloc[0]
-            logger.info(f"✓ Adjacent pairs table: {pairs_count:,} records")
-
-            # Check candidate metrics
-            metrics_count = db.query("SELECT COUNT(*) as count FROM candidate_metrics")[
-                "count"
-            ].iloc[0]
-            logger.info(f"✓ Candidate metrics table: {metrics_count} records")
+                # Check candidate metrics
+                metrics_count = db.query(
+                    "SELECT COUNT(*) as count FROM candidate_metrics"
+                )["count"].iloc[0]
+                logger.info(f"✓ Candidate metrics table: {metrics_count} records")
 
-            # Validate coalition strength distribution
-            strength_stats = db.query(
+                # Validate coalition strength distribution
+                strength_stats = db.query(
+                    """
+                    SELECT
+                        MIN(coalition_strength_score) as min_strength,
+                        AVG(coalition_strength_score) as avg_strength,
+                        MAX(coalition_strength_score) as max_strength
+                    FROM adjacent_pairs
                 """
-                SELECT
-                    MIN(coalition_strength_score) as min_strength,
-                    AVG(coalition_strength_score) as avg_strength,
-                    MAX(coalition_strength_score) as max_strength
-                FROM adjacent_pairs
-            """
-            ).iloc[0]
+                ).iloc[0]
 
-            logger.info(
-                f"✓ Coalition strength range: {strength_stats['min_strength']:.4f} - {strength_stats['max_strength']:.4f}"
-            )
-            logger.info(
-                f"✓ Average coalition strength: {strength_stats['avg_strength']:.4f}"
-            )
+                logger.info(
+                    f"✓ Coalition strength range: {strength_stats['min_strength']:.4f} - {strength_stats['max_strength']:.4f}"
+                )
+                logger.info(
+                    f"✓ Average coalition strength: {strength_stats['avg_strength']:.4f}"
+                )
 
-            # Check for winners in candidate metrics
-            winners = db.query(
-                "SELECT candidate_name FROM candidate_metrics WHERE candidate_id IN (36, 46, 55) ORDER BY weighted_score DESC"
-            )
-            logger.info(
-                f"✓ Portland winners found: {', '.join(winners['candidate_name'])}"
-            )
+                # Check for winners in candidate metrics
+                winners = db.query(
+                    "SELECT candidate_name FROM candidate_metrics WHERE candidate_id IN (36, 46, 55) ORDER BY weighted_score DESC"
+                )
+                logger.info(
+                    f"✓ Portland winners found: {', '.join(winners['candidate_name'])}"
+                )
 
+                db.close()
             logger.info("✓ Validation completed successfully")
 
         print(f"\n🎉 Success! Precomputed data ready for {processor.election_id}")
-        print(f"📁 Data location: {processor.data_dir}")
+        if args.snapshot_root:
+            print(f"📁 Published snapshot: {store.current()}")
+        else:
+            print(f"📁 Data location: {processor.data_dir}")
         print("⚡ Expected API performance improvements: 5-100x faster")
 
     except Exception as e:
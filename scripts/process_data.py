@@ -7,12 +7,15 @@ Loads, transforms, and validates Cast Vote Record data.
 import argparse
 import logging
 import sys
+from contextlib import ExitStack
 from pathlib import Path
 
 # Add src to path so we can import our modules
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from data.cvr_parser import CVRParser  # noqa: E402
+from data.snapshots import DATABASE_NAME, SnapshotStore  # noqa: E402
+from monitoring.stages import recording  # noqa: E402
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -22,21 +25,42 @@ logger = logging.getLogger(__name__)
 
 def main():
     parser = argparse.ArgumentParser(description="Process CVR data")
-    parser.add_argument("csv_file", help="Path to CVR CSV file")
+    parser.add_argument("csv_file", help="Path to CVR file (CSV or .parquet)")
     parser.add_argument(
         "--db", help="Path to DuckDB database file (default: in-memory)"
     )
+    parser.add_argument(
+        "--snapshot-root",
+        help="Build into a new snapshot under this directory and publish it "
+        "when processing succeeds (instead of --db)",
+    )
     parser.add_argument("--validate", action="store_true", help="Run validation checks")
+    parser.add_argument(
+        "--stage-metrics", help="Write per-stage timing and memory metrics as JSON"
+    )
 
     args = parser.parse_args()
 
+    if args.db and args.snapshot_root:
+        parser.error("--db and --snapshot-root are mutually exclusive")
+
     csv_path = Path(args.csv_file)
     if not csv_path.exists():
-        logger.error(f"CSV file not found: {csv_path}")
+        logger.error(f"CVR file not found: {csv_path}")
         sys.exit(1)
 
     try:
-        with CVRParser(args.db) as parser:
+        with recording() as recorder, ExitStack() as stack:
+            db_path = args.db
+            if args.snapshot_root:
+                # Published (and served) only once the block below succeeds
+                snapshot = stack.enter_context(
+                    SnapshotStore(args.snapshot_root).build()
+                )
+                db_path = str(snapshot / DATABASE_NAME)
+            # Entered last so the database is closed before publishing
+            parser = stack.enter_context(CVRParser(db_path))
+
             # Step 1: Load raw CVR data
             logger.info("=== Step 1: Loading CVR Data ===")
             load_stats = parser.load_cvr_file(str(csv_path))
@@ -85,7 +109,7 @@ def main():
             print("\nBallot Completion Patterns:")
             for _, row in completion.iterrows():
                 print(
-                    f"  {row['ranks_used']} ranks: {row['ballot_count']:5d} ballots ({row['percentage']:5.1f}%)"
+                    f"  {row['ranks_used']} ranks: {int(row['ballot_count']):5d} ballots ({row['percentage']:5.1f}%)"
                 )
 
             if args.validate:
@@ -111,6 +135,12 @@ def main():
 
                 print("✓ Data processing completed successfully")
 
+        print("\nStage timings:")
+        print(recorder.summary())
+        if args.stage_metrics:
+            recorder.write(args.stage_metrics)
+            print(f"✓ Stage metrics written to: {args.stage_metrics}")
+
     except Exception as e:
         logger.error(f"Error processing data: {e}")
         sys.exit(1)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Estimate how robust STV winners are to sampling noise or lost ballots.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add src to path so we can import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from analysis.robustness import RESAMPLING_METHODS, run_robustness  # noqa: E402
+from analysis.stv_rules import RULE_PRESETS  # noqa: E402
+from data.ballot_patterns import load_ballot_patterns  # noqa: E402
+from data.database import CVRDatabase  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run STV robustness analysis")
+    parser.add_argument("--db", help="Path to DuckDB database file with processed data")
+    parser.add_argument(
+        "--seats", type=int, default=3, help="Number of seats to fill (default: 3)"
+    )
+    parser.add_argument(
+        "--replicates",
+        type=int,
+        default=1000,
+        help="Number of resampled replicates (default: 1000)",
+    )
+    parser.add_argument(
+        "--method",
+        choices=RESAMPLING_METHODS,
+        default="bootstrap",
+        help="Resample ballots (bootstrap) or drop them at --error-rate (perturb)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.01,
+        help="Probability each ballot is lost with --method perturb",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument(
+        "--rules", choices=sorted(RULE_PRESETS), help="Counting rules preset"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=50, help="Replicates per worker task"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: CPU count)",
+    )
+    parser.add_argument("--export", help="Export results to CSV files")
+
+    args = parser.parse_args()
+
+    if not args.db or not Path(args.db).exists():
+        logger.error(
+            "Database file required and must exist. Run process_data.py first."
+        )
+        sys.exit(1)
+
+    try:
+        with CVRDatabase(args.db) as db:
+            if not db.table_exists("ballots_long"):
+                logger.error(
+                    "Required table 'ballots_long' not found. Run process_data.py first."
+                )
+                sys.exit(1)
+
+            logger.info(
+                f"=== STV Robustness ({args.seats} seats, {args.replicates} "
+                f"{args.method} replicates) ==="
+            )
+            patterns = load_ballot_patterns(db)
+            result = run_robustness(
+                patterns,
+                seats=args.seats,
+                replicates=args.replicates,
+                method=args.method,
+                error_rate=args.error_rate,
+                seed=args.seed,
+                rules=args.rules,
+                batch_size=args.batch_size,
+                max_workers=args.workers,
+            )
+
+            print("\n=== Win Probability ===")
+            for row in result.win_probability.itertuples(index=False):
+                if row.wins == 0:
+                    continue
+                marker = "*" if row.baseline_winner else " "
+                print(
+                    f" {marker} {row.candidate_name:<30} "
+                    f"{row.win_probability:7.1%} ± {row.standard_error:.1%}"
+                )
+
+            print("\n=== Most Common Winner Sets ===")
+            for row in result.winner_sets.head(5).itertuples(index=False):
+                print(f"  {row.share:7.1%}  {', '.join(row.candidate_names)}")
+
+            if args.export:
+                export_path = Path(args.export)
+                for key in ("win_probability", "decision_rounds", "winner_sets"):
+                    path = export_path.with_stem(f"{export_path.stem}_{key}")
+                    getattr(result, key).to_csv(path.with_suffix(".csv"), index=False)
+                    print(f"✓ {key} exported to: {path.with_suffix('.csv')}")
+
+            print(
+                f"\n✓ {result.replicates} replicates completed in "
+                f"{result.elapsed_seconds:.1f}s"
+            )
+
+    except Exception as e:
+        logger.error(f"Error during robustness analysis: {e}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
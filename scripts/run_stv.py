@@ -6,12 +6,19 @@ Run STV tabulation on processed CVR data.
 import argparse
 import logging
 import sys
+from dataclasses import replace
 from pathlib import Path
 
 # Add src to path so we can import our modules
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from analysis.stv import STVTabulator  # noqa: E402
+from analysis.stv_rules import RULE_PRESETS, get_rules  # noqa: E402
+from analysis.stv_vectorized import (  # noqa: E402
+    VectorizedSTVTabulator,
+    tabulate_partitions,
+)
+from data.ballot_patterns import load_ballot_patterns  # noqa: E402
 from data.database import CVRDatabase  # noqa: E402
 
 logging.basicConfig(
@@ -20,6 +27,55 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def run_seat_sweep(db: CVRDatabase, args):
+    """Tabulate several seat counts together and print who wins each."""
+    logger.info(f"=== STV Seat Sweep ({', '.join(map(str, args.sweep))} seats) ===")
+    comparison = VectorizedSTVTabulator(db).run_seat_sweep(args.sweep)
+
+    print("\n=== Winners by Seat Count ===")
+    for seats, rows in comparison.groupby("seats"):
+        elected = rows[rows["elected"]].sort_values("seat_order")
+        print(
+            f"  {seats} seat(s), quota {rows['quota'].iloc[0]:,.0f}: "
+            f"{', '.join(elected['candidate_name'])}"
+        )
+
+    if args.export:
+        export_path = Path(args.export).with_suffix(".csv")
+        comparison.to_csv(export_path, index=False)
+        print(f"\n✓ Seat sweep exported to: {export_path}")
+
+    print("\n✓ Seat sweep completed successfully")
+
+
+def run_precinct_tabulation(db: CVRDatabase, args):
+    """Tabulate each precinct separately and print its winners."""
+    logger.info(f"=== Precinct STV Tabulation ({args.seats} seats) ===")
+    patterns = load_ballot_patterns(db, by_precinct=True)
+    results = tabulate_partitions(patterns, seats=args.seats, max_workers=args.workers)
+
+    print("\n=== Precinct Winners ===")
+    winners = results["winners"]
+    for precinct in results["summary"].itertuples(index=False):
+        names = winners[winners["partition_id"] == precinct.partition_id][
+            "candidate_name"
+        ]
+        print(
+            f"  Precinct {precinct.partition_id:>6}: "
+            f"{precinct.total_ballots:6d} ballots, {precinct.rounds:2d} rounds - "
+            f"{', '.join(names)}"
+        )
+
+    if args.export:
+        export_path = Path(args.export)
+        for key, frame in results.items():
+            path = export_path.with_stem(f"{export_path.stem}_precinct_{key}")
+            frame.to_csv(path.with_suffix(".csv"), index=False)
+            print(f"✓ Precinct {key} exported to: {path.with_suffix('.csv')}")
+
+    print("\n✓ Precinct STV tabulation completed successfully")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run STV tabulation")
     parser.add_argument("--db", help="Path to DuckDB database file with processed data")
@@ -27,6 +83,46 @@ def main():
         "--seats", type=int, default=3, help="Number of seats to fill (default: 3)"
     )
     parser.add_argument("--export", help="Export results to CSV file")
+    parser.add_argument(
+        "--sweep",
+        type=int,
+        nargs="+",
+        metavar="SEATS",
+        help="Compare several seat counts in one pass (e.g. --sweep 1 2 3 4 5)",
+    )
+    parser.add_argument(
+        "--by-precinct",
+        action="store_true",
+        help="Tabulate every precinct as its own election",
+    )
+    parser.add_argument(
+        "--rules",
+        choices=sorted(RULE_PRESETS),
+        help="Count with the array-based engine under these rules (e.g. meek)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=None,
+        help="Keep-value convergence tolerance in votes for meek/warren",
+    )
+    parser.add_argument(
+        "--decimals",
+        type=int,
+        default=None,
+        help="Count in fixed-point arithmetic with this many decimal places",
+    )
+    parser.add_argument(
+        "--bulk-defeat",
+        action="store_true",
+        help="Eliminate all mathematically defeated trailing candidates together",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for --by-precinct (default: CPU count)",
+    )
 
     args = parser.parse_args()
 
@@ -47,13 +143,44 @@ def main():
                     )
                     sys.exit(1)
 
+            if args.sweep:
+                run_seat_sweep(db, args)
+                return
+
+            if args.by_precinct:
+                run_precinct_tabulation(db, args)
+                return
+
             # Initialize STV tabulator
-            logger.info(f"=== STV Tabulation ({args.seats} seats) ===")
-            tabulator = STVTabulator(db, seats=args.seats)
+            if args.rules or args.tolerance or args.decimals is not None:
+                rules = get_rules(args.rules)
+                if args.tolerance:
+                    rules = replace(rules, tolerance=args.tolerance)
+                if args.bulk_defeat:
+                    rules = replace(rules, bulk_defeat=True)
+                if args.decimals is not None:
+                    rules = replace(rules, decimals=args.decimals)
+                logger.info(
+                    f"=== STV Tabulation ({args.seats} seats, "
+                    f"{args.rules or 'gregory'} rules) ==="
+                )
+                tabulator = VectorizedSTVTabulator(db, seats=args.seats, rules=rules)
+            else:
+                logger.info(f"=== STV Tabulation ({args.seats} seats) ===")
+                tabulator = STVTabulator(
+                    db, seats=args.seats, bulk_defeat=args.bulk_defeat
+                )
 
             # Run tabulation
             tabulator.run_stv_tabulation()  # Store results in tabulator object
 
+            for bulk in tabulator.bulk_defeats:
+                flag = " (single elimination could differ)" if bulk.may_differ else ""
+                print(
+                    f"Round {bulk.round_number}: eliminated {bulk.candidates} "
+                    f"together{flag}"
+                )
+
             # Display round-by-round results
             print("\n=== Round-by-Round Results ===")
             round_summary = tabulator.get_round_summary()
@@ -14,7 +14,12 @@ import uvicorn
 # Add src to path so we can import our modules
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from web.main import set_database_path  # noqa: E402
+from monitoring.queries import enable_query_profiling  # noqa: E402
+from web.main import (  # noqa: E402
+    set_database_path,
+    set_elections_root,
+    set_snapshot_root,
+)
 
 
 def find_available_port(host, start_port, max_attempts=10):
@@ -31,7 +36,33 @@ def find_available_port(host, start_port, max_attempts=10):
 
 def main():
     parser = argparse.ArgumentParser(description="Start the web server")
-    parser.add_argument("--db", required=True, help="Path to DuckDB database file")
+    parser.add_argument("--db", help="Path to DuckDB database file")
+    parser.add_argument(
+        "--snapshot-root",
+        help="Serve the current snapshot under this directory, following "
+        "refreshes published by process_data.py / precompute_data.py",
+    )
+    parser.add_argument(
+        "--elections-root",
+        help="Also serve every election under this directory at /elections/<id>/",
+    )
+    parser.add_argument(
+        "--catalog-memory-mb",
+        type=float,
+        default=1024,
+        help="Memory budget for cached per-election data (default: 1024)",
+    )
+    parser.add_argument(
+        "--profile-queries",
+        action="store_true",
+        help="Profile SQL queries (report at /api/debug/queries)",
+    )
+    parser.add_argument(
+        "--slow-query-ms",
+        type=float,
+        default=100,
+        help="Log queries slower than this with EXPLAIN ANALYZE (default: 100)",
+    )
     parser.add_argument(
         "--host", default="0.0.0.0", help="Host to bind to (default: 0.0.0.0)"
     )
@@ -49,14 +80,40 @@ def main():
 
     args = parser.parse_args()
 
-    db_path = Path(args.db)
-    if not db_path.exists():
-        print(f"Error: Database file not found: {db_path}")
-        print("Run process_data.py first to create the database.")
-        sys.exit(1)
+    if not args.db and not args.snapshot_root and not args.elections_root:
+        parser.error("--db, --snapshot-root or --elections-root is required")
+    if args.db and args.snapshot_root:
+        parser.error("--db and --snapshot-root are mutually exclusive")
+
+    if args.db:
+        db_path = Path(args.db)
+        if not db_path.exists():
+            print(f"Error: Database file not found: {db_path}")
+            print("Run process_data.py first to create the database.")
+            sys.exit(1)
+
+        # Set the database path for the web application
+        set_database_path(str(db_path.absolute()))
+
+    if args.snapshot_root:
+        snapshot_root = Path(args.snapshot_root)
+        if not snapshot_root.is_dir():
+            print(f"Error: Snapshot directory not found: {snapshot_root}")
+            sys.exit(1)
+        set_snapshot_root(str(snapshot_root.absolute()))
+
+    if args.elections_root:
+        elections_root = Path(args.elections_root)
+        if not elections_root.is_dir():
+            print(f"Error: Elections directory not found: {elections_root}")
+            sys.exit(1)
+        set_elections_root(str(elections_root.absolute()), args.catalog_memory_mb)
 
-    # Set the database path for the web application
-    set_database_path(str(db_path.absolute()))
+    if args.profile_queries:
+        # Environment too, so reloaded workers keep profiling
+        os.environ["RVA_QUERY_PROFILING"] = "1"
+        os.environ["RVA_SLOW_QUERY_MS"] = str(args.slow_query_ms)
+        enable_query_profiling(slow_ms=args.slow_query_ms)
 
     # Honor managed hosting env vars if present (Render/Heroku)
     host = os.getenv("HOST", args.host)
@@ -73,7 +130,14 @@ def main():
         port = available_port
 
     print("Starting Ranked Elections Analyzer web server...")
-    print(f"Database: {db_path.absolute()}")
+    if args.db:
+        print(f"Database: {db_path.absolute()}")
+    if args.snapshot_root:
+        print(f"Snapshots: {snapshot_root.absolute()}")
+    if args.elections_root:
+        print(f"Elections: {elections_root.absolute()} (at /elections/<id>/)")
+    if args.profile_queries:
+        print(f"Query profiling: on (slow > {args.slow_query_ms:g} ms)")
     print(f"Server: http://{host}:{port}")
     print("Press Ctrl+C to stop")
 
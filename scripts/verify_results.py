@@ -11,10 +11,13 @@ from pathlib import Path
 # Add src to path so we can import our modules
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from analysis.cross_verification import cross_verify  # noqa: E402
+from analysis.margin import compute_margin  # noqa: E402
 from analysis.stv import STVTabulator  # noqa: E402
 from analysis.verification import ResultsVerifier  # noqa: E402
 
 # from data.cvr_parser import CVRParser  # noqa: F401 - Commented out unused import
+from data.ballot_patterns import load_ballot_patterns  # noqa: E402
 from data.database import CVRDatabase  # noqa: E402
 
 logging.basicConfig(
@@ -36,6 +39,22 @@ def main():
     parser.add_argument(
         "--seats", type=int, default=3, help="Number of seats to fill (default: 3)"
     )
+    parser.add_argument(
+        "--margin",
+        action="store_true",
+        help="Include margin-of-victory bounds in the report",
+    )
+    parser.add_argument(
+        "--margin-budget",
+        type=float,
+        default=30.0,
+        help="Seconds allowed for the margin search (default: 30)",
+    )
+    parser.add_argument(
+        "--cross-verify",
+        metavar="ENGINES",
+        help="Also cross-verify these engines, e.g. sql,pyrankvote",
+    )
     parser.add_argument("--export", help="Export verification report to file")
 
     args = parser.parse_args()
@@ -74,6 +93,24 @@ def main():
                 f"Official threshold: {official_data['metadata'].get('threshold', 'Unknown')}"
             )
 
+            margin = None
+            if args.margin:
+                logger.info("=== Searching Margin of Victory ===")
+                margin = compute_margin(
+                    load_ballot_patterns(db),
+                    seats=args.seats,
+                    time_budget=args.margin_budget,
+                )
+
+            cross = None
+            if args.cross_verify:
+                logger.info("=== Cross-Verifying Engines ===")
+                cross = cross_verify(
+                    {Path(args.db).stem: args.db},
+                    seats=[args.seats],
+                    engines=[e.strip() for e in args.cross_verify.split(",")],
+                )
+
             logger.info("=== Verifying Results ===")
 
             # Verify our results
@@ -81,6 +118,8 @@ def main():
                 our_winners=our_winners,
                 our_candidates=candidates,
                 our_first_choice=first_choice,
+                margin=margin,
+                cross_verification=cross,
             )
 
             # Generate report
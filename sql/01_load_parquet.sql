@@ -0,0 +1,12 @@
+-- Load CVR data from Parquet file
+-- Same as 01_load_data for CVRs exported (or generated) as Parquet
+
+CREATE OR REPLACE TABLE rcv_data AS
+SELECT * FROM read_parquet(?);
+
+-- Add basic validation
+SELECT
+    COUNT(*) as total_ballots,
+    COUNT(DISTINCT BallotID) as unique_ballots,
+    COUNT(*) - COUNT(DISTINCT BallotID) as duplicate_ballots
+FROM rcv_data;
@@ -4,6 +4,8 @@ Analysis module for ranked-choice voting election analysis.
 This module provides STV (Single Transferable Vote) tabulation implementations:
 - PyRankVoteSTVTabulator: Production implementation using PyRankVote library (default)
 - OriginalSTVTabulator: Custom implementation for detailed round analysis
+- VectorizedSTVTabulator: Array-based implementation over ballot patterns,
+  with pluggable counting rules (see stv_rules)
 
 The default STVTabulator uses PyRankVote for industry-standard reliability.
 """
@@ -16,12 +18,16 @@ from .stv import STVTabulator as OriginalSTVTabulator
 # Import the PyRankVote implementation as the default
 from .stv_pyrankvote import PyRankVoteSTVTabulator as STVTabulator
 
+# Array-based engine (fast repeated and per-precinct tabulation)
+from .stv_vectorized import VectorizedSTVTabulator
+
 # Import verification utilities
 from .verification import ResultsVerifier
 
 __all__ = [
     "STVTabulator",  # Default: PyRankVote implementation
     "OriginalSTVTabulator",  # Original custom implementation
+    "VectorizedSTVTabulator",  # Array-based implementation
     "STVRound",  # Shared data structure
     "ResultsVerifier",  # Verification utilities
 ]
@@ -13,6 +13,11 @@ from typing import Any, Dict, List, Optional
 import numpy as np
 import pandas as pd
 
+try:
+    from ..monitoring.stages import instrument
+except ImportError:
+    from monitoring.stages import instrument
+
 logger = logging.getLogger(__name__)
 
 
@@ -105,6 +110,7 @@ class CandidateMetrics:
         """Initialize with database connection."""
         self.db = database
 
+    @instrument("candidate_metrics.profile")
     def get_comprehensive_candidate_profile(
         self, candidate_id: int
     ) -> Optional[CandidateProfile]:
@@ -137,7 +143,9 @@ class CandidateMetrics:
             return CandidateProfile(
                 candidate_id=candidate_id,
                 candidate_name=candidate_name,
-                total_ballots=basic_stats["total_election_ballots"],  # Use total election ballots for consistency
+                total_ballots=basic_stats[
+                    "total_election_ballots"
+                ],  # Use total election ballots for consistency
                 first_choice_votes=basic_stats["first_choice_votes"],
                 first_choice_percentage=basic_stats["first_choice_percentage"],
                 vote_strength_index=strength_index,
@@ -568,7 +576,7 @@ class CandidateMetrics:
             """
             )
 
-            # Get count of ballots that have transferable preferences  
+            # Get count of ballots that have transferable preferences
             total_transferable = self.db.query(
                 f"""
                 SELECT COUNT(DISTINCT BallotID) as count
@@ -583,7 +591,7 @@ class CandidateMetrics:
             """
             ).iloc[0]["count"]
 
-            # FIXED: Calculate transfer efficiency as the percentage of ballots 
+            # FIXED: Calculate transfer efficiency as the percentage of ballots
             # that have immediate next preferences (rank distance = 1)
             # This represents the "clean" transfer potential
             successful_transfers = self.db.query(
@@ -727,6 +735,7 @@ class CandidateMetrics:
             logger.error(f"Error analyzing voter behavior for {candidate_id}: {e}")
             return None
 
+    @instrument("candidate_metrics.summary", rows=len)
     def get_all_candidates_summary(self) -> List[Dict[str, Any]]:
         """Get summary metrics for all candidates."""
         try:
@@ -33,6 +33,11 @@ try:
 except ImportError:
     from data.database import CVRDatabase
 
+try:
+    from ..monitoring.stages import instrument
+except ImportError:
+    from monitoring.stages import instrument
+
 logger = logging.getLogger(__name__)
 
 
@@ -145,6 +150,7 @@ class CoalitionAnalyzer:
             """
             )
 
+    @instrument("coalition.pairwise_affinity", rows=len)
     def calculate_pairwise_affinity(
         self, min_shared_ballots: int = 100
     ) -> List[CandidateAffinity]:
@@ -223,6 +229,7 @@ class CoalitionAnalyzer:
         logger.info(f"Calculated {len(affinities)} candidate affinities")
         return affinities
 
+    @instrument("coalition.detailed_pairs", rows=len)
     def calculate_detailed_pairwise_analysis(
         self,
         min_shared_ballots: int = 10,
@@ -0,0 +1,170 @@
+"""
+Pairwise (Condorcet) Analysis
+
+Head-to-head preference counts between every pair of candidates: entry
+[a, b] of the pairwise matrix is the number of ballots ranking a above b.
+A candidate ranked on a ballot counts as above every candidate that ballot
+leaves unranked; ballots ranking neither candidate express no preference.
+
+The matrix is built in one vectorized pass over the weighted ballot patterns:
+every pair of rank positions (i < j) is a weighted bincount of
+``a * C + b`` pair codes, and the ranked-over-unranked part follows from
+per-candidate ranking totals, since ballots ranking a but not b are those
+ranking a minus those ranking both.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ..data.ballot_patterns import (
+        NO_CANDIDATE,
+        BallotPatterns,
+        load_ballot_patterns,
+    )
+    from ..data.database import CVRDatabase
+except ImportError:
+    from data.ballot_patterns import NO_CANDIDATE, BallotPatterns, load_ballot_patterns
+    from data.database import CVRDatabase
+
+logger = logging.getLogger(__name__)
+
+
+def pairwise_matrix(patterns: BallotPatterns) -> np.ndarray:
+    """
+    Count head-to-head preferences.
+
+    Returns:
+        (C, C) int64 matrix; entry [a, b] is the number of ballots ranking
+        dense candidate a above dense candidate b (diagonal is 0)
+    """
+    n = patterns.n_candidates
+    rankings = patterns.rankings.astype(np.int32)
+    counts = patterns.counts.astype(np.float64)
+
+    # Ballots ranking each candidate at all (padding falls into bin 0)
+    ranked = np.bincount(
+        (rankings + 1).ravel(),
+        weights=np.repeat(counts, patterns.max_rank),
+        minlength=n + 1,
+    )[1:]
+
+    # Both ranked: the earlier position wins. Padding is trailing, so an
+    # empty lower position is the only case to discard (into bin n * n).
+    first, second = np.triu_indices(patterns.max_rank, k=1)
+    codes = rankings[:, first] * n + rankings[:, second]
+    codes[rankings[:, second] == NO_CANDIDATE] = n * n
+    both_ranked = np.bincount(
+        codes.ravel(), weights=np.repeat(counts, len(first)), minlength=n * n + 1
+    )[: n * n].reshape(n, n)
+
+    ranked_together = both_ranked + both_ranked.T
+    matrix = both_ranked + (ranked[:, None] - ranked_together)
+    np.fill_diagonal(matrix, 0)
+    return np.rint(matrix).astype(np.int64)
+
+
+def condorcet_winner(matrix: np.ndarray) -> Optional[int]:
+    """Dense index of the candidate who beats every other head-to-head, if any."""
+    beats = matrix > matrix.T
+    wins = beats.sum(axis=1)
+    winner = np.flatnonzero(wins == len(matrix) - 1)
+    return int(winner[0]) if winner.size else None
+
+
+def smith_set(matrix: np.ndarray) -> List[int]:
+    """
+    Smallest set of candidates who each beat every candidate outside it.
+
+    A candidate is in the Smith set when it reaches every other candidate
+    through a chain of "beats or ties" results.
+    """
+    n = len(matrix)
+    reach = matrix >= matrix.T
+    # Transitive closure (Floyd-Warshall on booleans)
+    for k in range(n):
+        reach |= reach[:, k : k + 1] & reach[k : k + 1, :]
+    return [int(c) for c in np.flatnonzero(reach.all(axis=1))]
+
+
+@dataclass
+class PairwiseResult:
+    """Head-to-head results for every pair of candidates."""
+
+    candidate_ids: List[int]
+    candidate_names: List[str]
+    matrix: np.ndarray  # (C, C) ballots ranking row candidate above column
+    condorcet_winner: Optional[int]  # candidate ID, None if there is a cycle
+    smith_set: List[int]  # candidate IDs
+    copeland_scores: List[float]  # wins + ties / 2, per candidate
+    total_ballots: int
+
+
+class CondorcetAnalyzer:
+    """
+    Pairwise head-to-head analysis over ballot patterns.
+    """
+
+    def __init__(
+        self, db: Optional[CVRDatabase] = None, patterns: BallotPatterns = None
+    ):
+        """
+        Initialize Condorcet analyzer.
+
+        Args:
+            db: Database connection with ballot data (used if patterns not given)
+            patterns: Preloaded ballot patterns
+        """
+        if db is None and patterns is None:
+            raise ValueError("Either db or patterns must be provided")
+        self.db = db
+        self._patterns = patterns
+
+    @property
+    def patterns(self) -> BallotPatterns:
+        if self._patterns is None:
+            self._patterns = load_ballot_patterns(self.db)
+        return self._patterns
+
+    def analyze(self) -> PairwiseResult:
+        """Build the pairwise matrix and find the Condorcet winner / Smith set."""
+        patterns = self.patterns
+        matrix = pairwise_matrix(patterns)
+        ids = patterns.candidate_ids
+        winner = condorcet_winner(matrix)
+        copeland = (matrix > matrix.T).sum(axis=1) + 0.5 * (
+            (matrix == matrix.T).sum(axis=1) - 1
+        )
+        return PairwiseResult(
+            candidate_ids=[int(c) for c in ids],
+            candidate_names=[
+                patterns.candidate_name(c) for c in range(patterns.n_candidates)
+            ],
+            matrix=matrix,
+            condorcet_winner=int(ids[winner]) if winner is not None else None,
+            smith_set=[int(ids[c]) for c in smith_set(matrix)],
+            copeland_scores=copeland.tolist(),
+            total_ballots=patterns.total_ballots,
+        )
+
+    def pairs_to_dataframe(self, result: PairwiseResult) -> pd.DataFrame:
+        """One row per candidate pair (a < b) with both preference counts."""
+        a, b = np.triu_indices(len(result.candidate_ids), k=1)
+        matrix = result.matrix
+        ids = np.array(result.candidate_ids)
+        names = np.array(result.candidate_names, dtype=object)
+        return pd.DataFrame(
+            {
+                "candidate_a": ids[a],
+                "candidate_a_name": names[a],
+                "candidate_b": ids[b],
+                "candidate_b_name": names[b],
+                "a_over_b": matrix[a, b],
+                "b_over_a": matrix[b, a],
+                "margin": matrix[a, b] - matrix[b, a],
+            }
+        )
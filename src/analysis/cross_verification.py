@@ -0,0 +1,433 @@
+"""
+Cross-Verification Between STV Engines
+
+Tabulates the same elections with independent STV implementations and
+reports every place their results disagree. Each election is first copied
+into a read-only snapshot (``ballots_long`` and ``candidates`` only) so
+every engine counts exactly the same ballots; the engines then run at the
+same time in separate worker processes, so a full cross-verification takes
+about as long as the slowest engine alone.
+
+Round-by-round totals are compared by round index for the candidates
+continuing in that round. Engines that count in different steps (PyRankVote
+rejects hopeless candidates in bulk and uses an unrounded Droop quota)
+produce round discrepancies even when they elect the same winners, so
+winner agreement is reported separately from round-level agreement.
+"""
+
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import duckdb
+import pandas as pd
+
+try:
+    from ..data.database import CVRDatabase
+    from .stv import STVTabulator
+    from .stv_pyrankvote import PyRankVoteSTVTabulator
+    from .stv_vectorized import VectorizedSTVTabulator
+except ImportError:
+    from analysis.stv import STVTabulator
+    from analysis.stv_pyrankvote import PyRankVoteSTVTabulator
+    from analysis.stv_vectorized import VectorizedSTVTabulator
+    from data.database import CVRDatabase
+
+logger = logging.getLogger(__name__)
+
+# Engines in order of typical running time, slowest first, so the slowest
+# tasks start as soon as workers are available
+ENGINES = {
+    "sql": STVTabulator,
+    "pyrankvote": PyRankVoteSTVTabulator,
+    "vectorized": VectorizedSTVTabulator,
+}
+SNAPSHOT_TABLES = ("ballots_long", "candidates")
+
+
+@dataclass
+class EngineRun:
+    """One engine's count of one election, normalized for comparison."""
+
+    engine: str
+    election_id: str
+    seats: int
+    winners: List[int]
+    rounds: List[Dict[str, Any]]  # round, vote_totals, elected, eliminated, quota
+    elapsed_seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class Discrepancy:
+    """A difference between two engines' counts of the same election."""
+
+    election_id: str
+    seats: int
+    engine_a: str
+    engine_b: str
+    kind: str  # error, winners, round_count, quota, vote_total, elected, eliminated
+    round_number: Optional[int]
+    candidate_id: Optional[int]
+    value_a: Any
+    value_b: Any
+    difference: Optional[float] = None
+
+
+@dataclass
+class CrossVerificationReport:
+    """Results of cross-verifying engines over elections and seat counts."""
+
+    engines: List[str]
+    tolerance: float
+    runs: List[EngineRun]
+    discrepancies: List[Discrepancy]
+    wall_seconds: float
+    cases: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def winners_agree(self) -> bool:
+        """All engines elected the same candidates in every case."""
+        return not any(d.kind in ("error", "winners") for d in self.discrepancies)
+
+    @property
+    def passed(self) -> bool:
+        """No discrepancy of any kind beyond the tolerance."""
+        return not self.discrepancies
+
+    @property
+    def engine_seconds(self) -> Dict[str, float]:
+        """Total time each engine spent counting."""
+        totals: Dict[str, float] = {}
+        for run in self.runs:
+            totals[run.engine] = totals.get(run.engine, 0.0) + run.elapsed_seconds
+        return totals
+
+    def discrepancies_to_dataframe(self) -> pd.DataFrame:
+        columns = list(Discrepancy.__dataclass_fields__)
+        return pd.DataFrame([asdict(d) for d in self.discrepancies], columns=columns)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable report."""
+        return {
+            "engines": self.engines,
+            "tolerance": self.tolerance,
+            "passed": self.passed,
+            "winners_agree": self.winners_agree,
+            "wall_seconds": self.wall_seconds,
+            "engine_seconds": self.engine_seconds,
+            "cases": self.cases,
+            "discrepancies": [asdict(d) for d in self.discrepancies],
+        }
+
+
+def create_snapshot(db_path: str, snapshot_path: str) -> str:
+    """Copy the tables the engines read into a standalone DuckDB file."""
+    conn = duckdb.connect(snapshot_path)
+    try:
+        source = str(db_path).replace("'", "''")
+        conn.execute(f"ATTACH '{source}' AS source (READ_ONLY)")
+        for table in SNAPSHOT_TABLES:
+            conn.execute(f"CREATE TABLE {table} AS SELECT * FROM source.{table}")
+        conn.execute("DETACH source")
+    finally:
+        conn.close()
+    return snapshot_path
+
+
+def _normalize_rounds(tabulator) -> List[Dict[str, Any]]:
+    """
+    STVRound records as plain comparable dicts.
+
+    Vote totals are kept for the candidates still continuing after the round
+    (the engines differ in what they report for a candidate just elected).
+    """
+    rounds = []
+    decided = set()
+    for r in tabulator.rounds:
+        decided.update(int(c) for c in r.winners_this_round)
+        decided.update(int(c) for c in r.eliminated_this_round)
+        rounds.append(
+            {
+                "round": r.round_number,
+                "vote_totals": {
+                    int(c): float(v)
+                    for c, v in r.vote_totals.items()
+                    if int(c) not in decided
+                },
+                "elected": sorted(int(c) for c in r.winners_this_round),
+                "eliminated": sorted(int(c) for c in r.eliminated_this_round),
+                "quota": float(r.quota),
+            }
+        )
+    return rounds
+
+
+def _pyrankvote_rounds(tabulator: PyRankVoteSTVTabulator) -> List[Dict[str, Any]]:
+    """
+    Rounds rebuilt from PyRankVote's own round results (the adapter keeps
+    only a summary round).
+
+    PyRankVote registers each round before transferring votes, so the totals
+    after round k's transfers are those registered for round k + 1.
+    """
+    result = tabulator.pyrankvote_result
+    if result is None:
+        return _normalize_rounds(tabulator)
+
+    registered = [
+        {
+            int(r.candidate.name): (float(r.number_of_votes), r.status)
+            for r in round_result.candidate_results
+        }
+        for round_result in result.rounds
+    ]
+    quota = sum(votes for votes, _ in registered[0].values()) / (tabulator.seats + 1)
+
+    rounds = []
+    decided = set()
+    for number, outcomes in enumerate(registered, start=1):
+        changed = {
+            status: sorted(
+                c for c, (_, s) in outcomes.items() if s == status and c not in decided
+            )
+            for status in ("Elected", "Rejected")
+        }
+        decided.update(changed["Elected"], changed["Rejected"])
+        after = registered[number] if number < len(registered) else outcomes
+        rounds.append(
+            {
+                "round": number,
+                "vote_totals": {
+                    c: votes for c, (votes, _) in after.items() if c not in decided
+                },
+                "elected": changed["Elected"],
+                "eliminated": changed["Rejected"],
+                "quota": quota,
+            }
+        )
+    return rounds
+
+
+def _run_engine(engine: str, election_id: str, snapshot_path: str, seats: int):
+    """Worker task: count one election with one engine."""
+    start = time.time()
+    try:
+        with CVRDatabase(snapshot_path, read_only=True) as db:
+            tabulator = ENGINES[engine](db, seats=seats)
+            tabulator.run_stv_tabulation()
+            if engine == "pyrankvote":
+                rounds = _pyrankvote_rounds(tabulator)
+            else:
+                rounds = _normalize_rounds(tabulator)
+            winners = [int(c) for c in tabulator.winners]
+        error = None
+    except Exception as e:
+        logger.error(f"{engine} failed on {election_id} ({seats} seats): {e}")
+        winners, rounds, error = [], [], f"{type(e).__name__}: {e}"
+    return EngineRun(
+        engine=engine,
+        election_id=election_id,
+        seats=seats,
+        winners=winners,
+        rounds=rounds,
+        elapsed_seconds=time.time() - start,
+        error=error,
+    )
+
+
+def compare_runs(a: EngineRun, b: EngineRun, tolerance: float) -> List[Discrepancy]:
+    """
+    Diff two engines' counts of the same election.
+
+    Args:
+        a, b: Runs of the same election and seat count
+        tolerance: Largest vote total or quota difference treated as equal
+    """
+
+    def found(kind, round_number, candidate_id, value_a, value_b, difference=None):
+        return Discrepancy(
+            election_id=a.election_id,
+            seats=a.seats,
+            engine_a=a.engine,
+            engine_b=b.engine,
+            kind=kind,
+            round_number=round_number,
+            candidate_id=candidate_id,
+            value_a=value_a,
+            value_b=value_b,
+            difference=difference,
+        )
+
+    if a.error or b.error:
+        return [found("error", None, None, a.error, b.error)]
+
+    discrepancies = []
+    if sorted(a.winners) != sorted(b.winners):
+        discrepancies.append(
+            found("winners", None, None, sorted(a.winners), sorted(b.winners))
+        )
+    if len(a.rounds) != len(b.rounds):
+        discrepancies.append(
+            found("round_count", None, None, len(a.rounds), len(b.rounds))
+        )
+
+    decided_a, decided_b = set(), set()
+    for round_a, round_b in zip(a.rounds, b.rounds):
+        number = round_a["round"]
+        difference = round_b["quota"] - round_a["quota"]
+        if abs(difference) > tolerance:
+            discrepancies.append(
+                found(
+                    "quota",
+                    number,
+                    None,
+                    round_a["quota"],
+                    round_b["quota"],
+                    difference,
+                )
+            )
+
+        # Candidates an engine never mentions have no votes; ones it has
+        # already decided are not continuing (None)
+        decided_a.update(round_a["elected"], round_a["eliminated"])
+        decided_b.update(round_b["elected"], round_b["eliminated"])
+        totals_a, totals_b = round_a["vote_totals"], round_b["vote_totals"]
+        for candidate in sorted(set(totals_a) | set(totals_b)):
+            value_a = totals_a.get(candidate, None if candidate in decided_a else 0.0)
+            value_b = totals_b.get(candidate, None if candidate in decided_b else 0.0)
+            if value_a is None or value_b is None:
+                # Continuing for one engine only
+                discrepancies.append(
+                    found("vote_total", number, candidate, value_a, value_b)
+                )
+            elif abs(value_b - value_a) > tolerance:
+                discrepancies.append(
+                    found(
+                        "vote_total",
+                        number,
+                        candidate,
+                        value_a,
+                        value_b,
+                        value_b - value_a,
+                    )
+                )
+
+        for kind in ("elected", "eliminated"):
+            if round_a[kind] != round_b[kind]:
+                discrepancies.append(
+                    found(kind, number, None, round_a[kind], round_b[kind])
+                )
+
+    return discrepancies
+
+
+def cross_verify(
+    elections: Dict[str, str],
+    seats: Sequence[int] = (3,),
+    engines: Sequence[str] = ("sql", "pyrankvote"),
+    tolerance: float = 1e-6,
+    max_workers: Optional[int] = None,
+    snapshot_dir: Optional[str] = None,
+) -> CrossVerificationReport:
+    """
+    Count every election at every seat count with every engine, concurrently,
+    and diff each engine against the first.
+
+    Args:
+        elections: Election ID to database path
+        seats: Seat counts to tabulate
+        engines: Engine names from ENGINES; the first is the reference
+        tolerance: Largest vote total or quota difference treated as equal
+        max_workers: Worker processes (default: CPU count)
+        snapshot_dir: Where to write ballot snapshots (default: a temporary
+            directory removed afterwards)
+
+    Returns:
+        CrossVerificationReport with per-case timings and all discrepancies
+    """
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown engines: {', '.join(unknown)}")
+    if len(engines) < 2:
+        raise ValueError("Cross-verification needs at least two engines")
+    if not elections:
+        raise ValueError("No elections to verify")
+    if any(s < 1 for s in seats):
+        raise ValueError("Seat counts must be positive")
+    if tolerance < 0:
+        raise ValueError("tolerance must be non-negative")
+
+    start = time.time()
+    temporary = tempfile.TemporaryDirectory() if snapshot_dir is None else None
+    directory = Path(temporary.name if temporary else snapshot_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    try:
+        snapshots = {}
+        for election_id, db_path in elections.items():
+            snapshot = directory / f"{election_id}.snapshot.duckdb"
+            snapshot.unlink(missing_ok=True)
+            snapshots[election_id] = create_snapshot(db_path, str(snapshot))
+        logger.info(f"Snapshotted {len(snapshots)} elections in {directory}")
+
+        order = [e for e in ENGINES if e in engines]
+        tasks = [
+            (engine, election_id, snapshots[election_id], n_seats)
+            for engine in order
+            for election_id in elections
+            for n_seats in seats
+        ]
+        workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                runs = list(executor.map(_run_engine, *zip(*tasks)))
+        else:
+            runs = [_run_engine(*task) for task in tasks]
+    finally:
+        if temporary:
+            temporary.cleanup()
+
+    by_case = {(r.election_id, r.seats, r.engine): r for r in runs}
+    reference = engines[0]
+    discrepancies = []
+    cases = []
+    for election_id in elections:
+        for n_seats in seats:
+            case_runs = [by_case[(election_id, n_seats, e)] for e in engines]
+            case_discrepancies = [
+                d
+                for other in case_runs[1:]
+                for d in compare_runs(case_runs[0], other, tolerance)
+            ]
+            discrepancies.extend(case_discrepancies)
+            cases.append(
+                {
+                    "election_id": election_id,
+                    "seats": n_seats,
+                    "reference": reference,
+                    "winners": {r.engine: r.winners for r in case_runs},
+                    "rounds": {r.engine: len(r.rounds) for r in case_runs},
+                    "seconds": {r.engine: r.elapsed_seconds for r in case_runs},
+                    "discrepancies": len(case_discrepancies),
+                }
+            )
+
+    report = CrossVerificationReport(
+        engines=list(engines),
+        tolerance=tolerance,
+        runs=runs,
+        discrepancies=discrepancies,
+        wall_seconds=time.time() - start,
+        cases=cases,
+    )
+    logger.info(
+        f"Cross-verified {len(cases)} cases in {report.wall_seconds:.1f}s: "
+        f"{len(discrepancies)} discrepancies"
+    )
+    return report
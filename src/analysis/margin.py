@@ -0,0 +1,562 @@
+"""
+STV Margin of Victory
+
+Bounds on the smallest number of ballots that would have to be changed for
+a different set of candidates to win.
+
+Upper bound: concrete manipulations (replace k ballots whose first choice
+is a winner with ballots ranking only a losing candidate) are recounted
+with the array-based engine; the smallest k that changes the winner set is
+a verified upper bound.
+
+Lower bound: any different outcome has to diverge from the actual count at
+some round, by electing or eliminating a different candidate, and keep
+diverging until a loser is elected or a winner eliminated. The search walks
+these alternative decision sequences best-first. Each forced decision has a
+cheap cost from the round's tallies:
+- electing c in a round where nobody reached quota needs at least
+  quota - votes(c) ballots moved to c
+- eliminating c instead of the lowest candidate needs c to fall to the
+  bottom; each changed ballot closes that gap by at most 2 votes
+- skipping an election needs every candidate over quota pushed below it
+- electing c alongside, or instead of, r when r reached quota needs c lifted
+  to quota and r pushed below it (or, if c also reached quota, overtaken);
+  one changed ballot can do a vote of each
+A sequence costs at least its most expensive decision. Branches that cannot
+beat the upper bound are pruned, and the cheapest sequence that changes the
+winner set is a lower bound on the margin.
+
+The first divergence from the actual count is read from the cached round
+tallies; every such branch is searched independently, in parallel, within a
+shared time budget. When the budget runs out, the cheapest unexplored
+branch still gives a valid lower bound. The bound treats a changed ballot as
+moving at most one vote in each round. That holds until a surplus is
+transferred: changing a winner's pile also shifts the transfer value of
+every other ballot in it, which this model ignores. When any count the
+search relies on transfers a surplus that a later round still counts, the
+lower bound is reported as heuristic (``MarginResult.heuristic``). A surplus
+left over when the last seat is filled changes nothing, so single-winner
+(IRV) margins stay exact bounds.
+"""
+
+import heapq
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from ..data.ballot_patterns import NO_CANDIDATE, BallotPatterns
+    from .shared_arrays import attach_shared_arrays, get_shared_arrays, share_arrays
+    from .stv_vectorized import (
+        CONTINUING,
+        VOTE_TOLERANCE,
+        TabulationState,
+        VectorizedSTV,
+    )
+except ImportError:
+    from analysis.shared_arrays import (
+        attach_shared_arrays,
+        get_shared_arrays,
+        share_arrays,
+    )
+    from analysis.stv_vectorized import (
+        CONTINUING,
+        VOTE_TOLERANCE,
+        TabulationState,
+        VectorizedSTV,
+    )
+    from data.ballot_patterns import NO_CANDIDATE, BallotPatterns
+
+logger = logging.getLogger(__name__)
+
+# (elected, eliminated, surplus) for one round, as dense indices
+Decision = Tuple[Tuple[int, ...], Tuple[int, ...], bool]
+
+# Materialized search states kept per branch for replaying decision paths
+STATE_CACHE_SIZE = 32
+
+
+@dataclass
+class Manipulation:
+    """A verified change of ballots that alters the winner set."""
+
+    ballots: int
+    from_candidate: int  # first choice of the changed ballots
+    to_candidate: int  # the changed ballots rank only this candidate
+    winners: List[int]  # winners after the change
+
+
+@dataclass
+class MarginResult:
+    """Lower and upper bounds on the STV margin of victory."""
+
+    seats: int
+    winners: List[int]
+    total_ballots: int
+    lower_bound: int
+    upper_bound: Optional[int]  # None if no manipulation was found
+    manipulation: Optional[Manipulation]
+    branches: int  # first-divergence branches searched
+    nodes_expanded: int
+    complete: bool  # False if the time budget ran out
+    elapsed_seconds: float
+    # True if surplus transfers make the lower bound an estimate, not a bound
+    heuristic: bool = False
+    notes: List[str] = field(default_factory=list)
+
+    @property
+    def exact(self) -> bool:
+        return (
+            not self.heuristic
+            and self.upper_bound is not None
+            and self.lower_bound == self.upper_bound
+        )
+
+
+def _ballots(cost: float) -> int:
+    """Whole ballots needed to shift ``cost`` votes."""
+    return max(0, math.ceil(cost - VOTE_TOLERANCE))
+
+
+def _moves_surplus(
+    state: TabulationState, tallies: np.ndarray, decision: Decision
+) -> bool:
+    """
+    True if the decision transfers a winner's surplus that later rounds still
+    count. ``state`` is the state before the decision is applied.
+    """
+    elected, _, surplus = decision
+    if not surplus or not any(
+        tallies[c] > state.quota + VOTE_TOLERANCE for c in elected
+    ):
+        return False
+    # Once every remaining seat is settled no later tally depends on it
+    seats_left = state.seats - len(state.winners) - len(elected)
+    continuing = int((state.status == CONTINUING).sum()) - len(elected)
+    return seats_left > 0 and continuing > seats_left
+
+
+def alternative_decisions(
+    engine: VectorizedSTV, state: TabulationState, tallies: np.ndarray
+) -> List[Tuple[int, Decision]]:
+    """
+    Every decision a manipulation could force this round, with its minimum
+    cost in changed ballots. The decision the count actually makes costs 0.
+
+    ``state.history`` must already end with ``tallies``.
+    """
+    elected, eliminated, surplus = engine.decide(state, tallies)
+    natural = (tuple(elected), tuple(eliminated), surplus)
+    options = [(0, natural)]
+
+    continuing = np.flatnonzero(state.status == CONTINUING)
+    seats_left = state.seats - len(state.winners)
+    if len(continuing) <= seats_left:
+        return options  # everyone left is elected whatever the votes
+
+    quota = state.quota
+    reached = [int(c) for c in continuing if tallies[c] >= quota - VOTE_TOLERANCE]
+    if not reached:
+        # A candidate pushed up to exactly quota is elected with no surplus
+        for c in continuing:
+            c = int(c)
+            options.append((_ballots(quota - tallies[c]), ((c,), (), False)))
+    else:
+        # Electing fewer, more or other candidates than the count does. Keeping
+        # r out means pushing it below quota or, for c that also reached
+        # quota, letting c overtake it; a changed ballot moving a vote from r
+        # to c counts towards both, so the dearer of the two is the cost.
+        elected = [int(e) for e in elected]
+        keep_out = {r: tallies[r] - quota for r in elected}
+        if len(elected) > 1:
+            for r in elected:
+                rest = tuple(e for e in elected if e != r)
+                options.append((_ballots(keep_out[r]), (rest, (), True)))
+        for c in continuing:
+            c = int(c)
+            if c in elected:
+                continue
+            lift = max(quota - tallies[c], 0.0)
+            if len(elected) < seats_left:
+                options.append((_ballots(lift), (tuple(elected) + (c,), (), True)))
+            for r in elected:
+                cost = keep_out[r]
+                if c in reached:
+                    cost = min(cost, (tallies[r] - tallies[c]) / 2)
+                swapped = tuple(e for e in elected if e != r) + (c,)
+                options.append((_ballots(max(lift, cost)), (swapped, (), True)))
+
+    # Eliminating anyone means first keeping every candidate below quota
+    below_quota = max((tallies[c] - quota for c in reached), default=0.0)
+    lowest = tallies[continuing].min()
+    for c in continuing:
+        c = int(c)
+        if natural == ((), (c,), False):
+            continue
+        cost = max(below_quota, (tallies[c] - lowest) / 2)
+        options.append((_ballots(cost), ((), (c,), False)))
+    return options
+
+
+def _outcome(state: TabulationState, winners: frozenset) -> Optional[bool]:
+    """True if the winner set already differs, False if it matches, else None."""
+    if any(c not in winners for c in state.winners):
+        return True
+    if any(c in winners for c in state.eliminated):
+        return True
+    if winners.issubset(state.winners):
+        return False
+    return None
+
+
+class _BranchSearch:
+    """Best-first search of the decision sequences under one branch root."""
+
+    def __init__(
+        self,
+        engine: VectorizedSTV,
+        root: TabulationState,
+        winners: frozenset,
+        upper: int,
+        deadline: float,
+    ):
+        self.engine = engine
+        self.winners = winners
+        self.upper = upper
+        self.deadline = deadline
+        self.nodes = 0
+        self.moved_surplus = False
+        self._root = root
+        self._states: "OrderedDict[tuple, TabulationState]" = OrderedDict()
+
+    def _apply(self, state: TabulationState, decision: Decision) -> TabulationState:
+        state = state.copy()
+        current = self.engine.current_candidates(state)
+        tallies = self.engine.tally(state, current)
+        state.history.append(tallies)
+        self.engine._update_quota(state, tallies)
+        self.moved_surplus |= _moves_surplus(state, tallies, decision)
+        elected, eliminated, surplus = decision
+        self.engine.apply_decision(
+            state, current, tallies, list(elected), list(eliminated), surplus
+        )
+        return state
+
+    def _materialize(self, path: Tuple[Decision, ...]) -> TabulationState:
+        """Replay a decision path from the longest cached prefix."""
+        depth = len(path)
+        while depth and path[:depth] not in self._states:
+            depth -= 1
+        if depth:
+            state = self._states[path[:depth]]
+            self._states.move_to_end(path[:depth])
+        else:
+            state = self._root
+        for k in range(depth, len(path)):
+            state = self._apply(state, path[k])
+            self._states[path[: k + 1]] = state
+            if len(self._states) > STATE_CACHE_SIZE:
+                self._states.popitem(last=False)
+        return state
+
+    def run(self, root_cost: int) -> Tuple[int, bool]:
+        """
+        Returns:
+            Tuple of (lower bound for this branch, search completed)
+        """
+        heap = [(root_cost, 0, ())]
+        counter = 1
+        seen = set()
+        while heap:
+            cost, _, path = heap[0]
+            if cost >= self.upper:
+                return self.upper, True
+            if time.time() > self.deadline:
+                return cost, False
+            heapq.heappop(heap)
+
+            state = self._materialize(path)
+            key = (frozenset(state.winners), frozenset(state.eliminated))
+            if key in seen:
+                continue
+            seen.add(key)
+
+            outcome = _outcome(state, self.winners)
+            if outcome:
+                return cost, True
+            if outcome is False or self.engine.is_complete(state):
+                continue
+
+            self.nodes += 1
+            work = state.copy()
+            tallies = self.engine.tally(work)
+            work.history.append(tallies)
+            self.engine._update_quota(work, tallies)
+            for alt_cost, decision in alternative_decisions(self.engine, work, tallies):
+                child_cost = max(cost, alt_cost)
+                if child_cost < self.upper:
+                    heapq.heappush(heap, (child_cost, counter, path + (decision,)))
+                    counter += 1
+        return self.upper, True
+
+
+def _search_branches(
+    arrays: Dict[str, np.ndarray],
+    tasks: List[Tuple[int, TabulationState, Decision]],
+    winners: List[int],
+    upper: int,
+    deadline: float,
+) -> List[Tuple[int, int, bool, bool]]:
+    """
+    Search each (cost, checkpoint, first decision) branch.
+
+    Returns:
+        (lower bound, nodes expanded, completed, surplus moved) per branch
+    """
+    patterns = BallotPatterns(
+        candidate_ids=arrays["candidate_ids"],
+        rankings=arrays["rankings"],
+        counts=arrays["counts"],
+    )
+    engine = VectorizedSTV(patterns)
+    winner_set = frozenset(winners)
+    results = []
+    for cost, checkpoint, decision in tasks:
+        root = checkpoint.copy()
+        current = engine.current_candidates(root)
+        tallies = engine.tally(root, current)
+        root.history.append(tallies)
+        engine._update_quota(root, tallies)
+        moved = _moves_surplus(root, tallies, decision)
+        elected, eliminated, surplus = decision
+        engine.apply_decision(
+            root, current, tallies, list(elected), list(eliminated), surplus
+        )
+        search = _BranchSearch(engine, root, winner_set, upper, deadline)
+        lower, complete = search.run(cost)
+        results.append((lower, search.nodes, complete, moved or search.moved_surplus))
+    return results
+
+
+def _search_shared_branches(*args) -> List[Tuple[int, int, bool, bool]]:
+    return _search_branches(get_shared_arrays(), *args)
+
+
+def _count_winners(patterns: BallotPatterns, seats: int) -> List[int]:
+    engine = VectorizedSTV(patterns)
+    return engine.run(engine.initial_state(seats)).winners
+
+
+def find_manipulation(
+    patterns: BallotPatterns,
+    seats: int,
+    winners: List[int],
+    losers: List[int],
+    start: int = 1,
+    deadline: Optional[float] = None,
+) -> Optional[Manipulation]:
+    """
+    Smallest verified manipulation of the form "k ballots with a winner first
+    become ballots ranking only a loser", over the given winner/loser pairs.
+
+    For each pair, k doubles from ``start`` until the winner set changes and
+    is then narrowed by bisection; every candidate k is recounted.
+    """
+    first = patterns.rankings[:, 0]
+    best: Optional[Tuple[int, int, int, List[int]]] = None
+    for w in winners:
+        donors = np.flatnonzero(first == w)
+        donors = donors[np.argsort(-patterns.counts[donors], kind="stable")]
+        available = int(patterns.counts[donors].sum())
+        for loser in losers:
+            limit = available if best is None else min(available, best[0] - 1)
+
+            def changed(k: int) -> Optional[List[int]]:
+                counts = patterns.counts.astype(np.int64)
+                taken = np.minimum(
+                    counts[donors],
+                    np.maximum(k - np.cumsum(counts[donors]) + counts[donors], 0),
+                )
+                counts[donors] -= taken
+                ranking = np.full((1, patterns.max_rank), NO_CANDIDATE, np.int16)
+                ranking[0, 0] = loser
+                modified = BallotPatterns(
+                    candidate_ids=patterns.candidate_ids,
+                    rankings=np.vstack([patterns.rankings, ranking]),
+                    counts=np.append(counts, k),
+                )
+                result = _count_winners(modified, seats)
+                return result if set(result) != set(winners) else None
+
+            k, found = max(1, start), None
+            while k <= limit:
+                if deadline and time.time() > deadline:
+                    break
+                found = changed(k)
+                if found:
+                    break
+                k = min(k * 2, limit) if k < limit else limit + 1
+            if not found:
+                continue
+            lo, hi, hi_winners = k // 2, k, found
+            while hi - lo > 1 and not (deadline and time.time() > deadline):
+                mid = (lo + hi) // 2
+                mid_winners = changed(mid)
+                if mid_winners:
+                    hi, hi_winners = mid, mid_winners
+                else:
+                    lo = mid
+            if best is None or hi < best[0]:
+                best = (hi, w, loser, hi_winners)
+
+    if best is None:
+        return None
+    ids = patterns.candidate_ids
+    return Manipulation(
+        ballots=best[0],
+        from_candidate=int(ids[best[1]]),
+        to_candidate=int(ids[best[2]]),
+        winners=[int(ids[c]) for c in best[3]],
+    )
+
+
+def compute_margin(
+    patterns: BallotPatterns,
+    seats: int = 3,
+    time_budget: float = 30.0,
+    max_workers: Optional[int] = None,
+    max_losers: int = 3,
+) -> MarginResult:
+    """
+    Compute lower and upper bounds on the margin of victory.
+
+    Args:
+        patterns: Ballot patterns of the election
+        seats: Number of seats to fill
+        time_budget: Seconds allowed for the whole analysis
+        max_workers: Worker processes (None = CPU count, 1 = run in-process)
+        max_losers: Strongest losing candidates tried for the upper bound
+
+    Returns:
+        MarginResult with the bounds and a verified manipulation
+    """
+    if seats < 1:
+        raise ValueError("seats must be positive")
+    if time_budget <= 0:
+        raise ValueError("time_budget must be positive")
+
+    start = time.time()
+    deadline = start + time_budget
+    engine = VectorizedSTV(patterns)
+    baseline = engine.run(engine.initial_state(seats), checkpoint=True)
+    winners = list(baseline.winners)
+    seats = baseline.seats
+
+    # Root branches: every alternative to each round's decision, costed from
+    # the round tallies cached in the baseline count
+    branches = []
+    moved_surplus = False  # in the actual count, before any branch diverges
+    for checkpoint, tallies in zip(baseline.checkpoints, baseline.history):
+        state = checkpoint.copy()
+        state.history.append(tallies)
+        engine._update_quota(state, tallies)
+        options = alternative_decisions(engine, state, tallies)
+        for cost, decision in options[1:]:
+            branches.append((cost, checkpoint, decision, moved_surplus))
+        moved_surplus |= _moves_surplus(state, tallies, options[0][1])
+    branches.sort(key=lambda b: b[0])
+    cheapest = branches[0][0] if branches else 0
+
+    # Upper bound from the strongest losers: those never eliminated (by final
+    # tally), then the last eliminated
+    remaining = [
+        int(c)
+        for c in np.argsort(-baseline.history[-1], kind="stable")
+        if c not in winners and c not in baseline.eliminated
+    ]
+    losers = remaining + list(reversed(baseline.eliminated))
+    manipulation = find_manipulation(
+        patterns,
+        seats,
+        winners,
+        losers[:max_losers],
+        start=max(1, cheapest),
+        deadline=deadline,
+    )
+    upper = manipulation.ballots if manipulation else patterns.total_ballots
+
+    searched = [b for b in branches if b[0] < upper]
+    tasks = [b[:3] for b in searched]
+    arrays = {
+        "candidate_ids": patterns.candidate_ids,
+        "rankings": np.ascontiguousarray(patterns.rankings),
+        "counts": patterns.counts,
+    }
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        # Interleave so each worker gets cheap and expensive branches
+        blocks = [tasks[i::workers] for i in range(workers)]
+        with share_arrays(arrays) as spec:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=attach_shared_arrays,
+                initargs=(spec,),
+            ) as executor:
+                results = [
+                    r
+                    for block in executor.map(
+                        _search_shared_branches,
+                        blocks,
+                        [winners] * workers,
+                        [upper] * workers,
+                        [deadline] * workers,
+                    )
+                    for r in block
+                ]
+    elif tasks:
+        results = _search_branches(arrays, tasks, winners, upper, deadline)
+    else:
+        results = []
+
+    lower = min([upper] + [r[0] for r in results])
+    complete = all(r[2] for r in results)
+    heuristic = any(b[3] for b in searched) or any(r[3] for r in results)
+    notes = []
+    if not complete:
+        notes.append("Time budget reached; lower bound from unexplored branches")
+    if heuristic:
+        notes.append(
+            "Surplus transfers involved; the lower bound ignores transfer-value "
+            "shifts and is an estimate"
+        )
+    if manipulation is None:
+        notes.append("No manipulation found; upper bound is the ballot count")
+
+    ids = patterns.candidate_ids
+    result = MarginResult(
+        seats=seats,
+        winners=[int(ids[c]) for c in winners],
+        total_ballots=patterns.total_ballots,
+        lower_bound=lower,
+        upper_bound=manipulation.ballots if manipulation else None,
+        manipulation=manipulation,
+        branches=len(tasks),
+        nodes_expanded=sum(r[1] for r in results),
+        complete=complete,
+        elapsed_seconds=time.time() - start,
+        heuristic=heuristic,
+        notes=notes,
+    )
+    logger.info(
+        f"Margin bounds [{result.lower_bound}, {result.upper_bound}] from "
+        f"{result.branches} branches, {result.nodes_expanded} nodes in "
+        f"{result.elapsed_seconds:.2f}s"
+    )
+    return result
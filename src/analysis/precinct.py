@@ -0,0 +1,310 @@
+"""
+Precinct-Level Analytics Cube
+
+Builds a precinct × candidate × rank aggregate so precinct questions (first
+choices, rank distributions, which candidates share ballots) can be answered
+from small tables instead of scanning ``ballots_long``.
+
+The rank axis is the CVR ``rank_position`` from ``ballots_long``, so rank 1
+agrees with ``first_choice_totals``: a skipped rank stays empty and every
+candidate of an over-voted rank is counted there. A candidate marked at
+several ranks counts once, at the highest. Candidate pairs come
+from per-precinct ballot patterns; precincts are independent, so they are
+split into chunks and aggregated in parallel worker processes.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ..data.ballot_patterns import (
+        NO_CANDIDATE,
+        BallotPatterns,
+        encode_precincts,
+        load_ballot_patterns,
+    )
+    from ..data.database import CVRDatabase
+except ImportError:
+    from data.ballot_patterns import (
+        NO_CANDIDATE,
+        BallotPatterns,
+        encode_precincts,
+        load_ballot_patterns,
+    )
+    from data.database import CVRDatabase
+
+logger = logging.getLogger(__name__)
+
+
+def _aggregate_precinct_chunk(
+    precinct_index: np.ndarray,
+    rankings: np.ndarray,
+    counts: np.ndarray,
+    n_precincts: int,
+    n_candidates: int,
+) -> np.ndarray:
+    """
+    Aggregate candidate pairs for one chunk of precincts.
+
+    Args:
+        precinct_index: (P,) chunk-local precinct index of each pattern
+        rankings: (P, R) dense candidate indices, -1 padded
+        counts: (P,) ballots per pattern
+        n_precincts: Number of precincts in the chunk
+        n_candidates: Number of candidates
+
+    Returns:
+        Pair cube (n_precincts, C, C)
+    """
+    n_patterns = rankings.shape[0]
+    rows, positions = np.nonzero(rankings != NO_CANDIDATE)
+
+    # Weighted co-occurrence of candidates per precinct
+    presence = np.zeros((n_patterns, n_candidates + 1), dtype=np.float64)
+    presence[rows, rankings[rows, positions]] = 1.0
+    presence = presence[:, :n_candidates]
+    pair_cube = np.zeros((n_precincts, n_candidates, n_candidates))
+    boundaries = np.searchsorted(precinct_index, np.arange(n_precincts + 1))
+    for p in range(n_precincts):
+        block = presence[boundaries[p] : boundaries[p + 1]]
+        weights = counts[boundaries[p] : boundaries[p + 1]]
+        pair_cube[p] = (block * weights[:, None]).T @ block
+
+    return np.rint(pair_cube).astype(np.int64)
+
+
+class PrecinctAnalyzer:
+    """
+    Builds and summarizes the precinct analytics cube.
+    """
+
+    def __init__(
+        self, db: Optional[CVRDatabase] = None, patterns: BallotPatterns = None
+    ):
+        """
+        Initialize precinct analyzer.
+
+        Args:
+            db: Database connection with ballot data
+            patterns: Preloaded per-precinct ballot patterns of ``db``
+        """
+        if db is None:
+            # Patterns close up skipped ranks, so CVR ranks come from the db
+            raise ValueError("A database is required for CVR rank positions")
+        if patterns is not None and patterns.precinct_ids is None:
+            raise ValueError("Patterns must be loaded with by_precinct=True")
+        self.db = db
+        self._patterns = patterns
+
+    @property
+    def patterns(self) -> BallotPatterns:
+        if self._patterns is None:
+            self._patterns = load_ballot_patterns(self.db, by_precinct=True)
+        return self._patterns
+
+    def compute_cube(
+        self, max_workers: Optional[int] = None, chunk_size: int = 64
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Aggregate ballot patterns into dense precinct cubes.
+
+        Args:
+            max_workers: Worker processes (None = CPU count, 1 = run in-process)
+            chunk_size: Precincts per parallel task
+
+        Returns:
+            Tuple of (precinct_ids, rank_cube[K, C, R], pair_cube[K, C, C])
+        """
+        patterns = self.patterns
+        precinct_ids, precinct_index = np.unique(
+            patterns.precinct_ids, return_inverse=True
+        )
+        n_precincts = len(precinct_ids)
+        n_candidates = patterns.n_candidates
+        rank_cube = self._count_rank_marks(precinct_ids)
+
+        if n_precincts == 0 or patterns.max_rank == 0:
+            return (
+                precinct_ids,
+                rank_cube,
+                np.zeros((n_precincts, n_candidates, n_candidates), dtype=np.int64),
+            )
+
+        order = np.argsort(precinct_index, kind="stable")
+        precinct_index = precinct_index[order]
+        rankings = patterns.rankings[order]
+        counts = patterns.counts[order]
+
+        # Each task gets a contiguous block of precincts
+        chunk_starts = list(range(0, n_precincts, chunk_size))
+        tasks = []
+        for start in chunk_starts:
+            stop = min(start + chunk_size, n_precincts)
+            lo, hi = np.searchsorted(precinct_index, [start, stop])
+            tasks.append(
+                (
+                    precinct_index[lo:hi] - start,
+                    rankings[lo:hi],
+                    counts[lo:hi],
+                    stop - start,
+                    n_candidates,
+                )
+            )
+
+        workers = max_workers or os.cpu_count() or 1
+        workers = min(workers, len(tasks))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_aggregate_precinct_chunk, *zip(*tasks)))
+        else:
+            results = [_aggregate_precinct_chunk(*task) for task in tasks]
+
+        return precinct_ids, rank_cube, np.concatenate(results, axis=0)
+
+    def _count_rank_marks(self, precinct_ids: np.ndarray) -> np.ndarray:
+        """
+        Count ballots per (precinct, candidate, highest CVR rank marked).
+
+        Args:
+            precinct_ids: (K,) sorted precinct IDs of the patterns
+
+        Returns:
+            Rank cube (K, C, R) where R is the highest CVR rank marked
+        """
+        patterns = self.patterns
+        marks = self.db.query(
+            """
+            WITH first_marks AS (
+                SELECT BallotID, PrecinctID, candidate_id,
+                       MIN(rank_position) as rank_position
+                FROM ballots_long
+                GROUP BY BallotID, PrecinctID, candidate_id
+            )
+            SELECT PrecinctID, candidate_id, rank_position, COUNT(*) as ballots
+            FROM first_marks
+            GROUP BY PrecinctID, candidate_id, rank_position
+            """
+        )
+        max_rank = int(marks["rank_position"].max()) if len(marks) else 0
+        n_cells = len(precinct_ids) * patterns.n_candidates * max_rank
+        if n_cells == 0:
+            return np.zeros(
+                (len(precinct_ids), patterns.n_candidates, max_rank), dtype=np.int64
+            )
+
+        precincts, _ = encode_precincts(
+            marks["PrecinctID"], labels=patterns.precinct_labels
+        )
+        k = np.searchsorted(precinct_ids, precincts)
+        c = np.searchsorted(
+            patterns.candidate_ids, marks["candidate_id"].to_numpy(dtype=np.int64)
+        )
+        r = marks["rank_position"].to_numpy(dtype=np.int64) - 1
+        keys = (k * patterns.n_candidates + c) * max_rank + r
+        return (
+            np.bincount(
+                keys,
+                weights=marks["ballots"].to_numpy(dtype=np.float64),
+                minlength=n_cells,
+            )
+            .reshape(len(precinct_ids), patterns.n_candidates, max_rank)
+            .astype(np.int64)
+        )
+
+    def build_tables(
+        self, max_workers: Optional[int] = None, chunk_size: int = 64
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Build the precinct cube as flat tables.
+
+        Returns:
+            Dict with ``precinct_rank_cube`` (precinct, candidate, CVR rank, ballots),
+            ``precinct_pairs`` (precinct, candidate pair, shared ballots) and
+            ``precinct_summary`` (one row per precinct)
+        """
+        start = time.time()
+        patterns = self.patterns
+        precinct_ids, rank_cube, pair_cube = self.compute_cube(
+            max_workers=max_workers, chunk_size=chunk_size
+        )
+
+        # Sparse long format: only non-zero cells are stored
+        k, c, r = np.nonzero(rank_cube)
+        cube_df = pd.DataFrame(
+            {
+                "precinct_id": precinct_ids[k],
+                "candidate_id": patterns.candidate_ids[c],
+                "rank_position": r + 1,
+                "ballot_count": rank_cube[k, c, r],
+            }
+        )
+
+        upper = np.triu(np.ones(pair_cube.shape[1:], dtype=bool), k=1)
+        k, a, b = np.nonzero((pair_cube > 0) & upper)
+        pairs_df = pd.DataFrame(
+            {
+                "precinct_id": precinct_ids[k],
+                "candidate_1": patterns.candidate_ids[a],
+                "candidate_2": patterns.candidate_ids[b],
+                "shared_ballots": pair_cube[k, a, b],
+            }
+        )
+
+        summary_df = self._build_summary(precinct_ids, rank_cube, pair_cube)
+
+        logger.info(
+            f"Built precinct cube for {len(precinct_ids)} precincts "
+            f"({len(cube_df):,} cells, {len(pairs_df):,} pairs) "
+            f"in {time.time() - start:.2f}s"
+        )
+        return {
+            "precinct_rank_cube": cube_df,
+            "precinct_pairs": pairs_df,
+            "precinct_summary": summary_df,
+        }
+
+    def _build_summary(
+        self, precinct_ids: np.ndarray, rank_cube: np.ndarray, pair_cube: np.ndarray
+    ) -> pd.DataFrame:
+        """One row per precinct with totals and the first-choice leader."""
+        patterns = self.patterns
+        # Skipped or over-voted first ranks mean ballots != rank-1 marks
+        total_ballots = np.bincount(
+            np.searchsorted(precinct_ids, patterns.precinct_ids),
+            weights=patterns.counts,
+            minlength=len(precinct_ids),
+        ).astype(np.int64)
+        first_choices = rank_cube[:, :, 0] if rank_cube.shape[2] else rank_cube.sum(2)
+        total_marks = rank_cube.sum(axis=(1, 2))
+        leader = first_choices.argmax(axis=1) if first_choices.size else []
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            leader_share = np.where(
+                total_ballots > 0,
+                100.0 * first_choices.max(axis=1, initial=0) / total_ballots,
+                0.0,
+            )
+            avg_ranks = np.where(total_ballots > 0, total_marks / total_ballots, 0.0)
+
+        # Ballots per precinct ranking each candidate anywhere (diagonal)
+        candidates_ranked = (np.diagonal(pair_cube, axis1=1, axis2=2) > 0).sum(axis=1)
+
+        return pd.DataFrame(
+            {
+                "precinct_id": precinct_ids,
+                "total_ballots": total_ballots,
+                "avg_ranks_used": avg_ranks,
+                "candidates_ranked": candidates_ranked,
+                "leading_candidate_id": (
+                    patterns.candidate_ids[leader] if len(leader) else []
+                ),
+                "leading_candidate_name": [patterns.candidate_name(i) for i in leader],
+                "leading_first_choice_percentage": leader_share,
+            }
+        )
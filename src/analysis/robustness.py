@@ -0,0 +1,372 @@
+"""
+STV Robustness Analysis
+
+Monte Carlo estimate of how stable an STV outcome is under sampling noise
+or ballot handling errors. Each replicate redraws the ballot count of every
+ranking pattern and is tabulated with the array-based engine; the results
+give each candidate's win probability and the distribution of the round in
+which they were elected or eliminated.
+
+Replicate methods:
+- ``bootstrap``: resample the same number of ballots with replacement
+  (multinomial over the patterns)
+- ``perturb``: lose each ballot independently with probability
+  ``error_rate`` (binomial thinning of every pattern)
+
+Replicate i always draws from the i-th child of ``SeedSequence(seed)``, so
+results depend only on the seed, never on batch size or worker count.
+Replicates are tabulated in batches across a process pool whose workers map
+the ballot arrays from shared memory.
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ..data.ballot_patterns import BallotPatterns, load_ballot_patterns
+    from ..data.database import CVRDatabase
+    from .shared_arrays import attach_shared_arrays, get_shared_arrays, share_arrays
+    from .stv_rules import STVRules, get_rules
+    from .stv_vectorized import ELECTED, ELIMINATED, create_engine
+except ImportError:
+    from analysis.shared_arrays import (
+        attach_shared_arrays,
+        get_shared_arrays,
+        share_arrays,
+    )
+    from analysis.stv_rules import STVRules, get_rules
+    from analysis.stv_vectorized import ELECTED, ELIMINATED, create_engine
+    from data.ballot_patterns import BallotPatterns, load_ballot_patterns
+    from data.database import CVRDatabase
+
+logger = logging.getLogger(__name__)
+
+RESAMPLING_METHODS = ("bootstrap", "perturb")
+
+
+@dataclass
+class RobustnessResult:
+    """Aggregated outcome of a robustness run."""
+
+    seats: int
+    method: str
+    replicates: int
+    seed: int
+    baseline_winners: List[int]
+    # One row per candidate: wins, win_probability, standard_error, ...
+    win_probability: pd.DataFrame
+    # One row per candidate, outcome and round: replicates decided there
+    decision_rounds: pd.DataFrame
+    # One row per distinct set of winners
+    winner_sets: pd.DataFrame
+    elapsed_seconds: float
+
+
+def resample_counts(
+    counts: np.ndarray,
+    rng: np.random.Generator,
+    method: str = "bootstrap",
+    error_rate: float = 0.01,
+) -> np.ndarray:
+    """
+    Draw one replicate of the pattern counts.
+
+    Args:
+        counts: (P,) ballots per pattern
+        rng: Random generator for this replicate
+        method: ``bootstrap`` or ``perturb``
+        error_rate: Probability a ballot is lost (perturb only)
+    """
+    if method == "bootstrap":
+        total = int(counts.sum())
+        return rng.multinomial(total, counts / total)
+    if method == "perturb":
+        return counts - rng.binomial(counts, error_rate)
+    raise ValueError(f"Unknown resampling method: {method}")
+
+
+def _run_replicates(
+    arrays: Dict[str, np.ndarray],
+    start: int,
+    stop: int,
+    seats: int,
+    rules: STVRules,
+    method: str,
+    error_rate: float,
+    seed: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tabulate replicates ``start`` to ``stop``.
+
+    Returns:
+        Tuple of (outcome, decision_round, winners): (B, C) status codes,
+        (B, C) round each candidate was elected or eliminated (0 if never),
+        and (B, seats) dense winner indices in order of election (-1 padded)
+    """
+    candidate_ids = arrays["candidate_ids"]
+    rankings = arrays["rankings"]
+    counts = arrays["counts"].astype(np.int64)
+    n_candidates = len(candidate_ids)
+
+    n_replicates = stop - start
+    outcome = np.zeros((n_replicates, n_candidates), dtype=np.int8)
+    decision_round = np.zeros((n_replicates, n_candidates), dtype=np.int16)
+    winners = np.full((n_replicates, seats), -1, dtype=np.int16)
+
+    for row, replicate in enumerate(range(start, stop)):
+        rng = np.random.default_rng(
+            np.random.SeedSequence(entropy=seed, spawn_key=(replicate,))
+        )
+        replicate_counts = resample_counts(counts, rng, method, error_rate)
+        drawn = replicate_counts > 0  # unsampled patterns add nothing
+        patterns = BallotPatterns(
+            candidate_ids=candidate_ids,
+            rankings=rankings[drawn],
+            counts=replicate_counts[drawn],
+        )
+        engine = create_engine(patterns, rules)
+        state = engine.run(engine.initial_state(seats))
+
+        outcome[row] = np.where(
+            np.isin(state.status, (ELECTED, ELIMINATED)), state.status, 0
+        )
+        for round_obj in state.rounds:
+            decided = round_obj.winners_this_round + round_obj.eliminated_this_round
+            for cid in decided:
+                decision_round[row, engine.patterns.candidate_index(cid)] = (
+                    round_obj.round_number
+                )
+        winners[row, : len(state.winners)] = state.winners
+
+    return outcome, decision_round, winners
+
+
+def _run_shared_replicates(*args) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return _run_replicates(get_shared_arrays(), *args)
+
+
+def run_robustness(
+    patterns: BallotPatterns,
+    seats: int = 3,
+    replicates: int = 1000,
+    method: str = "bootstrap",
+    error_rate: float = 0.01,
+    seed: int = 0,
+    rules: Union[str, STVRules, None] = None,
+    batch_size: int = 50,
+    max_workers: Optional[int] = None,
+) -> RobustnessResult:
+    """
+    Tabulate resampled replicates of an election and summarize the outcomes.
+
+    Args:
+        patterns: Ballot patterns of the election
+        seats: Number of seats to fill
+        replicates: Number of replicates to draw
+        method: ``bootstrap`` or ``perturb`` (see module docstring)
+        error_rate: Probability a ballot is lost (perturb only)
+        seed: Seed for the replicate streams
+        rules: Counting rules or preset name (default: Droop + Gregory)
+        batch_size: Replicates per task sent to a worker
+        max_workers: Worker processes (None = CPU count, 1 = run in-process)
+
+    Returns:
+        RobustnessResult with win probabilities and decision round tables
+    """
+    if method not in RESAMPLING_METHODS:
+        raise ValueError(
+            f"Unknown resampling method: {method} "
+            f"(choose from {', '.join(RESAMPLING_METHODS)})"
+        )
+    if not 0 <= error_rate < 1:
+        raise ValueError("error_rate must be in [0, 1)")
+    if replicates < 1 or batch_size < 1:
+        raise ValueError("replicates and batch_size must be positive")
+
+    start = time.time()
+    rules = get_rules(rules)
+    baseline_engine = create_engine(patterns, rules)
+    baseline = baseline_engine.run(baseline_engine.initial_state(seats))
+    seats = baseline.seats  # rules may fix the number of seats
+
+    arrays = {
+        "candidate_ids": patterns.candidate_ids,
+        "rankings": np.ascontiguousarray(patterns.rankings),
+        "counts": patterns.counts,
+    }
+    tasks = [
+        (lo, min(lo + batch_size, replicates))
+        for lo in range(0, replicates, batch_size)
+    ]
+    task_args = [(seats, rules, method, error_rate, seed)] * len(tasks)
+
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        with share_arrays(arrays) as spec:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=attach_shared_arrays,
+                initargs=(spec,),
+            ) as executor:
+                results = list(
+                    executor.map(
+                        _run_shared_replicates,
+                        [lo for lo, _ in tasks],
+                        [hi for _, hi in tasks],
+                        *zip(*task_args),
+                    )
+                )
+    else:
+        results = [
+            _run_replicates(arrays, lo, hi, *args)
+            for (lo, hi), args in zip(tasks, task_args)
+        ]
+
+    outcome = np.concatenate([r[0] for r in results])
+    decision_round = np.concatenate([r[1] for r in results])
+    winners = np.concatenate([r[2] for r in results])
+    elapsed = time.time() - start
+
+    result = RobustnessResult(
+        seats=seats,
+        method=method,
+        replicates=replicates,
+        seed=seed,
+        baseline_winners=[int(patterns.candidate_ids[c]) for c in baseline.winners],
+        win_probability=_win_probability(patterns, baseline, outcome, decision_round),
+        decision_rounds=_decision_rounds(patterns, outcome, decision_round),
+        winner_sets=_winner_sets(patterns, winners),
+        elapsed_seconds=elapsed,
+    )
+    logger.info(
+        f"Robustness: {replicates} {method} replicates ({seats} seats) with "
+        f"{workers} worker(s) in {elapsed:.2f}s"
+    )
+    return result
+
+
+def _win_probability(
+    patterns: BallotPatterns,
+    baseline,
+    outcome: np.ndarray,
+    decision_round: np.ndarray,
+) -> pd.DataFrame:
+    n_replicates = len(outcome)
+    elected = outcome == ELECTED
+    wins = elected.sum(axis=0)
+    probability = wins / n_replicates
+    with np.errstate(invalid="ignore"):
+        mean_round = np.where(
+            wins > 0,
+            (decision_round * elected).sum(axis=0) / np.maximum(wins, 1),
+            np.nan,
+        )
+
+    baseline_winners = np.zeros(patterns.n_candidates, dtype=bool)
+    baseline_winners[baseline.winners] = True
+    table = pd.DataFrame(
+        {
+            "candidate_id": patterns.candidate_ids.astype(int),
+            "candidate_name": [
+                patterns.candidate_name(c) for c in range(patterns.n_candidates)
+            ],
+            "baseline_winner": baseline_winners,
+            "wins": wins.astype(int),
+            "win_probability": probability,
+            "standard_error": np.sqrt(probability * (1 - probability) / n_replicates),
+            "mean_election_round": mean_round,
+        }
+    )
+    return table.sort_values(
+        ["win_probability", "candidate_id"], ascending=[False, True]
+    ).reset_index(drop=True)
+
+
+def _decision_rounds(
+    patterns: BallotPatterns, outcome: np.ndarray, decision_round: np.ndarray
+) -> pd.DataFrame:
+    n_replicates, n_candidates = outcome.shape
+    candidate = np.broadcast_to(np.arange(n_candidates), outcome.shape).ravel()
+    frame = pd.DataFrame(
+        {
+            "candidate": candidate,
+            "outcome": outcome.ravel(),
+            "round": decision_round.ravel(),
+        }
+    )
+    frame = frame[frame["outcome"] > 0]
+    table = (
+        frame.groupby(["candidate", "outcome", "round"])
+        .size()
+        .rename("replicates")
+        .reset_index()
+    )
+    table["share"] = table["replicates"] / n_replicates
+    table["outcome"] = table["outcome"].map(
+        {ELECTED: "elected", ELIMINATED: "eliminated"}
+    )
+    table.insert(
+        0, "candidate_id", patterns.candidate_ids[table["candidate"]].astype(int)
+    )
+    table.insert(
+        1,
+        "candidate_name",
+        [patterns.candidate_name(c) for c in table["candidate"]],
+    )
+    return table.drop(columns="candidate")
+
+
+def _winner_sets(patterns: BallotPatterns, winners: np.ndarray) -> pd.DataFrame:
+    sets = Counter(
+        tuple(sorted(int(patterns.candidate_ids[c]) for c in row if c >= 0))
+        for row in winners
+    )
+    rows = [
+        {
+            "winners": list(winner_set),
+            "candidate_names": [
+                patterns.candidate_name(patterns.candidate_index(c)) for c in winner_set
+            ],
+            "replicates": n,
+            "share": n / len(winners),
+        }
+        for winner_set, n in sets.most_common()
+    ]
+    return pd.DataFrame(rows)
+
+
+class RobustnessAnalyzer:
+    """
+    Runs robustness analyses against a database's ballot patterns.
+    """
+
+    def __init__(self, db: CVRDatabase, patterns: BallotPatterns = None):
+        """
+        Initialize robustness analyzer.
+
+        Args:
+            db: Database connection with ballot data
+            patterns: Preloaded ballot patterns (loaded from db if omitted)
+        """
+        self.db = db
+        self._patterns = patterns
+
+    @property
+    def patterns(self) -> BallotPatterns:
+        if self._patterns is None:
+            self._patterns = load_ballot_patterns(self.db)
+        return self._patterns
+
+    def run(self, seats: int = 3, replicates: int = 1000, **kwargs) -> RobustnessResult:
+        """Run a robustness analysis; see run_robustness for options."""
+        return run_robustness(
+            self.patterns, seats=seats, replicates=replicates, **kwargs
+        )
@@ -0,0 +1,68 @@
+"""
+Shared-Memory Arrays for Worker Pools
+
+Parallel analyses (partition tabulation, margin search, robustness
+replicates) run many tasks over the same ballot arrays. Rather than pickling
+a copy into every task, the parent copies the arrays into shared memory once
+and each worker process maps them read-only:
+
+    with share_arrays(arrays) as spec:
+        with ProcessPoolExecutor(
+            initializer=attach_shared_arrays, initargs=(spec,)
+        ) as executor:
+            ...  # task functions read get_shared_arrays()
+"""
+
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+# Block name, shape and dtype of each shared array
+SharedArraySpec = Dict[str, Tuple[str, tuple, str]]
+
+# Arrays attached in this worker process, and the blocks backing them
+_attached_arrays: Dict[str, np.ndarray] = {}
+_attached_blocks: List[shared_memory.SharedMemory] = []
+
+
+@contextmanager
+def share_arrays(arrays: Dict[str, np.ndarray]) -> Iterator[SharedArraySpec]:
+    """
+    Copy arrays into shared memory blocks for the duration of the block.
+
+    Yields:
+        Spec to pass to ``attach_shared_arrays`` in the workers; the blocks
+        are closed and unlinked on exit
+    """
+    blocks = []
+    spec = {}
+    try:
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            blocks.append(block)
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            view[...] = array
+            spec[name] = (block.name, array.shape, array.dtype.str)
+        yield spec
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def attach_shared_arrays(spec: SharedArraySpec):
+    """Worker initializer: map the parent's arrays read-only."""
+    for name, (block_name, shape, dtype) in spec.items():
+        # The parent owns the blocks and unlinks them when the pool finishes
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        array.flags.writeable = False
+        _attached_blocks.append(block)
+        _attached_arrays[name] = array
+
+
+def get_shared_arrays() -> Dict[str, np.ndarray]:
+    """Arrays attached by ``attach_shared_arrays`` in this worker process."""
+    return _attached_arrays
@@ -0,0 +1,249 @@
+"""
+Candidate Slate Mining
+
+Finds groups of three or more candidates that voters rank together far more
+often than independent support would predict. Slate voting is common in
+multi-seat races, and pairwise coalition metrics miss it.
+
+Mining follows the Apriori idea: a slate can only be frequent if every smaller
+slate inside it is frequent, so each level is generated from the frequent
+slates of the level below. Support is counted on distinct candidate sets
+(ballot patterns collapsed to bitsets) by extending each frequent prefix with a
+single weighted matrix-vector product over the ballots that contain it.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ..data.ballot_patterns import BallotPatterns, load_ballot_patterns
+    from ..data.database import CVRDatabase
+except ImportError:
+    from data.ballot_patterns import BallotPatterns, load_ballot_patterns
+    from data.database import CVRDatabase
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CandidateSlate:
+    """A group of candidates frequently ranked together on the same ballots."""
+
+    candidates: List[int]
+    candidate_names: List[str]
+    size: int
+    support: int  # Ballots ranking every candidate in the slate
+    support_percentage: float  # Share of all ballots
+    expected_support: float  # Support if candidates were ranked independently
+    lift: float  # support / expected_support
+    top_rank_support: int  # Ballots ranking the slate in their first `size` spots
+
+
+class SlateMiner:
+    """
+    Frequent-itemset miner over ballot candidate sets.
+    """
+
+    def __init__(
+        self, db: Optional[CVRDatabase] = None, patterns: BallotPatterns = None
+    ):
+        """
+        Initialize slate miner.
+
+        Args:
+            db: Database connection with ballot data (used if patterns not given)
+            patterns: Preloaded ballot patterns
+        """
+        if db is None and patterns is None:
+            raise ValueError("Either db or patterns must be provided")
+        self.db = db
+        self._patterns = patterns
+        self._sets: Optional[np.ndarray] = None
+        self._set_counts: Optional[np.ndarray] = None
+
+    @property
+    def patterns(self) -> BallotPatterns:
+        if self._patterns is None:
+            self._patterns = load_ballot_patterns(self.db)
+        return self._patterns
+
+    def _load_candidate_sets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Collapse ranking patterns to distinct candidate sets with counts."""
+        if self._sets is None:
+            patterns = self.patterns
+            bitsets = patterns.candidate_bitsets()
+            _, first_index, inverse = np.unique(
+                bitsets, axis=0, return_index=True, return_inverse=True
+            )
+            presence = patterns.presence_matrix()
+            self._sets = presence[first_index].astype(np.float64)
+            self._set_counts = np.bincount(
+                inverse.ravel(), weights=patterns.counts, minlength=len(first_index)
+            )
+            logger.info(
+                f"Collapsed {patterns.n_patterns:,} ranking patterns into "
+                f"{len(first_index):,} distinct candidate sets"
+            )
+        return self._sets, self._set_counts
+
+    def mine_slates(
+        self,
+        min_support: float = 0.01,
+        min_size: int = 3,
+        max_size: int = 4,
+        min_lift: float = 1.0,
+    ) -> List[CandidateSlate]:
+        """
+        Mine candidate slates ranked together on many ballots.
+
+        Args:
+            min_support: Minimum share of ballots (0-1) that must rank the slate
+            min_size: Smallest slate size to report
+            max_size: Largest slate size to mine
+            min_lift: Only report slates at least this many times more common
+                than independent support predicts
+
+        Returns:
+            List of CandidateSlate sorted by lift (descending)
+        """
+        if min_size < 2 or max_size < min_size:
+            raise ValueError("Slate sizes must satisfy 2 <= min_size <= max_size")
+
+        start = time.time()
+        sets, weights = self._load_candidate_sets()
+        total_ballots = float(weights.sum())
+        if total_ballots == 0:
+            return []
+
+        threshold = max(1.0, min_support * total_ballots)
+        single_support = weights @ sets
+
+        # Level 1 and 2 come straight from the weighted co-occurrence matrix
+        frequent: Dict[Tuple[int, ...], float] = {
+            (i,): s for i, s in enumerate(single_support) if s >= threshold
+        }
+        pair_support = (sets * weights[:, None]).T @ sets
+        level = {}
+        for (a,) in frequent:
+            for b in range(a + 1, len(single_support)):
+                if (b,) in frequent and pair_support[a, b] >= threshold:
+                    level[(a, b)] = pair_support[a, b]
+        all_frequent = dict(frequent)
+        all_frequent.update(level)
+
+        size = 2
+        while level and size < max_size:
+            level = self._extend_level(level, all_frequent, sets, weights, threshold)
+            all_frequent.update(level)
+            size += 1
+
+        slates = [
+            self._build_slate(items, support, single_support, total_ballots)
+            for items, support in all_frequent.items()
+            if min_size <= len(items) <= max_size
+        ]
+        slates = [s for s in slates if s.lift >= min_lift]
+        self._add_top_rank_support(slates)
+        slates.sort(key=lambda s: (s.lift, s.support), reverse=True)
+
+        logger.info(
+            f"Mined {len(slates)} slates (sizes {min_size}-{max_size}, "
+            f"min support {threshold:.0f} ballots) in {time.time() - start:.2f}s"
+        )
+        return slates
+
+    def _extend_level(
+        self,
+        level: Dict[Tuple[int, ...], float],
+        frequent: Dict[Tuple[int, ...], float],
+        sets: np.ndarray,
+        weights: np.ndarray,
+        threshold: float,
+    ) -> Dict[Tuple[int, ...], float]:
+        """Grow each frequent k-set by one candidate, keeping frequent results."""
+        next_level = {}
+        for items in level:
+            # Only the candidate sets containing the prefix can contribute
+            rows = np.flatnonzero(sets[:, list(items)].all(axis=1))
+            if rows.size == 0:
+                continue
+            extension_support = weights[rows] @ sets[rows]
+
+            for extra in range(items[-1] + 1, sets.shape[1]):
+                support = extension_support[extra]
+                if support < threshold:
+                    continue
+                candidate = items + (extra,)
+                # Apriori pruning: every k-subset must itself be frequent
+                if all(
+                    candidate[:i] + candidate[i + 1 :] in frequent
+                    for i in range(len(candidate) - 1)
+                ):
+                    next_level[candidate] = support
+        return next_level
+
+    def _build_slate(
+        self,
+        items: Tuple[int, ...],
+        support: float,
+        single_support: np.ndarray,
+        total_ballots: float,
+    ) -> CandidateSlate:
+        patterns = self.patterns
+        expected = total_ballots * float(
+            np.prod(single_support[list(items)] / total_ballots)
+        )
+        return CandidateSlate(
+            candidates=[int(patterns.candidate_ids[i]) for i in items],
+            candidate_names=[patterns.candidate_name(i) for i in items],
+            size=len(items),
+            support=int(round(support)),
+            support_percentage=100.0 * support / total_ballots,
+            expected_support=expected,
+            lift=support / expected if expected > 0 else 0.0,
+            top_rank_support=0,
+        )
+
+    def _add_top_rank_support(self, slates: List[CandidateSlate]):
+        """Count ballots that rank each slate in their top positions."""
+        patterns = self.patterns
+        top_presence = {}
+        for slate in slates:
+            if slate.size not in top_presence:
+                top_presence[slate.size] = patterns.presence_matrix(top_n=slate.size)
+            indices = [patterns.candidate_index(c) for c in slate.candidates]
+            in_top = top_presence[slate.size][:, indices].all(axis=1)
+            slate.top_rank_support = int(patterns.counts[in_top].sum())
+
+    def slates_to_dataframe(self, slates: List[CandidateSlate]) -> pd.DataFrame:
+        """Convert slates to a flat DataFrame for storage or JSON responses."""
+        return pd.DataFrame(
+            [
+                {
+                    "slate_size": slate.size,
+                    "candidate_ids": ",".join(str(c) for c in slate.candidates),
+                    "candidate_names": " | ".join(slate.candidate_names),
+                    "support": slate.support,
+                    "support_percentage": slate.support_percentage,
+                    "expected_support": slate.expected_support,
+                    "lift": slate.lift,
+                    "top_rank_support": slate.top_rank_support,
+                }
+                for slate in slates
+            ],
+            columns=[
+                "slate_size",
+                "candidate_ids",
+                "candidate_names",
+                "support",
+                "support_percentage",
+                "expected_support",
+                "lift",
+                "top_rank_support",
+            ],
+        )
@@ -1,7 +1,10 @@
+import functools
 import logging
+import time
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 try:
@@ -9,8 +12,47 @@ try:
 except ImportError:
     from data.database import CVRDatabase
 
+try:
+    from ..monitoring.metrics import counter, histogram
+    from ..monitoring.stages import instrument
+except ImportError:
+    from monitoring.metrics import counter, histogram
+    from monitoring.stages import instrument
+
 logger = logging.getLogger(__name__)
 
+STV_RUNS = counter(
+    "rva_stv_runs_total", "STV tabulations by engine and outcome", ["engine", "outcome"]
+)
+STV_SECONDS = histogram(
+    "rva_stv_tabulation_seconds", "Wall time of complete STV tabulations", ["engine"]
+)
+STV_ROUNDS = counter(
+    "rva_stv_rounds_total", "Rounds counted by STV tabulations", ["engine"]
+)
+
+
+def observe_tabulation(engine: str):
+    """Record each ``run_stv_tabulation`` call in the STV metrics."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                rounds = func(*args, **kwargs)
+            except Exception:
+                STV_RUNS.labels(engine=engine, outcome="error").inc()
+                raise
+            STV_SECONDS.labels(engine=engine).observe(time.perf_counter() - start)
+            STV_RUNS.labels(engine=engine, outcome="ok").inc()
+            STV_ROUNDS.labels(engine=engine).inc(len(rounds))
+            return rounds
+
+        return wrapper
+
+    return decorator
+
 
 @dataclass
 class STVRound:
@@ -40,6 +82,160 @@ class BallotJourney:
     weight_progression: List[Tuple[int, float]]  # [(round, weight), ...]
 
 
+# Transfer reasons stored as small integer codes in JourneyLog
+TRANSFER_REASONS = ("elimination", "surplus")
+
+
+class JourneyLog:
+    """
+    Columnar record of every ballot transfer in a count.
+
+    Each transfer batch appends parallel arrays of (ballot key, round, from,
+    to, weight, reason) instead of per-ballot Python objects. Ballot IDs are
+    interned to int32 keys once; individual journeys are rebuilt on demand
+    and flows are aggregated with ``np.bincount``.
+    """
+
+    def __init__(self):
+        self._ballot_ids = pd.Index([], dtype=object)
+        self._chunks: List[Tuple[np.ndarray, ...]] = []
+        self._columns: Optional[Tuple[np.ndarray, ...]] = None
+
+    def append(
+        self,
+        round_number: int,
+        from_candidate: int,
+        ballot_ids: np.ndarray,
+        to_candidates: np.ndarray,
+        weight: float,
+        reason: str,
+    ):
+        """Record one batch of ballots moving from a candidate."""
+        n = len(ballot_ids)
+        if n == 0:
+            return
+        keys = self._ballot_ids.get_indexer(ballot_ids)
+        new = keys < 0
+        if new.any():
+            added = pd.unique(np.asarray(ballot_ids, dtype=object)[new])
+            self._ballot_ids = self._ballot_ids.append(pd.Index(added, dtype=object))
+            keys[new] = self._ballot_ids.get_indexer(np.asarray(ballot_ids)[new])
+
+        self._chunks.append(
+            (
+                keys.astype(np.int32),
+                np.full(n, round_number, dtype=np.int32),
+                np.full(n, from_candidate, dtype=np.int32),
+                np.asarray(to_candidates, dtype=np.int32),
+                np.full(n, weight, dtype=np.float32),
+                np.full(n, TRANSFER_REASONS.index(reason), dtype=np.int8),
+            )
+        )
+        self._columns = None
+
+    @property
+    def columns(self) -> Tuple[np.ndarray, ...]:
+        """(ballot_key, round, from, to, weight, reason) arrays of all transfers."""
+        if self._columns is None:
+            if self._chunks:
+                self._columns = tuple(np.concatenate(c) for c in zip(*self._chunks))
+            else:
+                self._columns = tuple(
+                    np.empty(0, dtype=t)
+                    for t in (
+                        np.int32,
+                        np.int32,
+                        np.int32,
+                        np.int32,
+                        np.float32,
+                        np.int8,
+                    )
+                )
+            self._chunks = [self._columns] if self._chunks else []
+        return self._columns
+
+    @property
+    def n_transfers(self) -> int:
+        return len(self.columns[0])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the transfer arrays."""
+        return sum(column.nbytes for column in self.columns)
+
+    def __len__(self) -> int:
+        """Number of distinct ballots that were transferred."""
+        return len(self._ballot_ids)
+
+    def __contains__(self, ballot_id: str) -> bool:
+        return ballot_id in self._ballot_ids
+
+    def __getitem__(self, ballot_id: str) -> BallotJourney:
+        journey = self.journey(ballot_id)
+        if journey is None:
+            raise KeyError(ballot_id)
+        return journey
+
+    def __iter__(self) -> Iterator[BallotJourney]:
+        """Rebuild every ballot's journey (slow; prefer journey() or flows())."""
+        keys = self.columns[0]
+        order = np.argsort(keys, kind="stable")
+        bounds = np.searchsorted(keys[order], np.arange(len(self) + 1))
+        for key in range(len(self)):
+            yield self._build(key, order[bounds[key] : bounds[key + 1]])
+
+    def journey(self, ballot_id: str) -> Optional[BallotJourney]:
+        """Rebuild one ballot's journey, or None if it never transferred."""
+        key = self._ballot_ids.get_indexer([ballot_id])[0]
+        if key < 0:
+            return None
+        return self._build(key, np.flatnonzero(self.columns[0] == key))
+
+    def _build(self, key: int, rows: np.ndarray) -> BallotJourney:
+        _, rounds, froms, tos, weights, reasons = (c[rows] for c in self.columns)
+        rounds, froms, tos = rounds.tolist(), froms.tolist(), tos.tolist()
+        return BallotJourney(
+            ballot_id=self._ballot_ids[key],
+            candidate_progression=list(zip(rounds, tos)),
+            transfer_history=[
+                (r, f, t, TRANSFER_REASONS[code])
+                for r, f, t, code in zip(rounds, froms, tos, reasons.tolist())
+            ],
+            final_status="continuing",
+            weight_progression=list(zip(rounds, weights.astype(float).tolist())),
+        )
+
+    def flows(self, round_number: Optional[int] = None) -> pd.DataFrame:
+        """
+        Ballots and votes moved between each pair of candidates.
+
+        Args:
+            round_number: Only count transfers in this round
+
+        Returns:
+            DataFrame with from_candidate, to_candidate, ballot_count, votes
+        """
+        _, rounds, froms, tos, weights, _ = self.columns
+        if round_number is not None:
+            mask = rounds == round_number
+            froms, tos, weights = froms[mask], tos[mask], weights[mask]
+
+        candidates, dense = np.unique(np.concatenate([froms, tos]), return_inverse=True)
+        n = len(candidates)
+        codes = dense[: len(froms)] * n + dense[len(froms) :]
+        ballots = np.bincount(codes, minlength=n * n)
+        votes = np.bincount(codes, weights=weights.astype(np.float64), minlength=n * n)
+        used = np.flatnonzero(ballots)
+        return pd.DataFrame(
+            {
+                "from_candidate": candidates[used // n],
+                "to_candidate": candidates[used % n],
+                "ballot_count": ballots[used],
+                "votes": votes[used],
+            }
+        )
+
+
 @dataclass
 class TransferPattern:
     """Represents vote transfers between candidates in a specific round."""
@@ -61,11 +257,75 @@ class VoteFlow:
 
     rounds: List[STVRound]
     transfer_patterns: List[TransferPattern]
-    ballot_journeys: List[BallotJourney]
+    ballot_journeys: JourneyLog
     candidate_flow_summary: Dict[int, Dict[str, any]]  # candidate_id -> flow stats
     flow_metadata: Dict[str, any] = field(default_factory=dict)
 
 
+@dataclass
+class BulkDefeat:
+    """A group of trailing candidates eliminated together in one round."""
+
+    round_number: int
+    candidates: List[int]  # lowest first
+    combined_votes: float
+    next_lowest_votes: float
+    # True if eliminating the group one candidate at a time could have
+    # produced a different result
+    may_differ: bool
+
+
+def find_bulk_defeat(
+    vote_totals: Dict[int, float], seats_left: int, quota: float, round_number: int
+) -> Optional[BulkDefeat]:
+    """
+    Find the largest trailing group of candidates that is mathematically defeated.
+
+    A group of the k lowest candidates can be eliminated together when their
+    combined votes are less than the votes of the next-lowest candidate: even
+    if every transfer between them went to one member, that member would
+    still be last. At least ``seats_left`` candidates are always kept.
+
+    Args:
+        vote_totals: Votes of each continuing candidate
+        seats_left: Seats still to fill
+        quota: Lowest quota that could apply while the group is eliminated
+        round_number: Round the group would be eliminated in
+
+    Returns:
+        BulkDefeat for two or more candidates, or None if only single
+        elimination is possible
+    """
+    ordered = sorted(vote_totals, key=lambda c: (vote_totals[c], c))
+    max_group = len(ordered) - seats_left
+    if max_group < 2:
+        return None
+
+    combined = 0.0
+    best = None
+    for k, candidate in enumerate(ordered[:max_group], start=1):
+        combined += vote_totals[candidate]
+        next_lowest = vote_totals[ordered[k]]
+        if k >= 2 and combined < next_lowest:
+            best = (k, combined, next_lowest)
+    if best is None:
+        return None
+
+    k, combined, next_lowest = best
+    # One at a time, the group's votes could elect someone whose surplus then
+    # lifts a group member past the next-lowest. The surplus is at most what
+    # the leading other candidate could end up holding above quota.
+    highest_other = max(vote_totals[c] for c in ordered[k:])
+    max_surplus = highest_other + combined - quota
+    return BulkDefeat(
+        round_number=round_number,
+        candidates=ordered[:k],
+        combined_votes=combined,
+        next_lowest_votes=next_lowest,
+        may_differ=max_surplus >= 0 and combined + max_surplus >= next_lowest,
+    )
+
+
 class STVTabulator:
     """
     Single Transferable Vote tabulation engine.
@@ -73,7 +333,11 @@ class STVTabulator:
     """
 
     def __init__(
-        self, db: CVRDatabase, seats: int = 3, detailed_tracking: bool = False
+        self,
+        db: CVRDatabase,
+        seats: int = 3,
+        detailed_tracking: bool = False,
+        bulk_defeat: bool = False,
     ):
         """
         Initialize STV tabulator.
@@ -82,18 +346,23 @@ class STVTabulator:
             db: Database connection with normalized ballot data
             seats: Number of seats to fill (default 3 for Portland District 2)
             detailed_tracking: Enable detailed vote flow tracking for visualization
+            bulk_defeat: Eliminate every mathematically defeated trailing
+                candidate in one round (ignored with detailed_tracking, which
+                follows ballots one elimination at a time)
         """
         self.db = db
         self.seats = seats
         self.detailed_tracking = detailed_tracking
+        self.bulk_defeat = bulk_defeat and not detailed_tracking
         self.rounds: List[STVRound] = []
         self.winners: List[int] = []
         self.eliminated: List[int] = []
+        self.bulk_defeats: List[BulkDefeat] = []
 
         # Enhanced tracking for vote flow visualization
         if self.detailed_tracking:
             self.transfer_patterns: List[TransferPattern] = []
-            self.ballot_journeys: Dict[str, BallotJourney] = {}
+            self.ballot_journeys = JourneyLog()
             self.candidate_names: Dict[int, str] = {}
 
         # Use retry queries for better reliability
@@ -208,6 +477,65 @@ class STVTabulator:
 
         return transfers
 
+    def calculate_group_transfers(
+        self, from_candidates: List[int], continuing_candidates: List[int]
+    ) -> Dict[int, Dict[int, float]]:
+        """
+        Calculate full-value transfers from candidates eliminated together.
+
+        Each ballot moves once, to its next continuing preference, and is
+        attributed to the highest-ranked eliminated candidate on it.
+
+        Args:
+            from_candidates: Candidates being eliminated together
+            continuing_candidates: List of candidates still in the race
+
+        Returns:
+            Dictionary mapping from_candidate to {candidate_id: votes}
+        """
+        transfers = {c: {} for c in from_candidates}
+        if not continuing_candidates:
+            return transfers
+
+        ballots_query = f"""
+            WITH group_ballots AS (
+                SELECT
+                    BallotID,
+                    arg_min(candidate_id, rank_position) as from_candidate
+                FROM ballots_long
+                WHERE candidate_id IN ({','.join(map(str, from_candidates))})
+                GROUP BY BallotID
+            ),
+            ballot_preferences AS (
+                SELECT
+                    bl.BallotID,
+                    bl.candidate_id,
+                    ROW_NUMBER() OVER (PARTITION BY bl.BallotID ORDER BY bl.rank_position) as pref_order
+                FROM ballots_long bl
+                WHERE bl.BallotID IN (SELECT BallotID FROM group_ballots)
+                  AND bl.candidate_id IN ({','.join(map(str, continuing_candidates))})
+            )
+            SELECT
+                gb.from_candidate,
+                bp.candidate_id,
+                COUNT(*) as ballots
+            FROM ballot_preferences bp
+            JOIN group_ballots gb ON bp.BallotID = gb.BallotID
+            WHERE bp.pref_order = 1  -- Next continuing preference
+            GROUP BY gb.from_candidate, bp.candidate_id
+        """
+
+        if self.use_retry:
+            transfer_df = self.db.query_with_retry(ballots_query)
+        else:
+            transfer_df = self.db.query(ballots_query)
+
+        for row in transfer_df.itertuples(index=False):
+            transfers[int(row.from_candidate)][int(row.candidate_id)] = float(
+                row.ballots
+            )
+        return transfers
+
     def calculate_detailed_transfers(
         self,
         from_candidate: int,
@@ -270,10 +598,12 @@ class STVTabulator:
         from_candidate_name = self.candidate_names.get(
             from_candidate, f"Candidate-{from_candidate}"
         )
+        ballot_ids = transfer_df["BallotID"].to_numpy()
+        to_candidates = transfer_df["candidate_id"].to_numpy()
+        counts = pd.Series(to_candidates).value_counts()
 
         for candidate_id in continuing_candidates:
-            candidate_ballots = transfer_df[transfer_df["candidate_id"] == candidate_id]
-            count = len(candidate_ballots)
+            count = int(counts.get(candidate_id, 0))
             if count > 0:
                 transfers[candidate_id] = count * transfer_value
 
@@ -294,28 +624,18 @@ class STVTabulator:
                 )
                 self.transfer_patterns.append(pattern)
 
-                # Update ballot journeys
-                for _, ballot_row in candidate_ballots.iterrows():
-                    ballot_id = ballot_row["BallotID"]
-
-                    if ballot_id not in self.ballot_journeys:
-                        self.ballot_journeys[ballot_id] = BallotJourney(
-                            ballot_id=ballot_id,
-                            candidate_progression=[],
-                            transfer_history=[],
-                            final_status="continuing",
-                            weight_progression=[],
-                        )
-
-                    journey = self.ballot_journeys[ballot_id]
-                    journey.transfer_history.append(
-                        (round_number, from_candidate, candidate_id, transfer_type)
-                    )
-                    journey.candidate_progression.append((round_number, candidate_id))
-                    journey.weight_progression.append((round_number, transfer_value))
-
+        self.ballot_journeys.append(
+            round_number,
+            from_candidate,
+            ballot_ids,
+            to_candidates,
+            transfer_value,
+            transfer_type,
+        )
         return transfers
 
+    @instrument("stv.sql.tabulate")
+    @observe_tabulation("sql")
     def run_stv_tabulation(self) -> List[STVRound]:
         """
         Run complete STV tabulation.
@@ -323,6 +643,17 @@ class STVTabulator:
         Returns:
             List of STVRound objects representing each round
         """
+        for _ in self.iter_rounds():
+            pass
+        return self.rounds
+
+    def iter_rounds(self) -> Iterator[STVRound]:
+        """
+        Run the tabulation, yielding each round as soon as it is counted.
+
+        Rounds are also appended to ``self.rounds`` (and, with detailed
+        tracking, their transfers to ``self.transfer_patterns``) as usual.
+        """
         logger.info("Starting STV tabulation")
 
         # Get initial vote counts
@@ -408,6 +739,42 @@ class STVTabulator:
                 len(round_winners) == 0
                 and len(self.winners) < self.seats
                 and len(continuing) > 0
+            ):
+                bulk = None
+                if self.bulk_defeat:
+                    bulk = find_bulk_defeat(
+                        {c: vote_totals[c] for c in continuing},
+                        self.seats - len(self.winners),
+                        quota,
+                        round_num,
+                    )
+
+                if bulk:
+                    round_eliminated.extend(bulk.candidates)
+                    self.eliminated.extend(bulk.candidates)
+                    self.bulk_defeats.append(bulk)
+                    for candidate_id in bulk.candidates:
+                        continuing.remove(candidate_id)
+
+                    logger.info(
+                        f"Bulk eliminating candidates {bulk.candidates} with "
+                        f"{bulk.combined_votes:.1f} combined votes "
+                        f"(next lowest has {bulk.next_lowest_votes:.1f})"
+                    )
+
+                    group_transfers = self.calculate_group_transfers(
+                        bulk.candidates, continuing
+                    )
+                    for from_candidate, to_votes in group_transfers.items():
+                        transfers[from_candidate] = to_votes
+                        for to_candidate, transfer_amount in to_votes.items():
+                            vote_totals[to_candidate] += transfer_amount
+
+            if (
+                len(round_winners) == 0
+                and not round_eliminated
+                and len(self.winners) < self.seats
+                and len(continuing) > 0
             ):
                 # Find candidate with lowest vote total
                 min_votes = min(vote_totals[c] for c in continuing)
@@ -461,6 +828,7 @@ class STVTabulator:
             )
 
             self.rounds.append(round_record)
+            yield round_record
             round_num += 1
 
             # Safety check to prevent infinite loops
@@ -471,8 +839,11 @@ class STVTabulator:
         logger.info("\nSTV tabulation complete:")
         logger.info(f"Winners: {self.winners}")
         logger.info(f"Total rounds: {len(self.rounds)}")
-
-        return self.rounds
+        if any(bulk.may_differ for bulk in self.bulk_defeats):
+            logger.warning(
+                "Bulk defeat moved enough votes to reach quota in some rounds; "
+                "single elimination could give different results"
+            )
 
     def get_round_summary(self) -> pd.DataFrame:
         """
@@ -634,7 +1005,7 @@ class STVTabulator:
         return VoteFlow(
             rounds=self.rounds,
             transfer_patterns=self.transfer_patterns,
-            ballot_journeys=list(self.ballot_journeys.values()),
+            ballot_journeys=self.ballot_journeys,
             candidate_flow_summary=candidate_flow_summary,
             flow_metadata=flow_metadata,
         )
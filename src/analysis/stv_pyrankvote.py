@@ -1,15 +1,23 @@
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import pandas as pd
 from pyrankvote import Ballot, Candidate, single_transferable_vote
 
 try:
+    from ..data.ballot_patterns import (
+        NO_CANDIDATE,
+        BallotPatterns,
+        load_ballot_patterns,
+    )
     from ..data.database import CVRDatabase
-    from .stv import STVRound  # Reuse the existing dataclass
+    from ..monitoring.stages import instrument
+    from .stv import STVRound, observe_tabulation
 except ImportError:
-    from analysis.stv import STVRound
+    from analysis.stv import STVRound, observe_tabulation
+    from data.ballot_patterns import NO_CANDIDATE, BallotPatterns, load_ballot_patterns
     from data.database import CVRDatabase
+    from monitoring.stages import instrument
 
 logger = logging.getLogger(__name__)
 
@@ -20,16 +28,23 @@ class PyRankVoteSTVTabulator:
     Maintains compatibility with the original STVTabulator interface.
     """
 
-    def __init__(self, db: CVRDatabase, seats: int = 3):
+    def __init__(
+        self,
+        db: CVRDatabase,
+        seats: int = 3,
+        patterns: Optional[BallotPatterns] = None,
+    ):
         """
         Initialize STV tabulator using PyRankVote.
 
         Args:
             db: Database connection with normalized ballot data
             seats: Number of seats to fill (default 3 for Portland District 2)
+            patterns: Preloaded ballot patterns (loaded from db if not given)
         """
         self.db = db
         self.seats = seats
+        self.ballot_patterns = patterns
         self.rounds: List[STVRound] = []
         self.winners: List[int] = []
         self.eliminated: List[int] = []
@@ -69,57 +84,47 @@ class PyRankVoteSTVTabulator:
         )
 
     def _prepare_pyrankvote_data(self):
-        """Convert database ballot data to PyRankVote format."""
+        """
+        Convert database ballot data to PyRankVote format.
+
+        Rankings are aggregated and deduplicated in DuckDB (see
+        load_ballot_patterns); each distinct ranking becomes one Ballot
+        object that is repeated by reference for every voter who cast it.
+        Ballots are immutable and PyRankVote transfers fractions of all of a
+        candidate's ballots at once, so sharing them does not change results.
+        """
         logger.info("Preparing data for PyRankVote")
 
-        # Get candidate information
-        candidates_df = self.db.query(
-            "SELECT candidate_id, candidate_name FROM candidates ORDER BY candidate_id"
-        )
+        if self.ballot_patterns is None:
+            self.ballot_patterns = load_ballot_patterns(self.db)
+        patterns = self.ballot_patterns
 
-        # Create PyRankVote Candidate objects
-        self.candidates_map = {}
-        for _, row in candidates_df.iterrows():
-            candidate = Candidate(str(row["candidate_id"]))
-            self.candidates_map[row["candidate_id"]] = candidate
+        # Create PyRankVote Candidate objects (marks for candidates missing
+        # from the candidates table are ignored)
+        self.candidates_map = {
+            cid: Candidate(str(cid)) for cid in sorted(patterns.candidate_names)
+        }
+        dense_candidates = [
+            self.candidates_map.get(int(cid)) for cid in patterns.candidate_ids
+        ]
 
         logger.info(f"Created {len(self.candidates_map)} candidates")
 
-        # Get ballot preferences
-        ballot_prefs = self.db.query(
-            """
-            SELECT
-                BallotID,
-                candidate_id,
-                rank_position
-            FROM ballots_long
-            ORDER BY BallotID, rank_position
-        """
-        )
-
-        # Group by ballot and create PyRankVote Ballot objects
-        grouped_ballots = ballot_prefs.groupby("BallotID")
         self.ballots_data = []
-
-        for ballot_id, group in grouped_ballots:
-            # Sort by rank position to ensure correct order
-            ranked_candidates = []
-            seen_candidates = set()  # Track candidates to avoid duplicates
-
-            for _, row in group.sort_values("rank_position").iterrows():
-                candidate_id = row["candidate_id"]
-                if (
-                    candidate_id in self.candidates_map
-                    and candidate_id not in seen_candidates
-                ):
-                    ranked_candidates.append(self.candidates_map[candidate_id])
-                    seen_candidates.add(candidate_id)
-
+        for ranking, count in zip(patterns.rankings.tolist(), patterns.counts.tolist()):
+            ranked_candidates = [
+                dense_candidates[c]
+                for c in ranking
+                if c != NO_CANDIDATE and dense_candidates[c] is not None
+            ]
             if ranked_candidates:  # Only add ballots with valid preferences
                 ballot = Ballot(ranked_candidates=ranked_candidates)
-                self.ballots_data.append(ballot)
+                self.ballots_data.extend([ballot] * count)
 
-        logger.info(f"Created {len(self.ballots_data)} ballots")
+        logger.info(
+            f"Created {len(self.ballots_data)} ballots from "
+            f"{patterns.n_patterns} distinct rankings"
+        )
 
     def _convert_pyrankvote_results_to_rounds(self) -> List[STVRound]:
         """
@@ -174,6 +179,8 @@ class PyRankVoteSTVTabulator:
         rounds.append(round_record)
         return rounds
 
+    @instrument("stv.pyrankvote.tabulate")
+    @observe_tabulation("pyrankvote")
     def run_stv_tabulation(self) -> List[STVRound]:
         """
         Run complete STV tabulation using PyRankVote.
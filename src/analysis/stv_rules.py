@@ -0,0 +1,238 @@
+"""
+STV Counting Rules
+
+The parts of an STV count that differ between jurisdictions, as pluggable
+strategies for the array-based engines in ``stv_vectorized``: how the quota
+is set, how a winner's surplus is transferred, and how ties are broken.
+Each strategy is a plain function registered by name; ``STVRules`` picks one
+of each.
+
+Surplus transfer rules:
+- ``gregory``: every ballot held by the winner moves on at value
+  surplus / votes (weighted inclusive Gregory)
+- ``whole``: a surplus-sized number of whole ballots move on at full value,
+  drawn from each ranking pattern in proportion to the votes it gave the
+  winner (largest remainder, so the draw is deterministic)
+- ``meek``: every winner keeps the same fraction (its keep value) of each
+  ballot that reaches it and passes the rest on; keep values are iterated
+  until each winner holds exactly a quota
+- ``warren``: like Meek, but a winner takes the same amount (its keep value)
+  from each ballot that reaches it instead of the same fraction
+
+Tie-break rules order tied candidates by:
+- ``backward``: the most recent earlier round in which they differ
+- ``forward``: the earliest round in which they differ
+- ``candidate_id``: candidate ID only
+
+In every case a remaining tie favors the lower candidate ID.
+
+Vote arithmetic is in floating point unless ``decimals`` is set, in which
+case Gregory transfers are counted in fixed point with that many decimal
+places (see ``stv_vectorized.FixedPointSTV``).
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+
+def droop_quota(total_votes: float, seats: int) -> int:
+    """Droop quota: floor(total_votes / (seats + 1)) + 1"""
+    return int(total_votes / (seats + 1)) + 1
+
+
+def exact_droop_quota(total_votes: float, seats: int) -> float:
+    """Fractional Droop quota used with keep values: total_votes / (seats + 1)"""
+    return total_votes / (seats + 1)
+
+
+def hare_quota(total_votes: float, seats: int) -> float:
+    """Hare quota: total_votes / seats"""
+    return total_votes / seats
+
+
+QUOTA_RULES: Dict[str, Callable[[float, int], float]] = {
+    "droop": droop_quota,
+    "droop_exact": exact_droop_quota,
+    "hare": hare_quota,
+}
+
+
+def gregory_transfer(values: np.ndarray, votes: float, quota: float) -> np.ndarray:
+    """Every ballot moves on at value surplus / votes."""
+    factor = (votes - quota) / votes if votes > quota else 0.0
+    return np.full(len(values), factor)
+
+
+def whole_ballot_transfer(values: np.ndarray, votes: float, quota: float) -> np.ndarray:
+    """Move a surplus-sized number of whole ballots, apportioned across patterns."""
+    multipliers = np.zeros(len(values))
+    surplus = int(np.floor(max(votes - quota, 0.0) + 1e-9))
+    if surplus == 0 or votes <= 0:
+        return multipliers
+
+    ideal = surplus * values / votes
+    moved = np.floor(ideal)
+    leftover = surplus - int(moved.sum())
+    if leftover > 0:
+        # Largest remainder; stable sort keeps earlier patterns first on ties
+        order = np.argsort(-(ideal - moved), kind="stable")
+        moved[order[:leftover]] += 1
+    moved = np.minimum(moved, np.floor(values + 1e-9))
+    live = values > 0
+    multipliers[live] = moved[live] / values[live]
+    return multipliers
+
+
+# Pointer-based rules: (values moving, winner's votes, quota) -> weight multipliers
+POINTER_TRANSFERS: Dict[str, Callable[[np.ndarray, float, float], np.ndarray]] = {
+    "gregory": gregory_transfer,
+    "whole": whole_ballot_transfer,
+}
+
+
+def meek_shares(keep: np.ndarray) -> np.ndarray:
+    """
+    Each candidate takes its keep value as a fraction of what is left.
+
+    The value reaching rank r is the cumulative product of (1 - keep) over
+    earlier ranks. It is built rank by rank for every ballot at once, which
+    is faster than np.cumprod along the short rank axis.
+    """
+    shares = np.empty_like(keep)
+    passed = np.ones(keep.shape[1:])
+    for rank in range(keep.shape[0]):
+        np.multiply(keep[rank], passed, out=shares[rank])
+        passed -= shares[rank]  # passed * (1 - keep)
+    return shares
+
+
+def warren_shares(keep: np.ndarray) -> np.ndarray:
+    """Each candidate takes its keep value as an amount, up to what is left."""
+    shares = np.empty_like(keep)
+    remaining = np.ones(keep.shape[1:])
+    for rank in range(keep.shape[0]):
+        np.minimum(keep[rank], remaining, out=shares[rank])
+        remaining -= shares[rank]
+    return shares
+
+
+# Keep-value rules: keep values (R, P) in preference order -> value given (R, P)
+KEEP_VALUE_TRANSFERS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "meek": meek_shares,
+    "warren": warren_shares,
+}
+
+
+def _tie_break_keys(
+    candidates: np.ndarray, rounds: List[np.ndarray], descending: bool
+) -> List[int]:
+    """Sort candidates by the given rounds (first is primary), then by ID."""
+    sign = -1.0 if descending else 1.0
+    # np.lexsort treats the last key as primary
+    keys = [-sign * candidates]
+    for tallies in reversed(rounds):
+        keys.append(sign * np.round(tallies[candidates], 9))
+    order = np.lexsort(keys)
+    return [int(c) for c in candidates[order]]
+
+
+def backward_tie_break(
+    candidates: np.ndarray, history: List[np.ndarray], descending: bool
+) -> List[int]:
+    return _tie_break_keys(candidates, history[::-1], descending)
+
+
+def forward_tie_break(
+    candidates: np.ndarray, history: List[np.ndarray], descending: bool
+) -> List[int]:
+    return _tie_break_keys(candidates, history[-1:] + history[:-1], descending)
+
+
+def candidate_id_tie_break(
+    candidates: np.ndarray, history: List[np.ndarray], descending: bool
+) -> List[int]:
+    return _tie_break_keys(candidates, history[-1:], descending)
+
+
+# (candidates, tallies per round so far, descending) -> candidates in order
+TIE_BREAK_RULES: Dict[
+    str, Callable[[np.ndarray, List[np.ndarray], bool], List[int]]
+] = {
+    "backward": backward_tie_break,
+    "forward": forward_tie_break,
+    "candidate_id": candidate_id_tie_break,
+}
+
+
+# Fixed-point ballot value times transfer value must fit in int64
+MAX_DECIMALS = 9
+
+
+@dataclass(frozen=True)
+class STVRules:
+    """Selection of counting rules for the array-based STV engines."""
+
+    quota: str = "droop"
+    transfer: str = "gregory"
+    tie_break: str = "backward"
+    dynamic_quota: bool = False  # recompute the quota from active votes each round
+    seats: Optional[int] = None  # fixed number of seats (IRV fills one)
+    tolerance: float = 1e-6  # keep-value convergence, in votes
+    max_iterations: int = 1000  # keep-value iterations per round
+    # eliminate every mathematically defeated trailing candidate at once
+    bulk_defeat: bool = False
+    # fixed-point vote arithmetic with this many decimal places (None: float)
+    decimals: Optional[int] = None
+
+    def __post_init__(self):
+        if self.quota not in QUOTA_RULES:
+            raise ValueError(f"Unknown quota rule: {self.quota}")
+        if self.transfer not in POINTER_TRANSFERS and not self.keep_value:
+            raise ValueError(f"Unknown transfer rule: {self.transfer}")
+        if self.tie_break not in TIE_BREAK_RULES:
+            raise ValueError(f"Unknown tie-break rule: {self.tie_break}")
+        if self.tolerance <= 0:
+            raise ValueError("tolerance must be positive")
+        if self.decimals is not None:
+            if not 0 <= self.decimals <= MAX_DECIMALS:
+                raise ValueError(f"decimals must be between 0 and {MAX_DECIMALS}")
+            if self.transfer != "gregory":
+                raise ValueError("Fixed-point arithmetic supports gregory transfers")
+
+    @property
+    def keep_value(self) -> bool:
+        """True for rules counted with keep values (Meek, Warren)."""
+        return self.transfer in KEEP_VALUE_TRANSFERS
+
+    @property
+    def fixed_point(self) -> bool:
+        """True for rules counted in fixed-point arithmetic."""
+        return self.decimals is not None
+
+    def quota_for(self, total_votes: float, seats: int) -> float:
+        return QUOTA_RULES[self.quota](total_votes, seats)
+
+
+RULE_PRESETS: Dict[str, STVRules] = {
+    "gregory": STVRules(),
+    "whole": STVRules(transfer="whole"),
+    "meek": STVRules(quota="droop_exact", transfer="meek", dynamic_quota=True),
+    "warren": STVRules(quota="droop_exact", transfer="warren", dynamic_quota=True),
+    # Single winner; a majority of the votes still in play wins
+    "irv": STVRules(transfer="whole", dynamic_quota=True, seats=1),
+}
+
+
+def get_rules(rules: Union[str, STVRules, None] = None) -> STVRules:
+    """Resolve a preset name (or None for the default) to STVRules."""
+    if rules is None:
+        return RULE_PRESETS["gregory"]
+    if isinstance(rules, STVRules):
+        return rules
+    if rules not in RULE_PRESETS:
+        raise ValueError(
+            f"Unknown STV rules: {rules} (choose from {', '.join(RULE_PRESETS)})"
+        )
+    return RULE_PRESETS[rules]
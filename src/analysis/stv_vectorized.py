@@ -0,0 +1,1162 @@
+"""
+Array-Based STV Tabulation
+
+Runs Single Transferable Vote directly over ``BallotPatterns`` (distinct
+rankings with counts) instead of issuing SQL per transfer. Each pattern keeps
+a pointer to its current preference and a transfer weight, so one round is a
+handful of NumPy operations regardless of how many ballots share a pattern.
+
+Default counting rules (others are selected with ``STVRules``, see
+``stv_rules``):
+- Droop quota: floor(valid ballots / (seats + 1)) + 1
+- Every candidate at or above quota is elected; surpluses are transferred with
+  the weighted inclusive Gregory method (all ballots held by the winner move
+  on at value ``surplus / votes``)
+- Otherwise the lowest candidate is eliminated and their ballots move on at
+  full value (with ``bulk_defeat``, every trailing candidate who cannot
+  overtake the next-lowest is eliminated together)
+- When the continuing candidates no longer outnumber the open seats, they
+  are all elected
+- Ties are broken by the most recent earlier round in which the tied
+  candidates differ, then by candidate ID (lower ID is favored)
+- Withdrawn candidates are skipped on every ballot from the first round
+
+Keep-value rules (Meek, Warren) are counted by ``KeepValueSTV``, which
+shares the same ballot arrays, decisions and round records but distributes
+each ballot by keep values instead of moving a pointer. ``FixedPointSTV``
+counts the same rules in scaled int64 arithmetic, truncating transfer values
+and ballot values to a fixed number of decimal places.
+
+Partitions of the electorate (e.g. precincts) can be tabulated independently
+in parallel worker processes that read the ballot arrays from shared memory
+(see shared_arrays).
+"""
+
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from fractions import Fraction
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ..data.ballot_patterns import (
+        NO_CANDIDATE,
+        BallotPatterns,
+        load_ballot_patterns,
+    )
+    from ..data.database import CVRDatabase
+    from ..monitoring.stages import instrument
+    from .shared_arrays import attach_shared_arrays, get_shared_arrays, share_arrays
+    from .stv import (
+        BulkDefeat,
+        STVRound,
+        STVTabulator,
+        find_bulk_defeat,
+        observe_tabulation,
+    )
+    from .stv_rules import (
+        KEEP_VALUE_TRANSFERS,
+        POINTER_TRANSFERS,
+        TIE_BREAK_RULES,
+        STVRules,
+        get_rules,
+    )
+except ImportError:
+    from analysis.shared_arrays import (
+        attach_shared_arrays,
+        get_shared_arrays,
+        share_arrays,
+    )
+    from analysis.stv import (
+        BulkDefeat,
+        STVRound,
+        STVTabulator,
+        find_bulk_defeat,
+        observe_tabulation,
+    )
+    from analysis.stv_rules import (
+        KEEP_VALUE_TRANSFERS,
+        POINTER_TRANSFERS,
+        TIE_BREAK_RULES,
+        STVRules,
+        get_rules,
+    )
+    from data.ballot_patterns import NO_CANDIDATE, BallotPatterns, load_ballot_patterns
+    from data.database import CVRDatabase
+    from monitoring.stages import instrument
+
+logger = logging.getLogger(__name__)
+
+# Candidate status codes
+CONTINUING = 0
+ELECTED = 1
+ELIMINATED = 2
+WITHDRAWN = 3
+
+# Vote totals closer than this are treated as equal
+VOTE_TOLERANCE = 1e-9
+
+
+@dataclass
+class TabulationState:
+    """Mutable tabulation state; copy() gives an independent fork."""
+
+    seats: int
+    quota: float
+    pointer: np.ndarray  # (P,) position of each pattern's current preference
+    weight: np.ndarray  # (P,) current value of each ballot in the pattern
+    status: np.ndarray  # (C,) CONTINUING / ELECTED / ELIMINATED / WITHDRAWN
+    settled_votes: np.ndarray  # (C,) votes held when elected or eliminated
+    winners: List[int] = field(default_factory=list)  # dense indices
+    eliminated: List[int] = field(default_factory=list)  # dense indices
+    history: List[np.ndarray] = field(default_factory=list)  # tallies per round
+    rounds: List[STVRound] = field(default_factory=list)
+    # State at the start of each round, recorded by run(checkpoint=True)
+    checkpoints: List["TabulationState"] = field(default_factory=list)
+    keep: Optional[np.ndarray] = None  # (C,) keep values (KeepValueSTV only)
+    converged: Optional[np.ndarray] = None  # (C,) tallies at those keep values
+    # Candidates eliminated together (by candidate ID), with rules.bulk_defeat
+    bulk_defeats: List[BulkDefeat] = field(default_factory=list)
+
+    @property
+    def round_number(self) -> int:
+        return len(self.rounds)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the state's arrays, tally history and checkpoints."""
+        # Checkpoints share tally arrays with the history, so count each once
+        arrays = {}
+        for state in [self] + self.checkpoints:
+            for array in [
+                state.pointer,
+                state.weight,
+                state.status,
+                state.settled_votes,
+                state.keep,
+                state.converged,
+                *state.history,
+            ]:
+                if array is not None:
+                    arrays[id(array)] = array.nbytes
+        return int(sum(arrays.values()))
+
+    def copy(self) -> "TabulationState":
+        return TabulationState(
+            seats=self.seats,
+            quota=self.quota,
+            pointer=self.pointer.copy(),
+            weight=self.weight.copy(),
+            status=self.status.copy(),
+            settled_votes=self.settled_votes.copy(),
+            winners=list(self.winners),
+            eliminated=list(self.eliminated),
+            history=list(self.history),
+            rounds=list(self.rounds),
+            keep=None if self.keep is None else self.keep.copy(),
+            converged=self.converged,
+            bulk_defeats=list(self.bulk_defeats),
+        )
+
+
+class VectorizedSTV:
+    """
+    STV counting engine over a fixed set of ballot patterns.
+
+    The engine itself is stateless; all per-count state lives in
+    TabulationState so counts can be forked, checkpointed and resumed.
+    """
+
+    # Surplus transfer rules this engine can count
+    transfer_rules = POINTER_TRANSFERS
+    fixed_point = False
+
+    def __init__(self, patterns: BallotPatterns, rules: Optional[STVRules] = None):
+        self.rules = rules or STVRules()
+        if self.rules.transfer not in self.transfer_rules:
+            raise ValueError(
+                f"{type(self).__name__} cannot count {self.rules.transfer} "
+                "transfers; use create_engine()"
+            )
+        if self.rules.fixed_point != self.fixed_point:
+            raise ValueError(
+                f"{type(self).__name__} cannot count with decimals="
+                f"{self.rules.decimals}; use create_engine()"
+            )
+        self.patterns = patterns
+        n_patterns = patterns.n_patterns
+        # Trailing padding column: an exhausted pointer reads NO_CANDIDATE
+        self.rankings = np.full(
+            (n_patterns, patterns.max_rank + 1), NO_CANDIDATE, dtype=np.int32
+        )
+        self.rankings[:, : patterns.max_rank] = patterns.rankings
+        self.counts = patterns.counts.astype(np.float64)
+        self.total_votes = float(self.counts.sum())
+        self.n_candidates = patterns.n_candidates
+        self._rows = np.arange(n_patterns)
+
+    def initial_state(
+        self, seats: int, withdrawn: Optional[List[int]] = None
+    ) -> TabulationState:
+        """
+        Fresh state with every ballot on its first preference.
+
+        Args:
+            seats: Number of seats to fill
+            withdrawn: Dense indices of candidates to skip on every ballot
+        """
+        seats = self.rules.seats or seats
+        state = TabulationState(
+            seats=seats,
+            quota=self.quota_for(self.total_votes, seats),
+            pointer=np.zeros(self.patterns.n_patterns, dtype=np.int32),
+            weight=np.ones(self.patterns.n_patterns),
+            status=np.full(self.n_candidates, CONTINUING, dtype=np.int8),
+            settled_votes=np.zeros(self.n_candidates),
+        )
+        if withdrawn:
+            self.withdraw(state, withdrawn)
+        return state
+
+    def withdraw(self, state: TabulationState, candidates: List[int]):
+        """Mark candidates withdrawn and move their ballots to the next choice."""
+        state.status[candidates] = WITHDRAWN
+        current = self.current_candidates(state)
+        self._advance(state, np.flatnonzero(np.isin(current, candidates)))
+
+    def current_candidates(self, state: TabulationState) -> np.ndarray:
+        """Dense index of each pattern's current candidate (-1 if exhausted)."""
+        return self.rankings[self._rows, state.pointer]
+
+    def tally(
+        self, state: TabulationState, current: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Votes currently held by each candidate."""
+        if current is None:
+            current = self.current_candidates(state)
+        # Exhausted patterns (-1) fall into bin 0, which is dropped
+        return np.bincount(
+            current + 1,
+            weights=self.counts * state.weight,
+            minlength=self.n_candidates + 1,
+        )[1:]
+
+    def quota_for(self, total_votes: float, seats: int) -> float:
+        return self.rules.quota_for(total_votes, seats)
+
+    def ballot_values(self, state: TabulationState, rows: np.ndarray) -> np.ndarray:
+        """Votes carried by the given patterns at their current weights."""
+        return self.counts[rows] * state.weight[rows]
+
+    def is_complete(self, state: TabulationState) -> bool:
+        return len(state.winners) >= state.seats or not np.any(
+            state.status == CONTINUING
+        )
+
+    def run(self, state: TabulationState, checkpoint: bool = False) -> TabulationState:
+        """
+        Count until every seat is filled.
+
+        Args:
+            state: State to count from (modified in place)
+            checkpoint: Record a copy of the state before each round in
+                ``state.checkpoints`` so later counts can resume from it
+        """
+        while not self.is_complete(state):
+            if checkpoint:
+                state.checkpoints.append(state.copy())
+            self.step(state)
+        return state
+
+    def iter_rounds(self, state: TabulationState) -> Iterator[STVRound]:
+        """Count like run(), yielding each round as soon as it is decided."""
+        while not self.is_complete(state):
+            yield self.step(state)
+
+    def sweep(self, seat_counts: List[int]) -> Dict[int, TabulationState]:
+        """
+        Count several seat numbers in one pass.
+
+        Until some candidate reaches quota (or the field shrinks to the number
+        of seats), every seat count makes the same elimination, so those
+        rounds are counted once. A seat count forks off a copy of the shared
+        state as soon as its decision would differ. Larger seat counts have
+        lower quotas, so they fork first. With bulk defeat, shared rounds only
+        eliminate groups that leave enough candidates for the largest seat
+        count.
+
+        Args:
+            seat_counts: Seat numbers to tabulate
+
+        Returns:
+            Completed TabulationState per seat count
+        """
+        if self.rules.dynamic_quota or self.rules.seats:
+            raise ValueError("Seat sweeps need a static quota and free seat count")
+        pending = sorted({int(s) for s in seat_counts if int(s) > 0})
+        if not pending:
+            return {}
+
+        results: Dict[int, TabulationState] = {}
+        forked_rounds = 0
+        shared = self.initial_state(pending[-1])
+        while pending:
+            tallies = self.tally(shared)
+            n_continuing = int(np.sum(shared.status == CONTINUING))
+            top = float(tallies[shared.status == CONTINUING].max(initial=0.0))
+
+            while pending:
+                seats = pending[-1]
+                quota = self.quota_for(self.total_votes, seats)
+                if n_continuing > seats and top < quota - VOTE_TOLERANCE:
+                    break
+                pending.pop()
+                fork = shared.copy()
+                fork.seats = seats
+                fork.quota = quota
+                fork.rounds = [replace(r, quota=quota) for r in fork.rounds]
+                results[seats] = self.run(fork)
+                forked_rounds += len(fork.rounds) - len(shared.rounds)
+
+            if pending:
+                # Elimination round common to every remaining seat count
+                shared.seats = pending[-1]
+                shared.quota = self.quota_for(self.total_votes, shared.seats)
+                self.step(shared)
+
+        logger.info(
+            f"Seat sweep {sorted(results)}: {len(shared.rounds)} shared rounds, "
+            f"{forked_rounds} seat-specific rounds"
+        )
+        return results
+
+    def step(self, state: TabulationState) -> STVRound:
+        """Run one round (an election with surplus transfer, or an elimination)."""
+        current = self.current_candidates(state)
+        tallies = self.tally(state, current)
+        state.history.append(tallies)
+        self._update_quota(state, tallies)
+
+        elected, eliminated, surplus = self.decide(state, tallies)
+        return self.apply_decision(
+            state, current, tallies, elected, eliminated, surplus
+        )
+
+    def apply_decision(
+        self,
+        state: TabulationState,
+        current: np.ndarray,
+        tallies: np.ndarray,
+        elected: List[int],
+        eliminated: List[int],
+        surplus: bool,
+    ) -> STVRound:
+        """
+        Carry out a round's decision (from decide(), or imposed by a caller
+        exploring alternative counts) and record the round.
+        """
+        transfers: Dict[int, Dict[int, float]] = {}
+        if elected:
+            self._elect(state, elected, tallies, cap=surplus)
+            if surplus:
+                moving = np.flatnonzero(np.isin(current, elected))
+                for c in elected:
+                    rows = moving[current[moving] == c]
+                    self._transfer_surplus(state, rows, tallies[c])
+                transfers = self._move(state, moving, current)
+        else:
+            self._eliminate(state, eliminated, tallies)
+            moving = np.flatnonzero(np.isin(current, eliminated))
+            transfers = self._move(state, moving, current)
+
+        round_record = self._record_round(state, elected, eliminated, transfers)
+        state.rounds.append(round_record)
+        return round_record
+
+    def decide(
+        self, state: TabulationState, tallies: np.ndarray
+    ) -> Tuple[List[int], List[int], bool]:
+        """
+        Decide a round from its tallies (already appended to ``state.history``).
+
+        Returns:
+            Tuple of (elected, eliminated, surplus); ``surplus`` is True when
+            the elected candidates' ballots are transferred on
+        """
+        continuing = np.flatnonzero(state.status == CONTINUING)
+        seats_left = state.seats - len(state.winners)
+        if len(continuing) <= seats_left:
+            return self.order_candidates(continuing, state), [], False
+
+        reached = continuing[tallies[continuing] >= state.quota - VOTE_TOLERANCE]
+        if reached.size:
+            return self.order_candidates(reached, state)[:seats_left], [], True
+        if self.rules.bulk_defeat:
+            bulk = self.find_bulk_defeat(state, tallies)
+            if bulk is not None:
+                return [], bulk.candidates, False
+        return [], [self.select_loser(continuing, state)], False
+
+    def find_bulk_defeat(
+        self, state: TabulationState, tallies: np.ndarray
+    ) -> Optional[BulkDefeat]:
+        """Trailing candidates (dense indices) that can be eliminated together."""
+        continuing = np.flatnonzero(state.status == CONTINUING)
+        votes = {int(c): float(tallies[c]) for c in continuing}
+        seats_left = state.seats - len(state.winners)
+        bulk = find_bulk_defeat(votes, seats_left, state.quota, state.round_number + 1)
+        if bulk is not None and self.rules.dynamic_quota:
+            # The quota falls if the group's votes exhaust instead of moving on
+            active = tallies.sum() + state.settled_votes[state.winners].sum()
+            quota = self.quota_for(float(active - bulk.combined_votes), state.seats)
+            bulk = find_bulk_defeat(votes, seats_left, quota, bulk.round_number)
+        return bulk
+
+    def _update_quota(self, state: TabulationState, tallies: np.ndarray):
+        """Recompute a dynamic quota from the votes still in play."""
+        if self.rules.dynamic_quota:
+            active = tallies.sum() + state.settled_votes[state.winners].sum()
+            state.quota = self.quota_for(float(active), state.seats)
+
+    def order_candidates(
+        self, candidates: np.ndarray, state: TabulationState, descending: bool = True
+    ) -> List[int]:
+        """
+        Order candidates by current votes, breaking ties with the rules'
+        tie-break and then by candidate ID.
+        """
+        tie_break = TIE_BREAK_RULES[self.rules.tie_break]
+        return tie_break(np.asarray(candidates), state.history, descending)
+
+    def select_loser(self, continuing: np.ndarray, state: TabulationState) -> int:
+        """Pick the continuing candidate to eliminate."""
+        return self.order_candidates(continuing, state, descending=False)[0]
+
+    def _transfer_surplus(self, state: TabulationState, rows: np.ndarray, votes: float):
+        """Reweight a winner's ballots to carry their share of the surplus."""
+        transfer = self.transfer_rules[self.rules.transfer]
+        values = self.ballot_values(state, rows)
+        state.weight[rows] *= transfer(values, votes, state.quota)
+
+    def _eliminate(
+        self, state: TabulationState, eliminated: List[int], tallies: np.ndarray
+    ):
+        if len(eliminated) > 1:
+            bulk = self.find_bulk_defeat(state, tallies)
+            imposed = bulk is None or sorted(bulk.candidates) != sorted(eliminated)
+            if imposed:
+                # Imposed through apply_decision (what-if, margin search)
+                # rather than found by decide(), so nothing guarantees it
+                rest = np.setdiff1d(
+                    np.flatnonzero(state.status == CONTINUING), eliminated
+                )
+                bulk = BulkDefeat(
+                    round_number=state.round_number + 1,
+                    candidates=[],
+                    combined_votes=float(tallies[eliminated].sum()),
+                    next_lowest_votes=float(tallies[rest].min()) if rest.size else 0.0,
+                    may_differ=True,
+                )
+            bulk.candidates = [int(self.patterns.candidate_ids[c]) for c in eliminated]
+            if bulk.may_differ and not imposed:
+                logger.warning(
+                    f"Round {bulk.round_number}: bulk defeat of {bulk.candidates} "
+                    "moves enough votes to reach quota; single elimination "
+                    "could give a different result"
+                )
+            state.bulk_defeats.append(bulk)
+        for c in eliminated:
+            state.status[c] = ELIMINATED
+            state.settled_votes[c] = tallies[c]
+            state.eliminated.append(c)
+
+    def _elect(
+        self,
+        state: TabulationState,
+        elected: List[int],
+        tallies: np.ndarray,
+        cap: bool,
+    ):
+        for c in elected:
+            state.status[c] = ELECTED
+            state.settled_votes[c] = min(tallies[c], state.quota) if cap else tallies[c]
+            state.winners.append(c)
+
+    def _advance(self, state: TabulationState, rows: np.ndarray):
+        """Move pointers forward past candidates that are no longer continuing."""
+        # Padding (-1) reads the trailing sentinel, which counts as continuing
+        status = np.append(state.status, CONTINUING)
+        while rows.size:
+            blocked = status[self.rankings[rows, state.pointer[rows]]] != CONTINUING
+            rows = rows[blocked]
+            state.pointer[rows] += 1
+
+    def _move(
+        self, state: TabulationState, rows: np.ndarray, current: np.ndarray
+    ) -> Dict[int, Dict[int, float]]:
+        """Advance the given patterns and summarize where their votes went."""
+        sources = current[rows]
+        self._advance(state, rows)
+        return self._flows(state, rows, sources)
+
+    def _flows(
+        self, state: TabulationState, rows: np.ndarray, sources: np.ndarray
+    ) -> Dict[int, Dict[int, float]]:
+        """Votes moved from ``sources`` to the patterns' current candidates."""
+        destinations = self.rankings[rows, state.pointer[rows]]
+        amounts = self.ballot_values(state, rows)
+
+        keep = (destinations != NO_CANDIDATE) & (amounts > 0)
+        keys = sources[keep] * self.n_candidates + destinations[keep]
+        flows = np.bincount(
+            keys, weights=amounts[keep], minlength=self.n_candidates**2
+        ).reshape(self.n_candidates, self.n_candidates)
+
+        candidate_ids = self.patterns.candidate_ids
+        transfers: Dict[int, Dict[int, float]] = {}
+        for source in np.unique(sources):
+            targets = np.flatnonzero(flows[source])
+            transfers[int(candidate_ids[source])] = {
+                int(candidate_ids[t]): float(flows[source, t]) for t in targets
+            }
+        return transfers
+
+    def _record_round(
+        self,
+        state: TabulationState,
+        elected: List[int],
+        eliminated: List[int],
+        transfers: Dict[int, Dict[int, float]],
+        tallies: Optional[np.ndarray] = None,
+    ) -> STVRound:
+        candidate_ids = self.patterns.candidate_ids
+        if tallies is None:
+            tallies = self.tally(state)
+        continuing = state.status == CONTINUING
+        totals = np.where(continuing, tallies, state.settled_votes)
+        winners = np.zeros(self.n_candidates, dtype=bool)
+        winners[state.winners] = True
+        total_continuing = float(totals[continuing].sum() + totals[winners].sum())
+
+        return STVRound(
+            round_number=state.round_number + 1,
+            continuing_candidates=[int(c) for c in candidate_ids[continuing]],
+            vote_totals={int(cid): float(v) for cid, v in zip(candidate_ids, totals)},
+            quota=state.quota,
+            winners_this_round=[int(candidate_ids[c]) for c in elected],
+            eliminated_this_round=[int(candidate_ids[c]) for c in eliminated],
+            transfers=transfers,
+            exhausted_votes=self.total_votes - total_continuing,
+            total_continuing_votes=total_continuing,
+        )
+
+
+class KeepValueSTV(VectorizedSTV):
+    """
+    STV counted with keep values (Meek or Warren rules).
+
+    Every candidate has a keep value: 1 while continuing, 0 once eliminated
+    or withdrawn, and for winners the share that leaves them holding exactly
+    a quota. Each ballot is distributed down its ranking by those keep values,
+    so surpluses flow on without moving any pointers, and later transfers
+    into a winner are passed on as well.
+    """
+
+    transfer_rules = KEEP_VALUE_TRANSFERS
+
+    def __init__(self, patterns: BallotPatterns, rules: Optional[STVRules] = None):
+        super().__init__(patterns, rules)
+        # Rank-major candidate index with padding mapped to an extra bin, so
+        # one gather reads every ballot's keep values and one bincount tallies
+        self._keep_index = np.ascontiguousarray(
+            np.where(self.rankings == NO_CANDIDATE, self.n_candidates, self.rankings).T,
+            dtype=np.intp,
+        )
+        self._flat_index = self._keep_index.ravel()
+
+    def initial_state(
+        self, seats: int, withdrawn: Optional[List[int]] = None
+    ) -> TabulationState:
+        state = super().initial_state(seats)
+        state.keep = np.ones(self.n_candidates)
+        if withdrawn:
+            self.withdraw(state, withdrawn)
+        return state
+
+    def withdraw(self, state: TabulationState, candidates: List[int]):
+        state.status[candidates] = WITHDRAWN
+        state.keep[candidates] = 0.0
+        state.converged = None
+
+    def tally(
+        self, state: TabulationState, current: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Votes each candidate receives when ballots are split by keep values."""
+        # Padding reads the appended zero keep value
+        keep = np.take(np.append(state.keep, 0.0), self._keep_index)
+        shares = self.transfer_rules[self.rules.transfer](keep)
+        shares *= self.counts
+        return np.bincount(
+            self._flat_index, weights=shares.ravel(), minlength=self.n_candidates + 1
+        )[: self.n_candidates]
+
+    def converge(self, state: TabulationState) -> np.ndarray:
+        """
+        Iterate winners' keep values until each holds a quota.
+
+        Returns:
+            Tallies under the converged keep values (also kept in
+            ``state.converged`` so the next round starts from them)
+        """
+        winners = np.asarray(state.winners, dtype=int)
+        for _ in range(self.rules.max_iterations):
+            tallies = self.tally(state)
+            if self.rules.dynamic_quota:
+                state.quota = self.quota_for(float(tallies.sum()), state.seats)
+            state.converged = tallies
+            if not winners.size:
+                return tallies
+            votes = tallies[winners]
+            excess = votes - state.quota
+            settled = (np.abs(excess) <= self.rules.tolerance) | (
+                (excess < 0) & (state.keep[winners] >= 1.0)
+            )
+            if settled.all():
+                return tallies
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scaled = np.where(votes > 0, state.quota / votes, 1.0)
+            state.keep[winners] = np.minimum(state.keep[winners] * scaled, 1.0)
+
+        logger.warning(
+            f"Keep values did not converge within {self.rules.max_iterations} "
+            f"iterations (tolerance {self.rules.tolerance})"
+        )
+        return tallies
+
+    def step(self, state: TabulationState) -> STVRound:
+        """Run one round: converge keep values, then elect or eliminate."""
+        tallies = state.converged
+        if tallies is None:
+            tallies = self.converge(state)
+        state.history.append(tallies)
+
+        elected, eliminated, surplus = self.decide(state, tallies)
+        transfers: Dict[int, Dict[int, float]] = {}
+        if elected:
+            self._elect(state, elected, tallies, cap=surplus)
+        else:
+            self._eliminate(state, eliminated, tallies)
+            state.keep[eliminated] = 0.0
+
+        after = tallies
+        if surplus or eliminated:
+            after = self.converge(state)
+            state.settled_votes[state.winners] = after[state.winners]
+            transfers = self._keep_value_flows(tallies, after, elected + eliminated)
+
+        round_record = self._record_round(
+            state, elected, eliminated, transfers, tallies=after
+        )
+        state.rounds.append(round_record)
+        return round_record
+
+    def _keep_value_flows(
+        self, before: np.ndarray, after: np.ndarray, sources: List[int]
+    ) -> Dict[int, Dict[int, float]]:
+        """Attribute the votes gained this round to the candidates who lost them."""
+        losses = np.maximum(before[sources] - after[sources], 0.0)
+        gains = np.maximum(after - before, 0.0)
+        gains[sources] = 0.0
+        total_loss = losses.sum()
+
+        candidate_ids = self.patterns.candidate_ids
+        transfers: Dict[int, Dict[int, float]] = {}
+        for source, loss in zip(sources, losses):
+            share = loss / total_loss if total_loss > 0 else 0.0
+            transfers[int(candidate_ids[source])] = {
+                int(candidate_ids[t]): float(gains[t] * share)
+                for t in np.flatnonzero(gains * share > VOTE_TOLERANCE)
+            }
+        return transfers
+
+
+class FixedPointSTV(VectorizedSTV):
+    """
+    Gregory STV counted in scaled int64 fixed-point arithmetic.
+
+    Ballot weights are integers in units of 10^-decimals of a vote, so every
+    tally is an exact sum and counts are reproducible across platforms. The
+    rules follow the usual hand-count conventions:
+    - the quota is truncated to ``decimals`` places
+    - a transfer value (surplus / votes) is truncated to ``decimals`` places
+    - each ballot's new value (value x transfer value) is truncated again
+    Votes lost to truncation are counted as exhausted.
+    """
+
+    fixed_point = True
+
+    def __init__(self, patterns: BallotPatterns, rules: Optional[STVRules] = None):
+        super().__init__(patterns, rules)
+        self.scale = 10**self.rules.decimals
+        self.unit_counts = patterns.counts.astype(np.int64)
+        # Tallies are float64 sums of integer units; exact below 2**53
+        if self.total_votes * self.scale >= 2**53:
+            raise ValueError(
+                f"{self.total_votes:.0f} ballots at {self.rules.decimals} "
+                "decimals exceed exact float64 tallies; use fewer decimals"
+            )
+
+    def initial_state(
+        self, seats: int, withdrawn: Optional[List[int]] = None
+    ) -> TabulationState:
+        state = super().initial_state(seats, withdrawn)
+        state.weight = np.full(self.patterns.n_patterns, self.scale, dtype=np.int64)
+        return state
+
+    def to_units(self, votes: float) -> int:
+        """Votes (a multiple of 10^-decimals) as an exact integer of units."""
+        return int(round(votes * self.scale))
+
+    def tally(
+        self, state: TabulationState, current: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        if current is None:
+            current = self.current_candidates(state)
+        units = np.bincount(
+            current + 1,
+            weights=self.unit_counts * state.weight,
+            minlength=self.n_candidates + 1,
+        )[1:]
+        return units / self.scale
+
+    def quota_for(self, total_votes: float, seats: int) -> float:
+        # Exact rational quota, then truncated
+        quota = self.rules.quota_for(
+            Fraction(self.to_units(total_votes), self.scale), seats
+        )
+        return math.floor(quota * self.scale) / self.scale
+
+    def ballot_values(self, state: TabulationState, rows: np.ndarray) -> np.ndarray:
+        return self.unit_counts[rows] * state.weight[rows] / self.scale
+
+    def _transfer_surplus(self, state: TabulationState, rows: np.ndarray, votes: float):
+        votes_units = self.to_units(votes)
+        surplus_units = votes_units - self.to_units(state.quota)
+        if surplus_units <= 0:
+            state.weight[rows] = 0
+            return
+        transfer_value = surplus_units * self.scale // votes_units
+        state.weight[rows] = state.weight[rows] * transfer_value // self.scale
+
+    def _record_round(
+        self,
+        state: TabulationState,
+        elected: List[int],
+        eliminated: List[int],
+        transfers: Dict[int, Dict[int, float]],
+        tallies: Optional[np.ndarray] = None,
+    ) -> STVRound:
+        round_record = super()._record_round(
+            state, elected, eliminated, transfers, tallies
+        )
+        decimals = self.rules.decimals
+        round_record.exhausted_votes = round(round_record.exhausted_votes, decimals)
+        round_record.total_continuing_votes = round(
+            round_record.total_continuing_votes, decimals
+        )
+        return round_record
+
+
+def create_engine(
+    patterns: BallotPatterns, rules: Union[str, STVRules, None] = None
+) -> VectorizedSTV:
+    """
+    Build the engine for a set of counting rules.
+
+    Args:
+        patterns: Ballot patterns to count
+        rules: STVRules or a preset name from stv_rules.RULE_PRESETS
+    """
+    rules = get_rules(rules)
+    if rules.keep_value:
+        return KeepValueSTV(patterns, rules)
+    if rules.fixed_point:
+        return FixedPointSTV(patterns, rules)
+    return VectorizedSTV(patterns, rules)
+
+
+def compare_rules(
+    patterns: BallotPatterns,
+    seats: int = 3,
+    rules: Optional[Dict[str, Union[str, STVRules]]] = None,
+) -> pd.DataFrame:
+    """
+    Count the same ballots under several rule sets and list who each elects.
+
+    Args:
+        patterns: Ballot patterns (loaded once, shared by every count)
+        seats: Number of seats (rules with a fixed seat count override this)
+        rules: Mapping of label to STVRules or preset name; all presets if omitted
+
+    Returns:
+        DataFrame with one row per rule set and seat: rules, seat, candidate_id,
+        candidate_name, election_round, quota, total_rounds, elapsed_seconds
+    """
+    if rules is None:
+        rules = {name: name for name in ("gregory", "whole", "meek", "warren", "irv")}
+
+    rows = []
+    for label, rule in rules.items():
+        start = time.time()
+        engine = create_engine(patterns, rule)
+        state = engine.run(engine.initial_state(seats))
+        elapsed = time.time() - start
+
+        election_round = {}
+        for round_obj in state.rounds:
+            for cid in round_obj.winners_this_round:
+                election_round[cid] = round_obj.round_number
+        for seat, c in enumerate(state.winners, start=1):
+            cid = int(patterns.candidate_ids[c])
+            rows.append(
+                {
+                    "rules": label,
+                    "seat": seat,
+                    "candidate_id": cid,
+                    "candidate_name": patterns.candidate_name(c),
+                    "election_round": election_round[cid],
+                    "quota": state.quota,
+                    "total_rounds": len(state.rounds),
+                    "elapsed_seconds": elapsed,
+                }
+            )
+        logger.info(f"{label} rules: {len(state.rounds)} rounds in {elapsed:.3f}s")
+    return pd.DataFrame(rows)
+
+
+class VectorizedSTVTabulator(STVTabulator):
+    """
+    Drop-in STVTabulator that counts over in-memory ballot patterns.
+    """
+
+    def __init__(
+        self,
+        db: CVRDatabase,
+        seats: int = 3,
+        patterns: BallotPatterns = None,
+        rules: Union[str, STVRules, None] = None,
+    ):
+        """
+        Initialize vectorized STV tabulator.
+
+        Args:
+            db: Database connection with normalized ballot data
+            seats: Number of seats to fill
+            patterns: Preloaded ballot patterns (loaded from db if omitted)
+            rules: Counting rules or preset name (default: Droop + Gregory)
+        """
+        super().__init__(db, seats)
+        self._patterns = patterns
+        self.rules = get_rules(rules)
+        self.state: Optional[TabulationState] = None
+
+    @property
+    def patterns(self) -> BallotPatterns:
+        if self._patterns is None:
+            self._patterns = load_ballot_patterns(self.db)
+        return self._patterns
+
+    @instrument("stv.vectorized.tabulate")
+    @observe_tabulation("vectorized")
+    def run_stv_tabulation(self) -> List[STVRound]:
+        """
+        Run complete STV tabulation.
+
+        Returns:
+            List of STVRound objects representing each round
+        """
+        logger.info("Starting vectorized STV tabulation")
+        start = time.time()
+
+        engine = create_engine(self.patterns, self.rules)
+        self.state = engine.run(engine.initial_state(self.seats))
+        self._sync_results()
+
+        logger.info(
+            f"STV tabulation complete in {time.time() - start:.3f}s: "
+            f"winners {self.winners}, {len(self.rounds)} rounds"
+        )
+        return self.rounds
+
+    def iter_rounds(self) -> Iterator[STVRound]:
+        """Run the tabulation, yielding each round as soon as it is counted."""
+        engine = create_engine(self.patterns, self.rules)
+        self.state = engine.initial_state(self.seats)
+        for round_record in engine.iter_rounds(self.state):
+            self._sync_results()
+            yield round_record
+
+    def _sync_results(self):
+        candidate_ids = self.patterns.candidate_ids
+        self.rounds = self.state.rounds
+        self.winners = [int(candidate_ids[c]) for c in self.state.winners]
+        self.eliminated = [int(candidate_ids[c]) for c in self.state.eliminated]
+        self.bulk_defeats = self.state.bulk_defeats
+
+    def run_seat_sweep(self, seat_counts: List[int]) -> pd.DataFrame:
+        """
+        Tabulate several seat counts in one pass and compare the outcomes.
+
+        Args:
+            seat_counts: Seat numbers to tabulate (e.g. [1, 2, 3, 4, 5])
+
+        Returns:
+            DataFrame with one row per seat count and candidate
+        """
+        start = time.time()
+        engine = create_engine(self.patterns, self.rules)
+        states = engine.sweep(seat_counts)
+        logger.info(
+            f"Seat sweep {sorted(states)} complete in {time.time() - start:.3f}s"
+        )
+        return compare_seat_counts(self.patterns, states)
+
+    def run_rule_comparison(
+        self, rules: Optional[Dict[str, Union[str, STVRules]]] = None
+    ) -> pd.DataFrame:
+        """
+        Count the election under several rule sets from one data load.
+
+        Args:
+            rules: Mapping of label to STVRules or preset name (all presets
+                if omitted)
+
+        Returns:
+            DataFrame with one row per rule set and seat (see compare_rules)
+        """
+        return compare_rules(self.patterns, self.seats, rules)
+
+
+def compare_seat_counts(
+    patterns: BallotPatterns, states: Dict[int, TabulationState]
+) -> pd.DataFrame:
+    """
+    Tabulate seat-sweep results as one row per seat count and candidate.
+
+    Columns: seats, candidate_id, candidate_name, elected, seat_order,
+    election_round, elimination_round, first_choice_votes, final_votes,
+    quota, total_rounds
+    """
+    rows = []
+    for seats in sorted(states):
+        state = states[seats]
+        first_choices = state.history[0] if state.history else None
+        final_round = state.rounds[-1] if state.rounds else None
+        decided = {}
+        for round_obj in state.rounds:
+            for cid in round_obj.winners_this_round:
+                decided[cid] = ("elected", round_obj.round_number)
+            for cid in round_obj.eliminated_this_round:
+                decided[cid] = ("eliminated", round_obj.round_number)
+        seat_order = {
+            int(patterns.candidate_ids[c]): i + 1 for i, c in enumerate(state.winners)
+        }
+
+        for i, cid in enumerate(patterns.candidate_ids):
+            cid = int(cid)
+            outcome, round_number = decided.get(cid, (None, None))
+            rows.append(
+                {
+                    "seats": seats,
+                    "candidate_id": cid,
+                    "candidate_name": patterns.candidate_name(i),
+                    "elected": cid in seat_order,
+                    "seat_order": seat_order.get(cid),
+                    "election_round": round_number if outcome == "elected" else None,
+                    "elimination_round": (
+                        round_number if outcome == "eliminated" else None
+                    ),
+                    "first_choice_votes": (
+                        float(first_choices[i]) if first_choices is not None else 0.0
+                    ),
+                    "final_votes": (
+                        final_round.vote_totals.get(cid, 0.0) if final_round else 0.0
+                    ),
+                    "quota": state.quota,
+                    "total_rounds": len(state.rounds),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def _tabulate_block(
+    arrays: Dict[str, np.ndarray],
+    tasks: List[Tuple[int, int, int]],
+    seats: int,
+    include_rounds: bool,
+) -> Dict[str, Dict[str, list]]:
+    """Tabulate each (partition_id, start, stop) slice of the pattern arrays."""
+    summary = {k: [] for k in ("partition_id", "total_ballots", "quota", "rounds")}
+    summary["exhausted_votes"] = []
+    winners = {k: [] for k in ("partition_id", "seat", "candidate_id", "round")}
+    rounds = {k: [] for k in ("partition_id", "round", "candidate_id", "votes")}
+    rounds["status"] = []
+
+    for partition_id, start, stop in tasks:
+        patterns = BallotPatterns(
+            candidate_ids=arrays["candidate_ids"],
+            rankings=arrays["rankings"][start:stop],
+            counts=arrays["counts"][start:stop],
+        )
+        engine = VectorizedSTV(patterns)
+        state = engine.run(engine.initial_state(seats))
+        candidate_ids = patterns.candidate_ids
+
+        summary["partition_id"].append(partition_id)
+        summary["total_ballots"].append(int(engine.total_votes))
+        summary["quota"].append(state.quota)
+        summary["rounds"].append(len(state.rounds))
+        summary["exhausted_votes"].append(
+            state.rounds[-1].exhausted_votes if state.rounds else 0.0
+        )
+
+        election_round = {}
+        for round_obj in state.rounds:
+            for cid in round_obj.winners_this_round:
+                election_round[cid] = round_obj.round_number
+        for seat, c in enumerate(state.winners, start=1):
+            cid = int(candidate_ids[c])
+            winners["partition_id"].append(partition_id)
+            winners["seat"].append(seat)
+            winners["candidate_id"].append(cid)
+            winners["round"].append(election_round[cid])
+
+        if include_rounds:
+            elected_so_far, eliminated_so_far = set(), set()
+            for round_obj in state.rounds:
+                for cid, votes in round_obj.vote_totals.items():
+                    if cid in round_obj.winners_this_round:
+                        status = "elected"
+                    elif cid in round_obj.eliminated_this_round:
+                        status = "eliminated"
+                    elif cid in elected_so_far:
+                        status = "already_elected"
+                    elif cid in eliminated_so_far:
+                        status = "already_eliminated"
+                    else:
+                        status = "continuing"
+                    rounds["partition_id"].append(partition_id)
+                    rounds["round"].append(round_obj.round_number)
+                    rounds["candidate_id"].append(cid)
+                    rounds["votes"].append(votes)
+                    rounds["status"].append(status)
+                elected_so_far.update(round_obj.winners_this_round)
+                eliminated_so_far.update(round_obj.eliminated_this_round)
+
+    return {"summary": summary, "winners": winners, "rounds": rounds}
+
+
+def _tabulate_shared_block(
+    tasks: List[Tuple[int, int, int]], seats: int, include_rounds: bool
+) -> Dict[str, Dict[str, list]]:
+    return _tabulate_block(get_shared_arrays(), tasks, seats, include_rounds)
+
+
+def tabulate_partitions(
+    patterns: BallotPatterns,
+    seats: int = 3,
+    partitions: Optional[Dict[int, int]] = None,
+    max_workers: Optional[int] = None,
+    include_rounds: bool = True,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Tabulate every partition of the electorate as its own STV election.
+
+    Args:
+        patterns: Ballot patterns loaded with by_precinct=True
+        seats: Number of seats in each partition's election
+        partitions: Optional mapping of precinct ID to partition ID (e.g. to
+            group precincts); by default each precinct is its own partition
+        max_workers: Worker processes (None = CPU count, 1 = run in-process)
+        include_rounds: Also return round-by-round vote totals
+
+    Returns:
+        Dict of columnar DataFrames: ``summary`` (one row per partition),
+        ``winners`` (one row per seat) and ``rounds`` (one row per partition,
+        round and candidate; empty unless include_rounds)
+    """
+    if patterns.precinct_ids is None:
+        raise ValueError("Patterns must be loaded with by_precinct=True")
+
+    start = time.time()
+    if partitions is None:
+        partition_ids = patterns.precinct_ids
+    else:
+        partition_ids = np.array(
+            [partitions.get(int(p), int(p)) for p in patterns.precinct_ids],
+            dtype=np.int64,
+        )
+
+    # Sort patterns so each partition is a contiguous slice
+    order = np.argsort(partition_ids, kind="stable")
+    partition_ids = partition_ids[order]
+    arrays = {
+        "candidate_ids": patterns.candidate_ids,
+        "rankings": np.ascontiguousarray(patterns.rankings[order]),
+        "counts": patterns.counts[order],
+    }
+    unique_ids, starts = np.unique(partition_ids, return_index=True)
+    stops = np.append(starts[1:], len(partition_ids))
+    tasks = [
+        (int(pid), int(lo), int(hi)) for pid, lo, hi in zip(unique_ids, starts, stops)
+    ]
+
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        # Several small blocks per worker keeps the pool balanced
+        n_blocks = min(len(tasks), workers * 4)
+        blocks = [tasks[i::n_blocks] for i in range(n_blocks)]
+        with share_arrays(arrays) as spec:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=attach_shared_arrays,
+                initargs=(spec,),
+            ) as executor:
+                results = list(
+                    executor.map(
+                        _tabulate_shared_block,
+                        blocks,
+                        [seats] * n_blocks,
+                        [include_rounds] * n_blocks,
+                    )
+                )
+    else:
+        results = [_tabulate_block(arrays, tasks, seats, include_rounds)]
+
+    names = {
+        int(cid): patterns.candidate_name(i)
+        for i, cid in enumerate(patterns.candidate_ids)
+    }
+    frames = {}
+    for key in ("summary", "winners", "rounds"):
+        columns = results[0][key].keys()
+        frames[key] = pd.DataFrame(
+            {col: [v for r in results for v in r[key][col]] for col in columns}
+        )
+        if "candidate_id" in frames[key]:
+            frames[key]["candidate_name"] = frames[key]["candidate_id"].map(names)
+        sort_cols = [c for c in ("partition_id", "seat", "round") if c in columns]
+        frames[key] = frames[key].sort_values(sort_cols, kind="stable")
+        frames[key] = frames[key].reset_index(drop=True)
+
+    logger.info(
+        f"Tabulated {len(tasks)} partitions ({seats} seats) with {workers} "
+        f"worker(s) in {time.time() - start:.2f}s"
+    )
+    return frames
@@ -1,10 +1,17 @@
 import logging
 import re
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import pandas as pd
 
+try:
+    from .cross_verification import CrossVerificationReport
+    from .margin import MarginResult
+except ImportError:
+    from analysis.cross_verification import CrossVerificationReport
+    from analysis.margin import MarginResult
+
 logger = logging.getLogger(__name__)
 
 
@@ -215,6 +222,8 @@ class ResultsVerifier:
         our_winners: List[int],
         our_candidates: pd.DataFrame,
         our_first_choice: pd.DataFrame,
+        margin: Optional[MarginResult] = None,
+        cross_verification: Optional[CrossVerificationReport] = None,
     ) -> Dict:
         """
         Verify our results against official results.
@@ -223,6 +232,9 @@ class ResultsVerifier:
             our_winners: List of candidate IDs we calculated as winners
             our_candidates: DataFrame with candidate ID to name mapping
             our_first_choice: DataFrame with our first choice vote counts
+            margin: Margin-of-victory bounds to include in the report
+            cross_verification: Engine cross-verification to include; the
+                verification fails if the engines elect different winners
 
         Returns:
             Verification report dictionary
@@ -312,8 +324,14 @@ class ResultsVerifier:
             "total_vote_difference": total_vote_difference,
             "max_candidate_difference": max_candidate_difference,
             "candidates_with_differences": candidates_with_differences,
-            "verification_passed": winners_match and total_vote_difference == 0,
+            "verification_passed": (
+                winners_match
+                and total_vote_difference == 0
+                and (cross_verification is None or cross_verification.winners_agree)
+            ),
             "official_metadata": self.official_data["metadata"],
+            "margin": margin,
+            "cross_verification": cross_verification,
         }
 
         return verification_report
@@ -389,6 +407,57 @@ class ResultsVerifier:
                     f"  {row['candidate_name']}: Official={row['official_votes']}, Ours={row['our_votes']}, Diff={row['difference']}"
                 )
 
+        margin = verification_results.get("margin")
+        if margin is not None:
+            report.append("")
+            report.append("MARGIN OF VICTORY:")
+            upper = (
+                margin.upper_bound if margin.upper_bound is not None else "not found"
+            )
+            report.append(
+                f"Ballots that must change to alter the winners: "
+                f"at least {margin.lower_bound}, at most {upper}"
+            )
+            if margin.manipulation is not None:
+                m = margin.manipulation
+                report.append(
+                    f"  Example: {m.ballots} ballots ranking candidate "
+                    f"{m.from_candidate} first changed to rank only candidate "
+                    f"{m.to_candidate} elects {m.winners}"
+                )
+            for note in margin.notes:
+                report.append(f"  Note: {note}")
+
+        cross = verification_results.get("cross_verification")
+        if cross is not None:
+            report.append("")
+            report.append(f"CROSS-VERIFICATION ({' vs '.join(cross.engines)}):")
+            if cross.winners_agree:
+                report.append(
+                    f"✅ Engines agree on winners in {len(cross.cases)} cases"
+                )
+            else:
+                report.append("❌ Engines disagree on winners")
+            report.append(
+                f"Round-level discrepancies: {len(cross.discrepancies)} "
+                f"(tolerance {cross.tolerance:g})"
+            )
+            for case in cross.cases:
+                winners = "; ".join(
+                    f"{engine}={winners}" for engine, winners in case["winners"].items()
+                )
+                report.append(
+                    f"  {case['election_id']} ({case['seats']} seats): {winners}, "
+                    f"{case['discrepancies']} discrepancies"
+                )
+            for d in cross.discrepancies[:5]:
+                where = f"round {d.round_number}" if d.round_number else "overall"
+                who = f" candidate {d.candidate_id}" if d.candidate_id else ""
+                report.append(
+                    f"  {d.election_id} ({d.seats} seats) {where}{who} {d.kind}: "
+                    f"{d.engine_a}={d.value_a}, {d.engine_b}={d.value_b}"
+                )
+
         # Metadata
         report.append("")
         report.append("OFFICIAL ELECTION METADATA:")
@@ -0,0 +1,324 @@
+"""
+What-If (Counterfactual) STV Tabulation
+
+Answers questions like "what if candidate X had withdrawn" or "what if these
+precincts' ballots were excluded" without recounting from round 1.
+
+The baseline count is run once with per-round checkpoints (pointer and weight
+arrays, status and tallies). For a counterfactual, each checkpoint is adjusted
+for the change (withdrawn candidates skipped, ballot counts reduced) and the
+baseline's decision for that round is re-checked against the adjusted
+tallies. Counting resumes from the first round whose decision would differ;
+every earlier round is reused as-is.
+
+A baseline round is only reused if it produces exactly the same state in the
+counterfactual:
+- the same candidates are elected or eliminated, in the same order
+- for surplus transfers, the winner holds exactly the same ballots and the
+  quota is unchanged, so every transfer value is identical
+"""
+
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from ..data.ballot_patterns import (
+        NO_CANDIDATE,
+        BallotPatterns,
+        load_ballot_patterns,
+    )
+    from ..data.database import CVRDatabase
+    from .stv import STVRound
+    from .stv_vectorized import CONTINUING, TabulationState, VectorizedSTV
+except ImportError:
+    from analysis.stv import STVRound
+    from analysis.stv_vectorized import CONTINUING, TabulationState, VectorizedSTV
+    from data.ballot_patterns import NO_CANDIDATE, BallotPatterns, load_ballot_patterns
+    from data.database import CVRDatabase
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WhatIfResult:
+    """Outcome of a counterfactual count compared with the baseline."""
+
+    seats: int
+    removed_candidates: List[int]
+    excluded_ballots: int
+    total_ballots: int
+    quota: float
+    winners: List[int]
+    baseline_winners: List[int]
+    rounds: List[STVRound]
+    baseline_rounds: int
+    rounds_reused: int  # leading rounds taken from the baseline checkpoints
+    state: TabulationState
+
+    @property
+    def winners_changed(self) -> bool:
+        return set(self.winners) != set(self.baseline_winners)
+
+    @property
+    def resumed_from_round(self) -> int:
+        """First round actually counted in the counterfactual."""
+        return self.rounds_reused + 1
+
+
+def resume_counterfactual(
+    baseline_engine: VectorizedSTV,
+    baseline: TabulationState,
+    engine: VectorizedSTV,
+    withdrawn: Optional[List[int]] = None,
+) -> Tuple[TabulationState, int]:
+    """
+    Count a counterfactual, reusing the baseline's rounds while they still hold.
+
+    Args:
+        baseline_engine: Engine the baseline was counted with
+        baseline: Completed baseline state, run with ``checkpoint=True``
+        engine: Engine over the same patterns with counterfactual counts
+        withdrawn: Dense indices of candidates withdrawn in the counterfactual
+
+    Returns:
+        Tuple of (completed counterfactual state, baseline rounds reused)
+    """
+    withdrawn = list(withdrawn or [])
+    if len(baseline.checkpoints) != len(baseline.rounds):
+        raise ValueError("Baseline must be counted with checkpoint=True")
+
+    seats = baseline.seats
+    quota = engine.quota_for(engine.total_votes, seats)
+    snapshots = baseline.checkpoints + [baseline]
+    history: List[np.ndarray] = []
+    rounds: List[STVRound] = []
+    settled = np.zeros(engine.n_candidates)
+
+    def adjust(snapshot: TabulationState) -> TabulationState:
+        state = snapshot.copy()
+        state.quota = quota
+        state.history = list(history)
+        state.rounds = list(rounds)
+        state.settled_votes = settled.copy()
+        state.checkpoints = []
+        if withdrawn:
+            engine.withdraw(state, withdrawn)
+        return state
+
+    state = adjust(snapshots[0])
+    reused = 0
+    for k, baseline_round in enumerate(baseline.rounds):
+        checkpoint = snapshots[k]
+        current = engine.current_candidates(state)
+        tallies = engine.tally(state, current)
+        state.history.append(tallies)
+        elected, eliminated, surplus = engine.decide(state, tallies)
+
+        expected_elected = [
+            baseline_engine.patterns.candidate_index(c)
+            for c in baseline_round.winners_this_round
+        ]
+        expected_eliminated = [
+            baseline_engine.patterns.candidate_index(c)
+            for c in baseline_round.eliminated_this_round
+        ]
+        seats_left = seats - len(checkpoint.winners)
+        expected_surplus = bool(expected_elected) and (
+            int(np.sum(checkpoint.status == CONTINUING)) > seats_left
+        )
+        if (elected, eliminated, surplus) != (
+            expected_elected,
+            expected_eliminated,
+            expected_surplus,
+        ):
+            break
+        if surplus and not _same_holders(
+            baseline_engine, checkpoint, engine, current, elected, quota
+        ):
+            break
+
+        history.append(tallies)
+        for c in elected:
+            settled[c] = min(tallies[c], quota) if surplus else tallies[c]
+        for c in eliminated:
+            settled[c] = tallies[c]
+
+        next_state = adjust(snapshots[k + 1])
+        if surplus or eliminated:
+            rows = np.flatnonzero(np.isin(current, elected + eliminated))
+            transfers = engine._flows(next_state, rows, current[rows])
+        else:
+            transfers = {}
+        rounds.append(engine._record_round(next_state, elected, eliminated, transfers))
+        next_state.rounds = list(rounds)
+        state = next_state
+        reused = k + 1
+
+    # Discard the tally of the round that differed; run() counts it afresh
+    state.history = list(history)
+    engine.run(state)
+    return state, reused
+
+
+def _same_holders(
+    baseline_engine: VectorizedSTV,
+    checkpoint: TabulationState,
+    engine: VectorizedSTV,
+    current: np.ndarray,
+    elected: List[int],
+    quota: float,
+) -> bool:
+    """True if every winner holds the same ballots at the same quota as before."""
+    if quota != checkpoint.quota:
+        return False
+    baseline_current = baseline_engine.current_candidates(checkpoint)
+    for c in elected:
+        holders = current == c
+        if not np.array_equal(holders, baseline_current == c):
+            return False
+        if not np.array_equal(engine.counts[holders], baseline_engine.counts[holders]):
+            return False
+    return True
+
+
+class CounterfactualAnalyzer:
+    """
+    Runs what-if counts against a checkpointed baseline.
+    """
+
+    def __init__(
+        self,
+        db: Optional[CVRDatabase] = None,
+        patterns: BallotPatterns = None,
+        seats: int = 3,
+    ):
+        """
+        Initialize counterfactual analyzer.
+
+        Args:
+            db: Database connection with ballot data (used if patterns not given)
+            patterns: Preloaded ballot patterns (per precinct to allow
+                precinct filters)
+            seats: Number of seats to fill
+        """
+        if db is None and patterns is None:
+            raise ValueError("Either db or patterns must be provided")
+        self.db = db
+        self.seats = seats
+        self._patterns = patterns
+        self._owns_patterns = patterns is None
+        self._engine: Optional[VectorizedSTV] = None
+        self._baseline: Optional[TabulationState] = None
+
+    @property
+    def patterns(self) -> BallotPatterns:
+        if self._patterns is None:
+            self._patterns = load_ballot_patterns(self.db, by_precinct=True)
+        return self._patterns
+
+    @property
+    def engine(self) -> VectorizedSTV:
+        if self._engine is None:
+            self._engine = VectorizedSTV(self.patterns)
+        return self._engine
+
+    @property
+    def baseline(self) -> TabulationState:
+        """Baseline count with per-round checkpoints (computed once)."""
+        if self._baseline is None:
+            start = time.time()
+            engine = self.engine
+            self._baseline = engine.run(
+                engine.initial_state(self.seats), checkpoint=True
+            )
+            logger.info(
+                f"Checkpointed baseline count: {len(self._baseline.rounds)} rounds "
+                f"in {time.time() - start:.2f}s"
+            )
+        return self._baseline
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory held by the engine and the checkpointed baseline, plus the
+        patterns if this analyzer loaded them (shared ones are not counted).
+        Zero until the baseline has been counted.
+        """
+        if self._baseline is None:
+            return 0
+        engine = self.engine
+        total = engine.rankings.nbytes + engine.counts.nbytes + engine._rows.nbytes
+        total += self._baseline.nbytes
+        if self._owns_patterns:
+            total += self.patterns.nbytes
+        return int(total)
+
+    def run_what_if(
+        self,
+        remove_candidates: Optional[List[int]] = None,
+        exclude_precincts: Optional[List[int]] = None,
+        exclude_counts: Optional[np.ndarray] = None,
+    ) -> WhatIfResult:
+        """
+        Count the election as if candidates had withdrawn or ballots were excluded.
+
+        Args:
+            remove_candidates: Candidate IDs treated as withdrawn
+            exclude_precincts: Precinct IDs whose ballots are not counted
+            exclude_counts: (P,) ballots to drop from each pattern
+
+        Returns:
+            WhatIfResult comparing the counterfactual with the baseline
+        """
+        start = time.time()
+        patterns = self.patterns
+        removed_ids = sorted({int(c) for c in remove_candidates or []})
+        try:
+            withdrawn = [patterns.candidate_index(c) for c in removed_ids]
+        except KeyError as e:
+            raise ValueError(str(e.args[0]))
+
+        counts = patterns.counts.astype(np.int64)
+        if exclude_counts is not None:
+            counts = counts - np.minimum(np.asarray(exclude_counts), counts)
+        if exclude_precincts:
+            if patterns.precinct_ids is None:
+                raise ValueError("Precinct filters need patterns loaded by precinct")
+            counts[np.isin(patterns.precinct_ids, exclude_precincts)] = 0
+        if withdrawn:
+            # Ballots ranking only withdrawn candidates are not valid votes
+            ranked = patterns.rankings != NO_CANDIDATE
+            remaining = ranked & ~np.isin(patterns.rankings, withdrawn)
+            counts[~remaining.any(axis=1)] = 0
+
+        baseline_engine = self.engine
+        baseline = self.baseline
+        engine = VectorizedSTV(replace(patterns, counts=counts))
+        state, reused = resume_counterfactual(
+            baseline_engine, baseline, engine, withdrawn
+        )
+
+        candidate_ids = patterns.candidate_ids
+        result = WhatIfResult(
+            seats=self.seats,
+            removed_candidates=removed_ids,
+            excluded_ballots=patterns.total_ballots - int(counts.sum()),
+            total_ballots=int(counts.sum()),
+            quota=state.quota,
+            winners=[int(candidate_ids[c]) for c in state.winners],
+            baseline_winners=[int(candidate_ids[c]) for c in baseline.winners],
+            rounds=state.rounds,
+            baseline_rounds=len(baseline.rounds),
+            rounds_reused=reused,
+            state=state,
+        )
+        logger.info(
+            f"What-if count reused {result.rounds_reused} of "
+            f"{result.baseline_rounds} baseline rounds, "
+            f"{len(result.rounds)} rounds in {time.time() - start:.2f}s"
+        )
+        return result
@@ -0,0 +1,317 @@
+"""
+Compact Ballot Pattern Representation
+
+Collapses the normalized ``ballots_long`` table into the distinct rankings that
+voters actually cast, each with a ballot count. Rankings are stored as dense
+candidate indices in a padded NumPy matrix so analysis code can work with
+vectorized array operations instead of row-by-row SQL or pandas loops.
+
+Ranking normalization matches the PyRankVote conversion: positions are ordered
+by rank (then candidate ID for overvoted ranks) and repeated marks for the same
+candidate keep only the highest rank.
+
+Precincts are integers: numeric PrecinctIDs keep their number, and any other
+label (text, or a missing ID) gets its own negative code, with the original
+label kept in ``precinct_labels``.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .database import CVRDatabase
+except ImportError:
+    from database import CVRDatabase
+
+try:
+    from ..monitoring.stages import instrument
+except ImportError:
+    from monitoring.stages import instrument
+
+logger = logging.getLogger(__name__)
+
+# Padding value for unused rank slots in the rankings matrix
+NO_CANDIDATE = -1
+
+
+@dataclass
+class BallotPatterns:
+    """Distinct ballot rankings with multiplicities, stored as dense arrays."""
+
+    candidate_ids: np.ndarray  # (C,) sorted candidate IDs; position = dense index
+    rankings: np.ndarray  # (P, R) candidate indices in preference order, -1 padded
+    counts: np.ndarray  # (P,) number of ballots cast with each ranking
+    precinct_ids: Optional[np.ndarray] = None  # (P,) precinct of each pattern
+    candidate_names: Dict[int, str] = field(default_factory=dict)
+    # Original PrecinctID of each negative precinct code (non-numeric labels)
+    precinct_labels: Dict[int, Optional[str]] = field(default_factory=dict)
+
+    @property
+    def n_patterns(self) -> int:
+        return int(self.rankings.shape[0])
+
+    @property
+    def n_candidates(self) -> int:
+        return int(len(self.candidate_ids))
+
+    @property
+    def max_rank(self) -> int:
+        return int(self.rankings.shape[1])
+
+    @property
+    def total_ballots(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the pattern arrays."""
+        arrays = [self.candidate_ids, self.rankings, self.counts]
+        if self.precinct_ids is not None:
+            arrays.append(self.precinct_ids)
+        return int(sum(a.nbytes for a in arrays))
+
+    def candidate_index(self, candidate_id: int) -> int:
+        """Map a candidate ID to its dense index."""
+        idx = int(np.searchsorted(self.candidate_ids, candidate_id))
+        if idx >= self.n_candidates or self.candidate_ids[idx] != candidate_id:
+            raise KeyError(f"Unknown candidate ID: {candidate_id}")
+        return idx
+
+    def candidate_name(self, candidate_index: int) -> str:
+        """Get the display name for a dense candidate index."""
+        candidate_id = int(self.candidate_ids[candidate_index])
+        return self.candidate_names.get(candidate_id, f"Candidate-{candidate_id}")
+
+    def ranking_lengths(self) -> np.ndarray:
+        """Number of candidates ranked on each pattern."""
+        return (self.rankings != NO_CANDIDATE).sum(axis=1)
+
+    def first_choices(self) -> np.ndarray:
+        """Dense index of each pattern's first choice (-1 for blank rankings)."""
+        if self.max_rank == 0:
+            return np.full(self.n_patterns, NO_CANDIDATE, dtype=np.int16)
+        return self.rankings[:, 0]
+
+    def presence_matrix(self, top_n: Optional[int] = None) -> np.ndarray:
+        """
+        Boolean (P, C) matrix of which candidates appear on each pattern.
+
+        Args:
+            top_n: Only consider the first ``top_n`` ranked positions
+        """
+        ranks = self.rankings if top_n is None else self.rankings[:, :top_n]
+        presence = np.zeros((self.n_patterns, self.n_candidates + 1), dtype=bool)
+        rows = np.repeat(np.arange(self.n_patterns), ranks.shape[1])
+        # Padding (-1) lands in the spare trailing column and is dropped
+        presence[rows, ranks.ravel()] = True
+        return presence[:, : self.n_candidates]
+
+    def rank_positions(self) -> np.ndarray:
+        """
+        (P, C) matrix of the 1-based rank each candidate holds on each pattern.
+        Unranked candidates are 0.
+        """
+        positions = np.zeros((self.n_patterns, self.n_candidates + 1), dtype=np.int16)
+        rows = np.repeat(np.arange(self.n_patterns), self.max_rank)
+        ranks = np.tile(
+            np.arange(1, self.max_rank + 1, dtype=np.int16), self.n_patterns
+        )
+        positions[rows, self.rankings.ravel()] = ranks
+        return positions[:, : self.n_candidates]
+
+    def candidate_bitsets(self) -> np.ndarray:
+        """
+        Pack each pattern's candidate set into 64-bit words.
+
+        Returns:
+            (P, W) uint64 array where bit ``i % 64`` of word ``i // 64`` is set
+            when candidate index ``i`` is ranked
+        """
+        n_words = max(1, (self.n_candidates + 63) // 64)
+        bitsets = np.zeros((self.n_patterns, n_words), dtype=np.uint64)
+        presence = self.presence_matrix()
+        for word in range(n_words):
+            block = presence[:, word * 64 : (word + 1) * 64]
+            weights = np.left_shift(
+                np.uint64(1), np.arange(block.shape[1], dtype=np.uint64)
+            )
+            bitsets[:, word] = (block.astype(np.uint64) * weights).sum(
+                axis=1, dtype=np.uint64
+            )
+        return bitsets
+
+    def subset(self, mask: np.ndarray) -> "BallotPatterns":
+        """Return the patterns selected by a boolean mask (candidates unchanged)."""
+        return BallotPatterns(
+            candidate_ids=self.candidate_ids,
+            rankings=self.rankings[mask],
+            counts=self.counts[mask],
+            precinct_ids=(
+                self.precinct_ids[mask] if self.precinct_ids is not None else None
+            ),
+            candidate_names=self.candidate_names,
+            precinct_labels=self.precinct_labels,
+        )
+
+
+def encode_precincts(
+    values: pd.Series, labels: Optional[Dict[int, Optional[str]]] = None
+) -> Tuple[np.ndarray, Dict[int, Optional[str]]]:
+    """
+    Integer precinct IDs for a column of PrecinctID values.
+
+    Integer-valued IDs are kept. Every other distinct value (text labels,
+    NULL) gets its own negative code, so unlike precincts are never merged.
+
+    Args:
+        values: Raw PrecinctID values
+        labels: Codes from an earlier call on the same data, reused as-is
+
+    Returns:
+        Tuple of (int64 precinct IDs, original label of each negative code)
+    """
+    numeric = pd.to_numeric(values, errors="coerce")
+    integral = (numeric.notna() & (numeric == numeric.round())).to_numpy()
+    ids = np.zeros(len(values), dtype=np.int64)
+    ids[integral] = numeric[integral].to_numpy(dtype=np.int64)
+    if integral.all():
+        return ids, {}
+
+    other = [None if pd.isna(v) else str(v) for v in values[~integral]]
+    if labels is not None:
+        codes = {label: code for code, label in labels.items()}
+        ids[~integral] = [codes[label] for label in other]
+        return ids, labels
+
+    distinct = sorted(set(other), key=lambda label: (label is not None, label))
+    codes = {label: -1 - i for i, label in enumerate(distinct)}
+    ids[~integral] = [codes[label] for label in other]
+    logger.warning(
+        f"{len(other):,} rows have {len(distinct)} non-numeric or missing "
+        f"PrecinctID value(s); coded as negative precinct IDs"
+    )
+    return ids, {code: label for label, code in codes.items()}
+
+
+@instrument("ballot_patterns.load", rows=lambda patterns: patterns.total_ballots)
+def load_ballot_patterns(db: CVRDatabase, by_precinct: bool = False) -> BallotPatterns:
+    """
+    Aggregate ``ballots_long`` into distinct ranking patterns in one DuckDB pass.
+
+    Args:
+        db: Database with normalized ballot data
+        by_precinct: Keep patterns separate per PrecinctID
+
+    Returns:
+        BallotPatterns for every ballot with at least one valid mark
+    """
+    precinct_select = "PrecinctID," if by_precinct else ""
+    precinct_group = ", PrecinctID" if by_precinct else ""
+    precinct_order = "PrecinctID," if by_precinct else ""
+
+    patterns_sql = f"""
+        WITH first_marks AS (
+            SELECT
+                BallotID,
+                {precinct_select}
+                candidate_id,
+                MIN(rank_position) as rank_position
+            FROM ballots_long
+            GROUP BY BallotID{precinct_group}, candidate_id
+        ),
+        ballot_rankings AS (
+            SELECT
+                BallotID,
+                {precinct_select}
+                LIST(candidate_id ORDER BY rank_position, candidate_id) as ranking
+            FROM first_marks
+            GROUP BY BallotID{precinct_group}
+        ),
+        patterns AS (
+            SELECT {precinct_select} ranking, COUNT(*) as ballot_count
+            FROM ballot_rankings
+            GROUP BY {precinct_select} ranking
+        ),
+        numbered AS (
+            SELECT
+                ROW_NUMBER() OVER (
+                    ORDER BY {precinct_order} ballot_count DESC, ranking
+                ) - 1 as pattern_id,
+                {precinct_select}
+                ranking,
+                ballot_count
+            FROM patterns
+        )
+        SELECT
+            pattern_id,
+            {precinct_select}
+            ballot_count,
+            generate_subscripts(ranking, 1) as position,
+            UNNEST(ranking) as candidate_id
+        FROM numbered
+        ORDER BY pattern_id, position
+    """
+    marks = db.query(patterns_sql)
+    candidates = db.query(
+        "SELECT candidate_id, candidate_name FROM candidates ORDER BY candidate_id"
+    )
+
+    candidate_ids = np.union1d(
+        candidates["candidate_id"].to_numpy(dtype=np.int64),
+        marks["candidate_id"].to_numpy(dtype=np.int64),
+    )
+    candidate_names = {
+        int(cid): name
+        for cid, name in zip(candidates["candidate_id"], candidates["candidate_name"])
+    }
+
+    if marks.empty:
+        return BallotPatterns(
+            candidate_ids=candidate_ids,
+            rankings=np.zeros((0, 0), dtype=np.int16),
+            counts=np.zeros(0, dtype=np.int64),
+            precinct_ids=np.zeros(0, dtype=np.int64) if by_precinct else None,
+            candidate_names=candidate_names,
+        )
+
+    pattern_id = marks["pattern_id"].to_numpy(dtype=np.int64)
+    position = marks["position"].to_numpy(dtype=np.int64) - 1
+    n_patterns = int(pattern_id.max()) + 1
+    max_rank = int(position.max()) + 1
+
+    rankings = np.full((n_patterns, max_rank), NO_CANDIDATE, dtype=np.int16)
+    rankings[pattern_id, position] = np.searchsorted(
+        candidate_ids, marks["candidate_id"].to_numpy(dtype=np.int64)
+    )
+
+    # One row per pattern carries its count (and precinct)
+    first_rows = position == 0
+    counts = np.zeros(n_patterns, dtype=np.int64)
+    counts[pattern_id[first_rows]] = marks["ballot_count"].to_numpy(dtype=np.int64)[
+        first_rows
+    ]
+    precinct_ids = None
+    precinct_labels: Dict[int, Optional[str]] = {}
+    if by_precinct:
+        precinct_ids = np.zeros(n_patterns, dtype=np.int64)
+        precinct_ids[pattern_id[first_rows]], precinct_labels = encode_precincts(
+            marks["PrecinctID"][first_rows].reset_index(drop=True)
+        )
+
+    logger.info(
+        f"Loaded {n_patterns:,} distinct ballot patterns covering "
+        f"{int(counts.sum()):,} ballots"
+    )
+
+    return BallotPatterns(
+        candidate_ids=candidate_ids,
+        rankings=rankings,
+        counts=counts,
+        precinct_ids=precinct_ids,
+        candidate_names=candidate_names,
+        precinct_labels=precinct_labels,
+    )
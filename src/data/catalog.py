@@ -0,0 +1,372 @@
+"""
+Election Catalog
+
+Serves many elections from one process. Each election's DuckDB file is
+ATTACHed read-only to a single shared in-memory connection, or its Parquet
+artifacts are exposed as views in a schema of their own. Queries for an
+election run on a cursor of that connection whose default catalog/schema
+points at the election, so existing SQL with unqualified table names works
+unchanged.
+
+Hot per-election data (ballot patterns, analyzers with checkpoints) is kept
+in an LRU cache bounded by a byte budget; DuckDB's own buffer pool is
+bounded separately through ``memory_limit``.
+"""
+
+import logging
+import re
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import duckdb
+import pandas as pd
+
+try:
+    from .database import CVRDatabase
+except ImportError:
+    from database import CVRDatabase
+
+try:
+    from ..monitoring.metrics import CACHE_BYTES, CACHE_EVICTIONS, CACHE_REQUESTS
+except ImportError:
+    from monitoring.metrics import CACHE_BYTES, CACHE_EVICTIONS, CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+DATABASE_SUFFIXES = (".duckdb", ".db")
+_ELECTION_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+@dataclass
+class Election:
+    """One election registered in the catalog."""
+
+    election_id: str
+    path: str  # DuckDB file, or directory of Parquet files
+    kind: str  # "duckdb" or "parquet"
+    catalog_name: str  # DuckDB catalog holding the election's tables
+    schema_name: str
+
+    @property
+    def qualified_name(self) -> str:
+        return f'"{self.catalog_name}"."{self.schema_name}"'
+
+
+def estimate_nbytes(value: Any) -> int:
+    """Approximate in-memory size of a cached value."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(item) for item in value.values())
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, (int, float)):
+        return int(nbytes)
+    return sys.getsizeof(value)
+
+
+class CatalogDatabase(CVRDatabase):
+    """
+    CVRDatabase bound to one election in an ElectionCatalog.
+
+    Every query, including those CVRDatabase would run on a temporary
+    connection, goes through a cursor of the catalog's shared connection.
+    """
+
+    def __init__(self, catalog: "ElectionCatalog", election: Election):
+        super().__init__(election.path, read_only=True)
+        self.catalog = catalog
+        self.election = election
+
+    @property
+    def election_id(self) -> str:
+        return self.election.election_id
+
+    @property
+    def conn(self) -> duckdb.DuckDBPyConnection:
+        if self._conn is None:
+            self._conn = self.catalog.cursor(self.election_id)
+        return self._conn
+
+    def query(self, sql: str, use_temporary_connection: bool = False) -> pd.DataFrame:
+        return self._fetch(self.conn, sql)
+
+    def query_with_retry(self, sql: str, max_retries: int = 3) -> pd.DataFrame:
+        return self.query(sql)
+
+    def table_exists(
+        self, table_name: str, use_temporary_connection: bool = True
+    ) -> bool:
+        # information_schema lists the tables of every attached election
+        result = self.conn.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.tables
+            WHERE table_catalog = ? AND table_schema = ? AND table_name = ?
+            """,
+            [self.election.catalog_name, self.election.schema_name, table_name],
+        ).fetchone()
+        return result[0] > 0
+
+    def get_table_info(self, table_name: str) -> pd.DataFrame:
+        return self.conn.execute(f"DESCRIBE {table_name}").fetchdf()
+
+
+class ElectionCatalog:
+    """
+    Shared DuckDB connection with one attached database per election, plus
+    an LRU cache of hot per-election data.
+    """
+
+    def __init__(
+        self,
+        memory_budget_mb: float = 1024,
+        duckdb_memory_limit: Optional[str] = None,
+        threads: Optional[int] = None,
+    ):
+        """
+        Initialize the catalog.
+
+        Args:
+            memory_budget_mb: Byte budget (in MB) for cached per-election data
+            duckdb_memory_limit: DuckDB buffer pool limit (e.g. "2GB")
+            threads: DuckDB worker threads shared by all elections
+        """
+        if memory_budget_mb <= 0:
+            raise ValueError("memory_budget_mb must be positive")
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._conn = duckdb.connect()
+        if duckdb_memory_limit:
+            self._conn.execute(f"SET memory_limit = '{duckdb_memory_limit}'")
+        if threads:
+            self._conn.execute(f"SET threads = {int(threads)}")
+
+        self._elections: Dict[str, Election] = {}
+        self._cache: "OrderedDict[Tuple[str, Hashable], Tuple[Any, int]]" = (
+            OrderedDict()
+        )
+        self._cached_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.RLock()
+
+    # Registration -----------------------------------------------------------
+
+    def register(self, election_id: str, path: str) -> Election:
+        """
+        Attach an election.
+
+        Args:
+            election_id: Identifier used in routes (letters, digits, _ and -)
+            path: DuckDB file, or directory of ``<table>.parquet`` files
+
+        Returns:
+            The registered Election
+        """
+        if not _ELECTION_ID.match(election_id):
+            raise ValueError(f"Invalid election id: {election_id!r}")
+        source = Path(path)
+        alias = f"e_{election_id}"
+
+        with self._lock:
+            if election_id in self._elections:
+                raise ValueError(f"Election already registered: {election_id}")
+
+            if source.is_file() and source.suffix in DATABASE_SUFFIXES:
+                self._conn.execute(
+                    f"ATTACH '{self._quote(source)}' AS \"{alias}\" (READ_ONLY)"
+                )
+                election = Election(election_id, str(source), "duckdb", alias, "main")
+            elif source.is_dir():
+                tables = sorted(source.glob("*.parquet"))
+                if not tables:
+                    raise ValueError(f"No Parquet files in {source}")
+                self._conn.execute(f'CREATE SCHEMA "{alias}"')
+                for table in tables:
+                    self._conn.execute(
+                        f'CREATE VIEW "{alias}"."{table.stem}" AS '
+                        f"SELECT * FROM read_parquet('{self._quote(table)}')"
+                    )
+                election = Election(
+                    election_id, str(source), "parquet", "memory", alias
+                )
+            else:
+                raise ValueError(f"Not a DuckDB file or Parquet directory: {source}")
+
+            self._elections[election_id] = election
+        logger.info(f"Registered election {election_id} ({election.kind}: {source})")
+        return election
+
+    def discover(self, root: str) -> List[Election]:
+        """
+        Register every election directory under ``root``.
+
+        A directory is served from its DuckDB file if it has one
+        (``election.duckdb`` preferred), otherwise from the Parquet artifacts
+        in its ``precomputed/`` subdirectory.
+        """
+        registered = []
+        for directory in sorted(Path(root).iterdir()):
+            if not directory.is_dir() or directory.name in self._elections:
+                continue
+            databases = sorted(
+                p for p in directory.iterdir() if p.suffix in DATABASE_SUFFIXES
+            )
+            preferred = directory / "election.duckdb"
+            if databases:
+                source = preferred if preferred in databases else databases[0]
+            elif any((directory / "precomputed").glob("*.parquet")):
+                source = directory / "precomputed"
+            else:
+                continue
+            try:
+                registered.append(self.register(directory.name, str(source)))
+            except (ValueError, duckdb.Error) as e:
+                logger.warning(f"Skipping election {directory.name}: {e}")
+        return registered
+
+    def remove(self, election_id: str):
+        """Detach an election and drop its cached data."""
+        with self._lock:
+            election = self._elections.pop(election_id)
+            if election.kind == "duckdb":
+                self._conn.execute(f'DETACH "{election.catalog_name}"')
+            else:
+                self._conn.execute(f"DROP SCHEMA {election.qualified_name} CASCADE")
+            for key in [k for k in self._cache if k[0] == election_id]:
+                self._drop(key)
+
+    @property
+    def election_ids(self) -> List[str]:
+        return sorted(self._elections)
+
+    def __contains__(self, election_id: str) -> bool:
+        return election_id in self._elections
+
+    def get(self, election_id: str) -> Election:
+        try:
+            return self._elections[election_id]
+        except KeyError:
+            raise KeyError(f"Unknown election: {election_id}") from None
+
+    # Connections ------------------------------------------------------------
+
+    def cursor(self, election_id: str) -> duckdb.DuckDBPyConnection:
+        """New cursor on the shared connection, defaulting to the election."""
+        election = self.get(election_id)
+        with self._lock:
+            cursor = self._conn.cursor()
+        cursor.execute(f"USE {election.qualified_name}")
+        return cursor
+
+    def database(self, election_id: str) -> CatalogDatabase:
+        """CVRDatabase-compatible handle for one election."""
+        return CatalogDatabase(self, self.get(election_id))
+
+    # Hot data cache ---------------------------------------------------------
+
+    def cached(
+        self,
+        election_id: str,
+        key: Hashable,
+        loader: Callable[[], Any],
+        nbytes: Optional[int] = None,
+    ) -> Any:
+        """
+        Return cached data for an election, loading it on a miss.
+
+        Least recently used entries (across all elections) are evicted until
+        the cache fits its budget; values larger than the whole budget are
+        returned without being cached.
+
+        Args:
+            election_id: Election the data belongs to
+            key: Cache key within the election
+            loader: Builds the value on a miss
+            nbytes: Size of the value (estimated if not given)
+        """
+        self.get(election_id)
+        cache_key = (election_id, key)
+        with self._lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                self._hits += 1
+                CACHE_REQUESTS.labels(cache="catalog", result="hit").inc()
+                return self._cache[cache_key][0]
+            self._misses += 1
+        CACHE_REQUESTS.labels(cache="catalog", result="miss").inc()
+
+        # Load outside the lock so other elections are not blocked
+        value = loader()
+        size = estimate_nbytes(value) if nbytes is None else int(nbytes)
+        if size > self.memory_budget:
+            logger.warning(
+                f"Not caching {key!r} for {election_id}: {size:,} bytes exceeds "
+                f"the {self.memory_budget:,} byte budget"
+            )
+            return value
+
+        with self._lock:
+            if cache_key in self._cache:
+                self._drop(cache_key)
+            self._cache[cache_key] = (value, size)
+            self._cached_bytes += size
+            while self._cached_bytes > self.memory_budget:
+                evicted = next(iter(self._cache))
+                self._drop(evicted)
+                self._evictions += 1
+                CACHE_EVICTIONS.labels(cache="catalog").inc()
+                logger.debug(f"Evicted {evicted!r} from election cache")
+            CACHE_BYTES.labels(cache="catalog").set(self._cached_bytes)
+        return value
+
+    def _drop(self, cache_key: Tuple[str, Hashable]):
+        _, size = self._cache.pop(cache_key)
+        self._cached_bytes -= size
+        CACHE_BYTES.labels(cache="catalog").set(self._cached_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        """Registered elections and cache usage."""
+        with self._lock:
+            per_election: Dict[str, int] = {}
+            for (election_id, _), (_, size) in self._cache.items():
+                per_election[election_id] = per_election.get(election_id, 0) + size
+            return {
+                "elections": [
+                    {
+                        "election_id": e.election_id,
+                        "kind": e.kind,
+                        "path": e.path,
+                        "cached_bytes": per_election.get(e.election_id, 0),
+                    }
+                    for e in sorted(
+                        self._elections.values(), key=lambda e: e.election_id
+                    )
+                ],
+                "cache_entries": len(self._cache),
+                "cached_bytes": self._cached_bytes,
+                "memory_budget_bytes": self.memory_budget,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+    def close(self):
+        """Drop cached data and close the shared connection."""
+        with self._lock:
+            self._cache.clear()
+            self._cached_bytes = 0
+            self._conn.close()
+
+    @staticmethod
+    def _quote(path: Path) -> str:
+        return str(path).replace("'", "''")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
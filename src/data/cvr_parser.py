@@ -10,6 +10,11 @@ try:
 except ImportError:
     from database import CVRDatabase
 
+try:
+    from ..monitoring.stages import instrument
+except ImportError:
+    from monitoring.stages import instrument
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,23 +24,26 @@ class CVRParser:
     Uses DuckDB scripts for efficient processing.
     """
 
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, read_only: bool = True):
         """
         Initialize CVR parser.
 
         Args:
             db_path: Path to DuckDB database file
+            read_only: Open an existing database file read-only (pass False
+                to reprocess into a database that already exists)
         """
-        self.db = CVRDatabase(db_path)
+        self.db = CVRDatabase(db_path, read_only=read_only)
         self._loaded = False
         self._candidates = None
 
+    @instrument("cvr.load", rows=lambda stats: stats.get("total_ballots"))
     def load_cvr_file(self, csv_path: str) -> Dict[str, int]:
         """
-        Load CVR data from CSV file into database.
+        Load CVR data from a CSV (or ``.parquet``) file into database.
 
         Args:
-            csv_path: Path to CVR CSV file
+            csv_path: Path to CVR CSV file; a ``.parquet`` suffix reads Parquet
 
         Returns:
             Dictionary with loading statistics
@@ -43,7 +51,12 @@ class CVRParser:
         logger.info(f"Loading CVR data from: {csv_path}")
 
         # Execute loading script
-        result = self.db.execute_script("01_load_data", [csv_path])
+        script = (
+            "01_load_parquet"
+            if str(csv_path).lower().endswith(".parquet")
+            else "01_load_data"
+        )
+        result = self.db.execute_script(script, [csv_path])
 
         # Get validation stats
         stats = result.to_dict("records")[0] if not result.empty else {}
@@ -56,6 +69,7 @@ class CVRParser:
         self._loaded = True
         return stats
 
+    @instrument("cvr.extract_metadata", rows=len)
     def extract_candidate_metadata(self) -> pd.DataFrame:
         """
         Extract candidate information from column headers.
@@ -79,6 +93,7 @@ class CVRParser:
         self._candidates = candidates
         return candidates
 
+    @instrument("cvr.normalize", rows=lambda stats: stats.get("total_vote_records"))
     def normalize_vote_data(self, force_rebuild: bool = False) -> Dict[str, int]:
         """
         Transform wide-format voting data to normalized long format.
@@ -146,7 +161,7 @@ class CVRParser:
         """
 
         # Execute the dynamic SQL
-        self.db.conn.execute(normalize_sql)
+        self.db.execute(normalize_sql)
 
         # Record processing metadata for future cache validation
         self._update_processing_metadata()
@@ -263,6 +278,7 @@ class CVRParser:
         except Exception as e:
             logger.warning(f"Could not update processing metadata: {e}")
 
+    @instrument("cvr.summary_statistics")
     def get_summary_statistics(self) -> pd.DataFrame:
         """Get basic summary statistics about the data."""
         self.db.execute_script("04_basic_analysis")
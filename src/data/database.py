@@ -9,8 +9,31 @@ from typing import Any, Dict, Optional
 import duckdb
 import pandas as pd
 
+try:
+    from ..monitoring.metrics import counter, gauge
+    from ..monitoring.queries import timed_query
+    from ..monitoring.stages import count_query
+except ImportError:
+    from monitoring.metrics import counter, gauge
+    from monitoring.queries import timed_query
+    from monitoring.stages import count_query
+
 logger = logging.getLogger(__name__)
 
+CONNECTIONS_OPENED = counter(
+    "rva_db_connections_opened_total", "DuckDB connections opened", ["mode"]
+)
+CONNECTION_RETRIES = counter(
+    "rva_db_connection_retries_total", "Connection attempts retried on a lock"
+)
+CONNECTION_FAILURES = counter(
+    "rva_db_connection_failures_total", "Connections that could not be opened"
+)
+TEMPORARY_CONNECTIONS = gauge(
+    "rva_db_temporary_connections_open", "Temporary connections currently open"
+)
+QUERIES = counter("rva_db_queries_total", "Statements run through CVRDatabase")
+
 
 class DatabaseConnectionManager:
     """
@@ -43,9 +66,11 @@ class DatabaseConnectionManager:
                 # Use read-only mode to avoid locks when possible
                 if read_only and Path(db_path).exists():
                     conn = duckdb.connect(db_path, read_only=True)
+                    CONNECTIONS_OPENED.labels(mode="read_only").inc()
                     logger.debug(f"Opened read-only connection to {db_path}")
                 else:
                     conn = duckdb.connect(db_path)
+                    CONNECTIONS_OPENED.labels(mode="read_write").inc()
                     logger.debug(f"Opened read-write connection to {db_path}")
 
                 return conn
@@ -54,12 +79,14 @@ class DatabaseConnectionManager:
                 if "Conflicting lock" in str(e) and attempt < max_retries - 1:
                     # Exponential backoff with jitter
                     wait_time = (2**attempt) + random.uniform(0, 1)  # nosec B311
+                    CONNECTION_RETRIES.inc()
                     logger.warning(
                         f"Database locked, retrying in {wait_time:.2f}s (attempt {attempt + 1}/{max_retries})"
                     )
                     time.sleep(wait_time)
                     continue
                 else:
+                    CONNECTION_FAILURES.inc()
                     logger.error(
                         f"Failed to connect to database after {max_retries} attempts: {e}"
                     )
@@ -84,9 +111,11 @@ class DatabaseConnectionManager:
         conn = None
         try:
             conn = self.get_connection(db_path, read_only)
+            TEMPORARY_CONNECTIONS.inc()
             yield conn
         finally:
             if conn:
+                TEMPORARY_CONNECTIONS.dec()
                 try:
                     conn.close()
                     logger.debug(f"Closed temporary connection to {db_path}")
@@ -126,6 +155,18 @@ class CVRDatabase:
             )
         return self._conn
 
+    def cursor(self) -> "CVRDatabase":
+        """
+        Handle on a new cursor of this database's connection.
+
+        DuckDB connections must not be shared between threads; a cursor works
+        on the same database and can be used from another thread. Closing the
+        handle closes only the cursor.
+        """
+        handle = CVRDatabase(self.db_path, self.read_only)
+        handle._conn = self.conn.cursor()
+        return handle
+
     def execute_script(
         self, script_name: str, params: Optional[Dict[str, Any]] = None
     ) -> pd.DataFrame:
@@ -177,7 +218,7 @@ class CVRDatabase:
                 sql = sql.replace("?", quoted_value, 1)
 
         try:
-            result = self.conn.execute(sql).fetchdf()
+            result = self._fetch(self.conn, sql)
             logger.info(f"Executed script: {script_name}")
             return result
         except Exception as e:
@@ -196,9 +237,32 @@ class CVRDatabase:
             with _connection_manager.get_temporary_connection(
                 self.db_path, read_only=True
             ) as temp_conn:
-                return temp_conn.execute(sql).fetchdf()
-        else:
-            return self.conn.execute(sql).fetchdf()
+                return self._fetch(temp_conn, sql)
+        return self._fetch(self.conn, sql)
+
+    def _fetch(self, conn: duckdb.DuckDBPyConnection, sql: str) -> pd.DataFrame:
+        """Run a query on ``conn``, counting and (if enabled) profiling it."""
+        with timed_query(sql, conn) as timing:
+            result = conn.execute(sql).fetchdf()
+            timing.rows = len(result)
+        QUERIES.inc()
+        count_query(len(result))
+        return result
+
+    def execute(self, sql: str, params: Optional[list] = None):
+        """
+        Execute a statement on the main connection (DDL, inserts, or queries
+        whose results are fetched by the caller).
+
+        Returns:
+            The DuckDB connection, for ``fetchdf``/``fetchone`` chaining
+        """
+        with timed_query(sql):
+            conn = self.conn
+            result = conn.execute(sql, params) if params else conn.execute(sql)
+        QUERIES.inc()
+        count_query()
+        return result
 
     def query_with_retry(self, sql: str, max_retries: int = 3) -> pd.DataFrame:
         """
@@ -210,7 +274,7 @@ class CVRDatabase:
                 with _connection_manager.get_temporary_connection(
                     self.db_path, read_only=True
                 ) as temp_conn:
-                    return temp_conn.execute(sql).fetchdf()
+                    return self._fetch(temp_conn, sql)
             except Exception as e:
                 if attempt < max_retries - 1:
                     wait_time = (2**attempt) + random.uniform(0, 0.5)  # nosec B311
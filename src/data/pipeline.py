@@ -0,0 +1,402 @@
+"""
+Incremental Stage Pipeline
+
+Runs a DAG of stages over one DuckDB database. Each stage declares the
+tables it reads (``inputs``) and the tables and files it writes (``outputs``,
+``files``); dependencies follow from which stage outputs which table, and
+inputs no stage produces are source tables.
+
+Every stage gets a fingerprint: a hash of its code, its parameters and the
+content hashes of its inputs. Fingerprints and output hashes are kept in a
+JSON manifest, and a stage only reruns when its fingerprint changed or its
+outputs are missing or were modified. Because downstream fingerprints use
+the *output* hashes of upstream stages, a stage that reruns but produces
+identical tables does not invalidate the stages after it.
+
+Independent stages run concurrently, each on its own cursor of the shared
+connection. Stages write their tables with ``replace_table`` (build into a
+staging table, then swap it in one transaction) and their files with
+``atomic_path`` (write a temporary file, then rename), so an interrupted
+run never leaves a half-written artifact behind.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+try:
+    from .database import CVRDatabase
+except ImportError:
+    from database import CVRDatabase
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def table_hash(db: CVRDatabase, table: str) -> str:
+    """Content hash of a table: its schema, row count and row hashes."""
+    schema = db.execute(f"DESCRIBE {table}").fetchall()
+    count, total = db.execute(
+        f"SELECT COUNT(*), SUM(hash(t)) FROM {table} t"
+    ).fetchone()
+    columns = [(row[0], row[1]) for row in schema]
+    payload = json.dumps([columns, count, str(total)])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "item"):  # NumPy scalars
+        return value.item()
+    return str(value)
+
+
+def _json_safe(value: Any) -> Any:
+    """Round-trip through JSON so stage results can be stored in the manifest."""
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+@contextmanager
+def atomic_path(path) -> Iterator[Path]:
+    """
+    Yield a temporary path next to ``path`` and rename it into place on
+    success, so readers see either the old file or the complete new one.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def write_json(path, data: Any):
+    """Write JSON atomically."""
+    with atomic_path(path) as tmp:
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2, default=_json_default)
+
+
+def write_parquet(path, df: pd.DataFrame):
+    """Write a DataFrame as Parquet atomically."""
+    with atomic_path(path) as tmp:
+        df.to_parquet(tmp, index=False)
+
+
+def replace_table(
+    db: CVRDatabase,
+    table: str,
+    select_sql: str,
+    params: Optional[Sequence[Any]] = None,
+    indexes: Sequence[Tuple[str, str]] = (),
+):
+    """
+    Replace ``table`` with the result of ``select_sql`` atomically.
+
+    The result is built in a staging table first; dropping the old table,
+    renaming the new one and recreating ``indexes`` (``(name, columns)``
+    pairs) then happen in a single transaction.
+    """
+    staging = f"{table}__staging"
+    db.execute(f"DROP TABLE IF EXISTS {staging}")
+    db.execute(f"CREATE TABLE {staging} AS {select_sql}", params)
+    db.execute("BEGIN TRANSACTION")
+    try:
+        db.execute(f"DROP TABLE IF EXISTS {table}")
+        db.execute(f"ALTER TABLE {staging} RENAME TO {table}")
+        for name, columns in indexes:
+            db.execute(f"CREATE INDEX {name} ON {table}({columns})")
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+
+def replace_table_from_df(
+    db: CVRDatabase,
+    table: str,
+    df: pd.DataFrame,
+    indexes: Sequence[Tuple[str, str]] = (),
+):
+    """``replace_table`` from a DataFrame."""
+    view = f"{table}__df"
+    db.conn.register(view, df)
+    try:
+        replace_table(db, table, f"SELECT * FROM {view}", indexes=indexes)
+    finally:
+        db.conn.unregister(view)
+
+
+@dataclass
+class Stage:
+    """
+    One step of a pipeline.
+
+    ``run`` is called as ``run(db=..., **params, **options)`` with a database
+    handle for the stage's own thread, and returns a summary (stored in the
+    manifest, so it must be JSON-friendly). ``params`` are part of the
+    fingerprint; ``options`` (worker counts and the like) are not. ``files``
+    are paths relative to the pipeline's directory. ``version`` defaults to a
+    hash of ``run``'s source, so editing a stage reruns it.
+    """
+
+    name: str
+    run: Callable[[CVRDatabase], Any]
+    inputs: Sequence[str] = ()
+    outputs: Sequence[str] = ()
+    files: Sequence[str] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    options: Dict[str, Any] = field(default_factory=dict)
+    version: Optional[str] = None
+
+    def code_version(self) -> str:
+        if self.version is not None:
+            return self.version
+        try:
+            source = inspect.getsource(self.run)
+        except (OSError, TypeError):
+            return self.name
+        return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+@dataclass
+class StageResult:
+    """Outcome of one stage in a pipeline run."""
+
+    name: str
+    status: str  # "ran", "skipped", "failed" or "blocked"
+    fingerprint: str = ""
+    seconds: float = 0.0
+    result: Any = None
+    outputs: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class Pipeline:
+    """Incremental, parallel runner for a DAG of ``Stage``s."""
+
+    def __init__(
+        self,
+        db: CVRDatabase,
+        stages: Sequence[Stage],
+        directory,
+        manifest_name: str = "precompute_manifest.json",
+        max_parallel: Optional[int] = None,
+    ):
+        """
+        Args:
+            db: Writable database the stages read and write
+            stages: Stages in any order
+            directory: Base directory for stage files and the manifest
+            manifest_name: Manifest file name within ``directory``
+            max_parallel: Stages run at once (default: all that are ready)
+        """
+        self.db = db
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / manifest_name
+        self.max_parallel = max_parallel or max(len(stages), 1)
+        self.stages = self._sort(stages)
+        producers = {t: s.name for s in self.stages for t in s.outputs}
+        self.sources = sorted(
+            {t for s in self.stages for t in s.inputs if t not in producers}
+        )
+        self.dependencies = {
+            s.name: sorted({producers[t] for t in s.inputs if t in producers})
+            for s in self.stages
+        }
+        self.manifest = self._load_manifest()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sort(stages: Sequence[Stage]) -> List[Stage]:
+        """Topological order; raises ValueError on duplicates or cycles."""
+        producers: Dict[str, str] = {}
+        for s in stages:
+            for table in s.outputs:
+                if table in producers:
+                    raise ValueError(
+                        f"Table {table} is written by both {producers[table]} "
+                        f"and {s.name}"
+                    )
+                producers[table] = s.name
+        by_name = {s.name: s for s in stages}
+        if len(by_name) != len(stages):
+            raise ValueError("Stage names must be unique")
+
+        ordered: List[Stage] = []
+        visiting, done = set(), set()
+
+        def visit(stage: Stage):
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Stage dependency cycle through {stage.name}")
+            visiting.add(stage.name)
+            for table in stage.inputs:
+                if table in producers and producers[table] != stage.name:
+                    visit(by_name[producers[table]])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+            ordered.append(stage)
+
+        for s in stages:
+            visit(s)
+        return ordered
+
+    # Manifest ---------------------------------------------------------------
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {"version": MANIFEST_VERSION, "stages": {}}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {"version": MANIFEST_VERSION, "stages": {}}
+        return manifest
+
+    def _save_manifest(self):
+        with self._lock:
+            write_json(self.manifest_path, self.manifest)
+
+    # Planning ---------------------------------------------------------------
+
+    def fingerprint(self, stage: Stage, hashes: Dict[str, str]) -> str:
+        payload = json.dumps(
+            {
+                "stage": stage.name,
+                "code": stage.code_version(),
+                "params": stage.params,
+                "inputs": {t: hashes.get(t) for t in sorted(stage.inputs)},
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def is_current(self, stage: Stage, fingerprint: str) -> bool:
+        """Whether the manifest entry matches and every output is intact."""
+        entry = self.manifest["stages"].get(stage.name)
+        if not entry or entry.get("fingerprint") != fingerprint:
+            return False
+        if not all((self.directory / f).exists() for f in stage.files):
+            return False
+        for table in stage.outputs:
+            if not self.db.table_exists(table, use_temporary_connection=False):
+                return False
+            if table_hash(self.db, table) != entry["outputs"].get(table):
+                return False
+        return True
+
+    # Execution --------------------------------------------------------------
+
+    def _run_stage(self, stage: Stage, fingerprint: str) -> StageResult:
+        db = self.db.cursor()
+        try:
+            start = time.perf_counter()
+            result = _json_safe(stage.run(db=db, **stage.params, **stage.options))
+            seconds = time.perf_counter() - start
+            outputs = {t: table_hash(db, t) for t in stage.outputs}
+        finally:
+            db.close()
+        return StageResult(
+            stage.name, "ran", fingerprint, seconds, result, outputs=outputs
+        )
+
+    def run(self, force: bool = False) -> Dict[str, StageResult]:
+        """
+        Run every stage whose inputs, parameters or code changed.
+
+        Args:
+            force: Rerun every stage regardless of the manifest
+
+        Returns:
+            StageResult per stage name. If a stage fails, stages that do not
+            depend on it still finish before its exception is re-raised.
+        """
+        hashes = {t: table_hash(self.db, t) for t in self.sources}
+        results: Dict[str, StageResult] = {}
+        pending = list(self.stages)
+        running: Dict[Any, Stage] = {}
+        first_error: Optional[BaseException] = None
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_parallel, thread_name_prefix="stage"
+        ) as executor:
+            while pending or running:
+                for stage in list(pending):
+                    deps = [results.get(d) for d in self.dependencies[stage.name]]
+                    if any(
+                        d is not None and d.status in ("failed", "blocked")
+                        for d in deps
+                    ):
+                        pending.remove(stage)
+                        results[stage.name] = StageResult(stage.name, "blocked")
+                        continue
+                    if any(d is None for d in deps):
+                        continue
+                    pending.remove(stage)
+                    fingerprint = self.fingerprint(stage, hashes)
+                    if not force and self.is_current(stage, fingerprint):
+                        entry = self.manifest["stages"][stage.name]
+                        results[stage.name] = StageResult(
+                            stage.name,
+                            "skipped",
+                            fingerprint,
+                            result=entry.get("result"),
+                            outputs=entry["outputs"],
+                        )
+                        hashes.update(entry["outputs"])
+                        logger.info(f"Stage {stage.name}: up to date")
+                    else:
+                        logger.info(f"Stage {stage.name}: running")
+                        future = executor.submit(self._run_stage, stage, fingerprint)
+                        running[future] = stage
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Stage {stage.name} failed: {e}")
+                        results[stage.name] = StageResult(
+                            stage.name, "failed", error=f"{type(e).__name__}: {e}"
+                        )
+                        self.manifest["stages"].pop(stage.name, None)
+                        first_error = first_error or e
+                        continue
+                    results[stage.name] = result
+                    hashes.update(result.outputs)
+                    self.manifest["stages"][stage.name] = {
+                        "fingerprint": result.fingerprint,
+                        "outputs": result.outputs,
+                        "files": list(stage.files),
+                        "result": result.result,
+                        "seconds": result.seconds,
+                        "completed": datetime.now().isoformat(),
+                    }
+                    self._save_manifest()
+                    logger.info(f"Stage {stage.name}: done in {result.seconds:.2f}s")
+
+        self._save_manifest()
+        if first_error is not None:
+            raise first_error
+        return {s.name: results[s.name] for s in self.stages}
@@ -0,0 +1,185 @@
+"""
+Blue/Green Database Snapshots
+
+Ingest and precompute never write to the database the web server is
+reading. Each refresh builds a new version directory under a snapshot root,
+and publishing it atomically rewrites the ``CURRENT`` pointer:
+
+    root/
+        CURRENT                      {"version": "20241105T201500123456", ...}
+        20241105T183000654321/
+            election.duckdb
+            precomputed/ ...         (precompute artifacts, manifest)
+        20241105T201500123456/
+            election.duckdb
+            ...
+
+A version is built in a hidden ``.build-*`` directory and only renamed into
+place once it is complete, so readers never see a partial snapshot.
+
+Readers resolve ``current_database()`` per request (a ``stat`` of the
+pointer, re-read only when it changed). Requests already running keep their
+connections to the old file; new requests open the new one, so old
+connections drain on their own. Publishing prunes versions beyond the newest
+``keep`` (default 2), so the previous version survives for in-flight readers;
+on POSIX a file that is still open stays readable after it is deleted.
+
+Because a published snapshot is never written again, serving reads take no
+lock that a writer could conflict with, and the connection manager's
+lock-retry backoff never triggers on the serving path.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    from .pipeline import write_json
+except ImportError:
+    from pipeline import write_json
+
+logger = logging.getLogger(__name__)
+
+POINTER = "CURRENT"
+DATABASE_NAME = "election.duckdb"
+BUILD_PREFIX = ".build-"
+
+
+class SnapshotStore:
+    """Versioned snapshot directories behind an atomically flipped pointer."""
+
+    def __init__(self, root, keep: int = 2):
+        """
+        Args:
+            root: Snapshot root directory (created if missing)
+            keep: Published versions to retain, including the current one
+        """
+        if keep < 1:
+            raise ValueError("keep must be at least 1")
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.keep = keep
+        self.pointer = self.root / POINTER
+        self._lock = threading.Lock()
+        self._seen: Optional[Tuple[int, int, int]] = None  # pointer stat
+        self._current: Optional[str] = None
+
+    # Reading ----------------------------------------------------------------
+
+    def versions(self) -> List[str]:
+        """Published versions, oldest first."""
+        return sorted(
+            p.name
+            for p in self.root.iterdir()
+            if p.is_dir() and not p.name.startswith(".")
+        )
+
+    def current_version(self) -> Optional[str]:
+        """The version the pointer names; re-read only when the pointer changed."""
+        try:
+            stat = self.pointer.stat()
+        except FileNotFoundError:
+            return None
+        # Publishing replaces the file, so the inode changes on every flip
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key != self._seen:
+                with open(self.pointer) as f:
+                    self._current = json.load(f)["version"]
+                self._seen = key
+            return self._current
+
+    def current(self) -> Optional[Path]:
+        """Directory of the current version."""
+        version = self.current_version()
+        return self.root / version if version else None
+
+    def current_database(self) -> Optional[Path]:
+        """DuckDB file of the current version."""
+        current = self.current()
+        return current / DATABASE_NAME if current else None
+
+    # Writing ----------------------------------------------------------------
+
+    @contextmanager
+    def build(self, copy_current: bool = False) -> Iterator[Path]:
+        """
+        Build a new version and publish it when the block succeeds.
+
+        Args:
+            copy_current: Start from a copy of the current version (its
+                database and artifacts), e.g. for an incremental precompute
+
+        Yields:
+            The directory to write into; the database goes at
+            ``DATABASE_NAME`` inside it. Close every connection to it before
+            the block ends. On an exception the directory is discarded and
+            the current version stays published.
+        """
+        version = self._new_version_id()
+        staging = self.root / f"{BUILD_PREFIX}{version}"
+        current = self.current()
+        if copy_current and current is not None:
+            shutil.copytree(current, staging)
+            logger.info(f"Building snapshot {version} from {current.name}")
+        else:
+            staging.mkdir()
+            logger.info(f"Building snapshot {version}")
+
+        try:
+            yield staging
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            logger.warning(f"Discarded snapshot {version}")
+            raise
+
+        os.replace(staging, self.root / version)
+        self.publish(version)
+
+    def publish(self, version: str):
+        """Point readers at ``version`` and prune old versions."""
+        directory = self.root / version
+        if not (directory / DATABASE_NAME).exists():
+            raise ValueError(f"Snapshot {version} has no {DATABASE_NAME}")
+        previous = self.current_version()
+        write_json(
+            self.pointer,
+            {
+                "version": version,
+                "previous": previous,
+                "published": datetime.now().isoformat(),
+            },
+        )
+        logger.info(f"Published snapshot {version} (was {previous})")
+        self.prune()
+
+    def prune(self) -> List[str]:
+        """Delete published versions beyond the newest ``keep``; returns them."""
+        current = self.current_version()
+        removed = []
+        for version in self.versions()[: -self.keep]:
+            if version == current:
+                continue
+            try:
+                shutil.rmtree(self.root / version)
+                removed.append(version)
+            except OSError as e:  # e.g. still open on platforms that lock files
+                logger.warning(f"Could not remove snapshot {version}: {e}")
+        if removed:
+            logger.info(f"Pruned snapshots: {', '.join(removed)}")
+        return removed
+
+    def _new_version_id(self) -> str:
+        while True:
+            version = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+            if (
+                not (self.root / version).exists()
+                and not (self.root / f"{BUILD_PREFIX}{version}").exists()
+            ):
+                return version
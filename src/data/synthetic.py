@@ -0,0 +1,283 @@
+"""
+Synthetic Cast Vote Record Generator
+
+Writes deterministic CVR files in the same wide layout as the real county
+exports: one 0/1 column per candidate and rank named
+``Choice_<id>_1:<contest>:<rank>:Number of Winners <n>:<name>:NON``, which is
+what ``02_create_metadata.sql`` parses. CSV and Parquet files both load with
+``CVRParser.load_cvr_file`` like any real CVR.
+
+Voters belong to preference blocs. Each bloc ranks candidates by a
+Plackett-Luce draw from its own candidate weights, so blocs that favour the
+same slate produce the correlated transfers the coalition analysis looks for.
+Ballots can be truncated, skip ranks, or mark two candidates at one rank
+(over-votes).
+
+Ballots are generated and written in fixed-size blocks, each with its own
+random stream derived from the seed, so memory stays bounded for any ballot
+count and the output depends only on the configuration.
+"""
+
+import logging
+import time
+from dataclasses import asdict, dataclass, field, fields, replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Ballots generated (and held in memory) at a time
+BLOCK_SIZE = 50_000
+
+FORMATS = ("csv", "parquet")
+
+# Blank rank in generated rankings
+NO_MARK = -1
+
+
+@dataclass
+class SyntheticElectionConfig:
+    """Shape of a synthetic election."""
+
+    n_ballots: int = 10_000
+    n_candidates: int = 8
+    max_rank: int = 6
+    seats: int = 3
+    n_blocs: int = 3
+    bloc_cohesion: float = 4.0  # weight multiplier for a bloc's own slate
+    slate_size: int = 2  # candidates each bloc favours
+    continue_rate: float = 0.7  # chance a voter ranks one more candidate
+    skip_rate: float = 0.01  # ballots that leave one rank blank
+    overvote_rate: float = 0.005  # ballots that mark two candidates at one rank
+    n_precincts: int = 50
+    first_candidate_id: int = 36
+    contest_name: str = "Synthetic City, Councilor, District 1"
+    seed: int = 0
+    candidate_names: List[str] = field(default_factory=list)
+
+    def validate(self) -> None:
+        if self.n_ballots < 0:
+            raise ValueError("n_ballots must not be negative")
+        if self.n_candidates < 2:
+            raise ValueError("n_candidates must be at least 2")
+        if not 1 <= self.max_rank <= self.n_candidates:
+            raise ValueError("max_rank must be between 1 and n_candidates")
+        if not 1 <= self.seats < self.n_candidates:
+            raise ValueError("seats must be between 1 and n_candidates - 1")
+        if self.n_blocs < 1 or self.n_precincts < 1:
+            raise ValueError("n_blocs and n_precincts must be at least 1")
+        if not 0 < self.slate_size <= self.n_candidates:
+            raise ValueError("slate_size must be between 1 and n_candidates")
+        if self.bloc_cohesion < 1:
+            raise ValueError("bloc_cohesion must be at least 1")
+        for name in ("continue_rate", "skip_rate", "overvote_rate"):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
+        if self.candidate_names and len(self.candidate_names) != self.n_candidates:
+            raise ValueError("candidate_names must name every candidate")
+        if any(":" in name for name in self.candidate_names) or ":" in (
+            self.contest_name
+        ):
+            raise ValueError("Names must not contain ':'")
+
+    @property
+    def candidate_ids(self) -> List[int]:
+        return list(
+            range(self.first_candidate_id, self.first_candidate_id + self.n_candidates)
+        )
+
+    @property
+    def names(self) -> List[str]:
+        return self.candidate_names or [
+            f"Candidate {i + 1:02d}" for i in range(self.n_candidates)
+        ]
+
+
+class SyntheticCVRGenerator:
+    """
+    Generates synthetic CVR data block by block.
+
+    Use ``iter_blocks`` to consume DataFrames directly or ``write`` to stream
+    them to a CSV or Parquet file.
+    """
+
+    def __init__(self, config: Optional[SyntheticElectionConfig] = None):
+        self.config = config or SyntheticElectionConfig()
+        self.config.validate()
+
+        rng = np.random.default_rng([self.config.seed, 0])
+        self.bloc_shares = rng.dirichlet(np.full(self.config.n_blocs, 2.0))
+        self.bloc_weights = self._bloc_weights(rng)
+
+    def _bloc_weights(self, rng: np.random.Generator) -> np.ndarray:
+        """Candidate weights per bloc: shared popularity boosted on a slate."""
+        cfg = self.config
+        popularity = rng.lognormal(0.0, 0.5, cfg.n_candidates)
+        weights = np.tile(popularity, (cfg.n_blocs, 1))
+        for bloc in range(cfg.n_blocs):
+            slate = rng.choice(cfg.n_candidates, cfg.slate_size, replace=False)
+            weights[bloc, slate] *= cfg.bloc_cohesion
+        return weights / weights.sum(axis=1, keepdims=True)
+
+    @property
+    def columns(self) -> List[str]:
+        """CVR header: ballot columns then one column per candidate and rank."""
+        cfg = self.config
+        choice_columns = [
+            f"Choice_{candidate_id}_1:{cfg.contest_name}:{rank}:"
+            f"Number of Winners {cfg.seats}:{name}:NON"
+            for candidate_id, name in zip(cfg.candidate_ids, cfg.names)
+            for rank in range(1, cfg.max_rank + 1)
+        ]
+        return ["BallotID", "PrecinctID", "BallotStyleID", "Status"] + choice_columns
+
+    def _rankings(self, rng: np.random.Generator, n: int) -> Dict[str, np.ndarray]:
+        """
+        Draw ``n`` ballots.
+
+        Returns the full preference order per ballot (n, n_candidates), the
+        number of candidates each voter ranks, and the candidate index marked
+        at each rank (n, max_rank) with -1 for blank ranks. Orders use
+        Plackett-Luce sampling via the Gumbel-max trick: sorting
+        log-weight + Gumbel noise gives a ranking with the right distribution.
+        """
+        cfg = self.config
+        blocs = rng.choice(cfg.n_blocs, size=n, p=self.bloc_shares)
+        scores = np.log(self.bloc_weights[blocs]) + rng.gumbel(
+            size=(n, cfg.n_candidates)
+        )
+        order = np.argsort(-scores, axis=1)
+
+        # Ballot length: rank one, then keep going with continue_rate
+        if cfg.continue_rate < 1:
+            lengths = rng.geometric(1.0 - cfg.continue_rate, size=n)
+        else:
+            lengths = np.full(n, cfg.max_rank)
+        lengths = np.minimum(lengths, cfg.max_rank)
+        positions = np.arange(cfg.max_rank)
+        rankings = np.where(
+            positions < lengths[:, None], order[:, : cfg.max_rank], NO_MARK
+        )
+
+        # Skipped rank: shift the choices from a random rank down one slot
+        skipped = np.flatnonzero(rng.random(n) < cfg.skip_rate)
+        if len(skipped) and cfg.max_rank > 1:
+            gap = rng.integers(0, lengths[skipped])[:, None]
+            take = positions - (positions > gap)
+            shifted = np.take_along_axis(rankings[skipped], take, axis=1)
+            shifted[positions == gap] = NO_MARK
+            rankings[skipped] = shifted
+
+        return {"order": order, "lengths": lengths, "rankings": rankings}
+
+    def _block(self, block_index: int, start: int, n: int) -> pd.DataFrame:
+        cfg = self.config
+        rng = np.random.default_rng([cfg.seed, 1, block_index])
+        ballots = self._rankings(rng, n)
+        rankings, lengths = ballots["rankings"], ballots["lengths"]
+
+        marks = np.zeros((n, cfg.n_candidates, cfg.max_rank), dtype=np.uint8)
+        rows, ranks = np.nonzero(rankings != NO_MARK)
+        marks[rows, rankings[rows, ranks], ranks] = 1
+
+        # Over-vote: also mark the voter's next unranked choice at one rank
+        overvoted = np.flatnonzero(
+            (rng.random(n) < cfg.overvote_rate) & (lengths < cfg.n_candidates)
+        )
+        if len(overvoted):
+            rank = rng.integers(0, lengths[overvoted])
+            extra = ballots["order"][overvoted, lengths[overvoted]]
+            marks[overvoted, extra, rank] = 1
+
+        data = {
+            "BallotID": np.arange(start + 1, start + n + 1, dtype=np.int64),
+            "PrecinctID": rng.integers(1, cfg.n_precincts + 1, size=n),
+            "BallotStyleID": np.ones(n, dtype=np.int64),
+            "Status": np.zeros(n, dtype=np.int64),
+        }
+        choice = marks.reshape(n, -1)
+        for i, column in enumerate(self.columns[4:]):
+            data[column] = choice[:, i]
+        return pd.DataFrame(data)
+
+    def iter_blocks(self, block_size: int = BLOCK_SIZE) -> Iterator[pd.DataFrame]:
+        """Yield the election as DataFrames of at most ``block_size`` ballots."""
+        for index, start in enumerate(range(0, self.config.n_ballots, block_size)):
+            n = min(block_size, self.config.n_ballots - start)
+            yield self._block(index, start, n)
+
+    def write(self, path: str, fmt: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Stream the election to ``path`` as CSV or Parquet.
+
+        Args:
+            path: Output file; parent directories are created
+            fmt: "csv" or "parquet" (default: from the file extension)
+
+        Returns:
+            Summary with the configuration, bloc shares and timing
+        """
+        output = Path(path)
+        fmt = fmt or ("parquet" if output.suffix == ".parquet" else "csv")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+        start = time.perf_counter()
+        writer = None
+        try:
+            for block in self.iter_blocks():
+                table = pa.Table.from_pandas(block, preserve_index=False)
+                if writer is None:
+                    writer = (
+                        pq.ParquetWriter(str(output), table.schema)
+                        if fmt == "parquet"
+                        else pa_csv.CSVWriter(str(output), table.schema)
+                    )
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:  # no ballots: still write the header
+            empty = pa.Table.from_pandas(
+                pd.DataFrame(columns=self.columns, dtype="int64"), preserve_index=False
+            )
+            if fmt == "parquet":
+                pq.write_table(empty, str(output))
+            else:
+                pa_csv.write_csv(empty, str(output))
+        elapsed = time.perf_counter() - start
+
+        logger.info(
+            f"Wrote {self.config.n_ballots:,} synthetic ballots to {output} "
+            f"in {elapsed:.2f}s"
+        )
+        return {
+            "path": str(output),
+            "format": fmt,
+            "config": asdict(self.config),
+            "bloc_shares": [round(float(s), 6) for s in self.bloc_shares],
+            "elapsed_seconds": elapsed,
+            "bytes": output.stat().st_size,
+        }
+
+
+def generate_cvr(
+    path: str, config: Optional[SyntheticElectionConfig] = None, **overrides
+) -> Dict[str, Any]:
+    """
+    Write a synthetic CVR file; keyword arguments override config fields
+    (on a copy, so the caller's config is left unchanged).
+    """
+    config = config or SyntheticElectionConfig()
+    known = {f.name for f in fields(SyntheticElectionConfig)}
+    unknown = [name for name in overrides if name not in known]
+    if unknown:
+        raise TypeError(f"Unknown config field: {', '.join(unknown)}")
+    return SyntheticCVRGenerator(replace(config, **overrides)).write(path)
@@ -0,0 +1,35 @@
+"""
+Runtime instrumentation for the analysis pipeline.
+"""
+
+from .metrics import REGISTRY, MetricsRegistry, render_metrics
+from .queries import (
+    QueryProfiler,
+    disable_query_profiling,
+    enable_query_profiling,
+    get_query_profiler,
+)
+from .stages import (
+    StageMetrics,
+    StageRecorder,
+    get_recorder,
+    instrument,
+    recording,
+    stage,
+)
+
+__all__ = [
+    "MetricsRegistry",
+    "REGISTRY",
+    "QueryProfiler",
+    "StageMetrics",
+    "StageRecorder",
+    "disable_query_profiling",
+    "enable_query_profiling",
+    "get_query_profiler",
+    "get_recorder",
+    "instrument",
+    "recording",
+    "render_metrics",
+    "stage",
+]
@@ -0,0 +1,343 @@
+"""
+In-Process Metrics
+
+A small Prometheus-compatible metrics registry: counters, gauges and
+histograms with labels, kept in process memory and rendered in the
+Prometheus text exposition format (served by the web app at ``/metrics``).
+No client library or external service is needed.
+
+Components define their metrics at module level and update them inline:
+
+    STV_RUNS = counter("rva_stv_runs_total", "STV tabulations", ["engine"])
+    STV_RUNS.labels(engine="vectorized").inc()
+
+Cache instrumentation shares ``CACHE_REQUESTS`` / ``CACHE_EVICTIONS`` /
+``CACHE_BYTES`` (labelled by cache name) so hit rates are comparable across
+caches.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .stages import current_rss_mb
+except ImportError:
+    from monitoring.stages import current_rss_mb
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds (request handlers, tabulations)
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+# Payload buckets in bytes, 256 B to 64 MiB
+SIZE_BUCKETS = tuple(float(4**i * 256) for i in range(10))
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """Base class: a named metric with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values, **kwargs) -> "_Child":
+        """Bind label values, positionally or by name."""
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return _Child(self, values)
+
+    def _unlabelled(self) -> "_Child":
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+        return _Child(self, ())
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        """``(suffix, extra label names, label values, value)`` for rendering."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, names, values, value in self.samples():
+            lines.append(
+                f"{self.name}{suffix}{_label_text(names, values)} "
+                f"{_format_value(value)}"
+            )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def _inc(self, key: Tuple[str, ...], amount: float):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self.lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *values, **kwargs) -> float:
+        key = self.labels(*values, **kwargs).key if self.labelnames else ()
+        with self.lock:
+            return self._values.get(key, 0.0)
+
+    def samples(self):
+        with self.lock:
+            items = sorted(self._values.items())
+        return [("", self.labelnames, key, value) for key, value in items]
+
+
+class Gauge(Metric):
+    """Value that can go up and down, or be read from a callback at scrape."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._unlabelled().inc(-amount)
+
+    def set(self, value: float):
+        self._unlabelled().set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        """Report ``function()`` at every scrape (unlabelled gauges only)."""
+        self._unlabelled()
+        self._function = function
+
+    def _inc(self, key, amount):
+        with self.lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _set(self, key, value):
+        with self.lock:
+            self._values[key] = float(value)
+
+    def value(self, *values, **kwargs) -> float:
+        if self._function is not None:
+            return float(self._function())
+        key = self.labels(*values, **kwargs).key if self.labelnames else ()
+        with self.lock:
+            return self._values.get(key, 0.0)
+
+    def samples(self):
+        if self._function is not None:
+            return [("", (), (), float(self._function()))]
+        with self.lock:
+            items = sorted(self._values.items())
+        return [("", self.labelnames, key, value) for key, value in items]
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, plus their sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        if "le" in labelnames:
+            raise ValueError("'le' is reserved for histogram buckets")
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value: float):
+        self._unlabelled().observe(value)
+
+    def _observe(self, key, value):
+        with self.lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self, *values, **kwargs) -> Tuple[List[int], float, int]:
+        """Cumulative bucket counts, sum and count for one label set."""
+        key = self.labels(*values, **kwargs).key if self.labelnames else ()
+        with self.lock:
+            counts, total, count = self._values.get(
+                key, [[0] * len(self.buckets), 0.0, 0]
+            )
+            cumulative = [sum(counts[: i + 1]) for i in range(len(counts))]
+        return cumulative, total, count
+
+    def samples(self):
+        with self.lock:
+            items = sorted(
+                (key, (list(state[0]), state[1], state[2]))
+                for key, state in self._values.items()
+            )
+        bucket_names = self.labelnames + ("le",)
+        samples = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                samples.append(
+                    ("_bucket", bucket_names, key + (_format_value(bound),), cumulative)
+                )
+            samples.append(("_bucket", bucket_names, key + ("+Inf",), count))
+            samples.append(("_sum", self.labelnames, key, total))
+            samples.append(("_count", self.labelnames, key, count))
+        return samples
+
+
+class _Child:
+    """A metric bound to one set of label values."""
+
+    __slots__ = ("metric", "key")
+
+    def __init__(self, metric: Metric, key: Tuple[str, ...]):
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount: float = 1.0):
+        self.metric._inc(self.key, amount)
+
+    def dec(self, amount: float = 1.0):
+        self.metric._inc(self.key, -amount)
+
+    def set(self, value: float):
+        self.metric._set(self.key, value)
+
+    def observe(self, value: float):
+        self.metric._observe(self.key, value)
+
+
+class MetricsRegistry:
+    """Named metrics in registration order."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add ``metric``, or return the one already registered under its name.
+
+        Returning the existing metric keeps module reloads (and the package
+        being importable both as ``src.x`` and ``x``) from double-registering.
+        """
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or (
+                    existing.labelnames != metric.labelnames
+                ):
+                    raise ValueError(
+                        f"Metric {metric.name} already registered differently"
+                    )
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self.metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+# Shared by every cache so hit rates can be compared across them
+CACHE_REQUESTS = counter(
+    "rva_cache_requests_total", "Cache lookups by result", ["cache", "result"]
+)
+CACHE_EVICTIONS = counter("rva_cache_evictions_total", "Cache evictions", ["cache"])
+CACHE_BYTES = gauge("rva_cache_bytes", "Estimated bytes held in a cache", ["cache"])
+
+PROCESS_START = time.time()
+gauge(
+    "rva_process_resident_memory_bytes", "Resident memory of this process"
+).set_function(lambda: current_rss_mb() * 1024**2)
+gauge("rva_process_uptime_seconds", "Seconds since the process started").set_function(
+    lambda: time.time() - PROCESS_START
+)
+gauge("rva_process_pid", "Process ID (tells workers apart)").set_function(os.getpid)
@@ -0,0 +1,269 @@
+"""
+Query-Level Profiling
+
+Opt-in profiler for the SQL that flows through ``CVRDatabase``. When enabled
+it times every statement, tags it with the analyzer method that issued it and
+aggregates by query signature (the SQL with literals replaced by ``?``), so
+f-string queries that differ only in candidate IDs group together.
+
+Statements slower than ``slow_ms`` go to a bounded slow-query log. For
+read-only statements (SELECT / WITH) the log entry also holds DuckDB's
+``EXPLAIN ANALYZE`` profile, captured by re-running the query once on the
+same connection; DDL and writes are never re-run.
+
+Enable with ``enable_query_profiling()`` or RVA_QUERY_PROFILING=1 (threshold
+in RVA_SLOW_QUERY_MS); the web app serves the report at ``/api/debug/queries``.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Latencies kept per signature for percentiles
+LATENCY_SAMPLES = 1000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+# Frames in these files are plumbing, not the caller to blame
+_SKIP_FILES = {
+    str(Path(__file__).resolve()),
+    str((Path(__file__).parent.parent / "data" / "database.py").resolve()),
+    str((Path(__file__).parent.parent / "data" / "catalog.py").resolve()),
+}
+
+
+def normalize_sql(sql: str) -> str:
+    """SQL with literals replaced by ``?`` and whitespace collapsed."""
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _IN_LIST.sub("(?...)", text)
+
+
+def query_signature(sql: str) -> str:
+    """Short stable ID for a normalized query."""
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()[:12]  # nosec B324
+
+
+def find_caller() -> str:
+    """``module:Class.method`` of the nearest frame outside the database layer."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename not in _SKIP_FILES and "contextlib" not in filename:
+            module = Path(filename).stem
+            name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+            return f"{module}:{name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+@dataclass
+class QueryStats:
+    """Aggregate for one query signature."""
+
+    signature: str
+    sql: str  # normalized text
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    errors: int = 0
+    callers: Dict[str, int] = field(default_factory=dict)
+    latencies: Deque[float] = field(
+        default_factory=lambda: deque(maxlen=LATENCY_SAMPLES)
+    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies_ms = np.asarray(self.latencies) * 1000
+        return {
+            "signature": self.signature,
+            "sql": self.sql,
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": self.total_seconds * 1000,
+            "mean_ms": self.total_seconds * 1000 / self.count if self.count else 0.0,
+            "p50_ms": float(np.percentile(latencies_ms, 50)) if self.count else 0.0,
+            "p95_ms": float(np.percentile(latencies_ms, 95)) if self.count else 0.0,
+            "max_ms": self.max_seconds * 1000,
+            "rows": self.rows,
+            "rows_per_query": self.rows / self.count if self.count else 0.0,
+            "callers": dict(sorted(self.callers.items(), key=lambda item: -item[1])),
+        }
+
+
+class QueryProfiler:
+    """Thread-safe query timing aggregates plus a slow-query log."""
+
+    def __init__(
+        self, slow_ms: float = 100.0, slow_log_size: int = 50, explain: bool = True
+    ):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.stats: Dict[str, QueryStats] = {}
+        self.slow_queries: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+        self.started = datetime.now().isoformat()
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+            self.slow_queries.clear()
+            self.started = datetime.now().isoformat()
+
+    def record(
+        self,
+        sql: str,
+        seconds: float,
+        rows: int = 0,
+        conn=None,
+        error: Optional[str] = None,
+        caller: Optional[str] = None,
+    ):
+        """
+        Record one statement.
+
+        Args:
+            sql: Statement text as executed
+            seconds: Wall time
+            rows: Rows returned
+            conn: Connection it ran on, for EXPLAIN ANALYZE of slow queries
+            error: Exception text if the statement failed
+            caller: Defaults to the nearest frame outside the database layer
+        """
+        caller = caller or find_caller()
+        signature = query_signature(sql)
+        with self.lock:
+            stats = self.stats.get(signature)
+            if stats is None:
+                stats = self.stats[signature] = QueryStats(
+                    signature, normalize_sql(sql)
+                )
+            stats.count += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows
+            stats.errors += error is not None
+            stats.callers[caller] = stats.callers.get(caller, 0) + 1
+            stats.latencies.append(seconds)
+
+        if seconds * 1000 < self.slow_ms or error is not None:
+            return
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "signature": signature,
+            "caller": caller,
+            "duration_ms": seconds * 1000,
+            "rows": rows,
+            "sql": sql.strip(),
+            "explain_analyze": None,
+        }
+        if self.explain and conn is not None and _READ_ONLY.match(sql):
+            entry["explain_analyze"] = explain_analyze(conn, sql)
+        logger.warning(
+            f"Slow query ({seconds * 1000:.0f} ms, {rows} rows) from {caller}: "
+            f"{stats.sql[:120]}"
+        )
+        with self.lock:
+            self.slow_queries.append(entry)
+
+    def report(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Per-signature aggregates (slowest total first) and the slow log."""
+        with self.lock:
+            signatures = [s.to_dict() for s in self.stats.values()]
+            slow = list(self.slow_queries)
+        signatures.sort(key=lambda s: -s["total_ms"])
+        return {
+            "enabled": self.enabled,
+            "since": self.started,
+            "slow_ms": self.slow_ms,
+            "total_queries": sum(s["count"] for s in signatures),
+            "total_ms": sum(s["total_ms"] for s in signatures),
+            "signatures": signatures[:limit] if limit else signatures,
+            "slow_queries": sorted(slow, key=lambda q: -q["duration_ms"]),
+        }
+
+
+def explain_analyze(conn, sql: str) -> Optional[str]:
+    """DuckDB's EXPLAIN ANALYZE profile for ``sql`` as text."""
+    try:
+        rows = conn.execute(f"EXPLAIN ANALYZE {sql}").fetchall()
+        return "\n".join(str(row[-1]) for row in rows)
+    except Exception as e:
+        logger.debug(f"EXPLAIN ANALYZE failed: {e}")
+        return None
+
+
+_profiler = QueryProfiler(slow_ms=float(os.environ.get("RVA_SLOW_QUERY_MS", 100)))
+_profiler.enabled = bool(os.environ.get("RVA_QUERY_PROFILING"))
+
+
+def get_query_profiler() -> QueryProfiler:
+    return _profiler
+
+
+def enable_query_profiling(
+    slow_ms: Optional[float] = None, explain: Optional[bool] = None
+) -> QueryProfiler:
+    """Switch profiling on (optionally changing the slow-query threshold)."""
+    if slow_ms is not None:
+        _profiler.slow_ms = slow_ms
+    if explain is not None:
+        _profiler.explain = explain
+    _profiler.enabled = True
+    return _profiler
+
+
+def disable_query_profiling():
+    _profiler.enabled = False
+
+
+class timed_query:
+    """
+    Time a statement for the profiler (a no-op unless profiling is on).
+
+        with timed_query(sql, conn) as timing:
+            result = conn.execute(sql).fetchdf()
+            timing.rows = len(result)
+    """
+
+    __slots__ = ("sql", "conn", "rows", "start")
+
+    def __init__(self, sql: str, conn=None):
+        self.sql = sql
+        self.conn = conn
+        self.rows = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter() if _profiler.enabled else None
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.start is None:
+            return False
+        _profiler.record(
+            self.sql,
+            time.perf_counter() - self.start,
+            rows=self.rows,
+            conn=self.conn,
+            error=f"{exc_type.__name__}: {exc}" if exc_type else None,
+        )
+        return False
@@ -0,0 +1,303 @@
+"""
+Per-Stage Pipeline Instrumentation
+
+Measures named stages of the ingest, tabulation, analysis and precompute
+pipeline: wall time, CPU time, peak RSS, rows processed and the number of
+DuckDB queries issued. Stages are marked either with the ``stage`` context
+manager or the ``instrument`` decorator:
+
+    with stage("precompute.adjacent_pairs") as metrics:
+        ...
+        metrics.rows = n_pairs
+
+    @instrument("cvr.load", rows=lambda stats: stats["total_ballots"])
+    def load_cvr_file(...): ...
+
+Recording is off by default so library code pays nothing in the web server.
+Scripts switch it on with ``recording()`` (or RVA_STAGE_METRICS=1) and write
+the result as JSON with ``StageRecorder.write`` or print ``summary()``.
+
+Query counts come from ``CVRDatabase``, which calls ``count_query`` for every
+statement it runs. The counter is process-wide, so stages running
+concurrently on several threads each see the others' queries too.
+"""
+
+import functools
+import json
+import logging
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STATM = Path("/proc/self/statm")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_mb() -> float:
+    """Resident set size now, or the peak so far where /proc is unavailable."""
+    try:
+        return int(_STATM.read_text().split()[1]) * _PAGE_SIZE / 1024**2
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemorySampler:
+    """
+    Track peak RSS while a block runs.
+
+    RSS is sampled on a background thread, so allocations made by DuckDB and
+    NumPy count, not only Python objects.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.rows = 0
+
+    def add(self, rows: int):
+        with self.lock:
+            self.queries += 1
+            self.rows += rows
+
+    def snapshot(self):
+        with self.lock:
+            return self.queries, self.rows
+
+
+_query_counter = _QueryCounter()
+
+
+def count_query(rows: int = 0):
+    """Record one DuckDB statement (and the rows it returned)."""
+    _query_counter.add(rows)
+
+
+@dataclass
+class StageMetrics:
+    """Measurements for one run of a stage."""
+
+    name: str
+    parent: Optional[str] = None
+    started: str = ""
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    rss_growth_mb: float = 0.0
+    rows: Optional[int] = None  # rows processed, as reported by the stage
+    queries: int = 0
+    query_rows: int = 0  # rows returned by those queries
+    error: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        if self.rows is None or self.wall_seconds <= 0:
+            return None
+        return self.rows / self.wall_seconds
+
+
+class StageRecorder:
+    """Collects stage metrics for one pipeline run."""
+
+    def __init__(self):
+        self.stages: List[StageMetrics] = []
+        self.lock = threading.Lock()
+        self.created = datetime.now().isoformat()
+
+    def add(self, metrics: StageMetrics):
+        with self.lock:
+            self.stages.append(metrics)
+
+    def totals(self) -> List[Dict[str, Any]]:
+        """Stages aggregated by name, in first-seen order."""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for s in self.stages:
+            total = totals.setdefault(
+                s.name,
+                {
+                    "name": s.name,
+                    "calls": 0,
+                    "wall_seconds": 0.0,
+                    "cpu_seconds": 0.0,
+                    "peak_rss_mb": 0.0,
+                    "rows": None,
+                    "queries": 0,
+                    "errors": 0,
+                },
+            )
+            total["calls"] += 1
+            total["wall_seconds"] += s.wall_seconds
+            total["cpu_seconds"] += s.cpu_seconds
+            total["peak_rss_mb"] = max(total["peak_rss_mb"], s.peak_rss_mb)
+            total["queries"] += s.queries
+            total["errors"] += s.error is not None
+            if s.rows is not None:
+                total["rows"] = (total["rows"] or 0) + s.rows
+        return list(totals.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "created": self.created,
+            "stages": [
+                dict(asdict(s), rows_per_second=s.rows_per_second) for s in self.stages
+            ],
+            "totals": self.totals(),
+        }
+
+    def write(self, path) -> Path:
+        """Write the metrics as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        return path
+
+    def summary(self) -> str:
+        """Human-readable table of the aggregated stages."""
+        lines = [
+            f"{'Stage':<40} {'Calls':>5} {'Wall s':>9} {'CPU s':>9} "
+            f"{'Peak MB':>8} {'Rows':>11} {'Queries':>7}"
+        ]
+        for t in self.totals():
+            rows = f"{t['rows']:,}" if t["rows"] is not None else "-"
+            lines.append(
+                f"{t['name']:<40} {t['calls']:>5} {t['wall_seconds']:>9.3f} "
+                f"{t['cpu_seconds']:>9.3f} {t['peak_rss_mb']:>8.0f} {rows:>11} "
+                f"{t['queries']:>7}"
+                + (f"  ({t['errors']} failed)" if t["errors"] else "")
+            )
+        return "\n".join(lines)
+
+
+_recorder: Optional[StageRecorder] = (
+    StageRecorder() if os.environ.get("RVA_STAGE_METRICS") else None
+)
+_active = threading.local()
+
+
+def get_recorder() -> Optional[StageRecorder]:
+    """The recorder stages are reported to, or None when recording is off."""
+    return _recorder
+
+
+def set_recorder(recorder: Optional[StageRecorder]) -> Optional[StageRecorder]:
+    """Install ``recorder`` (None switches recording off); returns the old one."""
+    global _recorder
+    previous, _recorder = _recorder, recorder
+    return previous
+
+
+@contextmanager
+def recording(recorder: Optional[StageRecorder] = None) -> Iterator[StageRecorder]:
+    """Record stages into a fresh (or the given) recorder for the block."""
+    recorder = recorder or StageRecorder()
+    previous = set_recorder(recorder)
+    try:
+        yield recorder
+    finally:
+        set_recorder(previous)
+
+
+@contextmanager
+def stage(name: str, rows: Optional[int] = None) -> Iterator[StageMetrics]:
+    """
+    Measure a block as stage ``name``.
+
+    The yielded ``StageMetrics`` can be updated inside the block (``rows``,
+    ``extra``). When recording is off the block runs unmeasured.
+    """
+    metrics = StageMetrics(name=name, rows=rows)
+    recorder = _recorder
+    if recorder is None:
+        yield metrics
+        return
+
+    parents = getattr(_active, "stack", None)
+    if parents is None:
+        parents = _active.stack = []
+    metrics.parent = parents[-1] if parents else None
+    metrics.started = datetime.now().isoformat()
+    parents.append(name)
+
+    queries_before, query_rows_before = _query_counter.snapshot()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    try:
+        with MemorySampler() as memory:
+            yield metrics
+    except BaseException as e:
+        metrics.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        metrics.wall_seconds = time.perf_counter() - wall_before
+        metrics.cpu_seconds = time.process_time() - cpu_before
+        metrics.peak_rss_mb = memory.peak_mb
+        metrics.rss_growth_mb = memory.peak_mb - memory.start_mb
+        queries_after, query_rows_after = _query_counter.snapshot()
+        metrics.queries = queries_after - queries_before
+        metrics.query_rows = query_rows_after - query_rows_before
+        parents.pop()
+        recorder.add(metrics)
+        logger.debug(
+            f"Stage {name}: {metrics.wall_seconds:.3f}s wall, "
+            f"{metrics.cpu_seconds:.3f}s CPU, {metrics.queries} queries"
+        )
+
+
+def instrument(name: str, rows: Optional[Callable[[Any], Optional[int]]] = None):
+    """
+    Decorator measuring each call as stage ``name``.
+
+    Args:
+        name: Stage name
+        rows: Optional function of the return value giving the rows processed
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return func(*args, **kwargs)
+            with stage(name) as metrics:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    try:
+                        metrics.rows = rows(result)
+                    except Exception:  # counting must never break the stage
+                        logger.debug(f"Could not count rows for stage {name}")
+                return result
+
+        return wrapper
+
+    return decorator
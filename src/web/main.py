@@ -1,24 +1,74 @@
+import json
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, replace
 from pathlib import Path
+from typing import Dict, Optional
 
 import pandas as pd
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
 try:
     from ..analysis.candidate_metrics import CandidateMetrics
     from ..analysis.coalition import CoalitionAnalyzer, convert_numpy_types
-    from ..analysis.stv import STVTabulator
+    from ..analysis.condorcet import CondorcetAnalyzer
+    from ..analysis.margin import compute_margin
+    from ..analysis.precinct import PrecinctAnalyzer
+    from ..analysis.slates import SlateMiner
+    from ..analysis.stv import STVRound, STVTabulator
+    from ..analysis.stv_rules import get_rules
+    from ..analysis.stv_vectorized import VectorizedSTVTabulator, tabulate_partitions
     from ..analysis.verification import ResultsVerifier
+    from ..analysis.what_if import CounterfactualAnalyzer
+    from ..data.ballot_patterns import BallotPatterns, load_ballot_patterns
+    from ..data.catalog import CatalogDatabase, ElectionCatalog
     from ..data.database import CVRDatabase
+    from ..data.snapshots import DATABASE_NAME, SnapshotStore
+    from ..monitoring.metrics import (
+        CACHE_EVICTIONS,
+        CACHE_REQUESTS,
+        CONTENT_TYPE,
+        SIZE_BUCKETS,
+        counter,
+        gauge,
+        histogram,
+        render_metrics,
+    )
+    from ..monitoring.queries import get_query_profiler
 except ImportError:
     from analysis.candidate_metrics import CandidateMetrics
     from analysis.coalition import CoalitionAnalyzer, convert_numpy_types
-    from analysis.stv import STVTabulator
+    from analysis.condorcet import CondorcetAnalyzer
+    from analysis.margin import compute_margin
+    from analysis.precinct import PrecinctAnalyzer
+    from analysis.slates import SlateMiner
+    from analysis.stv import STVRound, STVTabulator
+    from analysis.stv_rules import get_rules
+    from analysis.stv_vectorized import VectorizedSTVTabulator, tabulate_partitions
     from analysis.verification import ResultsVerifier
+    from analysis.what_if import CounterfactualAnalyzer
+    from data.ballot_patterns import BallotPatterns, load_ballot_patterns
+    from data.catalog import CatalogDatabase, ElectionCatalog
     from data.database import CVRDatabase
+    from data.snapshots import DATABASE_NAME, SnapshotStore
+    from monitoring.metrics import (
+        CACHE_EVICTIONS,
+        CACHE_REQUESTS,
+        CONTENT_TYPE,
+        SIZE_BUCKETS,
+        counter,
+        gauge,
+        histogram,
+        render_metrics,
+    )
+    from monitoring.queries import get_query_profiler
 
 logger = logging.getLogger(__name__)
 
@@ -30,10 +80,134 @@ app = FastAPI(
 # Global database path - connections are now managed automatically
 db_path = None
 
+# Checkpointed baseline counts for what-if queries, keyed by (db path, seats),
+# least recently used first. Each holds a full baseline and seats comes from
+# the query string, so only the most recent few are kept. Handlers run in the
+# threadpool, so every access goes through what_if_lock.
+MAX_WHAT_IF_ANALYZERS = 4
+what_if_analyzers: "OrderedDict[tuple, CounterfactualAnalyzer]" = OrderedDict()
+what_if_lock = threading.Lock()
+
+# Requests that fan out to worker processes share a fixed budget: at most
+# RVA_PARALLEL_REQUESTS run at once, each with up to RVA_WEB_MAX_WORKERS
+# processes. Others wait briefly for a slot, then get a 503.
+WEB_MAX_WORKERS = max(
+    1, min(int(os.environ.get("RVA_WEB_MAX_WORKERS", 4)), os.cpu_count() or 1)
+)
+PARALLEL_SLOT_WAIT = 5.0
+# Longest search a request may ask for (margin of victory), in seconds
+MAX_TIME_BUDGET = 60.0
+parallel_slots = threading.BoundedSemaphore(
+    int(os.environ.get("RVA_PARALLEL_REQUESTS", 2))
+)
+
+# Blue/green snapshots: the database is whichever version CURRENT points at
+snapshot_store: Optional[SnapshotStore] = None
+served_snapshot: Optional[str] = None
+
+# Elections served side by side under /elections/<id>/ (see ElectionRouting)
+election_catalog: Optional[ElectionCatalog] = None
+ELECTION_PREFIX = "/elections/"
+current_election: ContextVar[Optional[str]] = ContextVar(
+    "current_election", default=None
+)
+
 # Templates and static files
 templates = Jinja2Templates(directory=Path(__file__).parent / "templates")
 
 
+class ElectionRouting:
+    """
+    Serve every route for one election under ``/elections/<id>/``.
+
+    The prefix is stripped before routing and the election ID is made
+    available to ``get_database`` through ``current_election``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] in ("http", "websocket") and path.startswith(ELECTION_PREFIX):
+            election_id, _, rest = path[len(ELECTION_PREFIX) :].partition("/")
+            if election_id and rest:
+                token = current_election.set(election_id)
+                try:
+                    await self.app(dict(scope, path="/" + rest), receive, send)
+                finally:
+                    current_election.reset(token)
+                return
+        await self.app(scope, receive, send)
+
+
+REQUEST_SECONDS = histogram(
+    "rva_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+)
+REQUESTS = counter(
+    "rva_http_requests_total",
+    "HTTP requests by route and status",
+    ["method", "route", "status"],
+)
+RESPONSE_BYTES = histogram(
+    "rva_http_response_size_bytes",
+    "HTTP response body size by route",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = gauge("rva_http_requests_in_flight", "HTTP requests being served")
+
+
+class RequestMetrics:
+    """
+    Record latency, status and response size for every HTTP request.
+
+    Requests are labelled by route template (``/api/candidates/{candidate_id}``)
+    rather than the raw path, so label cardinality stays bounded; requests no
+    route matched are grouped as ``unmatched``. Sits inside ``ElectionRouting``
+    so per-election requests count under the shared route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = (scope["method"], route)
+            REQUEST_SECONDS.labels(*labels).observe(elapsed)
+            RESPONSE_BYTES.labels(*labels).observe(size)
+            REQUESTS.labels(*labels, str(status)).inc()
+
+
+# Added first so it runs inside ElectionRouting and sees the routed scope
+app.add_middleware(RequestMetrics)
+app.add_middleware(ElectionRouting)
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the application."""
@@ -51,8 +225,25 @@ def get_database() -> CVRDatabase:
     Get database connection using improved connection management.
     Creates read-only connections by default to avoid locking issues.
 
-    Falls back to environment variable if global db_path is None (e.g., during reload).
+    Requests under /elections/<id>/ get that election from the catalog.
+    With a snapshot root configured, the current snapshot's database is used
+    (re-resolved per request, so a published refresh is picked up without a
+    restart). Falls back to environment variable if global db_path is None
+    (e.g., during reload).
     """
+    election_id = current_election.get()
+    if election_id is not None:
+        catalog = get_election_catalog()
+        if catalog is None or election_id not in catalog:
+            raise HTTPException(
+                status_code=404, detail=f"Unknown election: {election_id}"
+            )
+        return catalog.database(election_id)
+
+    store = get_snapshot_store()
+    if store is not None:
+        return CVRDatabase(str(get_snapshot_database(store)), read_only=True)
+
     global db_path
     if not db_path:
         # Check environment variable for database path (useful during reload)
@@ -71,6 +262,8 @@ def set_database_path(path: str):
     db_path = path
     # Also set environment variable to persist across reloads
     os.environ["RVA_DATABASE_PATH"] = path
+    with what_if_lock:
+        what_if_analyzers.clear()
     logger.info(f"Database path set to: {path}")
 
     # Test connection to ensure database is accessible
@@ -83,6 +276,100 @@ def set_database_path(path: str):
         raise
 
 
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """
+    Get the snapshot store, recreating it from RVA_SNAPSHOT_ROOT if needed
+    (e.g., during reload).
+    """
+    global snapshot_store
+    if snapshot_store is None and os.environ.get("RVA_SNAPSHOT_ROOT"):
+        snapshot_store = SnapshotStore(os.environ["RVA_SNAPSHOT_ROOT"])
+    return snapshot_store
+
+
+def get_snapshot_database(store: SnapshotStore) -> Path:
+    """Database of the current snapshot, dropping state tied to older ones."""
+    global served_snapshot
+    version = store.current_version()
+    if version is None:
+        raise HTTPException(status_code=503, detail="No snapshot published yet")
+    path = store.root / version / DATABASE_NAME
+    if version != served_snapshot:
+        # Analyzers built on an older snapshot would pin its file open
+        with what_if_lock:
+            for key in [k for k in what_if_analyzers if k[0] != str(path)]:
+                what_if_analyzers.pop(key, None)
+        logger.info(f"Serving snapshot {version} (was {served_snapshot})")
+        served_snapshot = version
+    return path
+
+
+def set_snapshot_root(path: str):
+    """Serve the current snapshot under ``path`` (see data.snapshots)."""
+    global snapshot_store, served_snapshot
+    snapshot_store = SnapshotStore(path)
+    served_snapshot = None
+    # Also set environment variable to persist across reloads
+    os.environ["RVA_SNAPSHOT_ROOT"] = path
+    with what_if_lock:
+        what_if_analyzers.clear()
+    logger.info(
+        f"Snapshot root set to: {path} "
+        f"(current: {snapshot_store.current_version() or 'none yet'})"
+    )
+
+
+def get_election_catalog() -> Optional[ElectionCatalog]:
+    """
+    Get the election catalog, rebuilding it from RVA_ELECTIONS_ROOT if needed
+    (e.g., during reload).
+    """
+    if election_catalog is None and os.environ.get("RVA_ELECTIONS_ROOT"):
+        set_elections_root(
+            os.environ["RVA_ELECTIONS_ROOT"],
+            float(os.environ.get("RVA_CATALOG_MEMORY_MB", 1024)),
+        )
+    return election_catalog
+
+
+def set_elections_root(path: str, memory_budget_mb: float = 1024):
+    """Serve every election directory under ``path`` from one shared catalog."""
+    global election_catalog
+    catalog = ElectionCatalog(memory_budget_mb=memory_budget_mb)
+    elections = catalog.discover(path)
+    if election_catalog is not None:
+        election_catalog.close()
+    election_catalog = catalog
+    # Also set environment variables to persist across reloads
+    os.environ["RVA_ELECTIONS_ROOT"] = path
+    os.environ["RVA_CATALOG_MEMORY_MB"] = str(memory_budget_mb)
+    logger.info(f"Serving {len(elections)} elections from {path}")
+
+
+@contextmanager
+def worker_pool_slot():
+    """Hold a parallel-request slot; yields the worker processes allowed."""
+    if not parallel_slots.acquire(timeout=PARALLEL_SLOT_WAIT):
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly")
+    try:
+        yield WEB_MAX_WORKERS
+    finally:
+        parallel_slots.release()
+
+
+def get_ballot_patterns(
+    database: CVRDatabase, by_precinct: bool = False
+) -> BallotPatterns:
+    """Load ballot patterns, cached per election when served from the catalog."""
+    if isinstance(database, CatalogDatabase):
+        return database.catalog.cached(
+            database.election_id,
+            ("ballot_patterns", by_precinct),
+            lambda: load_ballot_patterns(database, by_precinct=by_precinct),
+        )
+    return load_ballot_patterns(database, by_precinct=by_precinct)
+
+
 def has_precomputed_data() -> bool:
     """Check if precomputed data tables are available."""
     try:
@@ -125,6 +412,72 @@ def get_precomputed_pairs(min_shared_ballots: int = 50) -> pd.DataFrame:
     return database.query_with_retry(query.replace("?", str(min_shared_ballots)))
 
 
+PRECINCT_TABLES = ("precinct_rank_cube", "precinct_pairs", "precinct_summary")
+
+
+def get_live_precinct_tables(
+    database: CVRDatabase,
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Build the precinct cube tables live, cached per election when served
+    from the catalog.
+
+    Returns:
+        The built tables, or None when the cube was precomputed
+    """
+    if all(database.table_exists(name) for name in PRECINCT_TABLES):
+        return None
+
+    def build() -> Dict[str, pd.DataFrame]:
+        logger.info("Precinct cube not precomputed, building it live")
+        patterns = get_ballot_patterns(database, by_precinct=True)
+        return PrecinctAnalyzer(database, patterns=patterns).build_tables(max_workers=1)
+
+    if isinstance(database, CatalogDatabase):
+        return database.catalog.cached(database.election_id, "precinct_tables", build)
+    return build()
+
+
+def get_precinct_table(
+    database: CVRDatabase,
+    table_name: str,
+    filters: Optional[Dict[str, int]] = None,
+    live_tables: Optional[Dict[str, pd.DataFrame]] = None,
+) -> pd.DataFrame:
+    """
+    Read a precinct cube table, building the cube live if it was not precomputed.
+
+    Args:
+        database: Database connection
+        table_name: One of precinct_rank_cube, precinct_pairs, precinct_summary
+        filters: Column equality filters (integer values)
+        live_tables: Result of get_live_precinct_tables for this request, so
+            handlers reading several tables build the cube only once
+    """
+    filters = filters or {}
+    if database.table_exists(table_name):
+        where = " AND ".join(f"{col} = {int(val)}" for col, val in filters.items())
+        return database.query_with_retry(
+            f"SELECT * FROM {table_name}" + (f" WHERE {where}" if where else "")
+        )
+
+    table = (live_tables or get_live_precinct_tables(database))[table_name]
+    for col, val in filters.items():
+        table = table[table[col] == val]
+    return table
+
+
+def get_candidate_names(database: CVRDatabase) -> Dict[int, str]:
+    """Map candidate IDs to names."""
+    candidates = database.query_with_retry(
+        "SELECT candidate_id, candidate_name FROM candidates"
+    )
+    return {
+        int(cid): name
+        for cid, name in zip(candidates["candidate_id"], candidates["candidate_name"])
+    }
+
+
 # API Routes
 @app.get("/coalition")
 async def coalition_analysis(request: Request):
@@ -164,6 +517,46 @@ async def root(request: Request):
         )
 
 
+@app.get("/api/elections")
+async def list_elections():
+    """
+    Elections served from the catalog, with hot-data cache usage.
+
+    Every route is available per election under ``/elections/<id>/``.
+    """
+    catalog = get_election_catalog()
+    if catalog is None:
+        return {"elections": [], "catalog": False}
+    return {"catalog": True, **catalog.stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Request latency, cache, connection and tabulation metrics in the
+    Prometheus text format. State is per process; with several workers each
+    reports its own (``rva_process_pid`` tells them apart).
+    """
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.get("/api/debug/queries")
+async def get_query_profile(limit: int = 50, reset: bool = False):
+    """
+    Query profile: per-signature counts, p50/p95 latency and rows returned,
+    plus the slow-query log with EXPLAIN ANALYZE output.
+
+    Profiling is off unless the server runs with RVA_QUERY_PROFILING=1
+    (start_server.py --profile-queries). Pass ``reset=true`` to start a new
+    measurement window after reading.
+    """
+    profiler = get_query_profiler()
+    report = profiler.report(limit=limit)
+    if reset:
+        profiler.reset()
+    return convert_numpy_types(report)
+
+
 @app.get("/api/summary")
 async def get_summary():
     """Get summary statistics."""
@@ -261,15 +654,56 @@ async def search_ballots(candidate: str, rank: int = 1, limit: int = 10):
 
 
 @app.get("/api/stv-results")
-async def get_stv_results(seats: int = 3):
-    """Run STV tabulation and return results."""
+async def get_stv_results(
+    seats: int = 3,
+    rules: Optional[str] = None,
+    tolerance: Optional[float] = None,
+    bulk_defeat: bool = False,
+    decimals: Optional[int] = None,
+):
+    """
+    Run STV tabulation and return results.
+
+    Args:
+        seats: Number of seats to fill
+        rules: Counting rules preset for the array-based engine (gregory,
+            whole, meek, warren, irv); the default tabulator if omitted
+        tolerance: Keep-value convergence tolerance in votes (meek, warren)
+        bulk_defeat: Eliminate all mathematically defeated trailing
+            candidates together (array-based engine)
+        decimals: Count in fixed-point arithmetic with this many decimal
+            places, truncating transfer values (array-based engine)
+    """
     database = get_database()
     if not database or not database.table_exists("ballots_long"):
         raise HTTPException(status_code=400, detail="No data loaded")
 
+    vectorized = (
+        rules is not None
+        or tolerance is not None
+        or bulk_defeat
+        or decimals is not None
+    )
+    if vectorized:
+        try:
+            counting_rules = get_rules(rules)
+            if tolerance is not None:
+                counting_rules = replace(counting_rules, tolerance=tolerance)
+            if bulk_defeat:
+                counting_rules = replace(counting_rules, bulk_defeat=True)
+            if decimals is not None:
+                counting_rules = replace(counting_rules, decimals=decimals)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     try:
         # Run STV tabulation
-        tabulator = STVTabulator(database, seats=seats)
+        if vectorized:
+            tabulator = VectorizedSTVTabulator(
+                database, seats=seats, rules=counting_rules
+            )
+        else:
+            tabulator = STVTabulator(database, seats=seats)
         _ = tabulator.run_stv_tabulation()
 
         # Get results
@@ -284,12 +718,324 @@ async def get_stv_results(seats: int = 3):
                 len(tabulator.rounds) if hasattr(tabulator, "rounds") else 0
             ),
         }
+        if vectorized:
+            result["rules"] = rules or "gregory"
+        if bulk_defeat:
+            result["bulk_defeats"] = [asdict(b) for b in tabulator.bulk_defeats]
+            result["bulk_defeat_may_differ"] = any(
+                b.may_differ for b in tabulator.bulk_defeats
+            )
         return convert_numpy_types(result)
     except Exception as e:
         logger.error(f"Error running STV: {e}")
         raise HTTPException(status_code=500, detail=f"STV calculation failed: {str(e)}")
 
 
+@app.get("/api/stv/seat-sweep")
+async def get_seat_sweep(seats: str = "1,2,3,4,5"):
+    """
+    Tabulate several seat counts in one pass and compare who is elected.
+
+    Args:
+        seats: Comma-separated seat counts (e.g. "1,2,3,4,5")
+    """
+    database = get_database()
+    if not database or not database.table_exists("ballots_long"):
+        raise HTTPException(status_code=400, detail="No data loaded")
+
+    try:
+        seat_counts = sorted({int(s) for s in seats.split(",") if s.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="seats must be integers")
+    if not seat_counts or seat_counts[0] < 1:
+        raise HTTPException(status_code=400, detail="seats must be positive")
+
+    try:
+        tabulator = VectorizedSTVTabulator(database)
+        comparison = tabulator.run_seat_sweep(seat_counts)
+
+        winners_by_seats = {}
+        for seat_count, rows in comparison[comparison["elected"]].groupby("seats"):
+            winners_by_seats[int(seat_count)] = (
+                rows.sort_values("seat_order")["candidate_id"].astype(int).tolist()
+            )
+
+        result = {
+            "seat_counts": seat_counts,
+            "winners_by_seats": winners_by_seats,
+            "comparison": comparison.astype(object)
+            .where(comparison.notna(), None)
+            .to_dict("records"),
+        }
+        return convert_numpy_types(result)
+    except Exception as e:
+        logger.error(f"Seat sweep failed: {e}")
+        raise HTTPException(status_code=500, detail=f"STV calculation failed: {str(e)}")
+
+
+@app.get("/api/stv/precincts")
+def get_precinct_stv_results(seats: int = 3, include_rounds: bool = False):
+    """
+    Tabulate every precinct as its own STV election.
+
+    A plain ``def`` so FastAPI runs it in its threadpool: the worker
+    processes are waited on there instead of blocking the event loop.
+
+    Args:
+        seats: Number of seats in each precinct's election
+        include_rounds: Include round-by-round vote totals per precinct
+    """
+    database = get_database()
+    if not database or not database.table_exists("ballots_long"):
+        raise HTTPException(status_code=400, detail="No data loaded")
+
+    try:
+        patterns = get_ballot_patterns(database, by_precinct=True)
+        with worker_pool_slot() as max_workers:
+            results = tabulate_partitions(
+                patterns,
+                seats=seats,
+                max_workers=max_workers,
+                include_rounds=include_rounds,
+            )
+
+        winners = results["winners"]
+        precincts = []
+        for summary in results["summary"].to_dict("records"):
+            precinct_winners = winners[
+                winners["partition_id"] == summary["partition_id"]
+            ]
+            precincts.append(
+                {
+                    "precinct_id": summary["partition_id"],
+                    "total_ballots": summary["total_ballots"],
+                    "quota": summary["quota"],
+                    "total_rounds": summary["rounds"],
+                    "exhausted_votes": summary["exhausted_votes"],
+                    "winners": precinct_winners[
+                        ["seat", "candidate_id", "candidate_name", "round"]
+                    ].to_dict("records"),
+                }
+            )
+
+        # How often each candidate wins a precinct seat
+        win_counts = (
+            winners.groupby(["candidate_id", "candidate_name"])
+            .size()
+            .reset_index(name="precincts_won")
+            .sort_values("precincts_won", ascending=False)
+        )
+
+        result = {
+            "seats": seats,
+            "precincts": precincts,
+            "precinct_win_counts": win_counts.to_dict("records"),
+        }
+        if include_rounds:
+            result["round_summary"] = (
+                results["rounds"]
+                .rename(columns={"partition_id": "precinct_id"})
+                .to_dict("records")
+            )
+        return convert_numpy_types(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Precinct STV tabulation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"STV calculation failed: {str(e)}")
+
+
+@app.get("/api/stv/what-if")
+def get_what_if_results(
+    seats: int = 3, remove_candidates: str = "", exclude_precincts: str = ""
+):
+    """
+    Count the election as if candidates had withdrawn or ballots were excluded.
+
+    Rounds that the change does not affect are reused from a checkpointed
+    baseline count; counting resumes from the first round that differs.
+    Runs in FastAPI's threadpool (plain ``def``) so a baseline count does not
+    block the event loop.
+
+    Args:
+        seats: Number of seats to fill
+        remove_candidates: Comma-separated candidate IDs treated as withdrawn
+        exclude_precincts: Comma-separated precinct IDs whose ballots are dropped
+    """
+    database = get_database()
+    if not database or not database.table_exists("ballots_long"):
+        raise HTTPException(status_code=400, detail="No data loaded")
+    if seats < 1:
+        raise HTTPException(status_code=400, detail="seats must be positive")
+
+    try:
+        removed = [int(c) for c in remove_candidates.split(",") if c.strip()]
+        precincts = [int(p) for p in exclude_precincts.split(",") if p.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="Candidate and precinct IDs must be integers"
+        )
+
+    try:
+        if isinstance(database, CatalogDatabase):
+            # Patterns are cached (and counted) separately; the analyzer
+            # shares them and adds its checkpointed baseline
+            patterns = get_ballot_patterns(database, by_precinct=True)
+
+            def load_analyzer() -> CounterfactualAnalyzer:
+                analyzer = CounterfactualAnalyzer(patterns=patterns, seats=seats)
+                analyzer.baseline  # count now so the cache charges its nbytes
+                return analyzer
+
+            analyzer = database.catalog.cached(
+                database.election_id, ("what_if", seats), load_analyzer
+            )
+        else:
+            key = (database.db_path, seats)
+            with what_if_lock:
+                analyzer = what_if_analyzers.get(key)
+                if analyzer is not None:
+                    what_if_analyzers.move_to_end(key)
+            if analyzer is not None:
+                CACHE_REQUESTS.labels(cache="what_if", result="hit").inc()
+            else:
+                CACHE_REQUESTS.labels(cache="what_if", result="miss").inc()
+                # Count outside the lock; if another request for the same key
+                # finished first, its analyzer is kept
+                analyzer = CounterfactualAnalyzer(database, seats=seats)
+                analyzer.baseline  # count before publishing it to other requests
+                with what_if_lock:
+                    analyzer = what_if_analyzers.setdefault(key, analyzer)
+                    what_if_analyzers.move_to_end(key)
+                    while len(what_if_analyzers) > MAX_WHAT_IF_ANALYZERS:
+                        what_if_analyzers.popitem(last=False)
+                        CACHE_EVICTIONS.labels(cache="what_if").inc()
+        result = analyzer.run_what_if(
+            remove_candidates=removed, exclude_precincts=precincts
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"What-if tabulation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"STV calculation failed: {str(e)}")
+
+    names = analyzer.patterns.candidate_names
+    response = {
+        "seats": seats,
+        "removed_candidates": result.removed_candidates,
+        "excluded_precincts": sorted(set(precincts)),
+        "excluded_ballots": result.excluded_ballots,
+        "total_ballots": result.total_ballots,
+        "quota": result.quota,
+        "baseline_winners": result.baseline_winners,
+        "winners": result.winners,
+        "winners_changed": result.winners_changed,
+        "newly_elected": [
+            c for c in result.winners if c not in result.baseline_winners
+        ],
+        "no_longer_elected": [
+            c for c in result.baseline_winners if c not in result.winners
+        ],
+        "baseline_rounds": result.baseline_rounds,
+        "rounds_reused": result.rounds_reused,
+        "resumed_from_round": result.resumed_from_round,
+        "rounds": [
+            {
+                "round": r.round_number,
+                "winners": r.winners_this_round,
+                "eliminated": r.eliminated_this_round,
+                "vote_totals": r.vote_totals,
+                "exhausted_votes": r.exhausted_votes,
+            }
+            for r in result.rounds
+        ],
+        "candidate_names": names,
+    }
+    return convert_numpy_types(response)
+
+
+@app.get("/api/stv/margin")
+def get_margin_of_victory(
+    seats: int = 3, time_budget: float = 10.0, max_workers: Optional[int] = None
+):
+    """
+    Bound the number of changed ballots needed to alter the set of winners.
+
+    Runs in FastAPI's threadpool (plain ``def``) with a parallel-request slot.
+
+    Args:
+        seats: Number of seats to fill
+        time_budget: Seconds allowed for the search, at most MAX_TIME_BUDGET;
+            a shorter budget gives a looser lower bound
+        max_workers: Worker processes for the search, at most
+            WEB_MAX_WORKERS (the default)
+    """
+    database = get_database()
+    if not database or not database.table_exists("ballots_long"):
+        raise HTTPException(status_code=400, detail="No data loaded")
+
+    try:
+        patterns = get_ballot_patterns(database)
+        with worker_pool_slot() as workers:
+            result = compute_margin(
+                patterns,
+                seats=seats,
+                time_budget=min(time_budget, MAX_TIME_BUDGET),
+                max_workers=min(max_workers or workers, workers),
+            )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Margin search failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Margin search failed: {str(e)}")
+
+    response = asdict(result)
+    response["exact"] = result.exact
+    response["candidate_names"] = patterns.candidate_names
+    return convert_numpy_types(response)
+
+
+@app.get("/api/pairwise-matrix")
+async def get_pairwise_matrix():
+    """
+    Head-to-head preference counts for every pair of candidates, with the
+    Condorcet winner (if any) and the Smith set.
+
+    ``matrix[i][j]`` is the number of ballots ranking ``candidates[i]`` above
+    ``candidates[j]``; ranked candidates count as above unranked ones.
+    """
+    database = get_database()
+    if not database or not database.table_exists("ballots_long"):
+        raise HTTPException(status_code=400, detail="No data loaded")
+
+    try:
+        analyzer = CondorcetAnalyzer(patterns=get_ballot_patterns(database))
+        result = analyzer.analyze()
+        pairs = analyzer.pairs_to_dataframe(result)
+    except Exception as e:
+        logger.error(f"Pairwise analysis failed: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Pairwise analysis failed: {str(e)}"
+        )
+
+    response = {
+        "candidates": [
+            {"candidate_id": cid, "candidate_name": name, "copeland_score": score}
+            for cid, name, score in zip(
+                result.candidate_ids, result.candidate_names, result.copeland_scores
+            )
+        ],
+        "matrix": result.matrix.tolist(),
+        "condorcet_winner": result.condorcet_winner,
+        "smith_set": result.smith_set,
+        "total_ballots": result.total_ballots,
+        "pairs": pairs.to_dict("records"),
+    }
+    return convert_numpy_types(response)
+
+
 @app.get("/api/stv-flow-data")
 async def get_stv_flow_data(seats: int = 3):
     """Get complete vote flow data for visualization."""
@@ -309,34 +1055,8 @@ async def get_stv_flow_data(seats: int = 3):
 
         # Convert to JSON-serializable format
         flow_data = {
-            "rounds": [
-                {
-                    "round_number": r.round_number,
-                    "continuing_candidates": r.continuing_candidates,
-                    "vote_totals": r.vote_totals,
-                    "quota": r.quota,
-                    "winners_this_round": r.winners_this_round,
-                    "eliminated_this_round": r.eliminated_this_round,
-                    "transfers": r.transfers,
-                    "exhausted_votes": r.exhausted_votes,
-                    "total_continuing_votes": r.total_continuing_votes,
-                }
-                for r in vote_flow.rounds
-            ],
-            "transfer_patterns": [
-                {
-                    "round_number": p.round_number,
-                    "from_candidate": p.from_candidate,
-                    "from_candidate_name": p.from_candidate_name,
-                    "to_candidate": p.to_candidate,
-                    "to_candidate_name": p.to_candidate_name,
-                    "votes_transferred": p.votes_transferred,
-                    "transfer_type": p.transfer_type,
-                    "transfer_value": p.transfer_value,
-                    "ballot_count": p.ballot_count,
-                }
-                for p in vote_flow.transfer_patterns
-            ],
+            "rounds": [_round_to_dict(r) for r in vote_flow.rounds],
+            "transfer_patterns": [asdict(p) for p in vote_flow.transfer_patterns],
             "candidate_flow_summary": vote_flow.candidate_flow_summary,
             "flow_metadata": vote_flow.flow_metadata,
         }
@@ -350,6 +1070,92 @@ async def get_stv_flow_data(seats: int = 3):
         )
 
 
+def _round_to_dict(round_obj: STVRound) -> Dict:
+    return {
+        "round_number": round_obj.round_number,
+        "continuing_candidates": round_obj.continuing_candidates,
+        "vote_totals": round_obj.vote_totals,
+        "quota": round_obj.quota,
+        "winners_this_round": round_obj.winners_this_round,
+        "eliminated_this_round": round_obj.eliminated_this_round,
+        "transfers": round_obj.transfers,
+        "exhausted_votes": round_obj.exhausted_votes,
+        "total_continuing_votes": round_obj.total_continuing_votes,
+    }
+
+
+def _sse_event(event: str, data) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(convert_numpy_types(data))}\n\n"
+
+
+@app.get("/api/stv-flow-stream")
+async def stream_stv_flow(seats: int = 3):
+    """
+    Stream vote flow data as Server-Sent Events while the count runs.
+
+    Events:
+        start: seats and candidate names
+        round: one STVRound and its transfer patterns, as soon as counted
+        complete: candidate flow summary and metadata
+        error: tabulation failed part way (the stream then ends)
+    """
+    database = get_database()
+    if not database or not database.table_exists("ballots_long"):
+        raise HTTPException(status_code=400, detail="No data loaded")
+    if seats < 1:
+        raise HTTPException(status_code=400, detail="seats must be positive")
+
+    def events():
+        try:
+            candidates = database.query(
+                "SELECT candidate_id, candidate_name FROM candidates"
+            )
+            yield _sse_event(
+                "start",
+                {
+                    "seats": seats,
+                    "candidates": {
+                        cid: {"candidate_name": name}
+                        for cid, name in zip(
+                            candidates["candidate_id"], candidates["candidate_name"]
+                        )
+                    },
+                },
+            )
+
+            tabulator = STVTabulator(database, seats=seats, detailed_tracking=True)
+            sent = 0
+            for round_obj in tabulator.iter_rounds():
+                patterns = tabulator.transfer_patterns[sent:]
+                sent = len(tabulator.transfer_patterns)
+                yield _sse_event(
+                    "round",
+                    {
+                        "round": _round_to_dict(round_obj),
+                        "transfer_patterns": [asdict(p) for p in patterns],
+                    },
+                )
+
+            vote_flow = tabulator.get_vote_flow()
+            yield _sse_event(
+                "complete",
+                {
+                    "candidate_flow_summary": vote_flow.candidate_flow_summary,
+                    "flow_metadata": vote_flow.flow_metadata,
+                },
+            )
+        except Exception as e:
+            logger.error(f"Error streaming vote flow data: {e}")
+            yield _sse_event("error", {"detail": f"Vote flow generation failed: {e}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/api/vote-transfers/round/{round_number}")
 async def get_round_transfers(round_number: int, seats: int = 3):
     """Get vote transfer details for a specific round."""
@@ -492,10 +1298,18 @@ async def export_first_choice():
 
 
 @app.get("/api/verify-results")
-async def verify_results(
+def verify_results(
     official_results_path: str = "2024-12-02_15-04-45_report_official.csv",
+    include_margin: bool = False,
+    margin_budget: float = 10.0,
 ):
-    """Verify our results against official results."""
+    """
+    Verify our results against official results.
+
+    With ``include_margin`` the report also bounds how many ballots would
+    have to change to alter the winners (searched for ``margin_budget`` s, at
+    most MAX_TIME_BUDGET).
+    """
     database = get_database()
     if not database or not database.table_exists("ballots_long"):
         raise HTTPException(status_code=400, detail="No data loaded")
@@ -523,6 +1337,16 @@ async def verify_results(
             "SELECT candidate_id, candidate_name FROM candidates"
         )
         first_choice = database.query("SELECT * FROM first_choice_totals")
+        margin = None
+        if include_margin:
+            patterns = get_ballot_patterns(database)
+            with worker_pool_slot() as workers:
+                margin = compute_margin(
+                    patterns,
+                    seats=3,
+                    time_budget=min(margin_budget, MAX_TIME_BUDGET),
+                    max_workers=workers,
+                )
 
         # Verify against official results
         verifier = ResultsVerifier(str(official_path))
@@ -530,6 +1354,7 @@ async def verify_results(
             our_winners=tabulator.winners,
             our_candidates=candidates,
             our_first_choice=first_choice,
+            margin=margin,
         )
 
         # Generate readable report
@@ -546,8 +1371,11 @@ async def verify_results(
             ),
             "report": report,
             "official_metadata": verification_results["official_metadata"],
+            "margin": convert_numpy_types(asdict(margin)) if margin else None,
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during verification: {e}")
         raise HTTPException(status_code=500, detail=f"Verification failed: {str(e)}")
@@ -1337,6 +2165,100 @@ async def get_coalition_clusters(min_strength: float = 0.2, min_group_size: int
         raise HTTPException(status_code=500, detail=f"Clustering failed: {str(e)}")
 
 
+@app.get("/api/coalition/slates")
+async def get_candidate_slates(
+    min_support: float = 0.01,
+    min_size: int = 3,
+    max_size: int = 4,
+    min_lift: float = 1.0,
+    limit: int = 50,
+):
+    """
+    Get candidate slates (3+ candidates) ranked together more often than chance.
+
+    Args:
+        min_support: Minimum share of ballots (0-1) ranking every slate member
+        min_size: Smallest slate size
+        max_size: Largest slate size
+        min_lift: Minimum ratio of observed to independently-expected support
+        limit: Maximum number of slates to return
+    """
+    database = get_database()
+    if not database or not database.table_exists("ballots_long"):
+        raise HTTPException(status_code=400, detail="No data loaded")
+
+    if min_size < 2 or max_size < min_size:
+        raise HTTPException(
+            status_code=400, detail="Slate sizes must satisfy 2 <= min_size <= max_size"
+        )
+
+    try:
+        use_precomputed = False
+        if (
+            min_size >= 3
+            and max_size <= 4
+            and database.table_exists("candidate_slates")
+        ):
+            mined_min_support = database.query_with_retry(
+                "SELECT MIN(mined_min_support) as value FROM candidate_slates"
+            )["value"].iloc[0]
+            use_precomputed = pd.isna(mined_min_support) or (
+                min_support >= float(mined_min_support)
+            )
+
+        if use_precomputed:
+            logger.info("Using precomputed data for candidate slates")
+            slates_df = database.query_with_retry(
+                f"""
+                SELECT * EXCLUDE (mined_min_support)
+                FROM candidate_slates
+                WHERE slate_size BETWEEN {int(min_size)} AND {int(max_size)}
+                  AND support_percentage >= {float(min_support) * 100.0}
+                  AND lift >= {float(min_lift)}
+                ORDER BY lift DESC, support DESC
+                LIMIT {int(limit)}
+            """
+            )
+        else:
+            miner = SlateMiner(database)
+            slates = miner.mine_slates(
+                min_support=min_support,
+                min_size=min_size,
+                max_size=max_size,
+                min_lift=min_lift,
+            )
+            slates_df = miner.slates_to_dataframe(slates[:limit])
+
+        slates = []
+        for _, slate in slates_df.iterrows():
+            slates.append(
+                {
+                    "slate_size": int(slate["slate_size"]),
+                    "candidate_ids": [
+                        int(c) for c in str(slate["candidate_ids"]).split(",")
+                    ],
+                    "candidate_names": str(slate["candidate_names"]).split(" | "),
+                    "support": int(slate["support"]),
+                    "support_percentage": round(float(slate["support_percentage"]), 2),
+                    "expected_support": round(float(slate["expected_support"]), 1),
+                    "lift": round(float(slate["lift"]), 3),
+                    "top_rank_support": int(slate["top_rank_support"]),
+                }
+            )
+
+        return convert_numpy_types(
+            {
+                "slates": slates,
+                "count": len(slates),
+                "source": "precomputed" if use_precomputed else "live",
+            }
+        )
+
+    except Exception as e:
+        logger.error(f"Candidate slate mining failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
 # Candidates Page and Enhanced API Endpoints
 @app.get("/candidates")
 async def candidates_page(request: Request):
@@ -1843,6 +2765,207 @@ async def get_candidate_coalition_centrality(candidate_id: int):
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+@app.get("/api/precincts")
+async def get_precinct_summaries():
+    """Get one summary row per precinct (ballots, ranking depth, first-choice leader)."""
+    database = get_database()
+    if not database or not database.table_exists("ballots_long"):
+        raise HTTPException(status_code=400, detail="No data loaded")
+
+    try:
+        summary = get_precinct_table(database, "precinct_summary").sort_values(
+            "precinct_id"
+        )
+        return convert_numpy_types(
+            {"precincts": summary.to_dict("records"), "count": len(summary)}
+        )
+    except Exception as e:
+        logger.error(f"Precinct summary failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+@app.get("/api/precincts/candidate/{candidate_id}")
+async def get_candidate_precinct_support(candidate_id: int):
+    """Get a candidate's first-choice and overall ranking support in every precinct."""
+    database = get_database()
+    if not database or not database.table_exists("ballots_long"):
+        raise HTTPException(status_code=400, detail="No data loaded")
+
+    try:
+        candidate_names = get_candidate_names(database)
+        if candidate_id not in candidate_names:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+
+        live_tables = get_live_precinct_tables(database)
+        cube = get_precinct_table(
+            database,
+            "precinct_rank_cube",
+            {"candidate_id": candidate_id},
+            live_tables,
+        )
+        summary = get_precinct_table(database, "precinct_summary", None, live_tables)
+
+        totals = summary.set_index("precinct_id")["total_ballots"]
+        first_choices = (
+            cube[cube["rank_position"] == 1]
+            .set_index("precinct_id")["ballot_count"]
+            .reindex(totals.index, fill_value=0)
+        )
+        ranked_anywhere = (
+            cube.groupby("precinct_id")["ballot_count"]
+            .sum()
+            .reindex(totals.index, fill_value=0)
+        )
+        rank_sum = (
+            (cube["rank_position"] * cube["ballot_count"])
+            .groupby(cube["precinct_id"])
+            .sum()
+            .reindex(totals.index, fill_value=0)
+        )
+
+        precincts = []
+        for precinct_id, total in totals.items():
+            ranked = int(ranked_anywhere[precinct_id])
+            precincts.append(
+                {
+                    "precinct_id": int(precinct_id),
+                    "total_ballots": int(total),
+                    "first_choice_votes": int(first_choices[precinct_id]),
+                    "first_choice_percentage": (
+                        round(100.0 * first_choices[precinct_id] / total, 2)
+                        if total
+                        else 0.0
+                    ),
+                    "ballots_ranking_candidate": ranked,
+                    "ranking_percentage": (
+                        round(100.0 * ranked / total, 2) if total else 0.0
+                    ),
+                    "average_rank": (
+                        round(float(rank_sum[precinct_id]) / ranked, 2)
+                        if ranked
+                        else None
+                    ),
+                }
+            )
+
+        return convert_numpy_types(
+            {
+                "candidate_id": candidate_id,
+                "candidate_name": candidate_names[candidate_id],
+                "precincts": precincts,
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Precinct support failed for candidate {candidate_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+@app.get("/api/precincts/{precinct_id}")
+async def get_precinct_detail(precinct_id: int):
+    """Get first choices and rank distributions for every candidate in a precinct."""
+    database = get_database()
+    if not database or not database.table_exists("ballots_long"):
+        raise HTTPException(status_code=400, detail="No data loaded")
+
+    try:
+        live_tables = get_live_precinct_tables(database)
+        summary = get_precinct_table(
+            database, "precinct_summary", {"precinct_id": precinct_id}, live_tables
+        )
+        if summary.empty:
+            raise HTTPException(status_code=404, detail="Precinct not found")
+
+        cube = get_precinct_table(
+            database, "precinct_rank_cube", {"precinct_id": precinct_id}, live_tables
+        )
+        candidate_names = get_candidate_names(database)
+        total_ballots = int(summary.iloc[0]["total_ballots"])
+
+        candidates = []
+        for candidate_id, cells in cube.groupby("candidate_id"):
+            distribution = {
+                int(rank): int(count)
+                for rank, count in zip(cells["rank_position"], cells["ballot_count"])
+            }
+            first_choice_votes = distribution.get(1, 0)
+            candidates.append(
+                {
+                    "candidate_id": int(candidate_id),
+                    "candidate_name": candidate_names.get(
+                        int(candidate_id), f"Candidate-{candidate_id}"
+                    ),
+                    "first_choice_votes": first_choice_votes,
+                    "first_choice_percentage": (
+                        round(100.0 * first_choice_votes / total_ballots, 2)
+                        if total_ballots
+                        else 0.0
+                    ),
+                    "total_rankings": sum(distribution.values()),
+                    "rank_distribution": distribution,
+                }
+            )
+        candidates.sort(key=lambda c: c["first_choice_votes"], reverse=True)
+
+        return convert_numpy_types(
+            {"summary": summary.iloc[0].to_dict(), "candidates": candidates}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Precinct detail failed for {precinct_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+@app.get("/api/precincts/{precinct_id}/pairs")
+async def get_precinct_pairs(precinct_id: int, limit: int = 20):
+    """Get the candidate pairs most often ranked together in a precinct."""
+    database = get_database()
+    if not database or not database.table_exists("ballots_long"):
+        raise HTTPException(status_code=400, detail="No data loaded")
+
+    try:
+        live_tables = get_live_precinct_tables(database)
+        summary = get_precinct_table(
+            database, "precinct_summary", {"precinct_id": precinct_id}, live_tables
+        )
+        if summary.empty:
+            raise HTTPException(status_code=404, detail="Precinct not found")
+
+        pairs = get_precinct_table(
+            database, "precinct_pairs", {"precinct_id": precinct_id}, live_tables
+        ).nlargest(limit, "shared_ballots")
+        candidate_names = get_candidate_names(database)
+        total_ballots = int(summary.iloc[0]["total_ballots"])
+
+        result = []
+        for _, pair in pairs.iterrows():
+            result.append(
+                {
+                    "candidate_1": int(pair["candidate_1"]),
+                    "candidate_1_name": candidate_names.get(int(pair["candidate_1"])),
+                    "candidate_2": int(pair["candidate_2"]),
+                    "candidate_2_name": candidate_names.get(int(pair["candidate_2"])),
+                    "shared_ballots": int(pair["shared_ballots"]),
+                    "shared_percentage": (
+                        round(100.0 * pair["shared_ballots"] / total_ballots, 2)
+                        if total_ballots
+                        else 0.0
+                    ),
+                }
+            )
+
+        return convert_numpy_types(
+            {"precinct_id": precinct_id, "pairs": result, "count": len(result)}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Precinct pairs failed for {precinct_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
 if __name__ == "__main__":
     import uvicorn
 
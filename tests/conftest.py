@@ -68,6 +68,66 @@ def sample_ballots():
     ]
 
 
+@pytest.fixture
+def make_ballot_db():
+    """
+    Factory for test databases built from ranking patterns.
+
+    Usage: make_ballot_db({"A": 1, ...}, [(["A", "B"], 10, precinct), ...])
+    where each entry is a ranking (candidate names in preference order), a
+    ballot count, and an optional precinct ID. Pass ``db_path`` to build a
+    file database and get back a read-only handle (as the web app uses).
+    """
+    databases = []
+
+    def _make(candidates, patterns, db_path=None):
+        db = CVRDatabase(db_path or ":memory:", read_only=db_path is None)
+        db.conn.execute(
+            "CREATE TABLE candidates "
+            "(candidate_id INTEGER, candidate_name TEXT, rank_columns INTEGER)"
+        )
+        db.conn.execute(
+            "CREATE TABLE ballots_long (BallotID TEXT, PrecinctID INTEGER, "
+            "BallotStyleID INTEGER, candidate_id INTEGER, candidate_name TEXT, "
+            "rank_position INTEGER)"
+        )
+        for name, cid in candidates.items():
+            db.conn.execute("INSERT INTO candidates VALUES (?, ?, 6)", (cid, name))
+
+        rows = []
+        ballot_number = 0
+        for entry in patterns:
+            ranking, count = entry[0], entry[1]
+            precinct = entry[2] if len(entry) > 2 else 1
+            for _ in range(count):
+                ballot_number += 1
+                for rank, name in enumerate(ranking, start=1):
+                    rows.append(
+                        (
+                            f"B{ballot_number:06d}",
+                            precinct,
+                            1,
+                            candidates[name],
+                            name,
+                            rank,
+                        )
+                    )
+        if rows:
+            db.conn.executemany(
+                "INSERT INTO ballots_long VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+        if db_path is not None:
+            db.close()
+            db = CVRDatabase(db_path, read_only=True)
+        databases.append(db)
+        return db
+
+    yield _make
+
+    for db in databases:
+        db.close()
+
+
 def pytest_configure(config):
     """Configure pytest with custom markers."""
     config.addinivalue_line(
@@ -0,0 +1,138 @@
+"""
+Fixtures for the benchmark suite.
+
+Benchmarks are opt-in: they are skipped unless RVA_BENCHMARK is set.
+
+    RVA_BENCHMARK=1 pytest tests/performance -m performance
+    RVA_BENCHMARK=1 RVA_BENCHMARK_TIERS=small,medium pytest tests/performance
+
+Environment variables:
+    RVA_BENCHMARK_TIERS: comma-separated scale tiers to run (default: small)
+    RVA_BENCHMARK_OUTPUT: JSON results file
+        (default: tests/performance/results/latest.json)
+    RVA_BENCHMARK_BASELINE: baseline file (default: tests/performance/baseline.json)
+    RVA_BENCHMARK_UPDATE_BASELINE: write this run's numbers into the baseline
+        instead of failing on regressions
+"""
+
+import json
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+from src.data.cvr_parser import CVRParser
+from src.data.synthetic import SyntheticElectionConfig, generate_cvr
+
+from .harness import BenchmarkRecorder
+
+HERE = Path(__file__).parent
+
+# PrecomputeProcessor lives in scripts/
+sys.path.insert(0, str(HERE.parent.parent / "scripts"))
+
+TIERS = {
+    "small": SyntheticElectionConfig(n_ballots=20_000, n_candidates=8, seed=1),
+    "medium": SyntheticElectionConfig(
+        n_ballots=250_000, n_candidates=14, n_blocs=4, n_precincts=120, seed=2
+    ),
+    "large": SyntheticElectionConfig(
+        n_ballots=2_000_000,
+        n_candidates=22,
+        n_blocs=5,
+        slate_size=3,
+        n_precincts=400,
+        seed=3,
+    ),
+}
+
+
+def enabled_tiers():
+    names = os.environ.get("RVA_BENCHMARK_TIERS", "small").split(",")
+    names = [name.strip() for name in names if name.strip()]
+    unknown = sorted(set(names) - set(TIERS))
+    if unknown:
+        raise pytest.UsageError(f"Unknown benchmark tiers: {', '.join(unknown)}")
+    return names
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get("RVA_BENCHMARK"):
+        return
+    skip = pytest.mark.skip(reason="set RVA_BENCHMARK=1 to run benchmarks")
+    for item in items:
+        if "performance" in item.keywords:
+            item.add_marker(skip)
+
+
+def pytest_generate_tests(metafunc):
+    if "tier" in metafunc.fixturenames:
+        metafunc.parametrize("tier", enabled_tiers(), scope="session")
+
+
+@dataclass
+class SyntheticElection:
+    tier: str
+    config: SyntheticElectionConfig
+    csv_path: Path
+    db_path: Path
+
+
+@pytest.fixture(scope="session")
+def recorder():
+    """Session-wide results; written to JSON (or the baseline) at the end."""
+    baseline_path = Path(
+        os.environ.get("RVA_BENCHMARK_BASELINE", HERE / "baseline.json")
+    )
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    recorder = BenchmarkRecorder(baseline)
+    yield recorder
+
+    if not recorder.results:
+        return
+    output = Path(
+        os.environ.get("RVA_BENCHMARK_OUTPUT", HERE / "results" / "latest.json")
+    )
+    recorder.write(output)
+    if os.environ.get("RVA_BENCHMARK_UPDATE_BASELINE"):
+        baseline_path.write_text(
+            json.dumps(recorder.updated_baseline(), indent=2) + "\n"
+        )
+
+
+@pytest.fixture
+def bench(recorder, tier):
+    """
+    ``bench(name, func, repeat=1)`` times ``func`` for the current tier and
+    fails the test if it regressed against the baseline.
+    """
+    updating = bool(os.environ.get("RVA_BENCHMARK_UPDATE_BASELINE"))
+
+    def measure(name, func, repeat=1):
+        value = recorder.measure(tier, name, func, repeat=repeat)
+        regressions = recorder.regressions(recorder.results[-1])
+        if regressions and not updating:
+            pytest.fail("; ".join(str(r) for r in regressions))
+        return value
+
+    return measure
+
+
+@pytest.fixture(scope="session")
+def election(tier, tmp_path_factory):
+    """A synthetic election for the tier, ingested into a DuckDB file."""
+    config = TIERS[tier]
+    directory = tmp_path_factory.mktemp(f"election_{tier}")
+    csv_path = directory / "cvr.csv"
+    db_path = directory / "election.duckdb"
+    generate_cvr(str(csv_path), config)
+
+    parser = CVRParser(str(db_path), read_only=False)
+    parser.load_cvr_file(str(csv_path))
+    parser.extract_candidate_metadata()
+    parser.normalize_vote_data()
+    parser.get_summary_statistics()  # creates the summary views
+    parser.db.close()
+    return SyntheticElection(tier, config, csv_path, db_path)
@@ -0,0 +1,162 @@
+"""
+Benchmark recording and baseline comparison for the performance suite.
+
+Each measurement records wall time and peak RSS (see
+``src.monitoring.stages.MemorySampler``).
+"""
+
+import json
+import os
+import platform
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.monitoring.stages import MemorySampler
+
+
+@dataclass
+class BenchmarkResult:
+    tier: str
+    name: str
+    seconds: float
+    peak_rss_mb: float
+    rss_growth_mb: float
+    repeat: int = 1
+
+
+@dataclass
+class Regression:
+    tier: str
+    name: str
+    metric: str
+    measured: float
+    baseline: float
+    limit: float
+
+    def __str__(self):
+        return (
+            f"{self.tier}/{self.name}: {self.metric} {self.measured:.3f} exceeds "
+            f"{self.limit:.3f} (baseline {self.baseline:.3f})"
+        )
+
+
+class BenchmarkRecorder:
+    """
+    Collects results for a run and checks them against a stored baseline.
+
+    A result regresses when it exceeds ``baseline * tolerance + slack``; the
+    absolute slack keeps sub-second timings from failing on scheduler noise.
+    """
+
+    def __init__(
+        self,
+        baseline: Optional[Dict[str, Any]] = None,
+        time_tolerance: Optional[float] = None,
+        memory_tolerance: Optional[float] = None,
+    ):
+        self.baseline = baseline or {}
+        settings = self.baseline.get("settings", {})
+        self.time_tolerance = time_tolerance or settings.get("time_tolerance", 1.5)
+        self.memory_tolerance = memory_tolerance or settings.get(
+            "memory_tolerance", 1.5
+        )
+        self.time_slack = settings.get("time_slack_seconds", 0.25)
+        self.memory_slack = settings.get("memory_slack_mb", 64.0)
+        self.results: List[BenchmarkResult] = []
+
+    def measure(
+        self, tier: str, name: str, func: Callable[[], Any], repeat: int = 1
+    ) -> Any:
+        """Run ``func`` ``repeat`` times; record the mean time and peak memory."""
+        with MemorySampler() as memory:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                value = func()
+            elapsed = (time.perf_counter() - start) / repeat
+        self.results.append(
+            BenchmarkResult(
+                tier=tier,
+                name=name,
+                seconds=elapsed,
+                peak_rss_mb=memory.peak_mb,
+                rss_growth_mb=memory.peak_mb - memory.start_mb,
+                repeat=repeat,
+            )
+        )
+        return value
+
+    def regressions(self, result: BenchmarkResult) -> List[Regression]:
+        """Compare one result with its baseline entry (if there is one)."""
+        reference = self.baseline.get("tiers", {}).get(result.tier, {})
+        reference = reference.get(result.name)
+        if not reference:
+            return []
+
+        found = []
+        checks = [
+            ("seconds", result.seconds, self.time_tolerance, self.time_slack),
+            (
+                "rss_growth_mb",
+                result.rss_growth_mb,
+                self.memory_tolerance,
+                self.memory_slack,
+            ),
+        ]
+        for metric, measured, tolerance, slack in checks:
+            if metric not in reference:
+                continue
+            limit = reference[metric] * tolerance + slack
+            if measured > limit:
+                found.append(
+                    Regression(
+                        result.tier,
+                        result.name,
+                        metric,
+                        measured,
+                        reference[metric],
+                        limit,
+                    )
+                )
+        return found
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "created": datetime.now().isoformat(),
+            "machine": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+            },
+            "results": [asdict(r) for r in self.results],
+            "regressions": [
+                asdict(reg) for r in self.results for reg in self.regressions(r)
+            ],
+        }
+
+    def write(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def updated_baseline(self) -> Dict[str, Any]:
+        """The stored baseline with this run's results merged in."""
+        baseline = json.loads(json.dumps(self.baseline))  # deep copy
+        baseline.setdefault(
+            "settings",
+            {
+                "time_tolerance": self.time_tolerance,
+                "memory_tolerance": self.memory_tolerance,
+                "time_slack_seconds": self.time_slack,
+                "memory_slack_mb": self.memory_slack,
+            },
+        )
+        tiers = baseline.setdefault("tiers", {})
+        for r in self.results:
+            tiers.setdefault(r.tier, {})[r.name] = {
+                "seconds": round(r.seconds, 4),
+                "rss_growth_mb": round(r.rss_growth_mb, 1),
+            }
+        return baseline
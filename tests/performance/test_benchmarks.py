@@ -0,0 +1,125 @@
+"""
+Benchmarks for the ingest, tabulation, analysis, precompute and web layers.
+
+Opt-in (see conftest.py); each test is parametrized over the enabled scale
+tiers and fails if a timing regressed against tests/performance/baseline.json.
+"""
+
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+
+import src.web.main as web_main
+from src.analysis.candidate_metrics import CandidateMetrics
+from src.analysis.coalition import CoalitionAnalyzer
+from src.analysis.stv import STVTabulator
+from src.analysis.stv_vectorized import VectorizedSTVTabulator
+from src.data.cvr_parser import CVRParser
+from src.data.database import CVRDatabase
+
+pytestmark = pytest.mark.performance
+
+WEB_ENDPOINTS = [
+    "/api/summary",
+    "/api/first-choice",
+    "/api/stv-results",
+    "/api/pairwise-matrix",
+    "/api/coalition/pairs/all",
+    "/api/candidates/enhanced",
+    "/api/precincts",
+]
+
+
+@pytest.fixture
+def db(election):
+    database = CVRDatabase(str(election.db_path), read_only=True)
+    yield database
+    database.close()
+
+
+def test_ingest(bench, election, tmp_path):
+    parser = CVRParser(str(tmp_path / "ingest.duckdb"), read_only=False)
+    try:
+        stats = bench(
+            "ingest.load_cvr", lambda: parser.load_cvr_file(election.csv_path)
+        )
+        parser.extract_candidate_metadata()
+        normalized = bench(
+            "ingest.normalize", lambda: parser.normalize_vote_data(force_rebuild=True)
+        )
+    finally:
+        parser.db.close()
+
+    assert stats["total_ballots"] == election.config.n_ballots
+    assert normalized["ballots_with_votes"] == election.config.n_ballots
+
+
+@pytest.mark.parametrize(
+    "engine", [STVTabulator, VectorizedSTVTabulator], ids=["sql", "vectorized"]
+)
+def test_tabulation(bench, db, election, engine):
+    seats = election.config.seats
+    tabulator = engine(db, seats=seats)
+    bench(f"stv.{engine.__name__}", tabulator.run_stv_tabulation)
+    assert len(tabulator.winners) == seats
+
+
+def test_coalition_pairwise(bench, db, election):
+    n = election.config.n_candidates
+    affinities = bench(
+        "coalition.pairwise_affinity",
+        lambda: CoalitionAnalyzer(db).calculate_pairwise_affinity(min_shared_ballots=1),
+    )
+    detailed = bench(
+        "coalition.detailed_pairs",
+        lambda: CoalitionAnalyzer(db).calculate_detailed_pairwise_analysis(
+            min_shared_ballots=1
+        ),
+    )
+    assert len(affinities) <= n * (n - 1) // 2
+    assert detailed
+
+
+def test_candidate_metrics(bench, db):
+    metrics = CandidateMetrics(db)
+    summary = bench("candidate_metrics.summary", metrics.get_all_candidates_summary)
+    candidate_id = summary[0]["candidate_id"]
+    profile = bench(
+        "candidate_metrics.profile",
+        lambda: metrics.get_comprehensive_candidate_profile(candidate_id),
+    )
+    assert profile is not None
+
+
+def test_precompute(bench, election, tmp_path):
+    from precompute_data import PrecomputeProcessor
+
+    db_path = tmp_path / "election.duckdb"
+    shutil.copy(election.db_path, db_path)
+    processor = PrecomputeProcessor(str(db_path), data_dir=tmp_path / "data")
+    results = bench(
+        "precompute.full", lambda: processor.run_full_precomputation(max_workers=1)
+    )
+    assert "error" not in results["adjacent_pairs"]
+
+    # Nothing changed, so every stage should be skipped
+    processor = PrecomputeProcessor(str(db_path), data_dir=tmp_path / "data")
+    bench(
+        "precompute.incremental",
+        lambda: processor.run_full_precomputation(max_workers=1),
+    )
+    assert processor.stats["operations_completed"] == []
+
+
+@pytest.mark.parametrize("endpoint", WEB_ENDPOINTS)
+def test_web_endpoint(bench, election, endpoint, monkeypatch):
+    monkeypatch.setenv("RVA_DATABASE_PATH", str(election.db_path))
+    monkeypatch.setattr(web_main, "db_path", None)
+    web_main.set_database_path(str(election.db_path))
+    client = TestClient(web_main.app)
+
+    # The first request opens the database and fills the per-election caches
+    response = bench(f"web{endpoint}.first", lambda: client.get(endpoint))
+    assert response.status_code == 200, response.text
+    bench(f"web{endpoint}", lambda: client.get(endpoint), repeat=3)
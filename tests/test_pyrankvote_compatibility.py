@@ -232,6 +232,24 @@ class TestPyRankVoteInterface(unittest.TestCase):
         quota = tabulator.calculate_droop_quota(120)
         self.assertIsInstance(quota, (int, float))
 
+    def test_ballots_built_once_per_ranking(self):
+        """Test that identical rankings share one Ballot object."""
+        # A repeated mark for Alice keeps only her highest rank
+        self.db.conn.execute(
+            "INSERT INTO ballots_long VALUES ('ballot_0', 1, 1, 1, 'Alice', 3, 1)"
+        )
+        tabulator = PyRankVoteSTVTabulator(self.db, seats=2)
+        tabulator._prepare_pyrankvote_data()
+
+        ballots = tabulator.ballots_data
+        self.assertEqual(len(ballots), 120)
+        self.assertEqual(len({id(ballot) for ballot in ballots}), 3)
+        rankings = {
+            tuple(c.name for c in ballot.ranked_candidates) for ballot in ballots
+        }
+        self.assertEqual(rankings, {("1", "2"), ("2", "3"), ("3", "1")})
+        self.assertEqual(list(tabulator.candidates_map), [1, 2, 3])
+
 
 if __name__ == "__main__":
     unittest.main()
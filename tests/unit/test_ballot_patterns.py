@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from src.data.ballot_patterns import NO_CANDIDATE, load_ballot_patterns
+
+CANDIDATES = {"Alice": 10, "Bob": 20, "Carol": 30, "Dave": 40}
+
+
+@pytest.mark.unit
+class TestLoadBallotPatterns:
+    """Test aggregation of ballots_long into distinct ranking patterns."""
+
+    def test_identical_rankings_collapse(self, make_ballot_db):
+        db = make_ballot_db(
+            CANDIDATES,
+            [(["Alice", "Bob"], 5), (["Bob"], 3), (["Alice", "Bob"], 2)],
+        )
+        patterns = load_ballot_patterns(db)
+
+        assert patterns.n_patterns == 2
+        assert patterns.total_ballots == 10
+        # Most common pattern first
+        assert patterns.counts.tolist() == [7, 3]
+        assert patterns.rankings.tolist() == [[0, 1], [1, NO_CANDIDATE]]
+
+    def test_candidate_index_mapping(self, make_ballot_db):
+        db = make_ballot_db(CANDIDATES, [(["Dave", "Carol"], 1)])
+        patterns = load_ballot_patterns(db)
+
+        assert patterns.candidate_ids.tolist() == [10, 20, 30, 40]
+        assert patterns.candidate_index(30) == 2
+        assert patterns.candidate_name(3) == "Dave"
+        with pytest.raises(KeyError):
+            patterns.candidate_index(99)
+
+    def test_repeated_candidate_keeps_highest_rank(self, make_ballot_db):
+        db = make_ballot_db(CANDIDATES, [(["Alice", "Bob", "Alice", "Carol"], 1)])
+        patterns = load_ballot_patterns(db)
+
+        assert patterns.rankings.tolist() == [[0, 1, 2]]
+
+    def test_by_precinct_keeps_patterns_separate(self, make_ballot_db):
+        db = make_ballot_db(
+            CANDIDATES,
+            [(["Alice"], 4, 1), (["Alice"], 6, 2), (["Bob"], 1, 2)],
+        )
+        patterns = load_ballot_patterns(db, by_precinct=True)
+
+        assert patterns.n_patterns == 3
+        by_precinct = {
+            (int(p), int(r[0])): int(c)
+            for p, r, c in zip(
+                patterns.precinct_ids, patterns.rankings, patterns.counts
+            )
+        }
+        assert by_precinct == {(1, 0): 4, (2, 0): 6, (2, 1): 1}
+
+    def test_non_numeric_precincts_are_not_merged(self, make_ballot_db):
+        db = make_ballot_db(
+            CANDIDATES,
+            [(["Alice"], 4, 1), (["Alice"], 6, 2), (["Bob"], 3, 3), (["Carol"], 2, 4)],
+        )
+        db.conn.execute("ALTER TABLE ballots_long ALTER PrecinctID TYPE VARCHAR")
+        db.conn.execute(
+            "UPDATE ballots_long SET PrecinctID = CASE PrecinctID "
+            "WHEN '2' THEN 'North' WHEN '3' THEN NULL ELSE PrecinctID END"
+        )
+        patterns = load_ballot_patterns(db, by_precinct=True)
+
+        counts = {
+            int(p): int(c) for p, c in zip(patterns.precinct_ids, patterns.counts)
+        }
+        assert counts == {1: 4, 4: 2, -1: 3, -2: 6}
+        assert patterns.precinct_labels == {-1: None, -2: "North"}
+
+    def test_empty_ballots(self, make_ballot_db):
+        patterns = load_ballot_patterns(make_ballot_db(CANDIDATES, []))
+
+        assert patterns.n_patterns == 0
+        assert patterns.total_ballots == 0
+        assert patterns.n_candidates == 4
+
+
+@pytest.mark.unit
+class TestPatternMatrices:
+    """Test derived matrix views of ballot patterns."""
+
+    @pytest.fixture
+    def patterns(self, make_ballot_db):
+        db = make_ballot_db(
+            CANDIDATES,
+            [(["Alice", "Bob", "Carol"], 3), (["Dave"], 2), (["Carol", "Alice"], 1)],
+        )
+        return load_ballot_patterns(db)
+
+    def test_presence_matrix(self, patterns):
+        presence = patterns.presence_matrix()
+        assert presence.tolist() == [
+            [True, True, True, False],
+            [False, False, False, True],
+            [True, False, True, False],
+        ]
+
+        top_one = patterns.presence_matrix(top_n=1)
+        assert top_one.sum(axis=1).tolist() == [1, 1, 1]
+
+    def test_rank_positions(self, patterns):
+        assert patterns.rank_positions().tolist() == [
+            [1, 2, 3, 0],
+            [0, 0, 0, 1],
+            [2, 0, 1, 0],
+        ]
+
+    def test_candidate_bitsets(self, patterns):
+        bitsets = patterns.candidate_bitsets()
+        assert bitsets.shape == (3, 1)
+        assert bitsets[:, 0].tolist() == [0b0111, 0b1000, 0b0101]
+
+    def test_subset(self, patterns):
+        subset = patterns.subset(patterns.ranking_lengths() > 1)
+        assert subset.n_patterns == 2
+        assert subset.total_ballots == 4
+        np.testing.assert_array_equal(subset.candidate_ids, patterns.candidate_ids)
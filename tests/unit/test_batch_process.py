@@ -0,0 +1,196 @@
+import json
+import resource
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.data.synthetic import SyntheticElectionConfig, generate_cvr
+
+# batch_process lives in scripts/
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
+
+import batch_process  # noqa: E402
+
+
+def write_manifest(path, contests, defaults=None):
+    manifest = {"contests": contests}
+    if defaults is not None:
+        manifest["defaults"] = defaults
+    path.write_text(json.dumps(manifest))
+    return path
+
+
+@pytest.mark.unit
+class TestLoadManifest:
+    """Test manifest parsing and validation."""
+
+    def test_defaults_and_paths(self, tmp_path):
+        manifest = write_manifest(
+            tmp_path / "manifest.json",
+            [
+                {"id": "a", "cvr": "cvr/a.csv"},
+                {"id": "b", "cvr": "/abs/b.csv", "seats": 1},
+            ],
+            defaults={"seats": 2, "rules": "scottish"},
+        )
+
+        a, b = batch_process.load_manifest(manifest)
+
+        assert a == {
+            "id": "a",
+            "cvr": str(tmp_path / "cvr" / "a.csv"),
+            "seats": 2,
+            "rules": "scottish",
+        }
+        assert b["cvr"] == "/abs/b.csv"
+        assert b["seats"] == 1
+
+    def test_seats_default_to_three(self, tmp_path):
+        manifest = write_manifest(tmp_path / "m.json", [{"id": "a", "cvr": "a.csv"}])
+        assert batch_process.load_manifest(manifest)[0]["seats"] == 3
+
+    @pytest.mark.parametrize(
+        "contests, message",
+        [
+            ([], "no contests"),
+            ([{"id": "a"}], "needs 'id' and 'cvr'"),
+            ([{"cvr": "a.csv"}], "needs 'id' and 'cvr'"),
+            (
+                [{"id": "a", "cvr": "a.csv"}, {"id": "a", "cvr": "b.csv"}],
+                "Duplicate contest id: a",
+            ),
+            ([{"id": "a", "cvr": "a.csv", "seats": 0}], "positive seat count"),
+            ([{"id": "a", "cvr": "a.csv", "seats": "3"}], "positive seat count"),
+        ],
+    )
+    def test_invalid_manifest(self, tmp_path, contests, message):
+        manifest = write_manifest(tmp_path / "m.json", contests)
+        with pytest.raises(ValueError, match=message):
+            batch_process.load_manifest(manifest)
+
+    def test_missing_cvr_rejected_before_running(self, tmp_path, monkeypatch):
+        manifest = write_manifest(
+            tmp_path / "m.json", [{"id": "a", "cvr": "missing.csv"}]
+        )
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            ["batch_process.py", str(manifest), "--output-root", str(tmp_path / "out")],
+        )
+
+        with pytest.raises(SystemExit) as exit_info:
+            batch_process.main()
+
+        assert exit_info.value.code == 1
+        assert not (tmp_path / "out").exists()
+
+
+@pytest.mark.unit
+def test_limit_resources(monkeypatch):
+    calls = []
+    monkeypatch.setattr(resource, "setrlimit", lambda *args: calls.append(args))
+
+    batch_process._limit_resources(None, None)
+    assert calls == []
+
+    batch_process._limit_resources(30, 0.5)
+    assert calls == [
+        (resource.RLIMIT_CPU, (30, 30)),
+        (resource.RLIMIT_AS, (512 * 1024**2, 512 * 1024**2)),
+    ]
+
+
+@pytest.mark.unit
+class TestRunBatch:
+    """Run the pipeline end to end over tiny synthetic contests."""
+
+    @pytest.fixture
+    def manifest(self, tmp_path):
+        config = SyntheticElectionConfig(
+            n_ballots=300, n_candidates=4, max_rank=3, n_precincts=3, seed=1
+        )
+        generate_cvr(str(tmp_path / "north.csv"), config)
+        generate_cvr(str(tmp_path / "south.csv"), config, seed=2)
+        return write_manifest(
+            tmp_path / "manifest.json",
+            [
+                {"id": "north", "cvr": "north.csv"},
+                {"id": "south", "cvr": "south.csv", "seats": 1},
+            ],
+            defaults={"seats": 2},
+        )
+
+    def run_main(self, monkeypatch, manifest, output_root, *args):
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            [
+                "batch_process.py",
+                str(manifest),
+                "--output-root",
+                str(output_root),
+                "--stages",
+                "ingest,normalize,tabulate",
+                "--workers",
+                "2",
+                *args,
+            ],
+        )
+        with pytest.raises(SystemExit) as exit_info:
+            batch_process.main()
+        with open(output_root / "batch_report.json") as f:
+            return exit_info.value.code, json.load(f)
+
+    def test_report(self, tmp_path, monkeypatch, manifest):
+        code, report = self.run_main(monkeypatch, manifest, tmp_path / "out")
+
+        assert code == 0
+        assert report["stages"] == ["ingest", "normalize", "tabulate"]
+        assert (report["succeeded"], report["failed"]) == (2, 0)
+        north, south = report["contests"]
+        assert [north["id"], south["id"]] == ["north", "south"]
+        assert north["ballots"] == south["ballots"] == 300
+        assert len(north["winners"]) == 2 and len(south["winners"]) == 1
+        assert report["stage_seconds"]["tabulate"] == pytest.approx(
+            north["timings"]["tabulate"] + south["timings"]["tabulate"]
+        )
+
+        contest_dir = tmp_path / "out" / "north"
+        results = json.loads((contest_dir / "stv_results.json").read_text())
+        assert results["winners"] == north["winners"]
+        assert (contest_dir / "stv_rounds.csv").exists()
+        timings = json.loads((contest_dir / "batch_timings.json").read_text())
+        assert timings["status"] == "ok"
+
+    def test_failures_reported_with_nonzero_exit(self, tmp_path, monkeypatch):
+        generate_cvr(
+            str(tmp_path / "good.csv"),
+            SyntheticElectionConfig(n_ballots=100, n_candidates=3, max_rank=2, seats=1),
+        )
+        (tmp_path / "bad.csv").write_text("not,a,cvr\n1,2,3\n")
+        manifest = write_manifest(
+            tmp_path / "manifest.json",
+            [
+                {"id": "good", "cvr": "good.csv", "seats": 1},
+                {"id": "bad", "cvr": "bad.csv"},
+                {"id": "crashed", "cvr": "good.csv"},
+            ],
+        )
+        # A file where the contest directory should go fails the worker
+        # outside process_contest's own error handling
+        output_root = tmp_path / "out"
+        output_root.mkdir()
+        (output_root / "crashed").write_text("")
+
+        code, report = self.run_main(monkeypatch, manifest, output_root)
+
+        assert code == 1
+        assert (report["succeeded"], report["failed"]) == (1, 2)
+        good, bad, crashed = report["contests"]
+        assert good["status"] == "ok"
+        assert bad["status"] == "failed"
+        assert bad["error"].startswith("BinderException")
+        assert "ingest" not in bad["timings"]
+        assert crashed["status"] == "failed"
+        assert crashed["error"].startswith("Worker failed: FileExistsError")
@@ -0,0 +1,138 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from src.analysis.stv import STVTabulator, find_bulk_defeat
+from src.analysis.stv_rules import get_rules
+from src.analysis.stv_vectorized import create_engine
+from src.data.ballot_patterns import NO_CANDIDATE, BallotPatterns
+
+
+def crowded_patterns(seed, n_candidates=30, n_patterns=2000, max_rank=6):
+    """Four strong candidates, six minor ones and a long fringe."""
+    rng = np.random.default_rng(seed)
+    popularity = np.full(n_candidates, 0.005)
+    popularity[:4] = 1.0
+    popularity[4:10] = 0.2
+    popularity /= popularity.sum()
+    rankings = np.full((n_patterns, max_rank), NO_CANDIDATE, dtype=np.int16)
+    for i in range(n_patterns):
+        length = rng.integers(1, max_rank + 1)
+        rankings[i, :length] = rng.choice(
+            n_candidates, size=length, replace=False, p=popularity
+        )
+    return BallotPatterns(
+        candidate_ids=np.arange(1, n_candidates + 1, dtype=np.int64),
+        rankings=rankings,
+        counts=rng.integers(1, 50, n_patterns),
+    )
+
+
+@pytest.mark.unit
+class TestFindBulkDefeat:
+    """Test selection of mathematically defeated candidates."""
+
+    def test_largest_defeated_group(self):
+        votes = {1: 5.0, 2: 7.0, 3: 20.0, 4: 40.0, 5: 50.0}
+        bulk = find_bulk_defeat(votes, seats_left=1, quota=100.0, round_number=2)
+
+        # 5 + 7 + 20 = 32 < 40, but 72 is not below 50
+        assert bulk.candidates == [1, 2, 3]
+        assert bulk.combined_votes == 32
+        assert bulk.next_lowest_votes == 40
+        assert bulk.round_number == 2
+        assert not bulk.may_differ
+
+    def test_keeps_candidates_for_open_seats(self):
+        votes = {1: 5.0, 2: 7.0, 3: 20.0, 4: 40.0, 5: 50.0}
+        bulk = find_bulk_defeat(votes, seats_left=3, quota=100.0, round_number=1)
+        assert bulk.candidates == [1, 2]
+
+        assert (
+            find_bulk_defeat(votes, seats_left=4, quota=100.0, round_number=1) is None
+        )
+
+    def test_no_group_when_combined_votes_catch_up(self):
+        votes = {1: 10.0, 2: 11.0, 3: 12.0, 4: 13.0}
+        assert find_bulk_defeat(votes, seats_left=1, quota=30.0, round_number=1) is None
+
+    def test_may_differ_when_surplus_could_lift_group(self):
+        # 30 group votes could elect candidate 4 with a surplus of 25, and
+        # that surplus could lift a group member past candidate 3
+        votes = {1: 14.0, 2: 16.0, 3: 35.0, 4: 55.0}
+        bulk = find_bulk_defeat(votes, seats_left=1, quota=60.0, round_number=1)
+        assert bulk.candidates == [1, 2]
+        assert bulk.may_differ
+
+
+@pytest.mark.unit
+class TestBulkDefeatCount:
+    """Test counts with bulk defeat against single elimination."""
+
+    @pytest.mark.parametrize("seed", range(4))
+    @pytest.mark.parametrize("rules", ["gregory", "meek"])
+    def test_same_winners_in_fewer_rounds(self, seed, rules):
+        patterns = crowded_patterns(seed)
+        single = create_engine(patterns, rules)
+        bulk = create_engine(patterns, replace(get_rules(rules), bulk_defeat=True))
+        single_state = single.run(single.initial_state(3))
+        bulk_state = bulk.run(bulk.initial_state(3))
+
+        assert bulk_state.winners == single_state.winners
+        assert set(bulk_state.eliminated) == set(single_state.eliminated)
+        assert len(bulk_state.rounds) * 3 < len(single_state.rounds)
+        # The whole fringe goes at once, before any vote could reach quota
+        assert len(bulk_state.bulk_defeats[0].candidates) == 20
+        assert not bulk_state.bulk_defeats[0].may_differ
+
+        for record in bulk_state.bulk_defeats:
+            round_obj = bulk_state.rounds[record.round_number - 1]
+            assert round_obj.eliminated_this_round == record.candidates
+            assert record.combined_votes < record.next_lowest_votes
+
+    def test_imposed_group_elimination(self):
+        # The two strongest candidates cannot be bulk defeated; imposing
+        # their elimination (as the margin search does) is still recorded
+        patterns = crowded_patterns(0)
+        engine = create_engine(
+            patterns, replace(get_rules("gregory"), bulk_defeat=True)
+        )
+        state = engine.initial_state(3)
+        current = engine.current_candidates(state)
+        tallies = engine.tally(state, current)
+        state.history.append(tallies)
+        top = [int(c) for c in np.argsort(-tallies)[:2]]
+
+        round_obj = engine.apply_decision(state, current, tallies, [], top, False)
+
+        assert round_obj.eliminated_this_round == [
+            int(patterns.candidate_ids[c]) for c in top
+        ]
+        record = state.bulk_defeats[0]
+        assert record.candidates == round_obj.eliminated_this_round
+        assert record.may_differ
+        assert record.combined_votes == pytest.approx(tallies[top].sum())
+
+    def test_sql_tabulator_bulk_defeat(self, make_ballot_db, tmp_path):
+        candidates = {"A": 1, "B": 2, "C": 3, "D": 4, "E": 5}
+        ballots = [
+            (["A", "B"], 40),
+            (["B", "A"], 30),
+            (["C", "B"], 18),
+            (["D", "A"], 6),
+            (["E", "D"], 4),
+        ]
+        db = make_ballot_db(candidates, ballots, db_path=str(tmp_path / "bulk.duckdb"))
+        single = STVTabulator(db, seats=1)
+        single.run_stv_tabulation()
+        bulk = STVTabulator(db, seats=1, bulk_defeat=True)
+        bulk.run_stv_tabulation()
+
+        assert bulk.winners == single.winners == [2]
+        assert len(bulk.rounds) < len(single.rounds)
+        # E, D and C have 28 votes between them, fewer than B's 30
+        assert bulk.rounds[0].eliminated_this_round == [5, 4, 3]
+        assert bulk.bulk_defeats[0].combined_votes == 28
+        # Each ballot moves once, to its next continuing preference
+        assert bulk.rounds[0].transfers == {3: {2: 18.0}, 4: {1: 6.0}, 5: {}}
@@ -0,0 +1,104 @@
+import duckdb
+import pytest
+
+from src.data.ballot_patterns import load_ballot_patterns
+from src.data.catalog import ElectionCatalog
+
+CANDIDATES = {"A": 1, "B": 2, "C": 3}
+
+
+@pytest.fixture
+def elections(make_ballot_db, tmp_path):
+    """Two on-disk elections with different first-choice winners."""
+    paths = {}
+    for election_id, patterns in {
+        "north": [(["A", "B"], 30), (["B"], 10)],
+        "south": [(["C", "A"], 25), (["B", "C"], 5)],
+    }.items():
+        directory = tmp_path / election_id
+        directory.mkdir()
+        paths[election_id] = str(directory / "election.duckdb")
+        make_ballot_db(CANDIDATES, patterns, db_path=paths[election_id])
+    return paths
+
+
+class TestElectionCatalog:
+    def test_routes_queries_per_election(self, elections):
+        with ElectionCatalog() as catalog:
+            for election_id, path in elections.items():
+                catalog.register(election_id, path)
+
+            north = catalog.database("north")
+            south = catalog.database("south")
+            count = "SELECT COUNT(DISTINCT BallotID) AS n FROM ballots_long"
+            assert north.query(count)["n"].iloc[0] == 40
+            assert south.query_with_retry(count)["n"].iloc[0] == 30
+            assert north.table_exists("ballots_long")
+            assert not north.table_exists("adjacent_pairs")
+
+            patterns = load_ballot_patterns(south)
+            assert patterns.total_ballots == 30
+            assert patterns.candidate_name(patterns.rankings[0, 0]) == "C"
+
+    def test_parquet_artifacts(self, tmp_path):
+        directory = tmp_path / "precomputed"
+        directory.mkdir()
+        duckdb.connect().execute(
+            "COPY (SELECT 1 AS candidate_1, 2 AS candidate_2) "
+            f"TO '{directory / 'adjacent_pairs.parquet'}'"
+        )
+
+        with ElectionCatalog() as catalog:
+            election = catalog.register("artifacts", str(directory))
+            database = catalog.database("artifacts")
+
+            assert election.kind == "parquet"
+            assert database.table_exists("adjacent_pairs")
+            assert not database.table_exists("ballots_long")
+            assert database.query("SELECT * FROM adjacent_pairs").shape == (1, 2)
+
+    def test_discover_and_invalid_registrations(self, elections, tmp_path):
+        (tmp_path / "empty").mkdir()
+
+        with ElectionCatalog() as catalog:
+            registered = catalog.discover(str(tmp_path))
+
+            assert [e.election_id for e in registered] == ["north", "south"]
+            assert catalog.election_ids == ["north", "south"]
+            with pytest.raises(ValueError):
+                catalog.register("north", elections["north"])
+            with pytest.raises(ValueError):
+                catalog.register("bad id;", elections["north"])
+            with pytest.raises(KeyError):
+                catalog.database("empty")
+
+            catalog.remove("north")
+            assert "north" not in catalog
+            assert catalog.database("south").table_exists("ballots_long")
+
+    def test_lru_cache_budget(self, elections):
+        with ElectionCatalog(memory_budget_mb=1) as catalog:
+            for election_id, path in elections.items():
+                catalog.register(election_id, path)
+            half = 512 * 1024
+            loads = []
+
+            def loader(value):
+                return lambda: loads.append(value) or value
+
+            assert catalog.cached("north", "a", loader("a"), nbytes=half) == "a"
+            assert catalog.cached("south", "b", loader("b"), nbytes=half) == "b"
+            catalog.cached("north", "a", loader("a2"))  # hit; "b" is now oldest
+            catalog.cached("north", "c", loader("c"), nbytes=half)  # evicts "b"
+            catalog.cached("south", "b", loader("b"), nbytes=half)  # evicts "a"
+            catalog.cached("north", "huge", loader("huge"), nbytes=4 * half)
+
+            stats = catalog.stats()
+            assert loads == ["a", "b", "c", "b", "huge"]
+            assert stats["hits"] == 1
+            assert stats["misses"] == 5
+            assert stats["evictions"] == 2
+            assert stats["cache_entries"] == 2
+            assert stats["cached_bytes"] == 2 * half <= stats["memory_budget_bytes"]
+            cached = {e["election_id"]: e["cached_bytes"] for e in stats["elections"]}
+            assert cached == {"north": half, "south": half}
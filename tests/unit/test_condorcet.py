@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from src.analysis.condorcet import (
+    CondorcetAnalyzer,
+    condorcet_winner,
+    pairwise_matrix,
+    smith_set,
+)
+from src.data.ballot_patterns import BallotPatterns
+from tests.unit.test_stv_vectorized import random_patterns
+
+
+def reference_matrix(patterns):
+    """Pair-by-pair count: unranked candidates sit below every ranked one."""
+    positions = patterns.rank_positions().astype(np.int64)
+    positions[positions == 0] = patterns.max_rank + 1
+    n = patterns.n_candidates
+    matrix = np.zeros((n, n), dtype=np.int64)
+    for a in range(n):
+        for b in range(n):
+            if a != b:
+                prefers = positions[:, a] < positions[:, b]
+                matrix[a, b] = patterns.counts[prefers].sum()
+    return matrix
+
+
+@pytest.mark.unit
+class TestCondorcet:
+    """Test pairwise matrix, Condorcet winner and Smith set."""
+
+    def test_matrix_matches_reference(self):
+        for seed in range(3):
+            patterns = random_patterns(seed, n_candidates=7, max_rank=5)
+            assert np.array_equal(pairwise_matrix(patterns), reference_matrix(patterns))
+
+    def test_unranked_and_blank(self):
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3]),
+            rankings=np.array([[0, -1], [1, 0], [-1, -1]], dtype=np.int16),
+            counts=np.array([5, 3, 4]),
+        )
+        matrix = pairwise_matrix(patterns)
+
+        # A-only ballots put A above B and C; nobody ranks C
+        assert matrix.tolist() == [[0, 5, 8], [3, 0, 3], [0, 0, 0]]
+        assert condorcet_winner(matrix) == 0
+
+    def test_cycle_gives_smith_set(self):
+        # A > B > C > A, with D beaten by all three
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3, 4]),
+            rankings=np.array(
+                [[0, 1, 2, 3], [1, 2, 0, 3], [2, 0, 1, 3]], dtype=np.int16
+            ),
+            counts=np.array([10, 9, 8]),
+        )
+        matrix = pairwise_matrix(patterns)
+
+        assert condorcet_winner(matrix) is None
+        assert smith_set(matrix) == [0, 1, 2]
+
+    def test_analyzer(self):
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3]),
+            rankings=np.array([[0, 1], [1, 2], [2, 1]], dtype=np.int16),
+            counts=np.array([40, 35, 25]),
+            candidate_names={1: "A", 2: "B", 3: "C"},
+        )
+        analyzer = CondorcetAnalyzer(patterns=patterns)
+        result = analyzer.analyze()
+
+        # B beats A 60-40 and C 75-25; C beats A 60-40
+        assert result.condorcet_winner == 2
+        assert result.smith_set == [2]
+        assert result.copeland_scores == [0.0, 2.0, 1.0]
+        pairs = analyzer.pairs_to_dataframe(result)
+        row = pairs[(pairs["candidate_a"] == 1) & (pairs["candidate_b"] == 2)]
+        assert row[["a_over_b", "b_over_a", "margin"]].values.tolist() == [
+            [40, 60, -20]
+        ]
+        with pytest.raises(ValueError):
+            CondorcetAnalyzer()
@@ -0,0 +1,125 @@
+import pytest
+
+from src.analysis.cross_verification import EngineRun, compare_runs, cross_verify
+
+CANDIDATES = {"A": 1, "B": 2, "C": 3, "D": 4}
+PATTERNS = [
+    (["A", "B", "C"], 30),
+    (["B", "C", "A"], 10),
+    (["D"], 40),
+    (["D", "A"], 20),
+]
+
+
+def make_run(engine, winners, rounds):
+    return EngineRun(
+        engine=engine,
+        election_id="x",
+        seats=1,
+        winners=winners,
+        rounds=rounds,
+        elapsed_seconds=0.0,
+    )
+
+
+def make_round(number, totals, elected=(), eliminated=(), quota=51.0):
+    return {
+        "round": number,
+        "vote_totals": totals,
+        "elected": list(elected),
+        "eliminated": list(eliminated),
+        "quota": quota,
+    }
+
+
+class TestCompareRuns:
+    def test_tolerance_and_missing_candidates(self):
+        a = make_run(
+            "sql",
+            [4],
+            [
+                make_round(1, {1: 30.0, 2: 10.0}, eliminated=[3]),
+                make_round(2, {1: 40.0}, elected=[4], eliminated=[2]),
+            ],
+        )
+        b = make_run(
+            "other",
+            [4],
+            [
+                make_round(1, {1: 30.0000001, 2: 10.0, 3: 0.0}),
+                make_round(2, {1: 41.0, 3: 0.0}, elected=[4], eliminated=[2]),
+            ],
+        )
+
+        found = compare_runs(a, b, tolerance=1e-6)
+        kinds = [(d.kind, d.round_number, d.candidate_id) for d in found]
+
+        # Candidate 3 has no votes for sql in round 1 but was eliminated, so
+        # it is continuing for the other engine only from round 1 on
+        assert kinds == [
+            ("vote_total", 1, 3),
+            ("eliminated", 1, None),
+            ("vote_total", 2, 1),
+            ("vote_total", 2, 3),
+        ]
+        assert found[2].difference == pytest.approx(1.0)
+        assert compare_runs(a, b, tolerance=2.0)[2].kind == "vote_total"
+
+    def test_winner_and_error_discrepancies(self):
+        a = make_run("sql", [4], [make_round(1, {})])
+        b = make_run("other", [1], [make_round(1, {}), make_round(2, {})])
+        assert [d.kind for d in compare_runs(a, b, 0.0)] == ["winners", "round_count"]
+
+        b.error = "RuntimeError: failed"
+        (error,) = compare_runs(a, b, 0.0)
+        assert error.kind == "error"
+        assert error.value_b == "RuntimeError: failed"
+
+
+class TestCrossVerify:
+    @pytest.fixture
+    def elections(self, make_ballot_db, tmp_path):
+        paths = {}
+        doubled = [(ranking, 2 * count) for ranking, count in PATTERNS]
+        for election_id, patterns in {"first": PATTERNS, "second": doubled}.items():
+            paths[election_id] = str(tmp_path / f"{election_id}.duckdb")
+            make_ballot_db(CANDIDATES, patterns, db_path=paths[election_id])
+        return paths
+
+    def test_engines_agree(self, elections):
+        report = cross_verify(
+            elections, seats=[1], engines=["sql", "vectorized"], max_workers=2
+        )
+
+        assert report.passed and report.winners_agree
+        assert [(c["election_id"], c["seats"]) for c in report.cases] == [
+            ("first", 1),
+            ("second", 1),
+        ]
+        assert report.cases[0]["winners"] == {"sql": [4], "vectorized": [4]}
+        assert set(report.engine_seconds) == {"sql", "vectorized"}
+        assert report.to_dict()["discrepancies"] == []
+
+    def test_many_seats_and_engines(self, elections, tmp_path):
+        report = cross_verify(
+            {"first": elections["first"]},
+            seats=[1, 2],
+            engines=["sql", "vectorized", "pyrankvote"],
+            max_workers=1,
+            snapshot_dir=str(tmp_path / "snapshots"),
+        )
+
+        assert report.winners_agree
+        assert len(report.runs) == 6
+        assert (tmp_path / "snapshots" / "first.snapshot.duckdb").exists()
+        # PyRankVote's unrounded Droop quota differs from ours
+        quotas = report.discrepancies_to_dataframe().query("kind == 'quota'")
+        assert set(quotas["engine_b"]) == {"pyrankvote"}
+
+    def test_invalid_arguments(self, elections):
+        with pytest.raises(ValueError):
+            cross_verify(elections, engines=["sql", "unknown"])
+        with pytest.raises(ValueError):
+            cross_verify(elections, engines=["sql"])
+        with pytest.raises(ValueError):
+            cross_verify(elections, seats=[0])
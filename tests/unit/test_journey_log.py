@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from src.analysis.stv import BallotJourney, JourneyLog, STVTabulator
+
+
+@pytest.mark.unit
+class TestJourneyLog:
+    """Test the columnar ballot journey store."""
+
+    @pytest.fixture
+    def log(self):
+        log = JourneyLog()
+        log.append(
+            1,
+            30,
+            np.array(["b1", "b2", "b3"]),
+            np.array([10, 20, 10]),
+            1.0,
+            "elimination",
+        )
+        log.append(2, 10, np.array(["b1", "b4"]), np.array([20, 20]), 0.25, "surplus")
+        return log
+
+    def test_journey(self, log):
+        journey = log.journey("b1")
+
+        assert isinstance(journey, BallotJourney)
+        assert journey.transfer_history == [
+            (1, 30, 10, "elimination"),
+            (2, 10, 20, "surplus"),
+        ]
+        assert journey.candidate_progression == [(1, 10), (2, 20)]
+        assert journey.weight_progression == [(1, 1.0), (2, 0.25)]
+        assert log["b4"].transfer_history == [(2, 10, 20, "surplus")]
+        assert log.journey("missing") is None
+        with pytest.raises(KeyError):
+            log["missing"]
+
+    def test_sizes(self, log):
+        assert len(log) == 4
+        assert log.n_transfers == 5
+        assert "b3" in log and "b9" not in log
+        assert {j.ballot_id for j in log} == {"b1", "b2", "b3", "b4"}
+        # 4 + 4 + 4 + 4 + 4 + 1 bytes per transfer
+        assert log.nbytes == 5 * 21
+        assert len(JourneyLog()) == 0 and JourneyLog().n_transfers == 0
+
+    def test_flows(self, log):
+        flows = log.flows().set_index(["from_candidate", "to_candidate"])
+
+        assert flows.loc[(30, 10), "ballot_count"] == 2
+        assert flows.loc[(30, 20), "votes"] == 1.0
+        assert flows.loc[(10, 20), "ballot_count"] == 2
+        assert flows.loc[(10, 20), "votes"] == 0.5
+        assert log.flows(round_number=2)["ballot_count"].tolist() == [2]
+
+    def test_detailed_tracking(self, make_ballot_db, tmp_path):
+        db = make_ballot_db(
+            {"A": 1, "B": 2, "C": 3},
+            [(["A"], 4), (["B", "A"], 3), (["C", "B", "A"], 2)],
+            db_path=str(tmp_path / "journeys.duckdb"),
+        )
+        tabulator = STVTabulator(db, seats=1, detailed_tracking=True)
+        tabulator.run_stv_tabulation()
+        flow = tabulator.get_vote_flow()
+
+        assert tabulator.winners == [2]
+        assert flow.ballot_journeys is tabulator.ballot_journeys
+        assert flow.flow_metadata["total_ballots_tracked"] == 2
+        assert tabulator.ballot_journeys["B000008"].transfer_history == [
+            (1, 3, 2, "elimination")
+        ]
+        assert flow.transfer_patterns[0].ballot_count == 2
@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from src.analysis.margin import alternative_decisions, compute_margin
+from src.analysis.stv_vectorized import VectorizedSTV
+from src.data.ballot_patterns import BallotPatterns
+from tests.unit.test_stv_vectorized import random_patterns
+
+
+def count_winners(patterns, seats):
+    engine = VectorizedSTV(patterns)
+    return engine.run(engine.initial_state(seats)).winners
+
+
+@pytest.mark.unit
+class TestMargin:
+    """Test margin-of-victory bounds."""
+
+    def test_close_race(self):
+        # A 40, B 35, C 25 (C -> B): B wins 60-40 after C is eliminated.
+        # Moving 6 B ballots to C eliminates B instead, and A wins; 5 only
+        # ties B and C, so the margin is 5 or 6 depending on the tie-break.
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3]),
+            rankings=np.array([[0, -1], [1, -1], [2, 1]], dtype=np.int16),
+            counts=np.array([40, 35, 25]),
+        )
+        result = compute_margin(patterns, seats=1, max_workers=1)
+
+        assert result.winners == [2]
+        assert result.complete
+        assert 5 <= result.lower_bound <= 6
+        assert result.upper_bound == 6
+        assert result.manipulation.from_candidate == 2
+        assert result.manipulation.winners != [2]
+
+    def test_landslide(self):
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3]),
+            rankings=np.array([[0, -1], [1, 2], [2, 1]], dtype=np.int16),
+            counts=np.array([500, 30, 25]),
+        )
+        result = compute_margin(patterns, seats=1, max_workers=1)
+
+        # A needs to lose 223 votes to fall below the quota of 278
+        assert result.lower_bound >= 200
+        assert result.lower_bound <= result.upper_bound
+
+    def test_upper_bound_is_verified(self):
+        patterns = random_patterns(0, n_candidates=7, n_patterns=300)
+        result = compute_margin(patterns, seats=3, max_workers=1)
+        assert result.lower_bound <= result.upper_bound
+
+        # Apply the reported manipulation and recount
+        m = result.manipulation
+        source = patterns.candidate_index(m.from_candidate)
+        counts = patterns.counts.astype(np.int64)
+        left = m.ballots
+        for row in np.flatnonzero(patterns.rankings[:, 0] == source):
+            taken = min(left, counts[row])
+            counts[row] -= taken
+            left -= taken
+        assert left == 0
+        ranking = np.full((1, patterns.max_rank), -1, dtype=np.int16)
+        ranking[0, 0] = patterns.candidate_index(m.to_candidate)
+        changed = BallotPatterns(
+            candidate_ids=patterns.candidate_ids,
+            rankings=np.vstack([patterns.rankings, ranking]),
+            counts=np.append(counts, m.ballots),
+        )
+        winners = count_winners(changed, 3)
+        assert {int(patterns.candidate_ids[c]) for c in winners} != set(result.winners)
+
+    def test_time_budget(self):
+        patterns = random_patterns(1, n_candidates=10, n_patterns=1000)
+        full = compute_margin(patterns, seats=3, max_workers=1)
+        rushed = compute_margin(patterns, seats=3, max_workers=1, time_budget=1e-6)
+
+        assert not rushed.complete
+        assert rushed.notes
+        assert rushed.lower_bound <= full.lower_bound
+        with pytest.raises(ValueError):
+            compute_margin(patterns, time_budget=0)
+        with pytest.raises(ValueError):
+            compute_margin(patterns, seats=0)
+
+    def test_workers_agree(self):
+        patterns = random_patterns(2, n_candidates=8, n_patterns=400)
+        serial = compute_margin(patterns, seats=2, max_workers=1)
+        parallel = compute_margin(patterns, seats=2, max_workers=2)
+
+        assert serial.complete and parallel.complete
+        assert parallel.lower_bound == serial.lower_bound
+        assert parallel.upper_bound == serial.upper_bound
+        assert parallel.nodes_expanded == serial.nodes_expanded
+
+    def test_alternatives_once_quota_is_reached(self):
+        # Two seats, quota 36: A (50) is elected this round; B (30) and C (25)
+        # could take a seat alongside or instead of A
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3]),
+            rankings=np.array([[0, -1], [1, -1], [2, -1]], dtype=np.int16),
+            counts=np.array([50, 30, 25]),
+        )
+        engine = VectorizedSTV(patterns)
+        state = engine.initial_state(2)
+        tallies = engine.tally(state)
+        state.history.append(tallies)
+        options = dict(
+            (decision, cost)
+            for cost, decision in alternative_decisions(engine, state, tallies)
+        )
+
+        assert options[((0,), (), True)] == 0  # what the count does
+        assert options[((0, 1), (), True)] == 6  # lift B to quota
+        assert options[((0, 2), (), True)] == 11
+        assert options[((1,), (), True)] == 14  # push A below quota
+        assert options[((2,), (), True)] == 14
+
+    def test_heuristic_with_surplus_transfers(self):
+        patterns = random_patterns(3, n_candidates=6, n_patterns=300)
+        result = compute_margin(patterns, seats=3, max_workers=1)
+
+        assert result.heuristic
+        assert not result.exact
+        assert any("estimate" in note for note in result.notes)
+
+    def test_single_seat_is_not_heuristic(self):
+        # The only election ends the count, so its surplus is never transferred
+        patterns = random_patterns(3, n_candidates=6, n_patterns=300)
+        result = compute_margin(patterns, seats=1, max_workers=1)
+
+        assert result.heuristic is False
+        assert not any("estimate" in note for note in result.notes)
+
+        landslide = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3]),
+            rankings=np.array([[0, -1], [1, 2], [2, 1]], dtype=np.int16),
+            counts=np.array([500, 30, 25]),
+        )
+        assert compute_margin(landslide, seats=1, max_workers=1).heuristic is False
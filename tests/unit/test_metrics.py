@@ -0,0 +1,109 @@
+import pytest
+
+from src.analysis.stv import STV_ROUNDS, STV_RUNS, STV_SECONDS
+from src.analysis.stv_vectorized import VectorizedSTVTabulator
+from src.data.catalog import ElectionCatalog
+from src.monitoring.metrics import (
+    CACHE_BYTES,
+    CACHE_EVICTIONS,
+    CACHE_REQUESTS,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+)
+
+
+class TestRegistry:
+    def test_text_format(self):
+        registry = MetricsRegistry()
+        requests = registry.register(
+            Counter("app_requests_total", "Requests", ["route", "status"])
+        )
+        in_flight = registry.register(Gauge("app_in_flight", "In flight"))
+        latency = registry.register(
+            Histogram("app_seconds", "Latency", ["route"], buckets=[0.1, 1.0])
+        )
+        uptime = registry.register(Gauge("app_uptime", "Uptime"))
+
+        requests.labels(route="/a", status="200").inc()
+        requests.labels("/a", "200").inc(2)
+        requests.labels(route='say "hi"\n', status="500").inc()
+        in_flight.inc()
+        in_flight.inc()
+        in_flight.dec()
+        for value in (0.05, 0.5, 0.5, 3.0):
+            latency.labels(route="/a").observe(value)
+        uptime.set_function(lambda: 12.5)
+
+        assert registry.render().splitlines() == [
+            "# HELP app_requests_total Requests",
+            "# TYPE app_requests_total counter",
+            'app_requests_total{route="/a",status="200"} 3.0',
+            'app_requests_total{route="say \\"hi\\"\\n",status="500"} 1.0',
+            "# HELP app_in_flight In flight",
+            "# TYPE app_in_flight gauge",
+            "app_in_flight 1.0",
+            "# HELP app_seconds Latency",
+            "# TYPE app_seconds histogram",
+            'app_seconds_bucket{route="/a",le="0.1"} 1',
+            'app_seconds_bucket{route="/a",le="1.0"} 3',
+            'app_seconds_bucket{route="/a",le="+Inf"} 4',
+            'app_seconds_sum{route="/a"} 4.05',
+            'app_seconds_count{route="/a"} 4',
+            "# HELP app_uptime Uptime",
+            "# TYPE app_uptime gauge",
+            "app_uptime 12.5",
+        ]
+        assert latency.snapshot(route="/a") == ([1, 3], 4.05, 4)
+
+    def test_validation(self):
+        registry = MetricsRegistry()
+        first = registry.register(Counter("x_total", "X", ["a"]))
+        assert registry.register(Counter("x_total", "X again", ["a"])) is first
+        with pytest.raises(ValueError):
+            registry.register(Gauge("x_total", "X", ["a"]))
+        with pytest.raises(ValueError):
+            first.inc()  # labels required
+        with pytest.raises(ValueError):
+            first.labels("1", "2")
+        with pytest.raises(ValueError):
+            first.labels(a="1").inc(-1)
+        with pytest.raises(ValueError):
+            Histogram("h", "H", ["le"])
+
+
+class TestComponentMetrics:
+    def test_stv_runs(self, make_ballot_db):
+        db = make_ballot_db(
+            {"A": 1, "B": 2, "C": 3},
+            [(["A", "B"], 40), (["B", "C"], 35), (["C", "A"], 25)],
+        )
+        runs = STV_RUNS.value(engine="vectorized", outcome="ok")
+        rounds = STV_ROUNDS.value(engine="vectorized")
+        _, _, observed = STV_SECONDS.snapshot(engine="vectorized")
+
+        tabulator = VectorizedSTVTabulator(db, seats=1)
+        tabulator.run_stv_tabulation()
+
+        assert STV_RUNS.value(engine="vectorized", outcome="ok") == runs + 1
+        assert STV_ROUNDS.value(engine="vectorized") == rounds + len(tabulator.rounds)
+        assert STV_SECONDS.snapshot(engine="vectorized")[2] == observed + 1
+
+    def test_catalog_cache(self, make_ballot_db, tmp_path):
+        path = str(tmp_path / "election.duckdb")
+        make_ballot_db({"A": 1, "B": 2}, [(["A", "B"], 10)], db_path=path)
+        hits = CACHE_REQUESTS.value(cache="catalog", result="hit")
+        misses = CACHE_REQUESTS.value(cache="catalog", result="miss")
+        evictions = CACHE_EVICTIONS.value(cache="catalog")
+
+        with ElectionCatalog(memory_budget_mb=1) as catalog:
+            catalog.register("city", path)
+            catalog.cached("city", "a", lambda: "a", nbytes=600 * 1024)
+            catalog.cached("city", "a", lambda: "a")
+            catalog.cached("city", "b", lambda: "b", nbytes=600 * 1024)  # evicts "a"
+
+            assert CACHE_REQUESTS.value(cache="catalog", result="hit") == hits + 1
+            assert CACHE_REQUESTS.value(cache="catalog", result="miss") == misses + 2
+            assert CACHE_EVICTIONS.value(cache="catalog") == evictions + 1
+            assert CACHE_BYTES.value(cache="catalog") == 600 * 1024
@@ -0,0 +1,179 @@
+import json
+import threading
+
+import pytest
+
+from src.data.database import CVRDatabase
+from src.data.pipeline import Pipeline, Stage, atomic_path, replace_table, write_json
+
+
+@pytest.fixture
+def db():
+    db = CVRDatabase(":memory:", read_only=False)
+    db.execute("CREATE TABLE source AS SELECT range AS x FROM range(10)")
+    yield db
+    db.close()
+
+
+def make_stages(calls, tmp_path, barrier=None):
+    """source -> doubled -> total (+ file); source -> squares, in parallel."""
+
+    def doubled(db):
+        calls.append("doubled")
+        if barrier:
+            barrier.wait()
+        replace_table(db, "doubled", "SELECT x * 2 AS y FROM source")
+        return {"rows": 10}
+
+    def squares(db):
+        calls.append("squares")
+        if barrier:
+            barrier.wait()
+        replace_table(db, "squares", "SELECT x * x AS y FROM source")
+
+    def total(db, offset):
+        calls.append("total")
+        value = db.execute("SELECT SUM(y) FROM doubled").fetchone()[0] + offset
+        write_json(tmp_path / "out" / "total.json", {"total": value})
+        return value
+
+    return [
+        Stage(
+            "total",
+            total,
+            inputs=["doubled"],
+            files=["out/total.json"],
+            params={"offset": 1},
+        ),
+        Stage("doubled", doubled, inputs=["source"], outputs=["doubled"]),
+        Stage("squares", squares, inputs=["source"], outputs=["squares"]),
+    ]
+
+
+class TestPipeline:
+    def test_incremental_runs(self, db, tmp_path):
+        calls = []
+        pipeline = Pipeline(db, make_stages(calls, tmp_path), tmp_path)
+        assert pipeline.sources == ["source"]
+        assert pipeline.dependencies["total"] == ["doubled"]
+        first = pipeline.run()
+        assert list(first) == ["doubled", "total", "squares"]  # topological
+        assert {r.status for r in first.values()} == {"ran"}
+        assert first["total"].result == 91
+        assert json.loads((tmp_path / "out" / "total.json").read_text()) == {
+            "total": 91
+        }
+
+        # Nothing changed: everything is skipped, results come from the manifest
+        calls.clear()
+        again = Pipeline(db, make_stages(calls, tmp_path), tmp_path).run()
+        assert calls == []
+        assert again["total"].status == "skipped"
+        assert again["total"].result == 91
+        assert again["doubled"].result == {"rows": 10}
+
+        # A missing artifact reruns only its stage
+        (tmp_path / "out" / "total.json").unlink()
+        Pipeline(db, make_stages(calls, tmp_path), tmp_path).run()
+        assert calls == ["total"]
+
+        # Changing a source reruns everything downstream of it
+        calls.clear()
+        db.execute("UPDATE source SET x = x + 1 WHERE x = 9")
+        Pipeline(db, make_stages(calls, tmp_path), tmp_path).run()
+        assert sorted(calls) == ["doubled", "squares", "total"]
+
+        # Editing an output by hand is detected
+        calls.clear()
+        db.execute("DELETE FROM squares WHERE y = 0")
+        Pipeline(db, make_stages(calls, tmp_path), tmp_path).run()
+        assert calls == ["squares"]
+
+        calls.clear()
+        Pipeline(db, make_stages(calls, tmp_path), tmp_path).run(force=True)
+        assert sorted(calls) == ["doubled", "squares", "total"]
+
+    def test_parameter_change_and_early_cutoff(self, db, tmp_path):
+        calls = []
+        Pipeline(db, make_stages(calls, tmp_path), tmp_path).run()
+
+        calls.clear()
+        stages = make_stages(calls, tmp_path)
+        stages[0].params = {"offset": 2}
+        assert Pipeline(db, stages, tmp_path).run()["total"].result == 92
+        assert calls == ["total"]
+
+        # A rerun that reproduces identical output does not invalidate "total"
+        calls.clear()
+        stages = make_stages(calls, tmp_path)
+        stages[0].params = {"offset": 2}
+        stages[1].version = "v2"
+        Pipeline(db, stages, tmp_path).run()
+        assert calls == ["doubled"]
+
+    def test_independent_stages_run_in_parallel(self, db, tmp_path):
+        barrier = threading.Barrier(2, timeout=10)
+        calls = []
+        Pipeline(db, make_stages(calls, tmp_path, barrier), tmp_path).run()
+        assert sorted(calls) == ["doubled", "squares", "total"]
+
+    def test_failure_blocks_dependents_only(self, db, tmp_path):
+        calls = []
+        stages = make_stages(calls, tmp_path)
+
+        def broken(db):
+            raise ValueError("boom")
+
+        stages[1].run = broken
+        pipeline = Pipeline(db, stages, tmp_path)
+        with pytest.raises(ValueError, match="boom"):
+            pipeline.run()
+
+        manifest = json.loads(pipeline.manifest_path.read_text())
+        assert calls == ["squares"]
+        assert set(manifest["stages"]) == {"squares"}
+
+    def test_invalid_graphs(self, db, tmp_path):
+        def noop(db):
+            pass
+
+        with pytest.raises(ValueError, match="cycle"):
+            Pipeline(
+                db,
+                [
+                    Stage("a", noop, inputs=["b_out"], outputs=["a_out"]),
+                    Stage("b", noop, inputs=["a_out"], outputs=["b_out"]),
+                ],
+                tmp_path,
+            )
+        with pytest.raises(ValueError, match="written by both"):
+            Pipeline(
+                db,
+                [Stage("a", noop, outputs=["t"]), Stage("b", noop, outputs=["t"])],
+                tmp_path,
+            )
+
+
+class TestAtomicWrites:
+    def test_replace_table_keeps_old_table_on_failure(self, db):
+        replace_table(db, "t", "SELECT 1 AS x", indexes=[("idx_t_x", "x")])
+        replace_table(db, "t", "SELECT 2 AS x", indexes=[("idx_t_x", "x")])
+        assert db.query("SELECT x FROM t")["x"].tolist() == [2]
+
+        with pytest.raises(Exception):
+            replace_table(db, "t", "SELECT 3 AS x", indexes=[("idx_t_x", "missing")])
+        assert db.query("SELECT x FROM t")["x"].tolist() == [2]
+
+    def test_atomic_path(self, tmp_path):
+        target = tmp_path / "data.txt"
+        target.write_text("old")
+        with pytest.raises(RuntimeError):
+            with atomic_path(target) as tmp:
+                tmp.write_text("partial")
+                raise RuntimeError
+        assert target.read_text() == "old"
+
+        with atomic_path(target) as tmp:
+            tmp.write_text("new")
+        assert target.read_text() == "new"
+        assert [p.name for p in tmp_path.iterdir()] == ["data.txt"]
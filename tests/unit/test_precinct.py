@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from src.analysis.precinct import PrecinctAnalyzer
+from src.data.ballot_patterns import load_ballot_patterns
+
+CANDIDATES = {"A": 1, "B": 2, "C": 3}
+
+
+@pytest.fixture
+def precinct_db(make_ballot_db):
+    return make_ballot_db(
+        CANDIDATES,
+        [
+            (["A", "B"], 6, 101),
+            (["B"], 4, 101),
+            (["C", "A", "B"], 5, 102),
+            (["A", "C"], 1, 102),
+            (["B", "A"], 3, 103),
+        ],
+    )
+
+
+@pytest.mark.unit
+class TestPrecinctAnalyzer:
+    """Test the precinct x candidate x rank cube."""
+
+    def test_requires_precinct_patterns(self, precinct_db):
+        with pytest.raises(ValueError):
+            PrecinctAnalyzer()
+        with pytest.raises(ValueError):
+            PrecinctAnalyzer(patterns=load_ballot_patterns(precinct_db))
+
+    def test_rank_cube(self, precinct_db):
+        precinct_ids, rank_cube, _ = PrecinctAnalyzer(precinct_db).compute_cube(
+            max_workers=1
+        )
+
+        assert precinct_ids.tolist() == [101, 102, 103]
+        assert rank_cube.shape == (3, 3, 3)
+        # Precinct 101: A first on 6, B first on 4 and second on 6
+        assert rank_cube[0].tolist() == [[6, 0, 0], [4, 6, 0], [0, 0, 0]]
+        # Precinct 102: C first on 5; A second on 5 and first on 1
+        assert rank_cube[1].tolist() == [[1, 5, 0], [0, 0, 5], [5, 1, 0]]
+
+    def test_pair_cube(self, precinct_db):
+        _, _, pair_cube = PrecinctAnalyzer(precinct_db).compute_cube(max_workers=1)
+
+        assert pair_cube[0, 0, 1] == 6  # A & B in precinct 101
+        assert pair_cube[0, 1, 1] == 10  # B ranked on every 101 ballot
+        assert pair_cube[1, 0, 2] == pair_cube[1, 2, 0] == 6
+        assert pair_cube[2, 0, 2] == 0
+
+    def test_parallel_chunks_match_serial(self, precinct_db):
+        analyzer = PrecinctAnalyzer(precinct_db)
+        serial = analyzer.compute_cube(max_workers=1)
+        parallel = analyzer.compute_cube(max_workers=2, chunk_size=1)
+
+        for expected, actual in zip(serial, parallel):
+            np.testing.assert_array_equal(expected, actual)
+
+    def test_build_tables(self, precinct_db):
+        tables = PrecinctAnalyzer(precinct_db).build_tables(max_workers=1)
+
+        cube = tables["precinct_rank_cube"]
+        assert cube["ballot_count"].sum() == 6 * 2 + 4 + 5 * 3 + 1 * 2 + 3 * 2
+        first = cube[cube["rank_position"] == 1]
+        assert first["ballot_count"].sum() == 19
+
+        pairs = tables["precinct_pairs"]
+        assert (pairs["candidate_1"] < pairs["candidate_2"]).all()
+        row = pairs[(pairs["precinct_id"] == 102) & (pairs["candidate_1"] == 1)]
+        assert dict(zip(row["candidate_2"], row["shared_ballots"])) == {2: 5, 3: 6}
+
+        summary = tables["precinct_summary"].set_index("precinct_id")
+        assert summary["total_ballots"].to_dict() == {101: 10, 102: 6, 103: 3}
+        assert summary.loc[102, "leading_candidate_name"] == "C"
+        assert summary.loc[101, "avg_ranks_used"] == pytest.approx(1.6)
+        assert summary.loc[103, "candidates_ranked"] == 2
+
+    def test_rank_one_matches_first_choice_totals(self, precinct_db):
+        conn = precinct_db.conn
+        conn.executemany(
+            "INSERT INTO ballots_long VALUES (?, ?, 1, ?, ?, ?)",
+            [
+                # Skipped first rank: A is marked second only
+                ("S1", 101, 1, "A", 2),
+                ("S2", 101, 1, "A", 2),
+                ("S2", 101, 3, "C", 3),
+                # Over-voted first rank: B and C both marked first
+                ("O1", 102, 2, "B", 1),
+                ("O1", 102, 3, "C", 1),
+                ("O1", 102, 1, "A", 2),
+                # Repeated mark: A counted once, at its highest rank
+                ("O1", 102, 1, "A", 3),
+            ],
+        )
+        precinct_db.execute_script("04_basic_analysis")
+
+        tables = PrecinctAnalyzer(precinct_db).build_tables(max_workers=1)
+        cube = tables["precinct_rank_cube"]
+        first = cube[cube["rank_position"] == 1].groupby("candidate_id")
+        totals = precinct_db.query("SELECT * FROM first_choice_totals")
+
+        assert first["ballot_count"].sum().to_dict() == dict(
+            zip(totals["candidate_id"], totals["first_choice_votes"])
+        )
+        # A is second on the skipped ballots, not promoted to first
+        a_101 = cube[(cube["precinct_id"] == 101) & (cube["candidate_id"] == 1)]
+        assert dict(zip(a_101["rank_position"], a_101["ballot_count"])) == {1: 6, 2: 2}
+
+        a_102 = cube[(cube["precinct_id"] == 102) & (cube["candidate_id"] == 1)]
+        assert dict(zip(a_102["rank_position"], a_102["ballot_count"])) == {1: 1, 2: 6}
+
+        summary = tables["precinct_summary"].set_index("precinct_id")
+        assert summary["total_ballots"].to_dict() == {101: 12, 102: 7, 103: 3}
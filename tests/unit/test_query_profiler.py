@@ -0,0 +1,101 @@
+import pytest
+
+from src.data.database import CVRDatabase
+from src.monitoring.queries import (
+    QueryProfiler,
+    get_query_profiler,
+    normalize_sql,
+    query_signature,
+)
+
+
+@pytest.fixture
+def profiler():
+    profiler = get_query_profiler()
+    enabled, slow_ms = profiler.enabled, profiler.slow_ms
+    profiler.reset()
+    profiler.enabled = True
+    yield profiler
+    profiler.enabled, profiler.slow_ms = enabled, slow_ms
+    profiler.reset()
+
+
+class Analyzer:
+    def __init__(self, db):
+        self.db = db
+
+    def by_candidate(self, candidate_id):
+        return self.db.query(f"SELECT * FROM range(10) WHERE range < {candidate_id}")
+
+
+def test_normalize_sql():
+    sql = "SELECT  *\n FROM t WHERE id IN (1, 2, 3) AND name = 'O''Hara' AND x > 2.5"
+    assert (
+        normalize_sql(sql)
+        == "SELECT * FROM t WHERE id IN (?...) AND name = ? AND x > ?"
+    )
+    assert normalize_sql("SELECT candidate_1 FROM choice_36") == (
+        "SELECT candidate_1 FROM choice_36"
+    )
+    assert query_signature("SELECT 1") == query_signature("SELECT  2")
+
+
+def test_aggregates_by_signature_and_caller(profiler):
+    profiler.slow_ms = 1e9
+    db = CVRDatabase(":memory:", read_only=False)
+    analyzer = Analyzer(db)
+    for candidate_id in range(1, 5):
+        analyzer.by_candidate(candidate_id)
+    db.execute("CREATE TABLE t AS SELECT 1 AS x")
+    db.close()
+
+    report = profiler.report()
+    by_sql = {s["sql"]: s for s in report["signatures"]}
+    select = by_sql["SELECT * FROM range(?) WHERE range < ?"]
+    assert select["count"] == 4
+    assert select["rows"] == 1 + 2 + 3 + 4
+    assert select["p50_ms"] <= select["p95_ms"] <= select["max_ms"]
+    assert select["callers"] == {"test_query_profiler:Analyzer.by_candidate": 4}
+    assert by_sql["CREATE TABLE t AS SELECT ? AS x"]["count"] == 1
+    assert report["total_queries"] == 5
+    assert report["slow_queries"] == []
+
+
+def test_slow_log_explains_read_only_queries(profiler):
+    profiler.slow_ms = 0.0
+    db = CVRDatabase(":memory:", read_only=False)
+    db.execute("CREATE TABLE t AS SELECT range AS x FROM range(100)")
+    db.query("SELECT SUM(x) AS total FROM t")
+    with pytest.raises(Exception):
+        db.query("SELECT * FROM missing_table")
+    db.close()
+
+    slow = {q["sql"]: q for q in profiler.report()["slow_queries"]}
+    assert set(slow) == {
+        "CREATE TABLE t AS SELECT range AS x FROM range(100)",
+        "SELECT SUM(x) AS total FROM t",
+    }
+    assert (
+        slow["CREATE TABLE t AS SELECT range AS x FROM range(100)"]["explain_analyze"]
+        is None
+    )
+    assert "Query Profiling" in slow["SELECT SUM(x) AS total FROM t"]["explain_analyze"]
+    errors = [s for s in profiler.report()["signatures"] if s["errors"]]
+    assert [s["sql"] for s in errors] == ["SELECT * FROM missing_table"]
+
+
+def test_disabled_and_bounded():
+    profiler = QueryProfiler(slow_ms=0.0, slow_log_size=2, explain=False)
+    for i in range(5):
+        profiler.record(f"SELECT {i}", seconds=i / 1000, rows=1, caller="x")
+    report = profiler.report(limit=1)
+
+    assert not report["enabled"]  # record() works; enabling only gates CVRDatabase
+    assert report["signatures"][0]["count"] == 5
+    assert [q["sql"] for q in report["slow_queries"]] == ["SELECT 4", "SELECT 3"]
+
+    disabled = get_query_profiler()
+    assert not disabled.enabled
+    before = disabled.report()["total_queries"]
+    CVRDatabase(":memory:").query("SELECT 1")
+    assert disabled.report()["total_queries"] == before
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from src.analysis.robustness import resample_counts, run_robustness
+from src.data.ballot_patterns import BallotPatterns
+from tests.unit.test_stv_vectorized import random_patterns
+
+
+@pytest.mark.unit
+class TestRobustness:
+    """Test Monte Carlo robustness analysis."""
+
+    def test_resample_counts(self):
+        counts = np.array([50, 30, 20])
+        rng = np.random.default_rng(0)
+
+        assert resample_counts(counts, rng, "bootstrap").sum() == 100
+        perturbed = resample_counts(counts, rng, "perturb", error_rate=0.1)
+        assert np.all(perturbed <= counts)
+        assert np.array_equal(resample_counts(counts, rng, "perturb", 0.0), counts)
+        with pytest.raises(ValueError):
+            resample_counts(counts, rng, "jackknife")
+
+    def test_invalid_options(self):
+        patterns = random_patterns(0)
+        with pytest.raises(ValueError):
+            run_robustness(patterns, method="jackknife")
+        with pytest.raises(ValueError):
+            run_robustness(patterns, method="perturb", error_rate=1.5)
+        with pytest.raises(ValueError):
+            run_robustness(patterns, replicates=0)
+
+    def test_landslide_is_certain(self):
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3]),
+            rankings=np.array([[0, -1], [1, 2], [2, 1]], dtype=np.int16),
+            counts=np.array([500, 30, 25]),
+        )
+        result = run_robustness(patterns, seats=1, replicates=40, max_workers=1)
+        table = result.win_probability.set_index("candidate_id")
+
+        assert result.baseline_winners == [1]
+        assert table.loc[1, "win_probability"] == 1.0
+        assert table.loc[1, "standard_error"] == 0.0
+        assert result.winner_sets["winners"].tolist() == [[1]]
+
+    def test_probabilities_and_rounds_consistent(self):
+        patterns = random_patterns(1, n_candidates=8, n_patterns=300)
+        result = run_robustness(patterns, seats=3, replicates=60, max_workers=1)
+
+        assert result.win_probability["win_probability"].sum() == pytest.approx(3)
+        assert result.win_probability["wins"].sum() == 3 * 60
+        assert result.winner_sets["replicates"].sum() == 60
+        rounds = result.decision_rounds
+        elected = rounds[rounds["outcome"] == "elected"]
+        assert elected["replicates"].sum() == 3 * 60
+        wins = elected.groupby("candidate_id")["replicates"].sum()
+        expected = result.win_probability.set_index("candidate_id")["wins"]
+        assert (wins == expected[wins.index]).all()
+
+    def test_deterministic_across_batches_and_workers(self):
+        patterns = random_patterns(2, n_candidates=7, n_patterns=200)
+        options = dict(seats=2, replicates=24, method="perturb", error_rate=0.05)
+        serial = run_robustness(patterns, batch_size=24, max_workers=1, **options)
+        batched = run_robustness(patterns, batch_size=5, max_workers=1, **options)
+        parallel = run_robustness(patterns, batch_size=5, max_workers=2, **options)
+
+        for other in (batched, parallel):
+            assert other.win_probability.equals(serial.win_probability)
+            assert other.decision_rounds.equals(serial.decision_rounds)
+
+        reseeded = run_robustness(patterns, seed=1, max_workers=1, **options)
+        assert not reseeded.decision_rounds.equals(serial.decision_rounds)
@@ -0,0 +1,42 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from src.analysis.shared_arrays import (
+    attach_shared_arrays,
+    get_shared_arrays,
+    share_arrays,
+)
+
+
+def _summarize(offset):
+    arrays = get_shared_arrays()
+    return (
+        int(arrays["counts"].sum()) + offset,
+        arrays["rankings"].shape,
+        arrays["rankings"].flags.writeable,
+    )
+
+
+@pytest.mark.unit
+def test_workers_read_shared_arrays():
+    arrays = {
+        "rankings": np.arange(12, dtype=np.int16).reshape(4, 3),
+        "counts": np.array([5, 0, 7, 1]),
+        "empty": np.zeros(0),
+    }
+
+    with share_arrays(arrays) as spec:
+        assert set(spec) == {"rankings", "counts", "empty"}
+        with ProcessPoolExecutor(
+            max_workers=2, initializer=attach_shared_arrays, initargs=(spec,)
+        ) as executor:
+            results = list(executor.map(_summarize, [0, 100]))
+
+    assert results == [(13, (4, 3), False), (113, (4, 3), False)]
+    # The parent unlinks every block on exit
+    for block_name, _, _ in spec.values():
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=block_name)
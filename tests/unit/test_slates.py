@@ -0,0 +1,83 @@
+import pytest
+
+from src.analysis.slates import SlateMiner
+
+CANDIDATES = {"A": 1, "B": 2, "C": 3, "D": 4, "E": 5}
+
+
+@pytest.fixture
+def slate_db(make_ballot_db):
+    # A-B-C is a strong slate; D and E are mostly ranked alone
+    return make_ballot_db(
+        CANDIDATES,
+        [
+            (["A", "B", "C"], 30),
+            (["C", "A", "B", "D"], 10),
+            (["D"], 30),
+            (["E", "D"], 20),
+            (["A", "E"], 10),
+        ],
+    )
+
+
+@pytest.mark.unit
+class TestSlateMiner:
+    """Test frequent candidate slate mining."""
+
+    def test_requires_data_source(self):
+        with pytest.raises(ValueError):
+            SlateMiner()
+
+    def test_invalid_sizes(self, slate_db):
+        with pytest.raises(ValueError):
+            SlateMiner(slate_db).mine_slates(min_size=3, max_size=2)
+
+    def test_finds_strong_triple(self, slate_db):
+        slates = SlateMiner(slate_db).mine_slates(min_support=0.2, max_size=4)
+
+        assert [s.candidates for s in slates] == [[1, 2, 3]]
+        slate = slates[0]
+        assert slate.support == 40
+        assert slate.support_percentage == pytest.approx(40.0)
+        # Ranked in the top three spots by both A-B-C patterns
+        assert slate.top_rank_support == 40
+        # Independent expectation: 100 * 0.5 * 0.4 * 0.4
+        assert slate.expected_support == pytest.approx(8.0)
+        assert slate.lift == pytest.approx(5.0)
+        assert slate.candidate_names == ["A", "B", "C"]
+
+    def test_low_support_reaches_quads(self, slate_db):
+        slates = SlateMiner(slate_db).mine_slates(min_support=0.05, max_size=4)
+
+        quads = [s for s in slates if s.size == 4]
+        assert [s.candidates for s in quads] == [[1, 2, 3, 4]]
+        assert quads[0].support == 10
+
+    def test_min_lift_filters(self, slate_db):
+        miner = SlateMiner(slate_db)
+        all_slates = miner.mine_slates(min_support=0.05, min_lift=0.0)
+        strong = miner.mine_slates(min_support=0.05, min_lift=100.0)
+
+        assert all_slates
+        assert strong == []
+
+    def test_support_matches_brute_force(self, slate_db):
+        miner = SlateMiner(slate_db)
+        patterns = miner.patterns
+        presence = patterns.presence_matrix()
+
+        for slate in miner.mine_slates(min_support=0.05, min_size=2, min_lift=0.0):
+            indices = [patterns.candidate_index(c) for c in slate.candidates]
+            expected = patterns.counts[presence[:, indices].all(axis=1)].sum()
+            assert slate.support == expected
+
+    def test_slates_to_dataframe(self, slate_db):
+        miner = SlateMiner(slate_db)
+        df = miner.slates_to_dataframe(miner.mine_slates(min_support=0.2))
+
+        assert len(df) == 1
+        assert df.iloc[0]["candidate_ids"] == "1,2,3"
+        assert df.iloc[0]["candidate_names"] == "A | B | C"
+
+        empty = miner.slates_to_dataframe([])
+        assert "lift" in empty.columns
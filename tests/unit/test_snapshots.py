@@ -0,0 +1,107 @@
+import json
+import os
+
+import duckdb
+import pytest
+
+from src.data.snapshots import DATABASE_NAME, POINTER, SnapshotStore
+
+
+def build(store, value, **kwargs):
+    """Publish a snapshot whose database holds ``value``."""
+    with store.build(**kwargs) as directory:
+        conn = duckdb.connect(str(directory / DATABASE_NAME))
+        conn.execute("CREATE OR REPLACE TABLE t AS SELECT ? AS value", [value])
+        conn.close()
+    return store.current_version()
+
+
+def read(path):
+    conn = duckdb.connect(str(path), read_only=True)
+    try:
+        return conn.execute("SELECT value FROM t").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_build_publishes_and_flips_pointer(tmp_path):
+    store = SnapshotStore(tmp_path / "snapshots")
+    assert store.current_version() is None
+    assert store.current_database() is None
+
+    first = build(store, 1)
+    assert read(store.current_database()) == 1
+
+    old = duckdb.connect(str(store.current_database()), read_only=True)
+    second = build(store, 2)
+    assert second > first
+    assert read(store.current_database()) == 2
+    # A reader still on the previous version keeps working
+    assert old.execute("SELECT value FROM t").fetchone()[0] == 1
+    old.close()
+
+    pointer = json.loads((store.root / POINTER).read_text())
+    assert pointer["version"] == second
+    assert pointer["previous"] == first
+    assert not [p for p in store.root.iterdir() if p.name.startswith(".")]
+
+
+def test_failed_build_is_discarded(tmp_path):
+    store = SnapshotStore(tmp_path)
+    first = build(store, 1)
+
+    with pytest.raises(RuntimeError):
+        with store.build() as directory:
+            (directory / "partial.json").write_text("{}")
+            raise RuntimeError("ingest failed")
+
+    assert store.current_version() == first
+    assert store.versions() == [first]
+    assert sorted(os.listdir(tmp_path)) == sorted([POINTER, first])
+
+    with pytest.raises(ValueError):
+        with store.build():
+            pass  # nothing written
+    assert store.current_version() == first
+
+
+def test_copy_current_and_prune(tmp_path):
+    store = SnapshotStore(tmp_path, keep=2)
+    first = build(store, 1)
+    (store.current() / "manifest.json").write_text("{}")
+
+    with store.build(copy_current=True) as directory:
+        assert read(directory / DATABASE_NAME) == 1
+        assert (directory / "manifest.json").exists()
+    second = store.current_version()
+    third = build(store, 3)
+
+    # The previous version survives for readers that have not drained yet
+    assert store.versions() == [second, third]
+    assert first not in os.listdir(tmp_path)
+
+
+def test_current_version_follows_external_publish(tmp_path, monkeypatch):
+    reader = SnapshotStore(tmp_path)
+    writer = SnapshotStore(tmp_path)
+    reads = []
+
+    def counting_open(*args, **kwargs):
+        reads.append(args[0])
+        return open(*args, **kwargs)
+
+    monkeypatch.setattr("src.data.snapshots.open", counting_open, raising=False)
+
+    first = build(writer, 1)
+    assert reader.current_version() == first
+    assert reader.current_version() == first
+    reads_before = len(reads)
+    second = build(writer, 2)
+
+    assert reader.current_version() == second
+    assert len(reads) > reads_before
+    # Unchanged pointer: answered from the stat check without re-reading
+    reads_before = len(reads)
+    for _ in range(5):
+        assert reader.current_version() == second
+    assert len(reads) == reads_before
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from src.data.database import CVRDatabase
+from src.monitoring.stages import get_recorder, instrument, recording, stage
+
+
+@instrument("test.squares", rows=len)
+def squares(n):
+    return [i * i for i in range(n)]
+
+
+class TestStages:
+    def test_off_by_default(self):
+        assert get_recorder() is None
+        assert squares(3) == [0, 1, 4]
+        with stage("unrecorded") as metrics:
+            pass
+        assert metrics.wall_seconds == 0.0
+
+    def test_records_time_rows_and_queries(self):
+        db = CVRDatabase(":memory:", read_only=False)
+        with recording() as recorder:
+            with stage("outer", rows=10) as outer:
+                db.query("SELECT * FROM range(5)")
+                db.execute("CREATE TABLE t AS SELECT 1 AS x")
+                squares(1000)
+                outer.extra["note"] = "ok"
+        db.close()
+
+        inner, outer = recorder.stages
+        assert (inner.name, inner.parent, inner.rows) == ("test.squares", "outer", 1000)
+        assert inner.queries == 0
+        assert outer.parent is None
+        assert outer.rows == 10
+        assert outer.queries == 2
+        assert outer.query_rows == 5
+        assert outer.wall_seconds >= inner.wall_seconds > 0
+        assert outer.cpu_seconds > 0
+        assert outer.peak_rss_mb > 0
+        assert get_recorder() is None
+
+    def test_errors_are_recorded_and_raised(self):
+        with recording() as recorder:
+            with pytest.raises(ValueError):
+                with stage("failing"):
+                    raise ValueError("boom")
+            squares(2)
+            squares(3)
+
+        failing, *_ = recorder.stages
+        assert failing.error == "ValueError: boom"
+        totals = {t["name"]: t for t in recorder.totals()}
+        assert totals["failing"]["errors"] == 1
+        assert totals["test.squares"]["calls"] == 2
+        assert totals["test.squares"]["rows"] == 5
+
+    def test_json_and_summary(self, tmp_path):
+        with recording() as recorder:
+            squares(100)
+        path = recorder.write(tmp_path / "stages.json")
+
+        data = json.loads(path.read_text())
+        assert data["stages"][0]["name"] == "test.squares"
+        assert data["stages"][0]["rows_per_second"] > 0
+        assert data["totals"][0]["calls"] == 1
+        assert "test.squares" in recorder.summary().splitlines()[1]
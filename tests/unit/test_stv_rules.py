@@ -0,0 +1,313 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from src.analysis.stv_rules import (
+    RULE_PRESETS,
+    STVRules,
+    backward_tie_break,
+    candidate_id_tie_break,
+    forward_tie_break,
+    get_rules,
+    hare_quota,
+    meek_shares,
+    warren_shares,
+    whole_ballot_transfer,
+)
+from src.analysis.stv_vectorized import (
+    FixedPointSTV,
+    KeepValueSTV,
+    VectorizedSTV,
+    VectorizedSTVTabulator,
+    compare_rules,
+    create_engine,
+)
+from src.data.ballot_patterns import NO_CANDIDATE, BallotPatterns
+from tests.unit.test_stv_vectorized import random_patterns
+
+
+def reference_keep_value(patterns, seats, take, tolerance=1e-6):
+    """Per-ballot Meek/Warren count with the same rules, for cross-checking."""
+    ballots = [
+        ([c for c in row if c != NO_CANDIDATE], n)
+        for row, n in zip(patterns.rankings.tolist(), patterns.counts.tolist())
+    ]
+    n_candidates = patterns.n_candidates
+    keep = [1.0] * n_candidates
+    status = ["continuing"] * n_candidates
+    winners, history = [], []
+
+    def distribute():
+        tallies = [0.0] * n_candidates
+        for ranking, count in ballots:
+            remaining = 1.0
+            for c in ranking:
+                amount = take(keep[c], remaining)
+                tallies[c] += count * amount
+                remaining -= amount
+        return tallies, sum(tallies) / (seats + 1)
+
+    def converge():
+        for _ in range(1000):
+            tallies, quota = distribute()
+            if all(abs(tallies[w] - quota) <= tolerance for w in winners):
+                break
+            for w in winners:
+                keep[w] = min(keep[w] * quota / tallies[w], 1.0)
+        return tallies, quota
+
+    def key(c, sign):
+        return tuple(sign * round(h[c], 9) for h in reversed(history)) + (-sign * c,)
+
+    while len(winners) < seats and "continuing" in status:
+        tallies, quota = converge()
+        history.append(tallies)
+        continuing = [c for c in range(n_candidates) if status[c] == "continuing"]
+        seats_left = seats - len(winners)
+        if len(continuing) <= seats_left:
+            winners.extend(sorted(continuing, key=lambda c: key(c, -1)))
+            break
+        reached = [c for c in continuing if tallies[c] >= quota - 1e-9]
+        if reached:
+            for c in sorted(reached, key=lambda c: key(c, -1))[:seats_left]:
+                status[c] = "elected"
+                winners.append(c)
+        else:
+            loser = min(continuing, key=lambda c: key(c, 1))
+            status[loser] = "eliminated"
+            keep[loser] = 0.0
+
+    return winners, history
+
+
+@pytest.mark.unit
+class TestRuleStrategies:
+    """Test the individual counting rule strategies."""
+
+    def test_rules_validation(self):
+        with pytest.raises(ValueError):
+            STVRules(quota="imperiali")
+        with pytest.raises(ValueError):
+            STVRules(transfer="random")
+        with pytest.raises(ValueError):
+            STVRules(tie_break="coin")
+        with pytest.raises(ValueError):
+            get_rules("borda")
+        with pytest.raises(ValueError):
+            STVRules(decimals=12)
+        with pytest.raises(ValueError):
+            STVRules(transfer="meek", decimals=6)
+
+        assert get_rules() == STVRules()
+        assert get_rules("meek").keep_value
+        assert not get_rules("whole").keep_value
+        assert set(RULE_PRESETS) == {"gregory", "whole", "meek", "warren", "irv"}
+
+    def test_quotas(self):
+        assert STVRules().quota_for(100, 3) == 26
+        assert STVRules(quota="droop_exact").quota_for(100, 3) == 25
+        assert hare_quota(100, 4) == 25
+
+    def test_whole_ballot_transfer_is_integral(self):
+        # 26 surplus ballots from 60: ideal shares 13, 8.67 and 4.33
+        values = np.array([30.0, 20.0, 10.0])
+        multipliers = whole_ballot_transfer(values, 60, 34)
+
+        np.testing.assert_allclose(values * multipliers, [13, 9, 4])
+        assert whole_ballot_transfer(values, 30, 34).tolist() == [0, 0, 0]
+
+    def test_keep_value_shares(self):
+        # Ranks down the rows, ballots across the columns
+        keep = np.array([[1.0, 0.5, 0.0], [0.4, 1.0, 0.25], [1.0, 1.0, 0.0]])
+        passed = np.vstack([np.ones(3), np.cumprod(1 - keep[:-1], axis=0)])
+
+        np.testing.assert_allclose(meek_shares(keep), keep * passed)
+        np.testing.assert_allclose(
+            warren_shares(keep), [[1.0, 0.5, 0.0], [0.0, 0.5, 0.25], [0.0, 0.0, 0.0]]
+        )
+
+    def test_tie_breaks(self):
+        # Tied now; B led in round 1, C led in round 2
+        history = [np.array([0, 5, 3]), np.array([0, 4, 6]), np.array([0, 7, 7])]
+        candidates = np.array([1, 2])
+
+        assert backward_tie_break(candidates, history, True) == [2, 1]
+        assert forward_tie_break(candidates, history, True) == [1, 2]
+        assert candidate_id_tie_break(candidates, history, True) == [1, 2]
+        assert backward_tie_break(candidates, history, False) == [1, 2]
+
+
+@pytest.mark.unit
+class TestRuleEngines:
+    """Test counting under each rule set over the shared ballot arrays."""
+
+    def test_create_engine(self):
+        patterns = random_patterns(0)
+        assert type(create_engine(patterns)) is VectorizedSTV
+        assert isinstance(create_engine(patterns, "warren"), KeepValueSTV)
+        with pytest.raises(ValueError):
+            VectorizedSTV(patterns, get_rules("meek"))
+        with pytest.raises(ValueError):
+            create_engine(patterns, "meek").sweep([1, 2])
+        assert isinstance(create_engine(patterns, STVRules(decimals=4)), FixedPointSTV)
+        with pytest.raises(ValueError):
+            VectorizedSTV(patterns, STVRules(decimals=4))
+
+    @pytest.mark.parametrize("seed", range(5))
+    @pytest.mark.parametrize("seats", [2, 3])
+    def test_meek_matches_reference(self, seed, seats):
+        patterns = random_patterns(seed, n_patterns=60)
+        engine = create_engine(patterns, "meek")
+        state = engine.run(engine.initial_state(seats))
+
+        expected_winners, expected_history = reference_keep_value(
+            patterns, seats, lambda keep, remaining: keep * remaining
+        )
+        assert state.winners == expected_winners
+        for actual, expected in zip(state.history, expected_history):
+            np.testing.assert_allclose(actual, expected, atol=1e-4)
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_warren_matches_reference(self, seed):
+        patterns = random_patterns(seed, n_patterns=60)
+        engine = create_engine(patterns, "warren")
+        state = engine.run(engine.initial_state(3))
+
+        expected_winners, _ = reference_keep_value(patterns, 3, min)
+        assert state.winners == expected_winners
+
+    @pytest.mark.parametrize("rules", ["meek", "warren"])
+    def test_keep_value_winners_hold_quota(self, rules):
+        patterns = random_patterns(4, n_candidates=8, n_patterns=300)
+        engine = create_engine(patterns, rules)
+        state = engine.initial_state(3)
+        while not engine.is_complete(state):
+            round_obj = engine.step(state)
+            assert round_obj.total_continuing_votes + round_obj.exhausted_votes == (
+                pytest.approx(patterns.total_ballots)
+            )
+            if len(state.winners) < 3:
+                for c in state.winners:
+                    cid = int(patterns.candidate_ids[c])
+                    assert round_obj.vote_totals[cid] == pytest.approx(
+                        state.quota, abs=1e-4
+                    )
+
+    def test_tolerance_bounds_winner_excess(self):
+        patterns = random_patterns(6, n_candidates=8, n_patterns=300)
+        for tolerance in (5.0, 1e-8):
+            rules = replace(get_rules("meek"), tolerance=tolerance)
+            engine = create_engine(patterns, rules)
+            state = engine.initial_state(3)
+            while not state.winners:
+                engine.step(state)
+            tallies = engine.converge(state)
+            excess = tallies[state.winners] - state.quota
+            assert np.all(np.abs(excess) <= tolerance)
+
+    def test_meek_winner_keeps_fraction(self):
+        # B is elected in round 1 and keeps only part of each ballot after that
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3, 4]),
+            rankings=np.array(
+                [[1, -1, -1], [0, 1, 2], [2, -1, -1], [3, -1, -1]], dtype=np.int16
+            ),
+            counts=np.array([40, 30, 14, 16]),
+        )
+        gregory = create_engine(patterns)
+        meek = create_engine(patterns, "meek")
+        gregory_state = gregory.run(gregory.initial_state(2))
+        meek_state = meek.run(meek.initial_state(2))
+
+        assert gregory_state.winners[0] == meek_state.winners[0] == 1
+        assert meek_state.keep[1] < 1.0
+
+    def test_irv_needs_majority_of_continuing_votes(self):
+        # 40 of 100 ballots exhaust once D and C are eliminated
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3, 4]),
+            rankings=np.array([[0], [1], [2], [3]], dtype=np.int16),
+            counts=np.array([35, 25, 22, 18]),
+        )
+        engine = create_engine(patterns, "irv")
+        state = engine.run(engine.initial_state(3))
+
+        assert state.seats == 1
+        assert state.winners == [0]
+        assert state.quota == 31  # majority of the 60 votes left in the final round
+        assert [int(c) for c in state.eliminated] == [3, 2]
+
+    def test_compare_rules(self):
+        patterns = random_patterns(2)
+        table = compare_rules(patterns, seats=2)
+
+        assert set(table["rules"]) == {"gregory", "whole", "meek", "warren", "irv"}
+        assert table.groupby("rules")["seat"].max().to_dict() == {
+            "gregory": 2,
+            "whole": 2,
+            "meek": 2,
+            "warren": 2,
+            "irv": 1,
+        }
+        custom = compare_rules(
+            patterns, seats=2, rules={"hare": STVRules(quota="hare")}
+        )
+        assert list(custom["rules"]) == ["hare", "hare"]
+
+    def test_tabulator_rules(self, make_ballot_db):
+        db = make_ballot_db(
+            {"Alice": 1, "Bob": 2, "Charlie": 3},
+            [(["Alice", "Bob"], 50), (["Bob", "Charlie"], 40), (["Charlie"], 10)],
+        )
+        tabulator = VectorizedSTVTabulator(db, seats=2, rules="meek")
+        tabulator.run_stv_tabulation()
+        assert tabulator.winners == [1, 2]
+
+        table = tabulator.run_rule_comparison({"irv": "irv", "whole": "whole"})
+        assert table.groupby("rules")["candidate_id"].apply(list).to_dict() == {
+            "irv": [1],
+            "whole": [1, 2],
+        }
+
+
+@pytest.mark.unit
+class TestFixedPoint:
+    """Test fixed-point vote arithmetic."""
+
+    def test_transfer_values_truncated(self):
+        # A's surplus of 24 from 70 votes moves at 0.3428, not 0.342857...
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3]),
+            rankings=np.array([[0, 1], [1, -1], [2, -1]], dtype=np.int16),
+            counts=np.array([70, 20, 45]),
+        )
+        engine = create_engine(patterns, STVRules(decimals=4))
+        state = engine.run(engine.initial_state(2))
+        first = state.rounds[0]
+
+        assert state.weight.dtype == np.int64
+        assert first.quota == 46
+        assert first.vote_totals[2] == pytest.approx(43.996, abs=1e-12)
+        assert first.exhausted_votes == 0.004
+        assert state.winners == [0, 2]
+
+    def test_quota_truncated(self):
+        engine = create_engine(random_patterns(0), STVRules(quota="hare", decimals=2))
+        assert engine.quota_for(100, 3) == 33.33
+        assert engine.quota_for(100, 4) == 25
+
+    @pytest.mark.parametrize("seed", range(4))
+    def test_matches_float_count(self, seed):
+        patterns = random_patterns(seed, n_candidates=8, n_patterns=300)
+        float_engine = create_engine(patterns)
+        fixed_engine = create_engine(patterns, STVRules(decimals=6))
+        float_state = float_engine.run(float_engine.initial_state(3))
+        fixed_state = fixed_engine.run(fixed_engine.initial_state(3))
+
+        assert fixed_state.winners == float_state.winners
+        for fixed_round, float_round in zip(fixed_state.rounds, float_state.rounds):
+            for cid, votes in fixed_round.vote_totals.items():
+                # Truncation loses under a millionth of a vote per transfer
+                assert votes == pytest.approx(float_round.vote_totals[cid], abs=1e-3)
+                assert round(votes * 10**6) == pytest.approx(votes * 10**6)
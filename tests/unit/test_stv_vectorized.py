@@ -0,0 +1,290 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.stv_rules import droop_quota
+from src.analysis.stv_vectorized import (
+    VectorizedSTV,
+    VectorizedSTVTabulator,
+    compare_seat_counts,
+    tabulate_partitions,
+)
+from src.data.ballot_patterns import NO_CANDIDATE, BallotPatterns
+
+
+def random_patterns(seed, n_candidates=6, n_patterns=150, max_rank=4, precincts=5):
+    """Random ballot patterns for cross-checking against the reference count."""
+    rng = np.random.default_rng(seed)
+    rankings = np.full((n_patterns, max_rank), NO_CANDIDATE, dtype=np.int16)
+    for i in range(n_patterns):
+        length = rng.integers(1, max_rank + 1)
+        rankings[i, :length] = rng.permutation(n_candidates)[:length]
+    return BallotPatterns(
+        candidate_ids=np.arange(1, n_candidates + 1, dtype=np.int64) * 10,
+        rankings=rankings,
+        counts=rng.integers(1, 40, n_patterns),
+        precinct_ids=rng.integers(1, precincts + 1, n_patterns),
+    )
+
+
+def reference_stv(patterns, seats):
+    """Straightforward per-ballot STV with the same rules, for cross-checking."""
+    ballots = [
+        {"ranking": [c for c in row if c != NO_CANDIDATE], "count": n, "weight": 1.0}
+        for row, n in zip(patterns.rankings.tolist(), patterns.counts.tolist())
+    ]
+    n_candidates = patterns.n_candidates
+    quota = droop_quota(sum(b["count"] for b in ballots), seats)
+    status = ["continuing"] * n_candidates
+    winners, history = [], []
+
+    def current(ballot):
+        for c in ballot["ranking"]:
+            if status[c] == "continuing":
+                return c
+        return None
+
+    def key(c, sign):
+        return tuple(sign * round(h[c], 9) for h in reversed(history)) + (-sign * c,)
+
+    while len(winners) < seats and "continuing" in status:
+        holders = [current(b) for b in ballots]
+        tallies = [0.0] * n_candidates
+        for b, c in zip(ballots, holders):
+            if c is not None:
+                tallies[c] += b["count"] * b["weight"]
+        history.append(tallies)
+
+        continuing = [c for c in range(n_candidates) if status[c] == "continuing"]
+        seats_left = seats - len(winners)
+        if len(continuing) <= seats_left:
+            for c in sorted(continuing, key=lambda c: key(c, -1)):
+                status[c] = "elected"
+                winners.append(c)
+            continue
+
+        reached = [c for c in continuing if tallies[c] >= quota - 1e-9]
+        if reached:
+            for c in sorted(reached, key=lambda c: key(c, -1))[:seats_left]:
+                status[c] = "elected"
+                winners.append(c)
+                value = (tallies[c] - quota) / tallies[c] if tallies[c] > quota else 0
+                for b, holder in zip(ballots, holders):
+                    if holder == c:
+                        b["weight"] *= value
+        else:
+            loser = min(continuing, key=lambda c: key(c, 1))
+            status[loser] = "eliminated"
+
+    return winners, history
+
+
+@pytest.mark.unit
+class TestVectorizedSTV:
+    """Test the array-based STV engine."""
+
+    @pytest.mark.parametrize("seed", range(8))
+    @pytest.mark.parametrize("seats", [1, 2, 3])
+    def test_matches_reference_count(self, seed, seats):
+        patterns = random_patterns(seed)
+        engine = VectorizedSTV(patterns)
+        state = engine.run(engine.initial_state(seats))
+
+        expected_winners, expected_history = reference_stv(patterns, seats)
+        assert state.winners == expected_winners
+        assert len(state.history) == len(expected_history)
+        for actual, expected in zip(state.history, expected_history):
+            np.testing.assert_allclose(actual, expected)
+
+    @pytest.mark.parametrize("seed", range(4))
+    def test_vote_conservation(self, seed):
+        patterns = random_patterns(seed)
+        engine = VectorizedSTV(patterns)
+        state = engine.run(engine.initial_state(3))
+
+        for round_obj in state.rounds:
+            assert round_obj.total_continuing_votes + round_obj.exhausted_votes == (
+                pytest.approx(patterns.total_ballots)
+            )
+            assert round_obj.exhausted_votes >= -1e-9
+
+    def test_surplus_transfer(self):
+        # A has 60 of 100 ballots; quota for 2 seats is 34, surplus 26/60
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3]),
+            rankings=np.array([[0, 1], [1, -1], [2, -1]], dtype=np.int16),
+            counts=np.array([60, 15, 25]),
+        )
+        engine = VectorizedSTV(patterns)
+        state = engine.initial_state(2)
+        first = engine.step(state)
+
+        assert first.quota == 34
+        assert first.winners_this_round == [1]
+        assert first.transfers == {1: {2: pytest.approx(26.0)}}
+        assert first.vote_totals[1] == 34
+        assert first.vote_totals[2] == pytest.approx(41.0)
+
+        engine.run(state)
+        assert [int(patterns.candidate_ids[c]) for c in state.winners] == [1, 2]
+
+    def test_tie_broken_by_earlier_round(self):
+        # B and C tie in round 2, but C had fewer votes in round 1
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3, 4]),
+            rankings=np.array([[0, -1], [1, -1], [2, -1], [3, 2]], dtype=np.int16),
+            counts=np.array([20, 12, 9, 3]),
+        )
+        engine = VectorizedSTV(patterns)
+        state = engine.initial_state(1)
+        engine.step(state)  # D eliminated, C reaches 12
+        second = engine.step(state)
+
+        assert second.eliminated_this_round == [3]
+
+    def test_fork_is_independent(self):
+        engine = VectorizedSTV(random_patterns(1))
+        state = engine.initial_state(2)
+        engine.step(state)
+        fork = state.copy()
+        engine.run(fork)
+
+        assert len(state.rounds) == 1
+        assert len(fork.rounds) > 1
+
+
+@pytest.mark.unit
+class TestSeatSweep:
+    """Test tabulating several seat counts with shared rounds."""
+
+    @pytest.mark.parametrize("seed", range(6))
+    def test_sweep_matches_independent_runs(self, seed):
+        patterns = random_patterns(seed, n_candidates=8, n_patterns=300)
+        engine = VectorizedSTV(patterns)
+        states = engine.sweep([1, 2, 3, 4, 5])
+
+        assert sorted(states) == [1, 2, 3, 4, 5]
+        for seats, state in states.items():
+            expected = engine.run(engine.initial_state(seats))
+            assert state.winners == expected.winners
+            assert state.quota == expected.quota
+            assert [r.quota for r in state.rounds] == [r.quota for r in expected.rounds]
+            assert [r.vote_totals for r in state.rounds] == [
+                r.vote_totals for r in expected.rounds
+            ]
+
+    def test_sweep_ignores_duplicates_and_invalid(self):
+        engine = VectorizedSTV(random_patterns(0))
+        assert sorted(engine.sweep([2, 2, 0, -1, 3])) == [2, 3]
+        assert engine.sweep([]) == {}
+
+    def test_compare_seat_counts(self):
+        patterns = random_patterns(4)
+        states = VectorizedSTV(patterns).sweep([1, 3])
+        table = compare_seat_counts(patterns, states)
+
+        assert len(table) == 2 * patterns.n_candidates
+        assert table.groupby("seats")["elected"].sum().to_dict() == {1: 1, 3: 3}
+        elected = table[table["elected"]]
+        assert elected["election_round"].notna().all()
+        assert set(elected.groupby("seats")["seat_order"].max()) == {1, 3}
+
+
+@pytest.mark.unit
+class TestVectorizedSTVTabulator:
+    """Test the STVTabulator-compatible front end."""
+
+    def test_interface(self, make_ballot_db):
+        db = make_ballot_db(
+            {"Alice": 1, "Bob": 2, "Charlie": 3},
+            [(["Alice", "Bob"], 50), (["Bob", "Charlie"], 40), (["Charlie"], 10)],
+        )
+        tabulator = VectorizedSTVTabulator(db, seats=2)
+        rounds = tabulator.run_stv_tabulation()
+
+        assert tabulator.winners == [1, 2]
+        assert rounds[0].quota == 34
+        summary = tabulator.get_round_summary()
+        assert set(summary.columns) >= {"round", "candidate_id", "votes", "status"}
+        final = tabulator.get_final_results()
+        assert set(final[final["status"] == "elected"]["candidate_id"]) == {1, 2}
+
+    def test_iter_rounds(self, make_ballot_db):
+        db = make_ballot_db(
+            {"Alice": 1, "Bob": 2, "Charlie": 3},
+            [(["Alice", "Bob"], 50), (["Bob", "Charlie"], 40), (["Charlie"], 10)],
+        )
+        expected = VectorizedSTVTabulator(db, seats=2)
+        expected.run_stv_tabulation()
+        tabulator = VectorizedSTVTabulator(db, seats=2)
+
+        winners_so_far = []
+        for _ in tabulator.iter_rounds():
+            winners_so_far.append(list(tabulator.winners))
+        assert tabulator.winners == expected.winners
+        assert [r.vote_totals for r in tabulator.rounds] == [
+            r.vote_totals for r in expected.rounds
+        ]
+        assert len(winners_so_far) == len(expected.rounds)
+        assert winners_so_far[-1] == expected.winners
+
+    def test_run_seat_sweep(self, make_ballot_db):
+        db = make_ballot_db(
+            {"Alice": 1, "Bob": 2, "Charlie": 3},
+            [(["Alice", "Bob"], 50), (["Bob", "Charlie"], 40), (["Charlie"], 10)],
+        )
+        table = VectorizedSTVTabulator(db).run_seat_sweep([1, 2])
+
+        winners = table[table["elected"]].sort_values(["seats", "seat_order"])
+        assert winners.groupby("seats")["candidate_id"].apply(list).to_dict() == {
+            1: [1],
+            2: [1, 2],
+        }
+
+
+@pytest.mark.unit
+class TestTabulatePartitions:
+    """Test batch tabulation of precincts."""
+
+    def test_requires_precincts(self):
+        patterns = random_patterns(0)
+        patterns.precinct_ids = None
+        with pytest.raises(ValueError):
+            tabulate_partitions(patterns)
+
+    def test_each_partition_matches_single_count(self):
+        patterns = random_patterns(3)
+        results = tabulate_partitions(patterns, seats=2, max_workers=1)
+
+        assert list(results["summary"]["partition_id"]) == [1, 2, 3, 4, 5]
+        for precinct in range(1, 6):
+            subset = patterns.subset(patterns.precinct_ids == precinct)
+            engine = VectorizedSTV(subset)
+            state = engine.run(engine.initial_state(2))
+            winners = results["winners"]
+            winners = winners[winners["partition_id"] == precinct]
+            assert list(winners["candidate_id"]) == [
+                int(subset.candidate_ids[c]) for c in state.winners
+            ]
+
+    def test_parallel_matches_serial(self):
+        patterns = random_patterns(5, precincts=12)
+        serial = tabulate_partitions(patterns, seats=3, max_workers=1)
+        parallel = tabulate_partitions(patterns, seats=3, max_workers=3)
+
+        for key in ("summary", "winners", "rounds"):
+            pd.testing.assert_frame_equal(serial[key], parallel[key])
+
+    def test_grouped_partitions(self):
+        patterns = random_patterns(2)
+        results = tabulate_partitions(
+            patterns,
+            seats=1,
+            partitions={1: 100, 2: 100, 3: 200, 4: 200, 5: 200},
+            include_rounds=False,
+        )
+
+        summary = results["summary"].set_index("partition_id")
+        assert list(summary.index) == [100, 200]
+        assert summary["total_ballots"].sum() == patterns.total_ballots
+        assert results["rounds"].empty
@@ -0,0 +1,130 @@
+import duckdb
+import numpy as np
+import pytest
+
+from src.data.cvr_parser import CVRParser
+from src.data.synthetic import (
+    SyntheticCVRGenerator,
+    SyntheticElectionConfig,
+    generate_cvr,
+)
+
+
+def make_config(**overrides):
+    values = dict(n_ballots=2_000, n_candidates=6, max_rank=4, seed=7)
+    values.update(overrides)
+    return SyntheticElectionConfig(**values)
+
+
+class TestSyntheticCVRGenerator:
+    def test_deterministic_and_independent_of_block_size(self):
+        first = SyntheticCVRGenerator(make_config())
+        second = SyntheticCVRGenerator(make_config())
+
+        a = list(first.iter_blocks(block_size=500))
+        b = list(second.iter_blocks(block_size=500))
+        assert len(a) == 4
+        assert all(x.equals(y) for x, y in zip(a, b))
+
+        other_seed = next(SyntheticCVRGenerator(make_config(seed=8)).iter_blocks(500))
+        assert not a[0].equals(other_seed)
+
+    def test_ballot_irregularities(self):
+        config = make_config(
+            n_ballots=20_000, skip_rate=0.1, overvote_rate=0.1, continue_rate=0.5
+        )
+        (block,) = SyntheticCVRGenerator(config).iter_blocks(block_size=20_000)
+        marks = block.iloc[:, 4:].to_numpy().reshape(-1, 6, 4)
+        per_rank = marks.sum(axis=1)  # (ballots, ranks)
+
+        assert block["BallotID"].is_unique
+        assert block["PrecinctID"].between(1, config.n_precincts).all()
+        overvote_share = (per_rank > 1).any(axis=1).mean()
+        assert 0.05 < overvote_share < 0.15
+        ranked = per_rank > 0
+        # A blank rank followed by a marked one is a skipped rank
+        skipped = (~ranked[:, :-1] & ranked[:, 1:]).any(axis=1).mean()
+        assert 0.02 < skipped < 0.15
+        # Truncation: fewer ballots rank a fourth than a first choice
+        assert ranked[:, 3].mean() < 0.5 * ranked[:, 0].mean()
+        # Each candidate is marked at most once per rank
+        assert marks.max() == 1
+
+    def test_blocs_correlate_preferences(self):
+        config = make_config(
+            n_ballots=20_000, n_blocs=1, bloc_cohesion=20.0, overvote_rate=0.0
+        )
+        generator = SyntheticCVRGenerator(config)
+        weights = generator.bloc_weights[0]
+        slate = np.argsort(-weights)[:2]
+        (block,) = generator.iter_blocks(block_size=20_000)
+        marks = block.iloc[:, 4:].to_numpy().reshape(-1, 6, 4)
+
+        # Plackett-Luce: first choices follow the bloc's candidate weights
+        first_choice = marks[:, :, 0].argmax(axis=1)
+        share = np.isin(first_choice, slate).mean()
+        assert share > 0.7
+        assert share == pytest.approx(weights[slate].sum(), abs=0.02)
+
+    def test_csv_loads_through_parser(self, tmp_path):
+        path = tmp_path / "cvr.csv"
+        summary = generate_cvr(str(path), make_config(), overvote_rate=0.0)
+
+        parser = CVRParser(":memory:", read_only=False)
+        assert parser.load_cvr_file(str(path))["total_ballots"] == 2_000
+        candidates = parser.extract_candidate_metadata()
+        stats = parser.normalize_vote_data()
+
+        assert summary["format"] == "csv"
+        assert candidates["candidate_id"].tolist() == list(range(36, 42))
+        assert (candidates["rank_columns"] == 4).all()
+        assert candidates["candidate_name"].iloc[0] == "Candidate 01"
+        assert stats["ballots_with_votes"] == 2_000
+        assert stats["max_rank"] == 4
+        parser.db.close()
+
+    def test_parquet_output(self, tmp_path):
+        path = tmp_path / "cvr.parquet"
+        summary = generate_cvr(str(path), make_config(n_ballots=1_200))
+
+        count = duckdb.sql(f"SELECT COUNT(*) FROM read_parquet('{path}')").fetchone()
+        assert summary["format"] == "parquet"
+        assert count == (1_200,)
+
+    def test_parquet_loads_through_parser(self, tmp_path):
+        tables = []
+        for name in ("cvr.csv", "cvr.parquet"):
+            path = str(tmp_path / name)
+            generate_cvr(path, make_config(n_ballots=500))
+            parser = CVRParser(":memory:", read_only=False)
+            assert parser.load_cvr_file(path)["total_ballots"] == 500
+            parser.extract_candidate_metadata()
+            parser.normalize_vote_data()
+            tables.append(
+                parser.db.query(
+                    "SELECT BallotID, candidate_id, rank_position FROM ballots_long "
+                    "ORDER BY ALL"
+                )
+            )
+            parser.db.close()
+
+        csv_marks, parquet_marks = tables
+        assert len(parquet_marks) > 500
+        assert parquet_marks.equals(csv_marks)
+
+    def test_overrides_leave_config_unchanged(self, tmp_path):
+        config = make_config()
+        summary = generate_cvr(str(tmp_path / "cvr.csv"), config, n_ballots=300)
+
+        assert summary["config"]["n_ballots"] == 300
+        assert config == make_config()
+
+    def test_invalid_config(self, tmp_path):
+        with pytest.raises(ValueError):
+            SyntheticCVRGenerator(make_config(max_rank=7))
+        with pytest.raises(ValueError):
+            SyntheticCVRGenerator(make_config(skip_rate=1.5))
+        with pytest.raises(ValueError):
+            SyntheticCVRGenerator(make_config()).write(str(tmp_path / "x"), fmt="xlsx")
+        with pytest.raises(TypeError):
+            generate_cvr(str(tmp_path / "cvr.csv"), make_config(), ballots=10)
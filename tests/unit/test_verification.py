@@ -5,6 +5,8 @@ from pathlib import Path
 import pandas as pd
 import pytest
 
+from src.analysis.cross_verification import CrossVerificationReport, Discrepancy
+from src.analysis.margin import Manipulation, MarginResult
 from src.analysis.verification import (
     OfficialResultsParser,
     ResultsVerifier,
@@ -384,3 +386,82 @@ Jane Smith,12345,7.48%,0,0%,0,0%
             assert "Extra winners" in report
         finally:
             os.unlink(temp_file)
+
+    def test_report_with_margin(self):
+        """Test margin-of-victory section in the report."""
+        temp_file = self.create_temp_csv(self.sample_csv_content)
+        try:
+            verifier = ResultsVerifier(temp_file)
+            margin = MarginResult(
+                seats=3,
+                winners=[1, 2, 3],
+                total_ballots=99391,
+                lower_bound=1200,
+                upper_bound=1450,
+                manipulation=Manipulation(1450, 3, 4, [1, 2, 4]),
+                branches=12,
+                nodes_expanded=40,
+                complete=True,
+                elapsed_seconds=0.5,
+            )
+
+            results = verifier.verify_results(
+                [1, 2, 3], self.our_candidates, self.our_first_choice, margin=margin
+            )
+            report = verifier.generate_verification_report(results)
+
+            assert results["margin"] is margin
+            assert "MARGIN OF VICTORY" in report
+            assert "at least 1200, at most 1450" in report
+            assert "1450 ballots ranking candidate 3 first" in report
+        finally:
+            os.unlink(temp_file)
+
+    def test_report_with_cross_verification(self):
+        """Test that engine disagreement fails verification and is reported."""
+        temp_file = self.create_temp_csv(self.sample_csv_content)
+        try:
+            verifier = ResultsVerifier(temp_file)
+            cross = CrossVerificationReport(
+                engines=["sql", "pyrankvote"],
+                tolerance=1e-6,
+                runs=[],
+                discrepancies=[
+                    Discrepancy(
+                        "d2",
+                        3,
+                        "sql",
+                        "pyrankvote",
+                        "winners",
+                        None,
+                        None,
+                        [1, 2, 3],
+                        [1, 2, 4],
+                    )
+                ],
+                wall_seconds=1.0,
+                cases=[
+                    {
+                        "election_id": "d2",
+                        "seats": 3,
+                        "winners": {"sql": [1, 2, 3], "pyrankvote": [1, 2, 4]},
+                        "discrepancies": 1,
+                    }
+                ],
+            )
+
+            results = verifier.verify_results(
+                [1, 2, 3],
+                self.our_candidates,
+                self.our_first_choice,
+                cross_verification=cross,
+            )
+            report = verifier.generate_verification_report(results)
+
+            assert results["cross_verification"] is cross
+            assert not results["verification_passed"]
+            assert "CROSS-VERIFICATION (sql vs pyrankvote)" in report
+            assert "❌ Engines disagree on winners" in report
+            assert "d2 (3 seats): sql=[1, 2, 3]; pyrankvote=[1, 2, 4]" in report
+        finally:
+            os.unlink(temp_file)
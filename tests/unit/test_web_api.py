@@ -1,15 +1,23 @@
+import asyncio
+import json
+import threading
+from collections import OrderedDict
 from unittest.mock import Mock, patch
 
 import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
 
+from src.analysis.margin import compute_margin
 from src.web.main import (
+    MAX_TIME_BUDGET,
+    WEB_MAX_WORKERS,
     app,
     get_database,
     get_precomputed_pairs,
     has_precomputed_data,
     set_database_path,
+    set_snapshot_root,
 )
 
 
@@ -47,6 +55,34 @@ class TestWebMainConfiguration:
             mock_cvr_database.assert_called_once_with("/env/path/db.db", read_only=True)
             assert result == mock_db
 
+    def test_get_database_follows_snapshot_pointer(self, tmp_path, monkeypatch):
+        """get_database opens whichever snapshot is current at request time."""
+        import duckdb
+        from fastapi import HTTPException
+
+        from src.data.snapshots import DATABASE_NAME, SnapshotStore
+
+        monkeypatch.setattr("src.web.main.snapshot_store", None)
+        monkeypatch.setattr("src.web.main.served_snapshot", None)
+        monkeypatch.setattr("src.web.main.what_if_analyzers", OrderedDict())
+        with patch.dict("os.environ"):
+            set_snapshot_root(str(tmp_path))
+            with pytest.raises(HTTPException) as error:
+                get_database()
+            assert error.value.status_code == 503
+
+            writer = SnapshotStore(tmp_path)
+            for value in (1, 2):
+                with writer.build() as directory:
+                    conn = duckdb.connect(str(directory / DATABASE_NAME))
+                    conn.execute(f"CREATE TABLE t AS SELECT {value} AS value")
+                    conn.close()
+
+                db = get_database()
+                assert db.db_path == str(writer.current_database())
+                assert db.query("SELECT value FROM t")["value"].iloc[0] == value
+                db.close()
+
     def test_get_database_no_path_configured(self):
         """Test get_database raises exception when no path configured."""
         with (
@@ -349,3 +385,410 @@ class TestWebApplicationIntegration:
 
             assert db1 != db2  # Different mock instances
             assert mock_cvr.call_count == 2
+
+
+class TestAnalysisEndpoints:
+    """Test analysis endpoints against a small on-disk election."""
+
+    @pytest.fixture
+    def client(self, make_ballot_db, tmp_path):
+        db = make_ballot_db(
+            {"A": 1, "B": 2, "C": 3, "D": 4},
+            [
+                (["A", "B", "C"], 30),
+                (["B", "C", "A"], 10),
+                (["D"], 40),
+                (["D", "A"], 20),
+            ],
+            db_path=str(tmp_path / "election.db"),
+        )
+        with patch("src.web.main.get_database", return_value=db):
+            yield TestClient(app)
+
+    def test_metrics(self, client):
+        client.get("/api/pairwise-matrix")
+        client.get("/api/ballot/no-such-ballot")
+        client.get("/no/such/page")
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        lines = response.text.splitlines()
+        assert "# TYPE rva_http_request_duration_seconds histogram" in lines
+        assert "rva_http_requests_in_flight 1.0" in lines  # the scrape itself
+        for route, status in [
+            ("/api/pairwise-matrix", "200"),
+            ("/api/ballot/{ballot_id}", "404"),
+            ("unmatched", "404"),
+        ]:
+            assert any(
+                line.startswith(
+                    f'rva_http_requests_total{{method="GET",route="{route}",'
+                    f'status="{status}"}}'
+                )
+                for line in lines
+            )
+        assert any(
+            line.startswith(
+                'rva_http_response_size_bytes_count{method="GET",'
+                'route="/api/pairwise-matrix"}'
+            )
+            for line in lines
+        )
+        assert "# TYPE rva_cache_requests_total counter" in lines
+        assert "# TYPE rva_stv_runs_total counter" in lines
+
+    def test_debug_queries(self, client):
+        # conftest builds databases from the top-level ``data`` package, which
+        # reports to the top-level ``monitoring`` profiler
+        from monitoring.queries import get_query_profiler
+
+        profiler = get_query_profiler()
+        profiler.reset()
+        with (
+            patch("src.web.main.get_query_profiler", return_value=profiler),
+            patch.object(profiler, "enabled", True),
+            patch.object(profiler, "slow_ms", 0.0),
+        ):
+            client.get("/api/pairwise-matrix")
+            client.get("/api/pairwise-matrix")
+            data = client.get("/api/debug/queries?reset=true").json()
+            after_reset = client.get("/api/debug/queries").json()
+
+        assert data["enabled"]
+        assert data["total_queries"] >= 2
+        repeated = [s for s in data["signatures"] if s["count"] >= 2]
+        assert repeated and all(s["p95_ms"] >= s["p50_ms"] for s in repeated)
+        assert "ballot_patterns:load_ballot_patterns" in repeated[0]["callers"]
+        assert data["slow_queries"][0]["explain_analyze"]
+        assert after_reset["total_queries"] == 0
+
+    def test_candidate_slates_live(self, client):
+        response = client.get("/api/coalition/slates?min_support=0.2")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["source"] == "live"
+        assert data["count"] == 1
+        slate = data["slates"][0]
+        assert slate["candidate_ids"] == [1, 2, 3]
+        assert slate["candidate_names"] == ["A", "B", "C"]
+        assert slate["support"] == 40
+
+    def test_candidate_slates_invalid_sizes(self, client):
+        response = client.get("/api/coalition/slates?min_size=4&max_size=3")
+        assert response.status_code == 400
+
+    def test_precinct_endpoints_live(self, client):
+        summary = client.get("/api/precincts").json()
+        assert summary["count"] == 1
+        assert summary["precincts"][0]["total_ballots"] == 100
+
+        detail = client.get("/api/precincts/1").json()
+        first = {
+            c["candidate_name"]: c["first_choice_votes"] for c in detail["candidates"]
+        }
+        assert first == {"D": 60, "A": 30, "B": 10, "C": 0}
+
+        pairs = client.get("/api/precincts/1/pairs?limit=1").json()
+        assert pairs["pairs"][0]["shared_ballots"] == 40
+
+        support = client.get("/api/precincts/candidate/1").json()
+        assert support["precincts"][0]["ballots_ranking_candidate"] == 60
+
+    def test_precinct_cube_built_once_per_request(self, client):
+        from src.analysis.precinct import PrecinctAnalyzer
+
+        build_tables = PrecinctAnalyzer.build_tables
+        with patch.object(
+            PrecinctAnalyzer, "build_tables", autospec=True, side_effect=build_tables
+        ) as built:
+            for path in (
+                "/api/precincts/1",
+                "/api/precincts/1/pairs",
+                "/api/precincts/candidate/1",
+            ):
+                assert client.get(path).status_code == 200
+                assert built.call_count == 1
+                built.reset_mock()
+
+    def test_precinct_not_found(self, client):
+        assert client.get("/api/precincts/999").status_code == 404
+        assert client.get("/api/precincts/candidate/999").status_code == 404
+
+    def test_precinct_stv_results(self, client):
+        response = client.get("/api/stv/precincts?seats=2&include_rounds=true")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["precincts"]) == 1
+        precinct = data["precincts"][0]
+        assert precinct["quota"] == 34
+        assert [w["candidate_name"] for w in precinct["winners"]] == ["D", "A"]
+        assert data["round_summary"][0]["precinct_id"] == 1
+
+    def test_precinct_stv_busy(self, client):
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()
+        with (
+            patch("src.web.main.parallel_slots", slots),
+            patch("src.web.main.PARALLEL_SLOT_WAIT", 0.01),
+        ):
+            response = client.get("/api/stv/precincts")
+        assert response.status_code == 503
+
+    def test_seat_sweep(self, client):
+        response = client.get("/api/stv/seat-sweep?seats=1,2,3")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["winners_by_seats"] == {"1": [4], "2": [4, 1], "3": [4, 1, 2]}
+        assert len(data["comparison"]) == 3 * 4
+
+    def test_seat_sweep_invalid(self, client):
+        assert client.get("/api/stv/seat-sweep?seats=a,b").status_code == 400
+        assert client.get("/api/stv/seat-sweep?seats=0").status_code == 400
+
+    def test_what_if_removed_candidate(self, client):
+        response = client.get("/api/stv/what-if?seats=1&remove_candidates=4")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["baseline_winners"] == [4]
+        # D-only ballots drop out; D-A ballots go to A, who reaches quota
+        assert data["winners"] == [1]
+        assert data["winners_changed"] is True
+        assert data["excluded_ballots"] == 40
+        assert data["quota"] == 31
+        assert data["total_ballots"] == 60
+        assert data["rounds"][0]["winners"] == [1]
+
+    def test_what_if_no_change(self, client):
+        data = client.get("/api/stv/what-if?seats=2").json()
+
+        assert data["winners"] == data["baseline_winners"] == [4, 1]
+        assert data["rounds_reused"] == data["baseline_rounds"]
+
+    def test_what_if_cache_is_bounded(self, client, monkeypatch):
+        analyzers = OrderedDict()
+        monkeypatch.setattr("src.web.main.what_if_analyzers", analyzers)
+        monkeypatch.setattr("src.web.main.MAX_WHAT_IF_ANALYZERS", 2)
+        for seats in (1, 2, 1, 3):
+            assert client.get(f"/api/stv/what-if?seats={seats}").status_code == 200
+
+        # seats=2 was least recently used when seats=3 came in
+        assert [key[1] for key in analyzers] == [1, 3]
+
+    def test_what_if_concurrent_misses(self, client, monkeypatch):
+        from concurrent.futures import ThreadPoolExecutor
+
+        import src.web.main as web
+
+        analyzers = OrderedDict()
+        monkeypatch.setattr("src.web.main.what_if_analyzers", analyzers)
+        monkeypatch.setattr("src.web.main.MAX_WHAT_IF_ANALYZERS", 2)
+        # Like the app, give each request its own connection
+        path = web.get_database().db_path
+        monkeypatch.setattr(
+            "src.web.main.get_database",
+            lambda: web.CVRDatabase(path, read_only=True),
+        )
+
+        # Handlers run in the threadpool; simultaneous cold requests must
+        # leave the cache consistent
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            responses = list(
+                pool.map(
+                    lambda seats: client.get(f"/api/stv/what-if?seats={seats}"),
+                    [1, 2, 3] * 4,
+                )
+            )
+
+        assert [r.status_code for r in responses] == [200] * 12
+        assert {r.json()["seats"]: r.json()["winners"] for r in responses} == {
+            1: [4],
+            2: [4, 1],
+            3: [4, 1, 2],
+        }
+        assert len(analyzers) == 2
+        # Cold counts must not block the event loop
+        assert not asyncio.iscoroutinefunction(web.get_what_if_results)
+
+    def test_what_if_invalid(self, client):
+        assert client.get("/api/stv/what-if?remove_candidates=x").status_code == 400
+        assert client.get("/api/stv/what-if?remove_candidates=99").status_code == 400
+        assert client.get("/api/stv/what-if?seats=0").status_code == 400
+
+    def test_stv_results_with_rules(self, client):
+        response = client.get("/api/stv-results?seats=2&rules=meek&tolerance=0.001")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["rules"] == "meek"
+        assert data["winners"] == [4, 1]
+        assert data["round_summary"]
+
+    def test_stv_results_invalid_rules(self, client):
+        assert client.get("/api/stv-results?rules=borda").status_code == 400
+        assert client.get("/api/stv-results?rules=meek&tolerance=0").status_code == 400
+
+    def test_stv_results_with_bulk_defeat(self, client):
+        single = client.get("/api/stv-results?seats=2&rules=gregory").json()
+        response = client.get("/api/stv-results?seats=2&bulk_defeat=true")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["winners"] == single["winners"]
+        assert data["total_rounds"] <= single["total_rounds"]
+        assert isinstance(data["bulk_defeats"], list)
+        assert isinstance(data["bulk_defeat_may_differ"], bool)
+
+    def test_stv_results_fixed_point(self, client):
+        response = client.get("/api/stv-results?seats=2&decimals=4")
+
+        assert response.status_code == 200
+        assert response.json()["winners"] == [4, 1]
+        assert client.get("/api/stv-results?decimals=20").status_code == 400
+
+    def test_margin_of_victory(self, client):
+        response = client.get("/api/stv/margin?seats=1&max_workers=1")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["winners"] == [4]
+        assert data["lower_bound"] <= data["upper_bound"]
+        assert data["manipulation"]["from_candidate"] == 4
+        assert data["candidate_names"]["4"] == "D"
+        assert client.get("/api/stv/margin?seats=0").status_code == 400
+        assert client.get("/api/stv/margin?time_budget=0").status_code == 400
+
+    def test_margin_limits(self, client):
+        with patch("src.web.main.compute_margin", side_effect=compute_margin) as run:
+            response = client.get(
+                "/api/stv/margin?seats=1&time_budget=1e9&max_workers=999"
+            )
+
+        assert response.status_code == 200
+        assert "heuristic" in response.json()
+        kwargs = run.call_args.kwargs
+        assert kwargs["time_budget"] == MAX_TIME_BUDGET
+        assert kwargs["max_workers"] == WEB_MAX_WORKERS
+
+    def test_pairwise_matrix(self, client):
+        response = client.get("/api/pairwise-matrix")
+
+        assert response.status_code == 200
+        data = response.json()
+        ids = [c["candidate_id"] for c in data["candidates"]]
+        assert ids == [1, 2, 3, 4]
+        matrix = data["matrix"]
+        assert matrix[3][0] == 60 and matrix[0][3] == 40  # D over A
+        assert matrix[0][1] == 50 and matrix[1][0] == 10  # A over B
+        assert data["condorcet_winner"] == 4
+        assert data["smith_set"] == [4]
+        assert len(data["pairs"]) == 6
+
+    def test_stv_flow_stream(self, client):
+        response = client.get("/api/stv-flow-stream?seats=2")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            (
+                block.split("\n")[0][len("event: ") :],
+                json.loads(block.split("\n")[1][6:]),
+            )
+            for block in response.text.strip().split("\n\n")
+        ]
+        names = [name for name, _ in events]
+        assert names[0] == "start" and names[-1] == "complete"
+        assert set(names[1:-1]) == {"round"}
+        assert events[0][1]["candidates"]["4"]["candidate_name"] == "D"
+
+        flow = client.get("/api/stv-flow-data?seats=2").json()
+        rounds = [data["round"] for name, data in events if name == "round"]
+        patterns = [
+            p
+            for name, data in events
+            if name == "round"
+            for p in data["transfer_patterns"]
+        ]
+        assert rounds == flow["rounds"]
+        assert patterns == flow["transfer_patterns"]
+        assert events[-1][1]["flow_metadata"] == flow["flow_metadata"]
+
+    def test_stv_flow_stream_invalid(self, client):
+        assert client.get("/api/stv-flow-stream?seats=0").status_code == 400
+
+
+class TestElectionRouting:
+    """Test serving several elections from one catalog."""
+
+    @pytest.fixture
+    def client(self, make_ballot_db, tmp_path):
+        from src.data.catalog import ElectionCatalog
+
+        candidates = {"A": 1, "B": 2, "C": 3}
+        catalog = ElectionCatalog()
+        for election_id, patterns in {
+            "north": [(["A", "B"], 30), (["B", "C"], 20)],
+            "south": [(["C", "A"], 25), (["B"], 5)],
+        }.items():
+            db_path = str(tmp_path / f"{election_id}.duckdb")
+            make_ballot_db(candidates, patterns, db_path=db_path)
+            catalog.register(election_id, db_path)
+
+        with patch("src.web.main.election_catalog", catalog):
+            yield TestClient(app)
+        catalog.close()
+
+    def test_routes_by_election(self, client):
+        north = client.get("/elections/north/api/pairwise-matrix").json()
+        south = client.get("/elections/south/api/pairwise-matrix").json()
+
+        assert north["condorcet_winner"] == 1
+        assert south["condorcet_winner"] == 3
+        assert north["total_ballots"] == 50
+        assert south["total_ballots"] == 30
+
+    def test_unknown_election(self, client):
+        response = client.get("/elections/east/api/pairwise-matrix")
+        assert response.status_code == 404
+
+    def test_lists_elections_with_cache_usage(self, client):
+        client.get("/elections/north/api/stv/what-if?seats=1")
+        client.get("/elections/north/api/stv/what-if?seats=1&remove_candidates=2")
+
+        data = client.get("/api/elections").json()
+        assert [e["election_id"] for e in data["elections"]] == ["north", "south"]
+        cached = {e["election_id"]: e["cached_bytes"] for e in data["elections"]}
+        assert cached["north"] > 0 and cached["south"] == 0
+        assert data["hits"] >= 2
+
+    def test_live_precinct_cube_cached_per_election(self, client):
+        import src.web.main as web
+        from src.analysis.precinct import PrecinctAnalyzer
+
+        build_tables = PrecinctAnalyzer.build_tables
+        with patch.object(
+            PrecinctAnalyzer, "build_tables", autospec=True, side_effect=build_tables
+        ) as built:
+            north = client.get("/elections/north/api/precincts").json()
+            client.get("/elections/north/api/precincts/1")
+            client.get("/elections/south/api/precincts")
+
+        assert north["precincts"][0]["total_ballots"] == 50
+        assert built.call_count == 2
+        tables, size = web.election_catalog._cache[("north", "precinct_tables")]
+        assert size >= tables["precinct_rank_cube"].memory_usage(deep=True).sum()
+
+    def test_what_if_analyzer_charged_for_baseline(self, client):
+        import src.web.main as web
+
+        client.get("/elections/north/api/stv/what-if?seats=1")
+
+        analyzer, size = web.election_catalog._cache[("north", ("what_if", 1))]
+        checkpoints = analyzer.baseline.checkpoints
+        assert checkpoints
+        assert size == analyzer.nbytes
+        assert size > sum(c.pointer.nbytes + c.weight.nbytes for c in checkpoints)
@@ -0,0 +1,163 @@
+import numpy as np
+import pytest
+
+from src.analysis.stv_vectorized import WITHDRAWN, VectorizedSTV
+from src.analysis.what_if import CounterfactualAnalyzer
+from src.data.ballot_patterns import BallotPatterns
+from tests.unit.test_stv_vectorized import random_patterns
+
+
+def fresh_count(patterns, seats, removed=(), excluded_precincts=()):
+    """Count the counterfactual from round 1 for comparison."""
+    withdrawn = [patterns.candidate_index(c) for c in removed]
+    counts = patterns.counts.copy()
+    counts[np.isin(patterns.precinct_ids, list(excluded_precincts))] = 0
+    remaining = (patterns.rankings >= 0) & ~np.isin(patterns.rankings, withdrawn)
+    counts[~remaining.any(axis=1)] = 0
+    patterns = BallotPatterns(
+        candidate_ids=patterns.candidate_ids,
+        rankings=patterns.rankings,
+        counts=counts,
+        precinct_ids=patterns.precinct_ids,
+    )
+    engine = VectorizedSTV(patterns)
+    return engine.run(engine.initial_state(seats, withdrawn=withdrawn))
+
+
+def assert_same_count(result, expected):
+    assert result.state.winners == expected.winners
+    assert result.quota == expected.quota
+    assert len(result.rounds) == len(expected.rounds)
+    for actual, wanted in zip(result.rounds, expected.rounds):
+        assert actual.winners_this_round == wanted.winners_this_round
+        assert actual.eliminated_this_round == wanted.eliminated_this_round
+        assert actual.vote_totals == pytest.approx(wanted.vote_totals)
+        assert actual.exhausted_votes == pytest.approx(wanted.exhausted_votes)
+
+
+@pytest.mark.unit
+class TestCheckpoints:
+    """Test per-round checkpoints recorded by the engine."""
+
+    def test_checkpoint_per_round(self):
+        engine = VectorizedSTV(random_patterns(0))
+        state = engine.run(engine.initial_state(3), checkpoint=True)
+
+        assert len(state.checkpoints) == len(state.rounds)
+        for k, checkpoint in enumerate(state.checkpoints):
+            assert checkpoint.round_number == k
+            resumed = engine.run(checkpoint.copy())
+            assert resumed.winners == state.winners
+
+    def test_withdrawn_candidate_skipped(self):
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3]),
+            rankings=np.array([[0, 1], [1, -1], [2, -1]], dtype=np.int16),
+            counts=np.array([10, 5, 8]),
+        )
+        engine = VectorizedSTV(patterns)
+        state = engine.initial_state(1, withdrawn=[0])
+
+        assert state.status[0] == WITHDRAWN
+        np.testing.assert_allclose(engine.tally(state), [0, 15, 8])
+        engine.run(state)
+        assert state.winners == [1]
+        assert state.rounds[0].vote_totals[1] == 0
+
+
+@pytest.mark.unit
+class TestCounterfactualAnalyzer:
+    """Test what-if counts resumed from baseline checkpoints."""
+
+    def test_nbytes_covers_baseline(self):
+        patterns = random_patterns(0)
+        shared = CounterfactualAnalyzer(patterns=patterns, seats=3)
+        assert shared.nbytes == 0  # nothing counted yet
+
+        baseline = shared.baseline
+        arrays = sum(
+            c.pointer.nbytes + c.weight.nbytes for c in baseline.checkpoints
+        ) + sum(tallies.nbytes for tallies in baseline.history)
+        assert baseline.nbytes >= arrays
+        assert shared.nbytes > baseline.nbytes
+
+    def test_nbytes_charges_loaded_patterns(self, make_ballot_db):
+        db = make_ballot_db({"A": 1, "B": 2, "C": 3}, [(["A", "B"], 30), (["C"], 20)])
+        loaded = CounterfactualAnalyzer(db, seats=1)
+        loaded.baseline
+        shared = CounterfactualAnalyzer(patterns=loaded.patterns, seats=1)
+        shared.baseline
+
+        assert loaded.nbytes == shared.nbytes + loaded.patterns.nbytes
+
+    def test_requires_data_source(self):
+        with pytest.raises(ValueError):
+            CounterfactualAnalyzer()
+
+    def test_unknown_candidate(self):
+        analyzer = CounterfactualAnalyzer(patterns=random_patterns(0))
+        with pytest.raises(ValueError):
+            analyzer.run_what_if(remove_candidates=[999])
+
+    def test_no_change_reuses_every_round(self):
+        analyzer = CounterfactualAnalyzer(patterns=random_patterns(1), seats=2)
+        result = analyzer.run_what_if()
+
+        assert result.rounds_reused == result.baseline_rounds
+        assert result.winners == result.baseline_winners
+        assert not result.winners_changed
+        assert_same_count(result, analyzer.baseline)
+
+    @pytest.mark.parametrize("seed", range(8))
+    @pytest.mark.parametrize("seats", [1, 3])
+    def test_removal_matches_fresh_count(self, seed, seats):
+        patterns = random_patterns(seed, n_candidates=8, n_patterns=300)
+        analyzer = CounterfactualAnalyzer(patterns=patterns, seats=seats)
+        baseline = analyzer.baseline
+
+        # Withdraw the first candidate eliminated, and separately a winner
+        for removed in (baseline.eliminated[0], baseline.winners[0]):
+            candidate_id = int(patterns.candidate_ids[removed])
+            result = analyzer.run_what_if(remove_candidates=[candidate_id])
+            assert_same_count(result, fresh_count(patterns, seats, [candidate_id]))
+            assert candidate_id not in result.winners
+
+    @pytest.mark.parametrize("seed", range(6))
+    def test_precinct_exclusion_matches_fresh_count(self, seed):
+        patterns = random_patterns(seed, n_candidates=8, n_patterns=300)
+        analyzer = CounterfactualAnalyzer(patterns=patterns, seats=2)
+        result = analyzer.run_what_if(exclude_precincts=[2])
+
+        expected = fresh_count(patterns, 2, excluded_precincts=[2])
+        assert_same_count(result, expected)
+        excluded = patterns.counts[patterns.precinct_ids == 2].sum()
+        assert result.excluded_ballots == excluded
+
+    def test_late_withdrawal_reuses_early_rounds(self):
+        # D, C and B are eliminated in turn; C's ballots only move in round 2
+        patterns = BallotPatterns(
+            candidate_ids=np.array([1, 2, 3, 4]),
+            rankings=np.array([[0, -1], [1, 0], [2, 1], [3, 0]], dtype=np.int16),
+            counts=np.array([40, 35, 10, 5]),
+            precinct_ids=np.array([1, 1, 1, 1]),
+        )
+        analyzer = CounterfactualAnalyzer(patterns=patterns, seats=1)
+        assert analyzer.baseline.eliminated == [3, 2, 1]
+
+        # Without B, A reaches quota in round 1 instead of D being eliminated
+        result = analyzer.run_what_if(remove_candidates=[2])
+        assert result.rounds_reused == 0
+        assert result.winners == [1]
+
+        # Without C, D is still eliminated first, so round 1 is reused
+        result = analyzer.run_what_if(remove_candidates=[3])
+        assert result.rounds_reused == 1
+        assert result.resumed_from_round == 2
+        assert_same_count(result, fresh_count(patterns, 1, [3]))
+
+    def test_precinct_filter_requires_precincts(self):
+        patterns = random_patterns(0)
+        patterns.precinct_ids = None
+        analyzer = CounterfactualAnalyzer(patterns=patterns)
+        with pytest.raises(ValueError):
+            analyzer.run_what_if(exclude_precincts=[1])